@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+批量抓取端到端基准测试
+在本地桩站点上生成多篇笔记，分别以串行（并发 1）和并发模式批量抓取，
+校验每篇输出的评论数与 manifest，并对比总耗时
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from batch_crawl import run_batch
+from stub_server import start_stub_server
+
+
+def verify(output_dir: Path, expected: int, n_posts: int) -> bool:
+    """校验 manifest 与每篇帖子的输出文件"""
+    manifest = json.loads((output_dir / "manifest.json").read_text(encoding="utf-8"))
+    ok = manifest["succeeded"] == n_posts
+    for entry in manifest["posts"]:
+        if entry["status"] != "ok":
+            print(f"  ❌ 抓取失败: {entry['url']} {entry.get('error', '')}")
+            ok = False
+            continue
+        data = json.loads((output_dir / entry["file"]).read_text(encoding="utf-8"))
+        if data["total_comments"] != expected:
+            print(f"  ❌ 评论数不符: {entry['file']} {data['total_comments']} != {expected}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量抓取端到端基准测试")
+    parser.add_argument("--posts", type=int, default=20, help="笔记数量")
+    parser.add_argument("--comments", type=int, default=50, help="每篇笔记的一级评论数")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发页面数")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stub_server(args.comments)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url_file = Path(tmp) / "urls.txt"
+        url_file.write_text("\n".join(f"{base_url}/explore/note{i}" for i in range(args.posts)), encoding="utf-8")
+
+        all_ok = True
+        for concurrency in (1, args.concurrency):
+            output_dir = Path(tmp) / f"out-{concurrency}"
+            start = time.perf_counter()
+            run_batch(str(url_file), str(output_dir), concurrency=concurrency, rate=0,
+                      headless=True, user_data_dir=str(Path(tmp) / "profile"))
+            results[concurrency] = time.perf_counter() - start
+            all_ok = verify(output_dir, args.comments, args.posts) and all_ok
+
+    server.shutdown()
+
+    print(f"\n{'并发数':<8}{'总耗时(s)':>12}{'帖/秒':>10}")
+    for concurrency, seconds in results.items():
+        print(f"{concurrency:<8}{seconds:>12.1f}{args.posts / seconds:>10.2f}")
+    print("✅ 输出校验通过" if all_ok else "❌ 输出校验失败")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
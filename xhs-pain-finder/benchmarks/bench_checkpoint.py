@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+抓取检查点正确性测试
+不启动浏览器，直接驱动 CrawlSession：
+- 增量抓取：先写出一份 JSONL 抓取结果，再以它为上次结果做增量抓取（输出到同一文件），检查合并后的文件包含
+  上次的全部评论和本次的新评论、结束记录的总数与文件内容一致；增量抓取中途中断（未收尾）时上次结果保持不变
+- 断点恢复：检查点记录了第 N 页的 cursor 时，用模拟评论接口的页面驱动 CommentCapture，检查翻页从该 cursor
+  继续而不是从第 2 页重来，且检查点中最后记录的 cursor 不会退回首屏
+不一致时以非零状态退出
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from checkpoint import CrawlSession, checkpoint_path, load_previous
+from comment_io import RECORD_TYPE, iter_comments, iter_records
+from network_capture import CommentCapture, with_cursor
+
+URL = "https://www.xiaohongshu.com/explore/checkpoint"
+API_URL = "https://edith.xiaohongshu.com/api/sns/web/v2/comment/page?note_id=checkpoint&cursor="
+
+
+def make_comments(start: int, n: int) -> list:
+    return [{"id": f"c{i}", "nickname": f"用户{i}", "content": f"第 {i} 条评论", "likes": i, "time": "刚刚",
+             "is_author_reply": False, "sub_comments": []} for i in range(start, start + n)]
+
+
+def check_incremental_jsonl(tmp: Path, previous_n: int, new_n: int) -> list:
+    """增量抓取到 JSONL：上次结果 + 新评论都应写入文件（crawl_post 会先调用 result_comments）"""
+    output = tmp / "comments.jsonl"
+    session = CrawlSession(URL, checkpoint_path(output))
+    session.add(make_comments(0, previous_n))
+    session.result_comments()
+    session.finalize_jsonl(output)
+
+    errors = []
+    # 中途中断：只写了检查点、未收尾，上次结果应原样保留
+    before = output.read_bytes()
+    session = CrawlSession(URL, checkpoint_path(output), previous=load_previous(str(output)))
+    session.add(make_comments(previous_n, new_n))
+    session.close()
+    print(f"增量 JSONL 中断: 上次结果{'未变' if output.read_bytes() == before else '已被改写'}")
+    if output.read_bytes() != before:
+        errors.append("增量抓取中断后上次结果被改写")
+
+    session = CrawlSession(URL, checkpoint_path(output), resume=False, previous=load_previous(str(output)))
+    session.add(make_comments(previous_n, new_n))
+    merged = session.result_comments()
+    session.finalize_jsonl(output)
+
+    ids = [c["id"] for c in iter_comments(str(output))]
+    footers = [r for r in iter_records(str(output)) if r.get(RECORD_TYPE) == "footer"]
+    expected = {c["id"] for c in make_comments(0, previous_n + new_n)}
+    print(f"增量 JSONL: 上次 {previous_n} 条 + 新增 {new_n} 条，结果列表 {len(merged)} 条，文件 {len(ids)} 条，"
+          f"结束记录 {footers[-1]['total_comments'] if footers else '无'}")
+    if set(ids) != expected or len(ids) != len(expected):
+        errors.append(f"合并后的文件缺少评论: {len(ids)} 条（应为 {len(expected)} 条）")
+    if len(footers) != 1 or footers[0]["total_comments"] != len(ids):
+        errors.append("结束记录的评论总数与文件内容不一致")
+    if len(merged) != len(expected):
+        errors.append(f"result_comments 返回 {len(merged)} 条（应为 {len(expected)} 条）")
+    if checkpoint_path(output).exists():
+        errors.append("收尾后检查点未替换为输出文件")
+    return errors
+
+
+class FakeResponse:
+    def __init__(self, url: str, payload: dict):
+        self.url = url
+        self._body = json.dumps(payload).encode("utf-8")
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+class FakeExpect:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeCommentPage:
+    """模拟评论接口的页面：第 k 页返回 cursor CURSOR_PAGE_k，重放请求按 URL 中的 cursor 返回下一页"""
+
+    def __init__(self, pages: int, per_page: int):
+        self.pages = pages
+        self.per_page = per_page
+        self.listeners = []
+        self.requested = []  # 重放请求携带的 cursor
+
+    def on(self, event: str, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, event: str, callback):
+        self.listeners.remove(callback)
+
+    def expect_response(self, predicate, timeout: int = None):
+        return FakeExpect()
+
+    def respond(self, page: int):
+        items = [{"id": f"c{i}", "content": f"第 {i} 条评论", "user_info": {"nickname": f"用户{i}"},
+                  "like_count": "1", "create_time": 1700000000000}
+                 for i in range((page - 1) * self.per_page, page * self.per_page)]
+        payload = {"code": 0, "success": True,
+                   "data": {"comments": items, "cursor": f"CURSOR_PAGE_{page}", "has_more": page < self.pages}}
+        response = FakeResponse(with_cursor(API_URL, f"CURSOR_PAGE_{page - 1}" if page > 1 else ""), payload)
+        for callback in self.listeners:
+            callback(response)
+
+    async def evaluate(self, script: str, arg: str = None):
+        if arg is None:
+            return None
+        cursor = dict(p.split("=", 1) for p in arg.split("?", 1)[1].split("&"))["cursor"]
+        self.requested.append(cursor)
+        self.respond(int(cursor.rsplit("_", 1)[1]) + 1)
+        return 200
+
+
+def check_cursor_resume(tmp: Path, pages: int, interrupted_at: int, per_page: int = 3) -> list:
+    """断点恢复：从检查点记录的第 interrupted_at 页 cursor 继续翻页"""
+    output = checkpoint_path(tmp / "resume.jsonl")
+    session = CrawlSession(URL, output)
+    page = FakeCommentPage(pages, per_page)
+    for k in range(1, interrupted_at + 1):
+        items = [{"id": f"c{i}", "nickname": f"用户{i}", "content": f"第 {i} 条评论", "likes": 1, "time": ""}
+                 for i in range((k - 1) * per_page, k * per_page)]
+        session.add(items)
+        session.save_cursor(with_cursor(API_URL, f"CURSOR_PAGE_{k - 1}"), f"CURSOR_PAGE_{k}")
+    session.close()
+
+    session = CrawlSession(URL, output, resume=True)
+    capture = CommentCapture(page, session)
+    capture.attach()
+    page.respond(1)  # 首屏请求
+    asyncio.run(capture.collect(max_pages=pages + 1))
+    capture.detach()
+    session.close()
+
+    errors = []
+    cursors = [r["cursor"] for r in iter_records(str(output)) if r.get(RECORD_TYPE) == "cursor"]
+    print(f"断点恢复: 检查点停在第 {interrupted_at} 页，恢复后首个翻页 cursor {page.requested[0] if page.requested else '无'}，"
+          f"共 {len(session.comments)} 条评论")
+    if not page.requested or page.requested[0] != f"CURSOR_PAGE_{interrupted_at}":
+        errors.append(f"恢复后未从检查点的 cursor 继续: {page.requested[:1]}（应为 CURSOR_PAGE_{interrupted_at}）")
+    if "CURSOR_PAGE_1" in cursors[interrupted_at:]:
+        errors.append("恢复后检查点记录了首屏的 cursor，再次中断会退回第 2 页")
+    if len(session.comments) != pages * per_page:
+        errors.append(f"恢复后评论数 {len(session.comments)}（应为 {pages * per_page}）")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取检查点正确性测试")
+    parser.add_argument("--previous", type=int, default=3, help="上次抓取的评论数")
+    parser.add_argument("--new", type=int, default=1, help="本次新增的评论数")
+    parser.add_argument("--pages", type=int, default=8, help="断点恢复测试的评论接口页数")
+    parser.add_argument("--interrupted-at", type=int, default=5, help="断点恢复测试中检查点停在第几页")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        errors = check_incremental_jsonl(Path(tmp), args.previous, args.new)
+        errors += check_cursor_resume(Path(tmp), args.pages, args.interrupted_at)
+
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        return 1
+    print("✅ 检查点测试通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
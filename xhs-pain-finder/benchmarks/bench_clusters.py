@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+痛点聚类基准测试
+按若干预设痛点主题合成负面评论的分词结果（每条评论取本主题的词、夹杂公共词和随机噪声词），
+计时 pain_clusters 的向量化、聚类和摘要，并以纯度（每个簇中占多数的主题所占比例）衡量聚类是否还原了主题；
+超出时间预算或纯度不足时以非零状态退出
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from pain_clusters import fit_clusters, summarize_clusters
+
+# 预设痛点主题
+TOPICS = [
+    ["物流", "太慢", "快递", "发货", "等了", "半个月"],
+    ["客服", "不理", "态度", "回复", "敷衍", "售后"],
+    ["价格", "太贵", "不值", "性价比", "降价", "差价"],
+    ["质量", "做工", "开线", "掉色", "起球", "粗糙"],
+    ["尺寸", "偏小", "偏大", "尺码", "不合身", "换货"],
+    ["续航", "电池", "充电", "耗电", "发热", "待机"],
+]
+COMMON = ["后悔", "失望", "垃圾", "难用", "东西", "退货"]
+NOISE = [f"噪声{i}" for i in range(2000)]
+
+
+def synthetic_documents(n_docs: int, seed: int = 42) -> tuple:
+    """返回 ([(序号, 点赞数, 内容, 分词), ...], 每条的主题号)"""
+    rng = random.Random(seed)
+    documents, topics = [], []
+    for i in range(n_docs):
+        topic = rng.randrange(len(TOPICS))
+        words = rng.choices(TOPICS[topic], k=rng.randint(2, 5))
+        words += rng.choices(COMMON, k=rng.randint(0, 3))
+        words += rng.choices(NOISE, k=rng.randint(0, 2))
+        rng.shuffle(words)
+        documents.append((i, int(rng.paretovariate(1.2)) - 1, "".join(words), words))
+        topics.append(topic)
+    return documents, topics
+
+
+def purity(labels, topics: list) -> float:
+    """每个簇中占多数的主题所占比例（加权平均）"""
+    clusters = {}
+    for label, topic in zip(labels, topics):
+        if label >= 0:
+            clusters.setdefault(label, Counter())[topic] += 1
+    members = sum(sum(c.values()) for c in clusters.values())
+    return sum(c.most_common(1)[0][1] for c in clusters.values()) / members if members else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="痛点聚类基准测试")
+    parser.add_argument("--docs", type=int, default=100000, help="负面评论条数")
+    parser.add_argument("--clusters", type=int, default=len(TOPICS), help="簇数")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="聚类时间预算（秒）")
+    parser.add_argument("--min-purity", type=float, default=0.9, help="要求的最低纯度")
+    args = parser.parse_args()
+
+    documents, topics = synthetic_documents(args.docs)
+    start = time.perf_counter()
+    fit = fit_clusters(documents, args.clusters)
+    result = summarize_clusters(documents, fit)
+    seconds = time.perf_counter() - start
+    score = purity(fit["labels"], topics)
+    covered = {Counter(t for label, t in zip(fit["labels"], topics) if label == c).most_common(1)[0][0]
+               for c in set(fit["labels"]) - {-1}}
+
+    print(f"负面评论 {args.docs} 条，{args.clusters} 簇，{result['steps']} 步，用时 {seconds:.2f}s "
+          f"（{args.docs / seconds:.0f} 条/秒）")
+    print(f"{'痛点':<6}{'评论数':>8}  标签 / 关键词")
+    for cluster in result["clusters"]:
+        print(f"{cluster['id']:<6}{cluster['size']:>8}  {cluster['label']} / "
+              f"{'、'.join(t for t, _ in cluster['terms'][:6])}")
+    print(f"主题还原纯度 {score:.1%}，覆盖主题 {len(covered)}/{len(TOPICS)}")
+
+    ok = True
+    if seconds > args.max_seconds:
+        print(f"❌ 聚类耗时超过 {args.max_seconds}s")
+        ok = False
+    # 簇数少于主题数时必然合并主题，只检查耗时
+    if args.clusters >= len(TOPICS) and (score < args.min_purity or len(covered) < len(TOPICS)):
+        print("❌ 聚类没有还原预设主题")
+        ok = False
+    if ok:
+        print("✅ 聚类耗时达标" + ("，还原了预设主题" if args.clusters >= len(TOPICS) else ""))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
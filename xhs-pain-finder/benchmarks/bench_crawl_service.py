@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+常驻抓取服务基准测试
+在带封面图、视频、字体和头像的本地桩站点上，对比每次冷启动 extract_comments 与向常驻服务提交任务的
+单帖耗时，并校验评论数、服务端实际发出的媒体字节数和服务报告的节省字节数
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_server import start_stub_server
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+
+def chromium_installed() -> bool:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        return Path(p.chromium.executable_path).exists()
+
+
+def run_cold(urls: list, tmp: Path) -> list:
+    """每篇帖子单独运行 extract_comments（启动浏览器、networkidle、加载全部资源），返回各帖耗时"""
+    from extract_comments import extract_comments
+
+    seconds = []
+    for i, url in enumerate(urls):
+        start = time.perf_counter()
+        extract_comments(url, str(tmp / f"cold{i}.json"), headless=True, user_data_dir=str(tmp / "profile"))
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def run_warm(urls: list, tmp: Path) -> tuple:
+    """启动常驻服务并逐个提交任务（等待完成），返回 (任务记录列表, 服务启动耗时)"""
+    import crawl_service
+
+    os.environ["XHS_CRAWL_SERVICE"] = str(tmp / "service.json")
+    command = [sys.executable, str(SCRIPTS_DIR / "crawl_service.py"), "start", "--foreground", "--headless",
+               "--queue-dir", str(tmp / "queue"), "--user-data-dir", str(tmp / "profile"), "--idle-timeout", "0"]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not crawl_service.wait_ready():
+            raise RuntimeError("常驻抓取服务启动超时")
+        startup = time.perf_counter() - start
+        jobs = []
+        for i, url in enumerate(urls):
+            jobs += crawl_service.submit([url], [tmp / f"warm{i}.json"], {}, wait=True)
+        crawl_service.request(crawl_service.read_state(), "POST", "/shutdown")
+        process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return jobs, startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻抓取服务基准测试")
+    parser.add_argument("--posts", type=int, default=5, help="笔记数量")
+    parser.add_argument("--comments", type=int, default=100, help="每篇笔记的一级评论数")
+    parser.add_argument("--max-ratio", type=float, default=0.5, help="服务单帖耗时中位数 / 冷启动耗时中位数的上限")
+    args = parser.parse_args()
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
+        return 1
+    if not chromium_installed():
+        print("⚠️ 未安装 Chromium（playwright install chromium），跳过常驻抓取服务测试")
+        return 0
+
+    server, base_url, state = start_stub_server(args.comments, media=True)
+    urls = [f"{base_url}/explore/svc{i}" for i in range(args.posts)]
+    errors = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cold = run_cold(urls, tmp)
+        cold_bytes = dict(state.bytes_sent)
+
+        state.reset_counters()
+        jobs, startup = run_warm(urls, tmp)
+        warm_bytes = dict(state.bytes_sent)
+
+        for i, job in enumerate(jobs):
+            if job["status"] != "ok":
+                errors.append(f"任务失败: {job['url']} {job.get('error', '')}")
+                continue
+            data = json.loads((tmp / f"warm{i}.json").read_text(encoding="utf-8"))
+            if data["total_comments"] != args.comments:
+                errors.append(f"评论数不符: {job['url']} {data['total_comments']} != {args.comments}")
+    server.shutdown()
+
+    warm = [job["seconds"] for job in jobs if job["status"] == "ok"]
+    blocked_kinds = ("avatar", "media", "font")
+    cold_media = sum(cold_bytes[k] for k in blocked_kinds) / args.posts
+    warm_media = sum(warm_bytes[k] for k in blocked_kinds) / args.posts
+    saved = statistics.mean(job.get("bytes_saved", 0) for job in jobs) if jobs else 0
+
+    print(f"\n{'方式':<10}{'耗时中位数(s)':>14}{'最长(s)':>10}{'媒体下载/帖(KB)':>18}")
+    print(f"{'冷启动':<10}{statistics.median(cold):>14.2f}{max(cold):>10.2f}{cold_media / 1024:>18.0f}")
+    if warm:
+        print(f"{'常驻服务':<10}{statistics.median(warm):>14.2f}{max(warm):>10.2f}{warm_media / 1024:>18.0f}")
+        print(f"服务启动 {startup:.1f}s（只发生一次），单帖耗时为冷启动的 "
+              f"{statistics.median(warm) / statistics.median(cold):.0%}，报告节省约 {saved / 1024:.0f} KB/帖")
+
+    if warm and statistics.median(warm) > args.max_ratio * statistics.median(cold):
+        errors.append(f"常驻服务单帖耗时未达标（上限为冷启动的 {args.max_ratio:.0%}）")
+    if warm_media:
+        errors.append(f"拦截后仍下载了媒体资源: {warm_media / 1024:.0f} KB/帖")
+    if cold_media and not 0.5 * cold_media <= saved <= 1.5 * cold_media:
+        errors.append(f"报告的节省字节数与实际媒体字节数偏差过大: {saved / 1024:.0f} KB vs {cold_media / 1024:.0f} KB")
+
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        return 1
+    print("✅ 常驻抓取服务测试通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
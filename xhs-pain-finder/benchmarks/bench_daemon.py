@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+常驻分析服务基准测试
+对同一份小评论文件反复调用 analyze_keywords.py 命令行：冷启动（--no-daemon，每次加载 jieba / SnowNLP / openpyxl）
+与热启动（交给常驻服务）分别计时，报告中位数延迟，并校验两种方式的分析摘要一致；
+热启动加速比不足时以非零状态退出
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fixtures import write_synthetic_jsonl
+
+
+def run_cli(args: list, env: dict) -> tuple:
+    """运行一次命令行，返回 (耗时, 分析摘要行)"""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, str(SCRIPTS_DIR / "analyze_keywords.py")] + args,
+                            capture_output=True, text=True, check=True, env=env).stdout
+    seconds = time.perf_counter() - start
+    return seconds, [line for line in output.splitlines() if line.startswith("   - ")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻分析服务基准测试")
+    parser.add_argument("--comments", type=int, default=200, help="每个文件的评论条数")
+    parser.add_argument("--runs", type=int, default=5, help="每种方式的调用次数")
+    parser.add_argument("--min-speedup", type=float, default=2.0, help="要求的热启动最低加速比")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / "comments.jsonl"
+        write_synthetic_jsonl(path, args.comments)
+        # 独立的状态文件，不影响正在使用的服务
+        env = dict(os.environ, XHS_ANALYSIS_DAEMON=str(tmp / "daemon.json"))
+        daemon = [sys.executable, str(SCRIPTS_DIR / "analysis_daemon.py")]
+
+        cold = [run_cli([str(path), "-o", str(tmp / f"cold-{i}.xlsx"), "--no-daemon"], env)
+                for i in range(args.runs)]
+
+        start = time.perf_counter()
+        subprocess.run(daemon + ["start", "--idle-timeout", "300"], check=True, env=env,
+                       capture_output=True)
+        startup = time.perf_counter() - start
+        try:
+            warm = [run_cli([str(path), "-o", str(tmp / f"warm-{i}.xlsx")], env) for i in range(args.runs)]
+            status = subprocess.run(daemon + ["status"], capture_output=True, text=True, env=env).stdout
+        finally:
+            subprocess.run(daemon + ["stop"], env=env, capture_output=True)
+
+    cold_median = statistics.median(s for s, _ in cold)
+    warm_median = statistics.median(s for s, _ in warm)
+    speedup = cold_median / warm_median
+    print(f"评论 {args.comments} 条，每种方式 {args.runs} 次")
+    print(f"{'方式':<12}{'中位数(s)':>10}{'最快(s)':>10}{'最慢(s)':>10}")
+    for name, runs in (("冷启动", cold), ("常驻服务", warm)):
+        times = [s for s, _ in runs]
+        print(f"{name:<12}{statistics.median(times):>10.2f}{min(times):>10.2f}{max(times):>10.2f}")
+    print(f"服务启动（含模型加载）{startup:.2f}s，热启动加速比 {speedup:.1f}x")
+    print(status.strip())
+
+    ok = True
+    if any(summary != cold[0][1] for _, summary in cold + warm):
+        print("❌ 常驻服务与本进程分析的结果不一致")
+        ok = False
+    if "已完成 0 个任务" in status or not status.startswith("服务运行中"):
+        print("❌ 任务没有交给常驻服务执行")
+        ok = False
+    if speedup < args.min_speedup:
+        print(f"❌ 加速比低于 {args.min_speedup}x")
+        ok = False
+    if ok:
+        print("✅ 结果一致，热启动达标")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
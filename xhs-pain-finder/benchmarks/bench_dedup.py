@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+重复评论检测基准测试
+合成评论（随机拼接的中文短句），按比例混入 完全重复（加标点 / 表情 / @提及）、近似重复（末尾追加一两个字）
+和灌水评论（“蹲”“求链接”等），计时 dedup 的归一化、MinHash 签名、LSH 分桶和分组，
+以召回率（混入的重复与原评论分到同一组的比例）和误合并率（互不重复的原评论被合并的比例）衡量准确性；
+超出时间预算、召回不足或误合并过多时以非零状态退出
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from dedup import find_duplicates, is_spam, normalize
+
+PHRASES = [
+    "质量太差了", "客服不理人", "物流好慢", "等了半个月", "颜值很高", "很喜欢", "价格有点贵", "性价比一般",
+    "尺寸偏小", "建议买大一码", "说明书看不懂", "用了一周", "感觉还不错", "退货很麻烦", "有没有平替",
+    "做工粗糙", "味道很大", "续航不行", "充电很慢", "包装破损", "颜色和图片不一样", "已经回购三次",
+    "推荐给朋友了", "售后态度好", "发货速度快", "第二次买了", "不值这个价", "容易起球", "洗了掉色",
+]
+SUFFIXES = ["哈哈", "真的", "啊", "呢", "了", "吧", "！！", "呀呀"]
+DECORATIONS = [lambda t: t + "！！！", lambda t: "@小王 " + t, lambda t: t + "[哭惹R]", lambda t: " " + t + "~"]
+SPAM = ["蹲", "求链接", "蹲蹲", "求链接求链接", "码住[赞R]", "同问", "+1", "@小李"]
+
+
+def synthetic_comments(n: int, seed: int = 42) -> tuple:
+    """
+    Returns:
+        (评论内容列表, 每条对应的原评论下标（原评论为自身，灌水为 -1）)
+    """
+    rng = random.Random(seed)
+    texts, origin = [], []
+    for i in range(n):
+        roll = rng.random()
+        if texts and roll < 0.05:
+            j = origin[rng.randrange(len(texts))]
+            if j >= 0:
+                texts.append(rng.choice(DECORATIONS)(texts[j]))
+                origin.append(j)
+                continue
+        elif texts and roll < 0.15:
+            j = origin[rng.randrange(len(texts))]
+            if j >= 0:
+                texts.append(texts[j] + rng.choice(SUFFIXES))
+                origin.append(j)
+                continue
+        elif roll < 0.18:
+            texts.append(rng.choice(SPAM))
+            origin.append(-1)
+            continue
+        # 原评论：4–7 个短句加随机数字，基本不会互相重复
+        parts = rng.sample(PHRASES, rng.randint(4, 7))
+        texts.append("，".join(parts) + f"，第{rng.randrange(10 ** 6)}次")
+        origin.append(len(texts) - 1)
+    return texts, origin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重复评论检测基准测试")
+    parser.add_argument("--comments", type=int, default=1000000, help="评论条数")
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="检测时间预算（秒）")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="要求的最低召回率")
+    parser.add_argument("--max-false-merge", type=float, default=0.001, help="允许的最高误合并率")
+    args = parser.parse_args()
+
+    texts, origin = synthetic_comments(args.comments)
+
+    start = time.perf_counter()
+    normalized = [normalize(t) for t in texts]
+    spam = [is_spam(t) for t in normalized]
+    normalize_seconds = time.perf_counter() - start
+    labels = find_duplicates(normalized).tolist()
+    seconds = time.perf_counter() - start
+
+    planted = [(i, j) for i, j in enumerate(origin) if j >= 0 and j != i]
+    found = sum(labels[i] == labels[j] for i, j in planted)
+    recall = found / len(planted) if planted else 1.0
+    # 原评论所在组中有其他原评论即为误合并
+    originals = [i for i, j in enumerate(origin) if j == i]
+    group_originals = {}
+    for i in originals:
+        group_originals[labels[i]] = group_originals.get(labels[i], 0) + 1
+    false_merge = sum(1 for i in originals if group_originals[labels[i]] > 1) / len(originals)
+    spam_found = sum(s for s, j in zip(spam, origin) if j < 0) / max(origin.count(-1), 1)
+    spam_false = sum(s for s, j in zip(spam, origin) if j >= 0)
+
+    print(f"评论 {args.comments} 条（重复 {len(planted)} 条，灌水 {origin.count(-1)} 条），"
+          f"用时 {seconds:.1f}s（归一化 {normalize_seconds:.1f}s），{args.comments / seconds:.0f} 条/秒")
+    print(f"重复召回率 {recall:.2%}，误合并率 {false_merge:.3%}，灌水识别率 {spam_found:.2%}，"
+          f"误判灌水 {spam_false} 条，共 {len(set(labels))} 组")
+
+    ok = True
+    if seconds > args.max_seconds:
+        print(f"❌ 检测耗时超过 {args.max_seconds}s")
+        ok = False
+    if recall < args.min_recall or false_merge > args.max_false_merge or spam_found < 1 or spam_false:
+        print("❌ 重复或灌水检测不准确")
+        ok = False
+    if ok:
+        print("✅ 重复检测耗时与准确性达标")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
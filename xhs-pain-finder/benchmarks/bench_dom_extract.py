@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+DOM 提取基准测试
+对比逐元素提取（extract_single_comment）与页面内批量提取（extract_comments_batch）
+的 IPC 往返次数和耗时，并校验两者输出一致
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dom_extract import COMMENT_SELECTORS, extract_comments_batch
+from extract_comments import extract_single_comment
+from fixtures import write_note_page
+
+
+class CountingHandle:
+    """包装 ElementHandle，统计每次 IPC 调用"""
+
+    def __init__(self, handle, counter: dict):
+        self._handle = handle
+        self._counter = counter
+
+    def _tick(self):
+        self._counter["round_trips"] += 1
+
+    async def query_selector(self, selector):
+        self._tick()
+        found = await self._handle.query_selector(selector)
+        return CountingHandle(found, self._counter) if found else None
+
+    async def query_selector_all(self, selector):
+        self._tick()
+        return [CountingHandle(h, self._counter) for h in await self._handle.query_selector_all(selector)]
+
+    async def inner_text(self):
+        self._tick()
+        return await self._handle.inner_text()
+
+
+async def run_legacy(page) -> tuple:
+    """逐元素提取，返回 (评论列表, 往返次数)"""
+    counter = {"round_trips": 0}
+    root = CountingHandle(page, counter)
+    comment_elems = []
+    for selector in COMMENT_SELECTORS:
+        comment_elems = await root.query_selector_all(selector)
+        if comment_elems:
+            break
+
+    comments = []
+    for idx, elem in enumerate(comment_elems):
+        comment = await extract_single_comment(elem, idx + 1)
+        if comment and comment.get("content"):
+            comments.append(comment)
+    return comments, counter["round_trips"]
+
+
+async def run_batch(page, chunk_size: int) -> tuple:
+    """批量提取，返回 (评论列表, 往返次数)"""
+    stats = {}
+    comments = await extract_comments_batch(page, chunk_size=chunk_size, stats=stats)
+    return comments, stats["round_trips"]
+
+
+async def measure(fixture: Path, chunk_size: int) -> tuple:
+    """在同一页面上依次运行两种提取方式"""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.goto(fixture.as_uri())
+
+        start = time.perf_counter()
+        legacy, legacy_trips = await run_legacy(page)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch, batch_trips = await run_batch(page, chunk_size)
+        batch_time = time.perf_counter() - start
+
+        await browser.close()
+
+    return legacy, legacy_trips, legacy_time, batch, batch_trips, batch_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DOM 提取基准测试")
+    parser.add_argument("--comments", type=int, default=2000, help="夹具页面评论数")
+    parser.add_argument("--chunk-size", type=int, default=500, help="批量提取分块大小")
+    args = parser.parse_args()
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = write_note_page(Path(tmp) / "note.html", args.comments)
+        legacy, legacy_trips, legacy_time, batch, batch_trips, batch_time = asyncio.run(
+            measure(fixture, args.chunk_size)
+        )
+
+    print(f"夹具页面: {args.comments} 条一级评论, 提取到 {len(legacy)} 个评论节点")
+    print(f"{'模式':<8}{'往返次数':>10}{'耗时(s)':>10}")
+    print(f"{'逐元素':<8}{legacy_trips:>10}{legacy_time:>10.2f}")
+    print(f"{'批量':<8}{batch_trips:>10}{batch_time:>10.2f}")
+    print(f"加速比: {legacy_time / max(batch_time, 1e-9):.1f}x")
+
+    if legacy != batch:
+        print("❌ 两种模式输出不一致")
+        return 1
+    print("✅ 两种模式输出一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
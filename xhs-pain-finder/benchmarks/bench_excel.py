@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Excel 写出基准测试
+同一份合成 JSONL 分别用常规 Workbook（逐格样式）与 write-only 流式写出，
+在独立子进程中测量每秒行数与峰值 RSS
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fixtures import write_synthetic_jsonl
+
+IMPLEMENTATIONS = ["classic", "fast"]
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值 RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，Linux 以 KB 计
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(impl: str, json_path: str, output_path: str) -> dict:
+    """在当前进程中写出一次 Excel 并返回耗时与峰值内存"""
+    from save_to_excel import save_to_excel
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_to_excel(json_path, output_path, fast=impl == "fast")
+    return {
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+        "file_mb": Path(output_path).stat().st_size / 1024 / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 写出基准测试")
+    parser.add_argument("--sizes", default="10000,100000", help="评论规模列表（逗号分隔）")
+    parser.add_argument("--impl", default="classic,fast", help="参与对比的实现（classic / fast）")
+    parser.add_argument("--worker", nargs=3, metavar=("IMPL", "JSON", "XLSX"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker)))
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    impls = [i for i in args.impl.split(",") if i in IMPLEMENTATIONS]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"comments-{size}.jsonl"
+            write_synthetic_jsonl(path, size)
+            for impl in impls:
+                output = Path(tmp) / f"{impl}-{size}.xlsx"
+                result = subprocess.run([sys.executable, __file__, "--worker", impl, str(path), str(output)],
+                                        capture_output=True, text=True, check=True).stdout
+                rows.append((size, impl, json.loads(result.strip().splitlines()[-1])))
+                output.unlink()
+            path.unlink()
+
+    print(f"{'评论数':>10}{'实现':>10}{'耗时(s)':>10}{'行/秒':>12}{'峰值RSS(MB)':>14}{'文件(MB)':>10}")
+    for size, impl, stats in rows:
+        print(f"{size:>10}{impl:>10}{stats['seconds']:>10.1f}{size / stats['seconds']:>12.0f}"
+              f"{stats['peak_rss_mb']:>14.1f}{stats['file_mb']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
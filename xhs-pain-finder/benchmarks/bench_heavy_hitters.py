@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+近似高频词计数基准测试
+在 Zipf 分布的合成词流上对比 SpaceSaving 与精确 Counter：
+固定内存预算下语料规模增大时，计数器大小不变，TOP-N 与精确结果一致，
+估计计数的高估不超过误差上界；任一条件不满足时以非零状态退出
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from itertools import accumulate
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from heavy_hitters import SpaceSaving, capacity_for
+
+
+def zipf_chunks(n_tokens: int, vocabulary: int, exponent: float = 1.1, chunk: int = 50000, seed: int = 42):
+    """按 Zipf 分布生成词流，每次产出一块的词频 Counter（模拟逐块合并）"""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cum_weights = list(accumulate(1 / (rank + 1) ** exponent for rank in range(vocabulary)))
+    remaining = n_tokens
+    while remaining > 0:
+        size = min(chunk, remaining)
+        remaining -= size
+        yield Counter(rng.choices(words, cum_weights=cum_weights, k=size))
+
+
+def run(n_tokens: int, vocabulary: int, capacity: int, top_n: int) -> dict:
+    exact = Counter()
+    sketch = SpaceSaving(capacity)
+    sketch_seconds = 0.0
+    for chunk in zipf_chunks(n_tokens, vocabulary):
+        exact.update(chunk)
+        start = time.perf_counter()
+        sketch.update(chunk)
+        sketch_seconds += time.perf_counter() - start
+
+    tracemalloc.start()
+    snapshot = SpaceSaving(capacity)
+    snapshot.update(sketch)
+    sketch_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    exact_top = [w for w, _ in exact.most_common(top_n)]
+    sketch_top = [w for w, _ in sketch.most_common(top_n)]
+    # 与第 N 名真实计数相同的词可以互换，只比较名次严格在界内的部分
+    cutoff = exact.most_common(top_n + 1)[-1][1]
+    strict = {w for w in exact_top if exact[w] > cutoff}
+    max_over = max(sketch[w] - exact[w] for w in sketch_top)
+    return {
+        "tokens": n_tokens,
+        "distinct": len(exact),
+        "tracked": len(sketch),
+        "sketch_kb": sketch_bytes / 1024,
+        "seconds": sketch_seconds,
+        "overlap": len(set(exact_top) & set(sketch_top)) / top_n,
+        "strict_ok": strict <= set(sketch_top),
+        "max_over": max_over,
+        "bound": sketch.error_bound,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似高频词计数基准测试")
+    parser.add_argument("--sizes", default="100000,1000000,3000000", help="词流长度列表（逗号分隔）")
+    parser.add_argument("--vocabulary", type=int, default=200000, help="词表大小")
+    parser.add_argument("--memory", type=float, default=1.0, help="内存预算（MB）")
+    parser.add_argument("--top", type=int, default=50, help="比较的 TOP-N")
+    parser.add_argument("--min-overlap", type=float, default=0.98, help="要求的最低 TOP-N 重合率")
+    args = parser.parse_args()
+
+    capacity = capacity_for(args.memory)
+    rows = [run(int(size), args.vocabulary, capacity, args.top) for size in args.sizes.split(",")]
+
+    print(f"内存预算 {args.memory} MB，计数器容量 {capacity}，TOP-{args.top}")
+    print(f"{'词数':>10}{'不同词':>10}{'跟踪词':>8}{'内存(KB)':>10}{'耗时(s)':>9}"
+          f"{'TOP重合':>9}{'最大高估':>10}{'误差上界':>10}")
+    for r in rows:
+        print(f"{r['tokens']:>10}{r['distinct']:>10}{r['tracked']:>8}{r['sketch_kb']:>10.0f}"
+              f"{r['seconds']:>9.2f}{r['overlap'] * 100:>8.0f}%{r['max_over']:>10}{r['bound']:>10.1f}")
+
+    ok = True
+    if any(r["tracked"] > capacity for r in rows):
+        print("❌ 跟踪词数超出容量")
+        ok = False
+    if max(r["sketch_kb"] for r in rows) > args.memory * 1024:
+        print("❌ 计数器内存超出预算")
+        ok = False
+    if any(r["overlap"] < args.min_overlap or not r["strict_ok"] for r in rows):
+        print(f"❌ TOP-{args.top} 与精确计数不一致")
+        ok = False
+    if any(r["max_over"] > r["bound"] for r in rows):
+        print("❌ 高估超出误差上界")
+        ok = False
+    if ok:
+        print("✅ 内存固定，TOP-N 与精确计数一致")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
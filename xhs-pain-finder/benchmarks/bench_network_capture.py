@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+接口捕获模式基准测试
+在本地桩服务上分别以 DOM 模式和接口模式抓取同一篇笔记，对比耗时、传输字节数和评论数
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from extract_comments import extract_comments
+from stub_server import start_stub_server
+
+
+def run_mode(mode: str, url: str, state, tmp: str, max_scroll: int) -> dict:
+    """以指定模式抓取一次，返回耗时、字节数与评论数"""
+    state.reset_counters()
+    start = time.perf_counter()
+    result = extract_comments(url, str(Path(tmp) / f"{mode}.json"), max_scroll=max_scroll,
+                              headless=True, mode=mode, user_data_dir=str(Path(tmp) / f"profile-{mode}"))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "bytes": sum(state.bytes_sent.values()),
+        "requests": sum(state.requests.values()),
+        "comments": result["total_comments"] if result else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口捕获模式基准测试")
+    parser.add_argument("--comments", type=int, default=200, help="一级评论数")
+    parser.add_argument("--page-size", type=int, default=10, help="每页评论数")
+    parser.add_argument("--max-scroll", type=int, default=100, help="最大滚动/翻页次数")
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub_server(args.comments, page_size=args.page_size)
+    url = f"{base_url}/explore/note0"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run_mode(mode, url, state, tmp, args.max_scroll) for mode in ("dom", "network")]
+    server.shutdown()
+
+    print(f"\n{'模式':<10}{'耗时(s)':>10}{'传输(KB)':>12}{'请求数':>8}{'评论数':>8}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['seconds']:>10.1f}{r['bytes'] / 1024:>12.1f}{r['requests']:>8}{r['comments']:>8}")
+
+    dom, network = results
+    print(f"\n接口模式节省: 时间 {dom['seconds'] - network['seconds']:.1f}s "
+          f"({(1 - network['seconds'] / max(dom['seconds'], 1e-9)) * 100:.0f}%), "
+          f"传输 {(dom['bytes'] - network['bytes']) / 1024:.1f} KB "
+          f"({(1 - network['bytes'] / max(dom['bytes'], 1)) * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
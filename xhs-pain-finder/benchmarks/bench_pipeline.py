@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+流水线端到端基准测试
+用模拟抓取（按页产出合成评论，每页固定等待，代替浏览器翻页）驱动真实的抓取会话，对比：
+- 串行：抓取写出 JSONL → save_to_excel_fast → analyze_keywords
+- 流水线：pipeline.PipelineSession 边抓边把评论送入 Excel 写入和分析两个阶段
+两种方式各在独立进程中运行（模型加载计入耗时）。校验两者的评论表和分析结果完全一致、
+队列积压不超过上限；流水线收尾耗时超过抓取耗时的给定比例时以非零状态退出
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fixtures import SYNTHETIC_WORDS
+
+
+def simulated_pages(n_comments: int, page_size: int, seed: int = 42):
+    """按页产出合成评论（与评论接口每页返回的记录格式相同）"""
+    rng = random.Random(seed)
+    page = []
+    for i in range(n_comments):
+        page.append({
+            "id": f"c{i}",
+            "nickname": f"用户{rng.randint(1, 99999)}",
+            "content": "，".join(rng.choices(SYNTHETIC_WORDS, k=rng.randint(2, 12))),
+            "likes": int(rng.paretovariate(1.2)) - 1,
+            "time": "03-12",
+            "is_author_reply": rng.random() < 0.01,
+            "sub_comments": []
+        })
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def simulated_crawl(session, output: Path, args) -> float:
+    """模拟抓取：逐页加入会话，每页等待 page_delay 秒，收尾写出 output，返回抓取耗时"""
+    start = time.perf_counter()
+    session.set_title("合成数据")
+    for page in simulated_pages(args.comments, args.page_size):
+        time.sleep(args.page_delay)
+        session.add(page)
+    session.finalize_jsonl(output)
+    return time.perf_counter() - start
+
+
+def run_sequential(args, tmp: Path) -> dict:
+    from analyze_keywords import analyze_keywords
+    from checkpoint import CrawlSession, checkpoint_path
+    from save_to_excel import save_to_excel_fast
+
+    start = time.perf_counter()
+    path = tmp / "sequential.jsonl"
+    crawl = simulated_crawl(CrawlSession("https://example.com/explore/synthetic", checkpoint_path(path)), path, args)
+    save_to_excel_fast(str(path), str(tmp / "sequential-comments.xlsx"))
+    analyze_keywords(str(path), str(tmp / "sequential-analysis.xlsx"), workers=args.workers)
+    return {"total": time.perf_counter() - start, "crawl": crawl}
+
+
+def run_pipeline(args, tmp: Path) -> dict:
+    from checkpoint import checkpoint_path
+    from pipeline import Pipeline, PipelineSession
+
+    start = time.perf_counter()
+    pipeline = Pipeline(str(tmp / "pipeline-comments.xlsx"), str(tmp / "pipeline-analysis.xlsx"),
+                        args.queue_size, {"workers": args.workers})
+    pipeline.start()
+    path = tmp / "pipeline.jsonl"
+    session = PipelineSession(pipeline, "https://example.com/explore/synthetic", checkpoint_path(path))
+    crawl = simulated_crawl(session, path, args)
+    pipeline.finish(dict(session.header))
+    total = time.perf_counter() - start
+    pipeline.print_stats()
+    return {"total": total, "crawl": crawl, "stats": pipeline.stats()}
+
+
+def sheets(path: Path, skip: tuple = ()) -> dict:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    return {ws.title: [list(row) for row in ws.iter_rows(values_only=True)]
+            for ws in wb.worksheets if ws.title not in skip}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线端到端基准测试")
+    parser.add_argument("--comments", type=int, default=5000, help="评论条数")
+    parser.add_argument("--page-size", type=int, default=20, help="每页评论数")
+    parser.add_argument("--page-delay", type=float, default=0.05, help="模拟每页抓取耗时（秒）")
+    parser.add_argument("--queue-size", type=int, default=200, help="流水线队列上限（小于评论数以触发背压）")
+    parser.add_argument("--workers", type=int, default=1, help="分析进程数")
+    parser.add_argument("--max-tail", type=float, default=0.2, help="允许的收尾耗时（抓取结束后）占抓取耗时的比例")
+    parser.add_argument("--run", choices=["sequential", "pipeline"], help=argparse.SUPPRESS)
+    parser.add_argument("--tmp", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run = run_sequential if args.run == "sequential" else run_pipeline
+        result = run(args, Path(args.tmp))
+        print("RESULT " + json.dumps(result, ensure_ascii=False))
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for mode in ("sequential", "pipeline"):
+            output = subprocess.run([sys.executable, __file__, "--run", mode, "--tmp", str(tmp)] + sys.argv[1:],
+                                    capture_output=True, text=True, check=True).stdout
+            results[mode] = json.loads(output.rsplit("RESULT ", 1)[1])
+            if mode == "pipeline":
+                log = output.rsplit("RESULT ", 1)[0]
+                print(log[log.find("⏱️"):].rstrip())
+        same_comments = sheets(tmp / "sequential-comments.xlsx", skip=("汇总信息",)) == \
+            sheets(tmp / "pipeline-comments.xlsx", skip=("汇总信息",))
+        same_analysis = sheets(tmp / "sequential-analysis.xlsx") == sheets(tmp / "pipeline-analysis.xlsx")
+
+    sequential, pipeline = results["sequential"], results["pipeline"]
+    tail = pipeline["total"] - pipeline["crawl"]
+    print(f"\n评论 {args.comments} 条，每页 {args.page_size} 条、{args.page_delay}s，队列上限 {args.queue_size}")
+    print(f"{'方式':<10}{'端到端(s)':>12}{'抓取(s)':>10}{'抓取后(s)':>12}")
+    for name, r in (("串行", sequential), ("流水线", pipeline)):
+        print(f"{name:<10}{r['total']:>12.2f}{r['crawl']:>10.2f}{r['total'] - r['crawl']:>12.2f}")
+    print(f"端到端加速比 {sequential['total'] / pipeline['total']:.2f}x，"
+          f"流水线端到端 / 抓取耗时 = {pipeline['total'] / pipeline['crawl']:.2f}")
+
+    ok = True
+    if not same_comments:
+        print("❌ 流水线写出的评论表与串行不一致")
+        ok = False
+    if not same_analysis:
+        print("❌ 流水线的分析结果与串行不一致")
+        ok = False
+    if any(row["max_depth"] is not None and row["max_depth"] > args.queue_size for row in pipeline["stats"]):
+        print("❌ 队列积压超过上限")
+        ok = False
+    if tail > pipeline["crawl"] * args.max_tail:
+        print(f"❌ 抓取结束后仍耗时 {tail:.2f}s，超过抓取耗时的 {args.max_tail:.0%}")
+        ok = False
+    if ok:
+        print("✅ 结果一致，端到端耗时约等于抓取耗时")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+分析结果文件与报告生成基准测试
+同一份合成 JSONL 完整分析一次（写出 .result.json 和分析结果 Excel），再只读结果文件并发重新生成
+Excel、词云图（已安装 wordcloud 时）和调研报告；检查重新生成的 Excel 与分析时逐格一致、报告中的数据占位符
+均已填写，并记录重新生成相对完整分析的耗时；不一致或重新生成不够快时以非零状态退出
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from analysis_result import load_result
+from analyze_keywords import analyze_keywords
+from fixtures import write_synthetic_jsonl
+from render_report import render_all, render_markdown
+from text_analysis import init_models
+
+# 报告中应由结果文件填写的占位符
+DATA_PLACEHOLDERS = ["[CRAWL_TIME]", "[POST_URL]", "[TOTAL_COMMENTS]", "[TOP_N]", "[APPROXIMATE_NOTE]",
+                     "[PAIN_POINTS]", "[TOP_WORDS_ROWS]", "[TFIDF_KEYWORDS]", "[WORDCLOUD]", "[SENTIMENT_ROWS]",
+                     "[NEGATIVE_TOP5]", "[TOP_LIKED_ROWS]"]
+
+
+def sheet_values(path: Path) -> dict:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path)
+    return {ws.title: [[cell.value for cell in row] for row in ws.iter_rows()] for ws in wb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析结果文件与报告生成基准测试")
+    parser.add_argument("--comments", type=int, default=20000, help="评论条数")
+    parser.add_argument("--clusters", type=int, default=5, help="痛点聚类簇数（报告痛点章节按簇填写）")
+    parser.add_argument("--rounds", type=int, default=5, help="重新生成的轮数（取中位数）")
+    parser.add_argument("--min-speedup", type=float, default=5.0, help="重新生成相对完整分析的最低加速比")
+    parser.add_argument("--max-report-ms", type=float, default=50.0, help="单独重新生成报告的耗时上限（毫秒）")
+    args = parser.parse_args()
+
+    init_models(quiet=True)
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        json_path = tmp / "comments.jsonl"
+        write_synthetic_jsonl(json_path, args.comments)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = analyze_keywords(str(json_path), str(tmp / "analysis.xlsx"), clusters=args.clusters)
+        analyze_seconds = time.perf_counter() - start
+
+        result_file = Path(full["result_path"])
+        targets = {"excel": tmp / "rendered.xlsx", "markdown": tmp / "report.md"}
+        if find_spec("wordcloud") is not None:
+            targets["wordcloud"] = tmp / "wordcloud.png"
+        else:
+            print("⚠️ 未安装 wordcloud，跳过词云图")
+
+        rounds = []
+        renderer_seconds = {name: [] for name in targets}
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                outputs = render_all(load_result(result_file), targets)
+            rounds.append(time.perf_counter() - start)
+            for name, (output, seconds) in outputs.items():
+                if output is None:
+                    errors.append(f"重新生成失败: {name}")
+                renderer_seconds[name].append(seconds)
+
+        result = load_result(result_file)
+        report_seconds = []
+        for top_words in (5, 10, 20):
+            start = time.perf_counter()
+            render_markdown(result, tmp / f"report{top_words}.md", top_words=top_words)
+            report_seconds.append(time.perf_counter() - start)
+
+        if sheet_values(tmp / "analysis.xlsx") != sheet_values(targets["excel"]):
+            errors.append("重新生成的 Excel 与分析时写出的不一致")
+        report = targets["markdown"].read_text(encoding="utf-8")
+        left = [p for p in DATA_PLACEHOLDERS if p in report]
+        if left:
+            errors.append(f"报告中仍有未填写的数据占位符: {'、'.join(left)}")
+        size_kb = result_file.stat().st_size / 1024
+
+    render_seconds = sorted(rounds)[len(rounds) // 2]
+    print(f"\n完整分析 {args.comments} 条 {analyze_seconds:.2f}s，结果文件 {size_kb:.0f} KB")
+    print(f"{'产物':<12}{'重新生成中位数(ms)':>20}")
+    for name, seconds in renderer_seconds.items():
+        print(f"{name:<12}{sorted(seconds)[len(seconds) // 2] * 1000:>20.0f}")
+    print(f"{'并发合计':<10}{render_seconds * 1000:>20.0f}")
+    print(f"单独重新生成报告（不同词数）最长 {max(report_seconds) * 1000:.1f} ms，"
+          f"重新生成全部产物为完整分析的 {analyze_seconds / render_seconds:.1f}x 快")
+
+    if analyze_seconds < args.min_speedup * render_seconds:
+        errors.append(f"重新生成加速不足（最低 {args.min_speedup}x）")
+    if max(report_seconds) * 1000 > args.max_report_ms:
+        errors.append(f"重新生成报告超过 {args.max_report_ms:.0f} ms")
+
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        return 1
+    print("✅ 重新生成结果一致且达标")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
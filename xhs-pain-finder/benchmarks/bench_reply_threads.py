@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+回复楼层基准测试
+离线部分：接口回复组树、WithReplies 展开与计权、Excel 回复表；
+浏览器部分：在带折叠回复的夹具页面上对比逐个展开与并发展开的耗时，并校验提取到的回复树与夹具一致
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import build_thread_page, generate_reply_thread
+from network_capture import build_record_from_api
+from reply_threads import WithReplies, count_replies, expand_threads, extract_threads_batch, iter_replies
+
+
+def tree_shape(comment: dict) -> list:
+    """回复树的可比较形式：[(层级, 昵称, 去掉“回复 某人：”的正文), ...]"""
+    return [(depth, reply["nickname"], reply["content"]) for depth, reply in iter_replies(comment)]
+
+
+def check_offline(threads: list, tmp: Path) -> list:
+    """离线校验，返回错误列表"""
+    errors = []
+    records = [build_record_from_api(thread, i, replies=True) for i, thread in enumerate(threads, 1)]
+    expected = sum(len(thread["sub_comments"]) for thread in threads)
+    actual = sum(count_replies(record) for record in records)
+    if actual != expected:
+        errors.append(f"接口回复组树丢失回复: {actual} / {expected}")
+    depth = max((d for record in records for d, _ in iter_replies(record)), default=0)
+    if depth < 3:
+        errors.append(f"夹具回复链过浅（最大层级 {depth}）")
+    for thread, record in zip(threads, records):
+        if record["sub_comments"] != build_record_from_api(thread, 0)["sub_comments"]:
+            errors.append(f"楼层 {thread['id']} 的 sub_comments 与旧格式不一致")
+            break
+
+    path = tmp / "replies.json"
+    path.write_text(json.dumps({"url": "https://www.xiaohongshu.com/explore/replies", "title": "回复楼层",
+                                "total_comments": len(records), "comments": records}, ensure_ascii=False),
+                    encoding="utf-8")
+    source = WithReplies(str(path), "likes")
+    items = list(source.iter_comments())
+    if (source.comments, source.replies) != (len(records), expected) or len(items) != len(records) + expected:
+        errors.append(f"WithReplies 计数错误: {source.comments} 条评论 + {source.replies} 条回复")
+    if any(item.get("weight", 1) < 1 for item in items) or not any(item.get("weight", 1) > 1 for item in items):
+        errors.append("WithReplies 按点赞计权异常")
+
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        print("⚠️ 未安装 openpyxl，跳过 Excel 回复表校验")
+        return errors
+    from save_to_excel import save_to_excel
+    for fast in (False, True):
+        output = tmp / f"replies{'_fast' if fast else ''}.xlsx"
+        save_to_excel(str(path), str(output), fast=fast, replies=True)
+        wb = load_workbook(output)
+        rows = sum(wb[name].max_row - 1 for name in wb.sheetnames if name.startswith("回复"))
+        if rows != expected:
+            errors.append(f"Excel 回复表行数错误（{'fast' if fast else '经典'}）: {rows} / {expected}")
+    return errors
+
+
+async def measure(fixture: Path, concurrency: int, timeout: float) -> tuple:
+    """打开夹具页面展开全部回复并提取，返回 (展开统计, 评论记录, 耗时)"""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.goto(fixture.as_uri())
+        start = time.perf_counter()
+        stats = await expand_threads(page, concurrency=concurrency, timeout=timeout)
+        comments = await extract_threads_batch(page)
+        elapsed = time.perf_counter() - start
+        await browser.close()
+    return stats, comments, elapsed
+
+
+def check_browser(fixture: Path, threads: list, concurrencies: list, timeout: float) -> list:
+    errors = []
+    expected = [tree_shape(build_record_from_api(thread, 0, replies=True)) for thread in threads]
+    timings = {}
+    rows = []
+    for concurrency in concurrencies:
+        stats, comments, elapsed = asyncio.run(measure(fixture, concurrency, timeout))
+        timings[concurrency] = elapsed
+        rows.append(f"{concurrency:>6}{stats['rounds']:>8}{stats['expanded']:>8}{stats['failed']:>8}{elapsed:>10.2f}")
+        if [tree_shape(comment) for comment in comments] != expected:
+            errors.append(f"并发 {concurrency}: 提取到的回复树与夹具不一致")
+    print(f"{'并发':>6}{'轮数':>8}{'展开':>8}{'失败':>8}{'耗时(s)':>10}")
+    print("\n".join(rows))
+    low, high = min(concurrencies), max(concurrencies)
+    if low != high:
+        print(f"加速比（{high} vs {low}）: {timings[low] / max(timings[high], 1e-9):.1f}x")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回复楼层基准测试")
+    parser.add_argument("--threads", type=int, default=60, help="夹具楼层数")
+    parser.add_argument("--replies", type=int, default=40, help="每个楼层最多的回复数")
+    parser.add_argument("--delay-ms", type=int, default=50, help="夹具页面每次展开的延迟（毫秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="对比的展开并发数")
+    parser.add_argument("--timeout", type=float, default=5.0, help="单个楼层展开超时（秒）")
+    args = parser.parse_args()
+
+    import random
+    rng = random.Random(7)
+    threads = [generate_reply_thread(rng, f"o{i}", args.replies) for i in range(args.threads)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        errors = check_offline(threads, tmp)
+        print(f"离线校验: {len(threads)} 个楼层, {sum(len(t['sub_comments']) for t in threads)} 条回复"
+              + ("" if errors else " ✅"))
+
+        try:
+            import playwright  # noqa: F401
+        except ImportError:
+            print("⚠️ 未安装 playwright，跳过浏览器展开测试")
+        else:
+            html, page_threads = build_thread_page(args.threads, args.replies, delay_ms=args.delay_ms)
+            fixture = tmp / "threads.html"
+            fixture.write_text(html, encoding="utf-8")
+            try:
+                errors += check_browser(fixture, page_threads, args.concurrency, args.timeout)
+            except Exception as e:
+                if "Executable doesn't exist" not in str(e):
+                    raise
+                print("⚠️ 未安装 Chromium（playwright install chromium），跳过浏览器展开测试")
+
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        return 1
+    print("✅ 回复楼层测试通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
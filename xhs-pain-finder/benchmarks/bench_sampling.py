@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+抽样近似分析基准测试
+同一份合成 JSONL 先全量分析，再用不同随机种子做分层抽样分析，
+检查全量的情感占比是否落在抽样给出的 95% 置信区间内、高频痛点词是否一致，并记录相对全量的加速比；
+另用小于高赞层的抽样条数（--small-sample）检查每层都抽到评论、情感计数合计等于评论总数、区间覆盖全量值；
+用极短的时间预算检查高赞层全部分析、抽样部分不少于 MIN_SAMPLE 条；
+区间覆盖不足、痛点词偏差过大、有层未抽到、预算停止过早或加速不足时以非零状态退出
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from analyze_keywords import analyze_keywords
+from fixtures import write_synthetic_jsonl
+from sampling import DEFAULT_MARGIN, MIN_SAMPLE, SENTIMENT_LABELS, StratifiedSample
+from text_analysis import init_models
+
+# 比较占比时的浮点容差：抽样等于全部评论时半宽为 0，估计值与全量值只差舍入误差
+TOLERANCE = 1e-9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抽样近似分析基准测试")
+    parser.add_argument("--comments", type=int, default=50000, help="评论条数")
+    parser.add_argument("--seeds", type=int, default=5, help="抽样次数（不同随机种子）")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="情感占比的目标误差")
+    parser.add_argument("--min-coverage", type=float, default=0.85, help="置信区间覆盖全量值的最低比例")
+    parser.add_argument("--min-speedup", type=float, default=2.0, help="相对全量分析的最低加速比")
+    parser.add_argument("--small-sample", type=int, default=300, help="小抽样检查的抽样条数（小于高赞层条数）")
+    args = parser.parse_args()
+
+    init_models(quiet=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "comments.jsonl"
+        write_synthetic_jsonl(json_path, args.comments)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = analyze_keywords(str(json_path), str(Path(tmp) / "full.xlsx"))
+        full_seconds = time.perf_counter() - start
+        scored = sum(full["sentiment_counts"].values())
+        truth = {label: full["sentiment_counts"].get(label, 0) / scored for label in SENTIMENT_LABELS}
+        full_pain = [w for w, _ in full["pain_words"][:10]]
+
+        covered = checked = 0
+        seconds = []
+        overlaps = []
+        print(f"全量分析 {args.comments} 条 {full_seconds:.1f}s，情感占比 "
+              + "，".join(f"{label} {p:.1%}" for label, p in truth.items()))
+        for seed in range(args.seeds):
+            sample = StratifiedSample(str(json_path), margin=args.margin, seed=seed).scan()
+            stats = sample.run()
+            seconds.append(sample.seconds)
+            pain = [w for w, _ in stats.pain_words.most_common(10)]
+            overlaps.append(len(set(pain) & set(full_pain)) / len(full_pain) if full_pain else 1.0)
+            intervals = sample.intervals()
+            for label, (p, half) in intervals.items():
+                checked += 1
+                covered += abs(p - truth[label]) <= half + TOLERANCE
+            print(f"  种子 {seed}: 抽样 {sample.analyzed} 条 {sample.seconds:.1f}s，"
+                  + "，".join(f"{label} {p:.1%}±{half:.1%}" for label, (p, half) in intervals.items())
+                  + f"，痛点词 TOP10 重合 {overlaps[-1]:.0%}")
+
+        # 抽样条数小于高赞层时，其余各层仍应抽到评论
+        small = StratifiedSample(str(json_path), args.small_sample, margin=0).scan()
+        small_stats = small.run()
+        small_intervals = small.intervals()
+        unsampled = [row["label"] for row in small.strata_rows() if not row["analyzed"]]
+        small_covered = all(abs(p - truth[label]) <= half + TOLERANCE for label, (p, half) in small_intervals.items())
+        print(f"  小抽样 {args.small_sample} 条: " + "，".join(
+            f"{row['label']} {row['analyzed']}/{row['population']}" for row in small.strata_rows()))
+
+        # 时间预算极短时仍应分析完高赞层和足够外推的抽样评论
+        budget = StratifiedSample(str(json_path), time_budget=0.001, margin=0).scan()
+        budget.run()
+        top, sampled = budget.strata[0], budget.strata[1:]
+        budget_sampled = sum(s.analyzed for s in sampled)
+        budget_ok = (top.analyzed == top.population
+                     and budget_sampled >= min(MIN_SAMPLE, sum(s.population for s in sampled)))
+        print(f"  时间预算 0.001s: 高赞层 {top.analyzed}/{top.population}，抽样部分 {budget_sampled} 条")
+
+    coverage = covered / checked if checked else 0.0
+    speedup = full_seconds / (sum(seconds) / len(seconds))
+    print(f"置信区间覆盖率 {coverage:.0%}（{covered}/{checked}），痛点词 TOP10 平均重合 "
+          f"{sum(overlaps) / len(overlaps):.0%}，加速比 {speedup:.1f}x")
+
+    ok = True
+    if coverage < args.min_coverage:
+        print("❌ 置信区间没有覆盖全量结果")
+        ok = False
+    if min(overlaps) < 0.7:
+        print("❌ 抽样的痛点词与全量相差过大")
+        ok = False
+    if unsampled:
+        print(f"❌ 小抽样时有层未抽到评论: {'、'.join(unsampled)}")
+        ok = False
+    if abs(sum(small_stats.sentiment_counts.values()) - scored) > len(SENTIMENT_LABELS):
+        print(f"❌ 小抽样的情感计数合计 {sum(small_stats.sentiment_counts.values())} 与评论总数 {scored} 不符")
+        ok = False
+    if not small_covered:
+        print("❌ 小抽样的置信区间没有覆盖全量结果")
+        ok = False
+    if not budget_ok:
+        print(f"❌ 时间预算停止过早：高赞层未分析完或抽样部分不足 {MIN_SAMPLE} 条")
+        ok = False
+    if speedup < args.min_speedup:
+        print(f"❌ 加速比低于 {args.min_speedup}x")
+        ok = False
+    if ok:
+        print("✅ 抽样估计准确，加速达标")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+滚动策略基准测试
+在带模拟延迟的本地桩服务上，以 DOM 模式分别用固定 sleep 轮询和自适应加载抓取同一篇笔记，
+对比耗时与完整度（抓到的一级评论数 / 实际评论数）
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from extract_comments import extract_comments
+from stub_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="滚动策略基准测试")
+    parser.add_argument("--comments", type=int, default=100, help="一级评论数")
+    parser.add_argument("--page-size", type=int, default=10, help="每页评论数")
+    parser.add_argument("--latency", type=float, default=0.3, help="接口基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=2.0, help="接口随机附加延迟上限（秒）")
+    parser.add_argument("--max-scroll", type=int, default=100, help="最大滚动次数")
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub_server(args.comments, page_size=args.page_size,
+                                                latency=args.latency, jitter=args.jitter)
+    url = f"{base_url}/explore/note0"
+    # 一级评论 + 子评论节点都会被提取，以桩数据计算期望节点数
+    expected = sum(1 + len(c["sub_comments"]) for c in state.comments_for("note0"))
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for strategy in ("fixed", "adaptive"):
+            start = time.perf_counter()
+            result = extract_comments(url, str(Path(tmp) / f"{strategy}.json"), max_scroll=args.max_scroll,
+                                      headless=True, mode="dom", user_data_dir=str(Path(tmp) / "profile"),
+                                      scroll_strategy=strategy)
+            seconds = time.perf_counter() - start
+            found = result["total_comments"] if result else 0
+            rows.append((strategy, seconds, found))
+
+    server.shutdown()
+
+    print(f"\n模拟延迟: {args.latency}s + U(0, {args.jitter})s，期望评论节点 {expected}")
+    print(f"{'策略':<10}{'耗时(s)':>10}{'评论数':>8}{'完整度':>10}")
+    for strategy, seconds, found in rows:
+        print(f"{strategy:<10}{seconds:>10.1f}{found:>8}{found / max(expected, 1) * 100:>9.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+批量情感打分基准测试
+参考集上逐条对比 SnowNLP(content).sentiments 与 BatchSentimentScorer 的得分，
+报告最大误差、情感类型一致率与吞吐；误差超出容差或加速比不足时以非零状态退出
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fixtures import NICKNAMES, PHRASES
+from text_analysis import classify_sentiment
+
+
+def reference_set(n_docs: int, seed: int = 42) -> list:
+    """参考集：评论短语组合、长评论、夹杂英文数字表情、随机生僻字（覆盖未登录字），全部去重"""
+    rng = random.Random(seed)
+    rare = [chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(2000)]
+    docs = []
+    seen = set()
+    while len(docs) < n_docs:
+        kind = rng.random()
+        if kind < 0.5:
+            text = "，".join(rng.sample(PHRASES, rng.randint(1, 4)))
+        elif kind < 0.7:
+            text = "。".join(rng.choices(PHRASES, k=rng.randint(6, 15)))
+        elif kind < 0.9:
+            text = f"@{rng.choice(NICKNAMES)} {rng.choice(PHRASES)} {rng.randint(1, 999)}元 😂 ok"
+        else:
+            text = "".join(rng.choice(rare) for _ in range(rng.randint(1, 30)))
+        if text not in seen:
+            seen.add(text)
+            docs.append(text)
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量情感打分基准测试")
+    parser.add_argument("--docs", type=int, default=2000, help="参考集评论数（去重后）")
+    parser.add_argument("--batch", type=int, default=500, help="每批评论数")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="允许的最大得分误差")
+    parser.add_argument("--min-speedup", type=float, default=10.0, help="要求的最低加速比")
+    args = parser.parse_args()
+
+    from snownlp import SnowNLP
+    from sentiment_batch import BatchSentimentScorer
+
+    docs = reference_set(args.docs)
+
+    # 两种实现都先加载模型，只计打分本身
+    SnowNLP("预热").sentiments
+    scorer = BatchSentimentScorer()
+
+    start = time.perf_counter()
+    expected = [SnowNLP(doc).sentiments for doc in docs]
+    snownlp_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores, failures = [], []
+    for i in range(0, len(docs), args.batch):
+        batch_scores, batch_failures = scorer.score(docs[i:i + args.batch])
+        scores.extend(batch_scores)
+        failures.extend((i + j, reason) for j, reason in batch_failures)
+    batch_seconds = time.perf_counter() - start
+
+    pairs = [(s, e) for s, e in zip(scores, expected) if s is not None]
+    max_error = max(abs(s - e) for s, e in pairs)
+    agree = sum(1 for s, e in pairs if classify_sentiment(s) == classify_sentiment(e)) / len(pairs)
+    speedup = snownlp_seconds / batch_seconds
+
+    print(f"参考集 {len(docs)} 条，失败 {len(failures)} 条")
+    print(f"{'实现':<16}{'耗时(s)':>10}{'条/秒':>10}")
+    print(f"{'SnowNLP 逐条':<16}{snownlp_seconds:>10.2f}{len(docs) / snownlp_seconds:>10.0f}")
+    print(f"{'批量打分':<16}{batch_seconds:>10.2f}{len(docs) / batch_seconds:>10.0f}")
+    print(f"最大误差 {max_error:.2e}，情感类型一致率 {agree * 100:.2f}%，加速比 {speedup:.1f}x")
+
+    ok = True
+    if failures:
+        print(f"❌ {len(failures)} 条评论打分失败: {failures[:5]}")
+        ok = False
+    if max_error > args.tolerance:
+        print(f"❌ 最大误差超出容差 {args.tolerance:.0e}")
+        ok = False
+    if speedup < args.min_speedup:
+        print(f"❌ 加速比低于 {args.min_speedup}x")
+        ok = False
+    if ok:
+        print("✅ 得分一致，吞吐达标")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
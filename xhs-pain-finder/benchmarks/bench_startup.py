@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+1. 用 python -X importtime 统计各脚本模块的累计导入耗时，并检查导入时没有加载重依赖
+   （jieba / snownlp / openpyxl / numpy / playwright）
+2. 空输入走 analyze_keywords.py 命令行，检查整条路径都没有加载重依赖
+3. 分别在禁用和命中模型缓存（见 model_cache）时计时 jieba + 情感模型初始化
+
+结果与基线文件（默认 startup_baseline.json，--update-baseline 重新生成）比较，
+任一项超出基线 (1 + 容差) 倍、或加载了不该加载的依赖时以非零状态退出
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "scripts"
+DEFAULT_BASELINE = BENCH_DIR / "startup_baseline.json"
+
+# 命令行入口模块
+MODULES = ["analyze_keywords", "save_to_excel", "extract_comments", "batch_crawl",
+           "analyze_corpus", "comment_store", "analysis_daemon"]
+
+# 只应在真正用到时加载的依赖
+HEAVY = ["jieba", "jieba.analyse", "jieba.posseg", "snownlp", "openpyxl", "numpy", "playwright"]
+
+# 低于此值（秒）的差异视为噪声
+SLACK = 0.05
+
+INIT_CODE = """
+import sys, time
+sys.path.insert(0, {scripts!r})
+start = time.perf_counter()
+from text_analysis import init_models
+init_models(sentiment=True, quiet=True)
+print(time.perf_counter() - start)
+"""
+
+
+def import_times(stderr: str) -> dict:
+    """解析 -X importtime 输出：{模块名: 累计耗时（秒）}"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def heavy_loaded(times: dict) -> list:
+    return [name for name in HEAVY if name in times]
+
+
+def measure_import(module: str, runs: int) -> tuple:
+    """导入一个脚本模块，返回 (最短累计导入耗时, 加载了的重依赖)"""
+    best, loaded = None, []
+    for _ in range(runs):
+        stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True).stderr
+        times = import_times(stderr)
+        seconds = times[module]
+        best = seconds if best is None else min(best, seconds)
+        loaded = heavy_loaded(times)
+    return best, loaded
+
+
+def measure_empty_input(tmp: Path, runs: int) -> tuple:
+    """空评论文件走一遍 analyze_keywords.py，返回 (最短总耗时, 加载了的重依赖)"""
+    import time
+
+    path = tmp / "empty.jsonl"
+    header = {"_type": "header", "url": "https://example.com/explore/empty", "title": "空"}
+    path.write_text(json.dumps(header, ensure_ascii=False) + "\n", encoding="utf-8")
+    env = dict(os.environ, XHS_ANALYSIS_DAEMON=str(tmp / "daemon.json"))
+    best, loaded = None, []
+    for _ in range(runs):
+        start = time.perf_counter()
+        stderr = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPTS_DIR / "analyze_keywords.py"),
+                                 str(path), "-o", str(tmp / "empty.xlsx"), "--no-daemon"],
+                                capture_output=True, text=True, check=True, env=env).stderr
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        loaded = heavy_loaded(import_times(stderr))
+    return best, loaded
+
+
+def measure_init(cache: str, runs: int) -> float:
+    """模型初始化的最短耗时"""
+    env = dict(os.environ, XHS_MODEL_CACHE=cache)
+    code = INIT_CODE.format(scripts=str(SCRIPTS_DIR))
+    return min(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                    check=True, env=env).stdout) for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=3, help="每项重复次数（取最短）")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次结果重写基线")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="允许超出基线的比例")
+    args = parser.parse_args()
+
+    results = {}
+    problems = []
+    print(f"{'项目':<32}{'耗时(s)':>10}")
+    for module in MODULES:
+        seconds, loaded = measure_import(module, args.runs)
+        results[f"import {module}"] = seconds
+        print(f"{'import ' + module:<32}{seconds:>10.3f}")
+        if loaded:
+            problems.append(f"导入 {module} 时加载了 {', '.join(loaded)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        seconds, loaded = measure_empty_input(tmp, args.runs)
+        results["analyze_keywords 空输入"] = seconds
+        print(f"{'analyze_keywords 空输入':<32}{seconds:>10.3f}")
+        if loaded:
+            problems.append(f"空输入时加载了 {', '.join(loaded)}")
+
+        try:
+            import numpy  # noqa: F401
+            import snownlp  # noqa: F401
+        except ImportError:
+            print("⚠️ 未安装 numpy / snownlp，跳过模型初始化计时")
+        else:
+            cache = str(tmp / "model-cache")
+            cold = measure_init("off", 1)
+            measure_init(cache, 1)  # 首次运行写入缓存
+            warm = measure_init(cache, args.runs)
+            results["模型初始化（无缓存）"] = cold
+            results["模型初始化（缓存命中）"] = warm
+            print(f"{'模型初始化（无缓存）':<32}{cold:>10.3f}")
+            print(f"{'模型初始化（缓存命中）':<32}{warm:>10.3f}")
+            if warm >= cold:
+                problems.append("模型缓存没有加快初始化")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"📄 基线已更新: {baseline_path}")
+    elif baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for name, seconds in results.items():
+            # 无缓存初始化只作参考，不算回归
+            if name in baseline and "无缓存" not in name and \
+                    seconds > baseline[name] * (1 + args.tolerance) + SLACK:
+                problems.append(f"{name}: {seconds:.3f}s，基线 {baseline[name]:.3f}s")
+    else:
+        print(f"⚠️ 没有基线文件 {baseline_path}，只检查依赖加载（--update-baseline 生成）")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 启动耗时未回归，未加载多余依赖")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
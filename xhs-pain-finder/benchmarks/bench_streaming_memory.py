@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+流式读取内存基准测试
+生成多种规模的合成 JSONL 评论文件，在独立子进程中用 iter_comments 流式汇总，
+记录峰值 RSS；规模增长时峰值内存应保持平稳（超过容差则以非零状态退出）
+"""
+
+import argparse
+import heapq
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from comment_io import iter_comments
+from fixtures import write_synthetic_jsonl
+
+def consume(path: str) -> dict:
+    """流式汇总：与 save_to_excel / analyze_keywords 相同的有界状态（计数 + 点赞 TOP100）"""
+    total = 0
+    total_likes = 0
+    top = []
+    for seq, comment in enumerate(iter_comments(path)):
+        total += 1
+        total_likes += comment.get("likes", 0)
+        item = (comment.get("likes", 0), -seq)
+        if len(top) < 100:
+            heapq.heappush(top, item)
+        else:
+            heapq.heappushpop(top, item)
+    return {"total": total, "likes": total_likes}
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值 RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，Linux 以 KB 计
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式读取内存基准测试")
+    parser.add_argument("--sizes", default="100000,1000000,3000000", help="评论规模列表（逗号分隔）")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="最大/最小峰值内存的允许比例")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        start = time.perf_counter()
+        stats = consume(args.worker)
+        stats["seconds"] = time.perf_counter() - start
+        stats["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(stats))
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"comments-{size}.jsonl"
+            write_synthetic_jsonl(path, size)
+            output = subprocess.run([sys.executable, __file__, "--worker", str(path)],
+                                    capture_output=True, text=True, check=True).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            assert stats["total"] == size, f"读取条数不符: {stats['total']} != {size}"
+            rows.append((size, path.stat().st_size, stats))
+            path.unlink()
+
+    print(f"{'评论数':>10}{'文件(MB)':>10}{'耗时(s)':>10}{'条/秒':>12}{'峰值RSS(MB)':>14}")
+    for size, file_size, stats in rows:
+        print(f"{size:>10}{file_size / 1024 / 1024:>10.1f}{stats['seconds']:>10.1f}"
+              f"{size / stats['seconds']:>12.0f}{stats['peak_rss_mb']:>14.1f}")
+
+    peaks = [stats["peak_rss_mb"] for _, _, stats in rows]
+    ratio = max(peaks) / min(peaks)
+    if ratio > args.tolerance:
+        print(f"❌ 峰值内存随规模增长 {ratio:.2f}x（容差 {args.tolerance}x）")
+        return 1
+    print(f"✅ 峰值内存平稳（最大/最小 {ratio:.2f}x）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
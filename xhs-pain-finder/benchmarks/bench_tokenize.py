@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+分词开销基准测试
+对比原实现的三次分词（整体 jieba.cut + extract_tags 内部再分词 + 负面评论重新分词）
+与逐条分词一次、由同一份分词结果统计高频词 / TF-IDF / 痛点词，并校验结果一致
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fixtures import PHRASES
+from text_analysis import (STOPWORDS, PUNCT_RE, TokenCache, count_tfidf, count_words, pain_terms,
+                           tfidf_from_counts)
+
+# 负面评论的替代判定（只比较分词开销，不引入情感模型）
+NEGATIVE_MARKERS = ("差", "贵", "慢", "短", "不推荐", "看不懂")
+
+
+def generate_contents(n_comments: int, seed: int = 42) -> list:
+    """生成评论文本：短语随机组合并附加序号，重复率接近真实评论区"""
+    rng = random.Random(seed)
+    contents = []
+    for i in range(n_comments):
+        text = "，".join(rng.sample(PHRASES, rng.randint(1, 4)))
+        if rng.random() < 0.7:
+            text += f"，第{rng.randint(1, n_comments)}次购买"
+        contents.append(text)
+    return contents
+
+
+def is_negative(content: str) -> bool:
+    return any(marker in content for marker in NEGATIVE_MARKERS)
+
+
+def legacy(contents: list) -> dict:
+    """原实现：整体分词统计词频，extract_tags 再分一次，负面评论再分一次"""
+    import jieba
+    import jieba.analyse
+
+    word_counts = Counter()
+    for word in jieba.cut(" ".join(contents)):
+        word = word.strip()
+        if len(word) >= 2 and word not in STOPWORDS and not word.isdigit() and not PUNCT_RE.match(word):
+            word_counts[word] += 1
+
+    keywords = jieba.analyse.extract_tags(" ".join(contents), topK=20, withWeight=True)
+
+    pain_words = Counter()
+    for content in contents:
+        if is_negative(content):
+            for word in jieba.cut(content):
+                word = word.strip()
+                if len(word) >= 2 and word not in STOPWORDS:
+                    pain_words[word] += 1
+
+    return {"top_words": word_counts.most_common(50), "keywords_tfidf": keywords,
+            "pain_words": pain_words.most_common(30)}
+
+
+def tokenize_once(contents: list, cache_size: int) -> dict:
+    """逐条分词一次，三种统计共用"""
+    cache = TokenCache(cache_size)
+    word_counts = Counter()
+    tfidf_freq = Counter()
+    pain_words = Counter()
+    for content in contents:
+        tokens = cache.get(content)
+        count_words(tokens, word_counts)
+        count_tfidf(tokens, tfidf_freq)
+        if is_negative(content):
+            pain_words.update(pain_terms(tokens))
+
+    return {"top_words": word_counts.most_common(50), "keywords_tfidf": tfidf_from_counts(tfidf_freq, 20),
+            "pain_words": pain_words.most_common(30), "cache_hits": cache.hits}
+
+
+def same_keywords(a: list, b: list) -> bool:
+    """TF-IDF 关键词一致（权重允许浮点误差）"""
+    return [w for w, _ in a] == [w for w, _ in b] and all(abs(x - y) < 1e-9 for (_, x), (_, y) in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分词开销基准测试")
+    parser.add_argument("--comments", type=int, default=20000, help="评论条数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    import jieba
+    jieba.initialize()
+
+    contents = generate_contents(args.comments, args.seed)
+
+    start = time.perf_counter()
+    baseline = legacy(contents)
+    legacy_seconds = time.perf_counter() - start
+
+    print(f"{'实现':<20}{'耗时(s)':>10}{'加速比':>10}{'缓存命中':>10}{'结果一致':>10}")
+    print(f"{'三次分词（原实现）':<20}{legacy_seconds:>10.2f}{1.0:>10.2f}{'-':>10}{'-':>10}")
+
+    ok = True
+    for label, cache_size in [("分词一次（无缓存）", 0), ("分词一次 + 缓存", 100000)]:
+        start = time.perf_counter()
+        result = tokenize_once(contents, cache_size)
+        seconds = time.perf_counter() - start
+        same = (result["top_words"] == baseline["top_words"]
+                and result["pain_words"] == baseline["pain_words"]
+                and same_keywords(result["keywords_tfidf"], baseline["keywords_tfidf"]))
+        ok = ok and same
+        print(f"{label:<20}{seconds:>10.2f}{legacy_seconds / seconds:>10.2f}"
+              f"{result['cache_hits']:>10}{'是' if same else '否':>10}")
+
+    if not ok:
+        print("❌ 分词一次的统计结果与原实现不一致")
+        return 1
+    print("✅ 统计结果一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
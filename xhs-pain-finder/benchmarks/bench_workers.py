@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+并行分析扩展性基准测试
+同一份合成 JSONL 分别以不同进程数运行 analyze_keywords（每个配置一个独立进程，互不共享缓存），
+记录吞吐（条/秒）与相对串行的加速比，并校验结果与串行完全一致
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from analyze_keywords import analyze_keywords
+from fixtures import write_synthetic_jsonl
+from text_analysis import init_models
+
+
+def default_workers() -> str:
+    """1 到 CPU 核数之间按 2 的幂取值"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return ",".join(str(c) for c in counts)
+
+
+def run_worker(workers: int, json_path: str, output_path: str) -> dict:
+    """在独立进程中运行一次分析，返回耗时与结果摘要"""
+    # 先加载模型，只计分析本身（fork 的工作进程直接继承已加载的模型）
+    init_models(quiet=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = analyze_keywords(json_path, output_path, workers=workers)
+    # 结果文件路径随输出路径而变，不参与比较
+    result.pop("result_path", None)
+    return {
+        "seconds": time.perf_counter() - start,
+        "digest": hashlib.sha1(json.dumps(result, ensure_ascii=False).encode("utf-8")).hexdigest()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行分析扩展性基准测试")
+    parser.add_argument("--comments", type=int, default=20000, help="评论条数")
+    parser.add_argument("--workers", default=default_workers(), help="进程数列表（逗号分隔）")
+    parser.add_argument("--worker", nargs=3, metavar=("N", "JSON", "XLSX"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(int(args.worker[0]), *args.worker[1:])))
+        return 0
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "comments.jsonl"
+        write_synthetic_jsonl(path, args.comments)
+        for workers in worker_counts:
+            output = subprocess.run([sys.executable, __file__, "--worker", str(workers), str(path),
+                                     str(Path(tmp) / f"analysis-{workers}.xlsx")],
+                                    capture_output=True, text=True, check=True).stdout
+            rows.append((workers, json.loads(output.strip().splitlines()[-1])))
+
+    base = rows[0][1]
+    print(f"{'进程数':>8}{'耗时(s)':>10}{'条/秒':>10}{'加速比':>10}{'结果一致':>10}")
+    for workers, stats in rows:
+        same = stats["digest"] == base["digest"]
+        print(f"{workers:>8}{stats['seconds']:>10.1f}{args.comments / stats['seconds']:>10.0f}"
+              f"{base['seconds'] / stats['seconds']:>10.2f}{'是' if same else '否':>10}")
+
+    if any(stats["digest"] != base["digest"] for _, stats in rows):
+        print("❌ 并行结果与首个配置不一致")
+        return 1
+    print(f"✅ 结果一致（CPU 核数 {os.cpu_count()}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
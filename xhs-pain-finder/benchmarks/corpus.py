@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+合成小红书评论语料
+按固定种子生成评论接口格式的评论：中文内容按 Zipf 分布从词表取词（少数词高频、长尾词低频），
+点赞数为重尾分布（大额点赞按“1.2万”缩写），含子评论和作者回复；评论记录由抓取脚本同一个
+build_record_from_api 转换，字段与真实抓取输出完全一致。
+也可写出供抓取脚本离线测试的夹具站点：笔记页 HTML（评论区 DOM）、分页的评论接口 JSON 和 URL 列表
+"""
+
+import argparse
+import html
+import itertools
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import BASE_TIME_MS, NICKNAMES, TIMES, build_parent_html
+from network_capture import build_record_from_api
+
+# 预设规模
+SIZES = {"1k": 1000, "100k": 100000, "1m": 1000000}
+
+# 词表：常见的评论用词排在前面（高频），其后为由常用字组合的长尾词
+COMMON_WORDS = [
+    "真的", "推荐", "喜欢", "好用", "质量", "价格", "客服", "物流", "颜值", "后悔", "一般", "太贵",
+    "尺寸", "续航", "发货", "售后", "退货", "回购", "性价比", "链接", "同款", "平替", "味道", "做工",
+    "包装", "颜色", "效果", "体验", "便宜", "划算", "失望", "垃圾", "满意", "不错", "难用", "好看",
+    "舒服", "偏小", "偏大", "掉色", "起球", "开线", "发热", "充电", "耗电", "半个月", "态度", "回复",
+    "敷衍", "正品", "假货", "赠品", "优惠", "活动", "直播", "博主", "姐妹", "宝宝", "学生党", "打工人",
+    "闭眼入", "踩雷", "种草", "拔草", "绝了", "yyds", "无语", "离谱", "心动", "已下单"
+]
+LONG_TAIL_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理"
+LONG_TAIL_WORDS = 5000
+
+# Zipf 指数
+ZIPF_EXPONENT = 1.07
+
+PUNCTUATION = ["，", "，", "，", "。", "！", "～", " "]
+STICKERS = ["[笑哭R]", "[哭惹R]", "[赞R]", "[害羞R]", "[doge]"]
+ENDINGS = ["", "", "", "。", "！", "！！", "？", "…"]
+
+
+def build_vocabulary(seed: int = 7) -> list:
+    """词表（按频率排名）：常见词在前，长尾词由常用字两两或三三组合"""
+    rng = random.Random(seed)
+    words = list(COMMON_WORDS)
+    seen = set(words)
+    while len(words) < len(COMMON_WORDS) + LONG_TAIL_WORDS:
+        word = "".join(rng.choices(LONG_TAIL_CHARS, k=rng.choice((2, 2, 3))))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+VOCABULARY = build_vocabulary()
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(VOCABULARY))))
+
+
+def generate_content(rng: random.Random) -> str:
+    """一条评论内容：1–4 个分句，每句 2–6 个按 Zipf 分布抽取的词，偶尔带表情或 @提及"""
+    clauses = []
+    for _ in range(rng.choice((1, 1, 2, 2, 3, 4))):
+        clauses.append("".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(2, 6))))
+    text = rng.choice(PUNCTUATION).join(clauses) + rng.choice(ENDINGS)
+    roll = rng.random()
+    if roll < 0.08:
+        text += rng.choice(STICKERS)
+    elif roll < 0.11:
+        text = f"@{rng.choice(NICKNAMES)} " + text
+    return text
+
+
+def format_likes(likes: int):
+    """接口中的点赞数：大额点赞缩写为“1.2万”"""
+    return f"{likes / 10000:.1f}万" if likes >= 10000 else str(likes)
+
+
+def generate_api_comment(rng: random.Random, comment_id: str, is_sub: bool = False) -> dict:
+    """生成一条评论接口格式的评论（字段与 /api/sns/web/v2/comment/page 一致）"""
+    is_author = rng.random() < (0.08 if is_sub else 0.01)
+    likes = min(int(rng.paretovariate(1.1)) - 1, 500000)
+    return {
+        "id": comment_id,
+        "content": generate_content(rng),
+        "like_count": format_likes(likes),
+        "create_time": BASE_TIME_MS - rng.randint(0, 90 * 86400) * 1000,
+        "display_time": rng.choice(TIMES),
+        "user_info": {"user_id": f"u{rng.randint(1, 10 ** 7)}",
+                      "nickname": "作者" if is_author else f"{rng.choice(NICKNAMES)}{rng.randint(1, 9999)}"},
+        "show_tags": ["is_author"] if is_author else [],
+        "sub_comments": [],
+        "is_sub": is_sub
+    }
+
+
+def iter_api_comments(n_comments: int, seed: int = 42):
+    """逐条生成评论接口格式的一级评论（含子评论，约 30% 的评论有子评论）"""
+    rng = random.Random(seed)
+    for i in range(n_comments):
+        comment = generate_api_comment(rng, f"c{seed}-{i}")
+        if rng.random() < 0.3:
+            for j in range(min(int(rng.paretovariate(1.5)), 20)):
+                comment["sub_comments"].append(generate_api_comment(rng, f"s{seed}-{i}-{j}", is_sub=True))
+        yield comment
+
+
+def iter_records(n_comments: int, seed: int = 42):
+    """逐条生成评论记录（与抓取脚本的输出字段一致）"""
+    for index, item in enumerate(iter_api_comments(n_comments, seed), 1):
+        yield build_record_from_api(item, index)
+
+
+def corpus_header(n_comments: int, seed: int = 42) -> dict:
+    return {"url": f"https://www.xiaohongshu.com/explore/synthetic{seed}", "title": f"合成语料 {n_comments} 条",
+            "crawl_time": "2026-01-01T00:00:00"}
+
+
+def write_corpus(path, n_comments: int, seed: int = 42) -> Path:
+    """
+    逐条写出合成评论文件（.jsonl 为头记录 + 每行一条评论，其他后缀为单个 JSON），内存占用与规模无关
+
+    Returns:
+        输出路径
+    """
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    header = corpus_header(n_comments, seed)
+    with open(output, "w", encoding="utf-8") as f:
+        if output.suffix == ".jsonl":
+            f.write(json.dumps(dict(header, _type="header"), ensure_ascii=False) + "\n")
+            for record in iter_records(n_comments, seed):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            f.write(json.dumps(dict(header, total_comments=n_comments), ensure_ascii=False)[:-1] + ', "comments": [')
+            for i, record in enumerate(iter_records(n_comments, seed)):
+                f.write((",\n" if i else "\n") + json.dumps(record, ensure_ascii=False))
+            f.write("\n]}")
+    return output
+
+
+def write_site(directory, n_comments: int = 2000, posts: int = 1, seed: int = 42, page_size: int = 20) -> Path:
+    """
+    写出夹具站点
+
+    - explore/<笔记 id>.html：笔记页，评论区 DOM 与小红书一致（DOM 模式提取）
+    - api/<笔记 id>/<页码>.json：分页的评论接口响应，cursor 为下一页页码（接口模式解析）
+    - index.html 与 urls.txt：全部笔记页（file:// 链接，可直接用于 --url-file）
+
+    Returns:
+        站点目录
+    """
+    root = Path(directory)
+    (root / "explore").mkdir(parents=True, exist_ok=True)
+    links, urls = [], []
+    for post in range(posts):
+        note_id = f"note{seed}{post:04d}"
+        comments = list(iter_api_comments(n_comments, seed + post))
+        title = f"合成笔记 {post + 1}"
+        page = root / "explore" / f"{note_id}.html"
+        page.write_text(
+            '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title></head><body>'
+            f'<div class="note-container"><h1 class="title">{html.escape(title)}</h1>'
+            '<div class="comments-container"><div class="list-container">'
+            + "".join(build_parent_html(c) for c in comments)
+            + '</div><div class="end-container">- THE END -</div></div></div></body></html>',
+            encoding="utf-8")
+
+        api_dir = root / "api" / note_id
+        api_dir.mkdir(parents=True, exist_ok=True)
+        pages = max((len(comments) + page_size - 1) // page_size, 1)
+        for number in range(pages):
+            has_more = number + 1 < pages
+            payload = {"code": 0, "success": True,
+                       "data": {"comments": comments[number * page_size:(number + 1) * page_size],
+                                "cursor": str(number + 1) if has_more else "", "has_more": has_more}}
+            (api_dir / f"{number}.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+        links.append(f'<li><a href="explore/{note_id}.html">{html.escape(title)}</a></li>')
+        urls.append(page.resolve().as_uri())
+
+    (root / "index.html").write_text(
+        '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>夹具站点</title></head>'
+        f'<body><ul>{"".join(links)}</ul></body></html>', encoding="utf-8")
+    (root / "urls.txt").write_text("\n".join(urls) + "\n", encoding="utf-8")
+    return root
+
+
+def parse_size(value: str) -> int:
+    """评论条数：预设规模（1k / 100k / 1m）或整数"""
+    return SIZES[value.lower()] if value.lower() in SIZES else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成小红书评论语料 / 夹具站点")
+    parser.add_argument("--size", default="1k", help=f"评论条数，预设 {' / '.join(SIZES)} 或整数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（相同种子生成相同数据）")
+    parser.add_argument("--output", "-o", help="评论文件输出路径（.jsonl / .json）")
+    parser.add_argument("--site", help="夹具站点输出目录")
+    parser.add_argument("--posts", type=int, default=1, help="夹具站点的笔记数")
+    args = parser.parse_args()
+
+    if not args.output and not args.site:
+        parser.error("请指定 --output 或 --site")
+    n_comments = parse_size(args.size)
+    if args.output:
+        print(f"✅ 语料已写入: {write_corpus(args.output, n_comments, args.seed)}（{n_comments} 条）")
+    if args.site:
+        root = write_site(args.site, n_comments, args.posts, args.seed)
+        print(f"✅ 夹具站点已写入: {root}（{args.posts} 篇笔记，URL 列表 {root / 'urls.txt'}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+基准测试用的本地夹具页面
+生成结构接近小红书笔记页的静态 HTML（评论区 + 子评论），供抓取脚本离线测试
+"""
+
+import html
+import json
+import random
+from pathlib import Path
+
+NICKNAMES = ["小鹿爱吃草", "momo", "今天也要加油", "一只猫", "阿杰", "Lily", "打工人日记", "柠檬不酸"]
+PHRASES = [
+    "这个价格有点贵了", "用了一周感觉还不错", "客服态度太差了", "物流好慢等了半个月",
+    "求链接", "蹲一个后续", "质量一般般，不推荐", "颜值很高，很喜欢",
+    "续航太短了，一天要充两次", "尺寸偏小建议买大一码", "有没有平替推荐", "说明书看不懂"
+]
+TIMES = ["刚刚", "5分钟前", "2小时前", "昨天 21:30", "3天前", "03-12", "2024-11-05"]
+
+# 评论接口数据的基准时间（毫秒），保证同一种子生成完全相同的数据
+BASE_TIME_MS = 1760000000000
+
+
+def generate_api_comment(rng: random.Random, comment_id: str, is_sub: bool = False) -> dict:
+    """生成一条评论接口格式的评论（字段与 /api/sns/web/v2/comment/page 一致）"""
+    is_author = rng.random() < 0.05
+    return {
+        "id": comment_id,
+        "content": "，".join(rng.sample(PHRASES, rng.randint(1, 3))),
+        "like_count": str(rng.choice([0, 0, 1, 3, 12, 56, 128, 1024])),
+        "create_time": BASE_TIME_MS - rng.randint(0, 30 * 86400) * 1000,
+        "display_time": rng.choice(TIMES),
+        "user_info": {"user_id": f"u{rng.randint(1, 10**6)}", "nickname": rng.choice(NICKNAMES)},
+        "show_tags": ["is_author"] if is_author else [],
+        "sub_comments": [],
+        "is_sub": is_sub
+    }
+
+
+def generate_api_comments(n_comments: int = 2000, seed: int = 42) -> list:
+    """
+    生成评论接口格式的一级评论列表（含子评论）
+
+    Args:
+        n_comments: 一级评论数
+        seed: 随机种子（相同种子生成相同数据）
+    """
+    rng = random.Random(seed)
+    comments = []
+    sub_idx = 0
+    for i in range(n_comments):
+        comment = generate_api_comment(rng, f"c{i}")
+        for _ in range(rng.choice([0, 0, 0, 1, 2, 6])):
+            sub_idx += 1
+            comment["sub_comments"].append(generate_api_comment(rng, f"s{sub_idx}", is_sub=True))
+        comments.append(comment)
+    return comments
+
+
+def build_comment_html(comment: dict) -> str:
+    """生成单条评论节点"""
+    nickname = html.escape(comment["user_info"]["nickname"])
+    content = html.escape(comment["content"])
+    badge = '<span class="author-tag">作者</span>' if "is_author" in comment["show_tags"] else ""
+    item_class = "comment-item comment-item-sub" if comment["is_sub"] else "comment-item"
+    return (
+        f'<div class="{item_class}" id="comment-{comment["id"]}">'
+        f'<div class="right">'
+        f'<div class="user-info"><a class="nickname" href="#">{nickname}</a>{badge}</div>'
+        f'<div class="note-content"><span class="note-text">{content}</span></div>'
+        f'<div class="info"><span class="date">{comment["display_time"]}</span>'
+        f'<span class="like-wrapper"><span class="count">{comment["like_count"]}</span></span></div>'
+        f'</div></div>'
+    )
+
+
+def build_parent_html(comment: dict) -> str:
+    """生成一级评论及其子评论区"""
+    subs = ""
+    if comment["sub_comments"]:
+        sub_items = "".join(build_comment_html(sub) for sub in comment["sub_comments"])
+        subs = f'<div class="reply-container">{sub_items}</div>'
+    return f'<div class="parent-comment">{build_comment_html(comment)}{subs}</div>'
+
+
+def build_note_page(n_comments: int = 2000, seed: int = 42, title: str = "测试笔记标题") -> str:
+    """
+    生成包含指定数量评论的笔记页 HTML
+
+    Args:
+        n_comments: 一级评论数
+        seed: 随机种子（相同种子生成相同页面）
+        title: 笔记标题
+    """
+    parts = [build_parent_html(c) for c in generate_api_comments(n_comments, seed)]
+    return (
+        '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)}</title></head><body>'
+        f'<div class="note-container"><h1 class="title">{html.escape(title)}</h1>'
+        f'<div class="comments-container"><div class="list-container">{"".join(parts)}</div>'
+        '<div class="end-container">- THE END -</div></div></div>'
+        '</body></html>'
+    )
+
+
+def write_note_page(path: str, n_comments: int = 2000, seed: int = 42) -> Path:
+    """将夹具页面写入文件并返回路径"""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(build_note_page(n_comments, seed), encoding="utf-8")
+    return output
+
+
+# 合成评论文本用词（大规模数据生成，不构造 HTML）
+SYNTHETIC_WORDS = ["价格", "质量", "客服", "物流", "续航", "颜值", "尺寸", "推荐", "后悔", "好用", "太贵", "一般"]
+
+
+def write_synthetic_jsonl(path: Path, n_comments: int, seed: int = 42):
+    """逐行写出合成评论文件（写入过程本身也不占用与规模相关的内存）"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        header = {"_type": "header", "url": "https://example.com/explore/synthetic",
+                  "title": "合成数据", "crawl_time": "2026-01-01T00:00:00"}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for i in range(n_comments):
+            comment = {
+                "index": i + 1,
+                "nickname": f"用户{rng.randint(1, 99999)}",
+                "content": "，".join(rng.choices(SYNTHETIC_WORDS, k=rng.randint(2, 12))),
+                "likes": int(rng.paretovariate(1.2)) - 1,
+                "time": "03-12",
+                "is_author_reply": rng.random() < 0.01,
+                "sub_comments": []
+            }
+            f.write(json.dumps(comment, ensure_ascii=False) + "\n")
+
+
+def generate_reply_thread(rng: random.Random, thread_id: str, n_replies: int) -> dict:
+    """
+    生成一个带长回复链的楼层（接口格式）：每条回复随机回复一级评论或楼层内更早的一条回复，
+    回复他人回复时带 target_comment，正文以“回复 昵称 : ”开头（与小红书一致）
+    """
+    comment = generate_api_comment(rng, thread_id)
+    for j in range(n_replies):
+        reply = generate_api_comment(rng, f"{thread_id}-r{j}", is_sub=True)
+        reply["user_info"]["nickname"] = f"{rng.choice(NICKNAMES)}{j}"  # 昵称在楼层内唯一，便于按昵称挂接
+        if comment["sub_comments"] and rng.random() < 0.7:
+            target = comment["sub_comments"][-1] if rng.random() < 0.6 else rng.choice(comment["sub_comments"])
+            reply["target_comment"] = {"id": target["id"], "user_info": dict(target["user_info"])}
+            reply["content"] = f"回复 {target['user_info']['nickname']} : {reply['content']}"
+        comment["sub_comments"].append(reply)
+    return comment
+
+
+def build_thread_page(n_threads: int = 100, replies_per_thread: int = 30, visible: int = 3, page_size: int = 10,
+                      delay_ms: int = 50, seed: int = 42) -> tuple:
+    """
+    生成带折叠回复的笔记页：每个楼层只渲染前 visible 条回复和“展开 N 条回复”按钮，
+    点击后延迟 delay_ms 毫秒（模拟接口往返）再追加 page_size 条，取完后移除按钮
+
+    Returns:
+        (页面 HTML, 接口格式的楼层列表)
+    """
+    rng = random.Random(seed)
+    threads = [generate_reply_thread(rng, f"t{i}", rng.randint(replies_per_thread // 2, replies_per_thread))
+               for i in range(n_threads)]
+    hidden = {}
+    parts = []
+    for thread in threads:
+        subs = thread["sub_comments"]
+        more = ""
+        if len(subs) > visible:
+            hidden[thread["id"]] = [build_comment_html(sub) for sub in subs[visible:]]
+            more = f'<div class="show-more" data-thread="{thread["id"]}">展开 {len(subs) - visible} 条回复</div>'
+        replies = "".join(build_comment_html(sub) for sub in subs[:visible])
+        parts.append(f'<div class="parent-comment">{build_comment_html(thread)}'
+                     f'<div class="reply-container">{replies}{more}</div></div>')
+
+    script = (
+        "const HIDDEN = " + json.dumps(hidden, ensure_ascii=False).replace("</", "<\\/") + ";"
+        f"document.addEventListener('click', (e) => {{"
+        "  const btn = e.target.closest('.show-more'); if (!btn || btn.dataset.loading) return;"
+        "  btn.dataset.loading = '1';"
+        "  setTimeout(() => {"
+        "    const rest = HIDDEN[btn.dataset.thread];"
+        f"    btn.insertAdjacentHTML('beforebegin', rest.splice(0, {page_size}).join(''));"
+        "    delete btn.dataset.loading;"
+        "    if (rest.length) btn.textContent = `展开 ${rest.length} 条回复`; else btn.remove();"
+        f"  }}, {delay_ms});"
+        "});"
+    )
+    page = (
+        '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>回复楼层测试</title></head><body>'
+        '<div class="note-container"><h1 class="title">回复楼层测试</h1>'
+        f'<div class="comments-container"><div class="list-container">{"".join(parts)}</div>'
+        '<div class="end-container">- THE END -</div></div></div>'
+        f'<script>{script}</script></body></html>'
+    )
+    return page, threads
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+本地评论接口桩服务
+提供 /explore/<note_id> 笔记页（滚动时通过接口分页加载评论）和
+/api/sns/web/v2/comment/page 分页评论 JSON，并统计各类响应的字节数；
+media=True 时笔记页另带封面图、视频和网页字体（与真实笔记页一样，抓评论用不到）
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import generate_api_comments
+
+# 头像图片大小（模拟评论区每条评论都会加载的图片资源）
+AVATAR_BYTES = b"\x89PNG\r\n\x1a\n" + b"\0" * 4096
+
+# 笔记页媒体资源（media=True）：封面图、视频、网页字体
+COVER_BYTES = b"\xff\xd8\xff\xe0" + b"\0" * (256 * 1024)
+VIDEO_BYTES = b"\0\0\0\x18ftypmp42" + b"\0" * (2 * 1024 * 1024)
+FONT_BYTES = b"wOF2" + b"\0" * (128 * 1024)
+MEDIA_HTML = (
+    '<style>@font-face { font-family: "NoteFont"; src: url("/media/note.woff2"); }'
+    ' body { font-family: "NoteFont", sans-serif; }</style>'
+    '<div class="media-container">'
+    + "".join(f'<img class="note-image" src="/media/cover{i}.jpg">' for i in range(4))
+    + '<video src="/media/note.mp4" autoplay muted preload="auto"></video></div>'
+)
+
+NOTE_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>__TITLE__</title></head>
+<body>
+<div class="note-container">
+  <h1 class="title">__TITLE__</h1>
+  __MEDIA__
+  <div class="comments-container"><div class="list-container" id="list"></div></div>
+  <div id="end"></div>
+</div>
+<script>
+const noteId = "__NOTE_ID__";
+let cursor = "", hasMore = true, loading = false;
+const esc = (s) => String(s).replace(/[&<>"]/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+const renderItem = (c) => `<div class="${c.is_sub ? "comment-item comment-item-sub" : "comment-item"}" id="comment-${c.id}">`
+    + `<img class="avatar-item" src="/avatar/${c.user_info.user_id}.png"><div class="right">`
+    + `<div class="user-info"><a class="nickname" href="#">${esc(c.user_info.nickname)}</a>`
+    + `${c.show_tags.includes("is_author") ? '<span class="author-tag">作者</span>' : ""}</div>`
+    + `<div class="note-content"><span class="note-text">${esc(c.content)}</span></div>`
+    + `<div class="info"><span class="date">${c.display_time}</span>`
+    + `<span class="like-wrapper"><span class="count">${c.like_count}</span></span></div></div></div>`;
+const renderParent = (c) => `<div class="parent-comment">${renderItem(c)}`
+    + (c.sub_comments.length ? `<div class="reply-container">${c.sub_comments.map(renderItem).join("")}</div>` : "")
+    + `</div>`;
+async function loadMore() {
+  if (loading || !hasMore) return;
+  loading = true;
+  const resp = await fetch(`/api/sns/web/v2/comment/page?note_id=${noteId}&cursor=${cursor}&top_comment_id=`);
+  const payload = await resp.json();
+  document.getElementById("list").insertAdjacentHTML("beforeend", payload.data.comments.map(renderParent).join(""));
+  cursor = payload.data.cursor;
+  hasMore = payload.data.has_more;
+  if (!hasMore) document.getElementById("end").outerHTML = '<div class="end-container">- THE END -</div>';
+  loading = false;
+}
+window.addEventListener("scroll", () => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 200) loadMore();
+});
+loadMore();
+</script>
+</body></html>
+"""
+
+
+class StubState:
+    """桩服务数据与计数"""
+
+    def __init__(self, n_comments: int = 200, seed: int = 42, page_size: int = 10,
+                 latency: float = 0.0, jitter: float = 0.0, media: bool = False):
+        self.n_comments = n_comments
+        self.seed = seed
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.media = media
+        self.lock = threading.Lock()
+        self._notes = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        with self.lock:
+            self.bytes_sent = {"html": 0, "api": 0, "avatar": 0, "media": 0, "font": 0}
+            self.requests = {"html": 0, "api": 0, "avatar": 0, "media": 0, "font": 0}
+
+    def count(self, kind: str, size: int):
+        with self.lock:
+            self.bytes_sent[kind] += size
+            self.requests[kind] += 1
+
+    def comments_for(self, note_id: str) -> list:
+        """每个笔记 id 对应一组确定性的评论数据"""
+        with self.lock:
+            if note_id not in self._notes:
+                note_seed = self.seed ^ zlib.crc32(note_id.encode("utf-8"))
+                self._notes[note_id] = generate_api_comments(self.n_comments, note_seed)
+            return self._notes[note_id]
+
+    def comment_page(self, note_id: str, cursor: str) -> dict:
+        """按 cursor（上一页最后一条评论 id）返回一页评论"""
+        comments = self.comments_for(note_id)
+        start = 0
+        if cursor:
+            ids = [c["id"] for c in comments]
+            start = ids.index(cursor) + 1 if cursor in ids else len(comments)
+        page = comments[start:start + self.page_size]
+        has_more = start + self.page_size < len(comments)
+        return {
+            "code": 0,
+            "success": True,
+            "msg": "成功",
+            "data": {
+                "comments": page,
+                "cursor": page[-1]["id"] if page else cursor,
+                "has_more": has_more
+            }
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务请求处理"""
+
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, kind: str, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        self.wfile.write(body)
+        self.state.count(kind, len(body))
+
+    def _send_media(self, path: str):
+        if path.endswith(".woff2"):
+            self._send("font", FONT_BYTES, "font/woff2")
+        elif path.endswith(".mp4"):
+            self._send("media", VIDEO_BYTES, "video/mp4")
+        elif path.startswith("/media/cover"):
+            self._send("media", COVER_BYTES, "image/jpeg")
+        else:
+            self.send_error(404)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+
+        if path.startswith("/explore/"):
+            note_id = path.rsplit("/", 1)[-1]
+            body = (NOTE_PAGE.replace("__NOTE_ID__", note_id)
+                    .replace("__MEDIA__", MEDIA_HTML if self.state.media else "")
+                    .replace("__TITLE__", f"测试笔记 {note_id}")).encode("utf-8")
+            self._send("html", body, "text/html; charset=utf-8")
+        elif path == "/api/sns/web/v2/comment/page":
+            query = parse_qs(parts.query)
+            if self.state.latency or self.state.jitter:
+                time.sleep(self.state.latency + random.uniform(0, self.state.jitter))
+            payload = self.state.comment_page(query.get("note_id", [""])[0], query.get("cursor", [""])[0])
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self._send("api", body, "application/json; charset=utf-8")
+        elif path.startswith("/avatar/"):
+            self._send("avatar", AVATAR_BYTES, "image/png")
+        elif path.startswith("/media/"):
+            self._send_media(path)
+        else:
+            self.send_error(404)
+
+    def do_HEAD(self):
+        # 只有静态资源响应 HEAD（抓取服务据此估计拦截节省的字节数）
+        path = urlsplit(self.path).path
+        if path.startswith("/avatar/"):
+            self._send("avatar", AVATAR_BYTES, "image/png")
+        elif path.startswith("/media/"):
+            self._send_media(path)
+        else:
+            self.send_error(404)
+
+
+def start_stub_server(n_comments: int = 200, seed: int = 42, page_size: int = 10,
+                      latency: float = 0.0, port: int = 0, jitter: float = 0.0, media: bool = False) -> tuple:
+    """
+    在后台线程启动桩服务
+
+    Returns:
+        (server, base_url, state)
+    """
+    state = StubState(n_comments, seed, page_size, latency, jitter, media)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地评论接口桩服务")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--comments", type=int, default=200, help="每个笔记的一级评论数")
+    parser.add_argument("--page-size", type=int, default=10, help="每页评论数")
+    parser.add_argument("--latency", type=float, default=0.0, help="接口响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="接口响应随机附加延迟上限（秒）")
+    parser.add_argument("--media", action="store_true", help="笔记页带封面图、视频和网页字体")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stub_server(args.comments, page_size=args.page_size, latency=args.latency,
+                                            port=args.port, jitter=args.jitter, media=args.media)
+    print(f"桩服务已启动: {base_url}/explore/note0")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+基准测试套件
+在合成语料（corpus.py，1k / 100k / 1m 条）上逐项测量 评论提取（接口 / DOM）、评论 Excel 写出和
+analyze_keywords 的各个阶段（读取、模型加载、分词、情感打分、词频统计、端到端），
+每项在独立子进程中运行，记录耗时、吞吐（条/秒）和峰值 RSS，追加到 JSON 历史文件；
+compare 对比历史中的两次运行，耗时或内存超出阈值的项标为回归并以非零状态退出
+
+    python benchmarks/suite.py run --size 100k
+    python benchmarks/suite.py compare
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import SIZES, iter_api_comments, parse_size, write_corpus
+
+DEFAULT_HISTORY = BENCH_DIR / "history.json"
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "xhs-bench-corpus"
+
+# 语料生成逻辑变化时递增，使缓存的语料文件重新生成
+CORPUS_VERSION = 1
+
+# DOM 提取的评论数上限（整页 DOM 过大时浏览器本身成为瓶颈）/ 常规模式 Excel 的评论数上限（内存随行数增长）
+DOM_LIMIT = 5000
+CLASSIC_EXCEL_LIMIT = 200000
+
+# 接口分页大小（与小红书评论接口一致）
+API_PAGE_SIZE = 20
+
+# 默认回归阈值：耗时增加超过 10%（且超过 0.05 秒）、峰值内存增加超过 20%
+DEFAULT_TIME_THRESHOLD = 0.10
+DEFAULT_RSS_THRESHOLD = 0.20
+MIN_TIME_DELTA = 0.05
+
+CASES = {
+    "extract_network": "提取·接口解析",
+    "extract_dom": "提取·DOM（夹具页）",
+    "save_excel": "评论 Excel（常规）",
+    "save_excel_fast": "评论 Excel（--fast）",
+    "analyze_read": "分析·读取评论",
+    "analyze_models": "分析·加载模型",
+    "analyze_tokenize": "分析·分词",
+    "analyze_sentiment": "分析·情感打分",
+    "analyze_count": "分析·词频统计",
+    "analyze_total": "分析·端到端",
+}
+
+
+class Skipped(Exception):
+    """当前环境无法运行的测试项（缺少依赖或超出规模上限）"""
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值 RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，Linux 以 KB 计
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def corpus_file(data_dir: Path, n_comments: int, seed: int) -> Path:
+    """生成（或复用已生成的）语料文件"""
+    path = data_dir / f"corpus-v{CORPUS_VERSION}-{n_comments}-{seed}.jsonl"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp.jsonl")
+        write_corpus(tmp, n_comments, seed)
+        tmp.replace(path)
+    return path
+
+
+def iter_chunk_items(json_path: str):
+    """语料按分析块切分，[(序号, 内容, 点赞数, None, 权重), ...]"""
+    from comment_io import iter_comments
+    from text_analysis import iter_chunks
+
+    return iter_chunks(iter_comments(json_path))
+
+
+# ===== 各测试项：返回 (处理条数, 计时秒数) =====
+
+def case_extract_network(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    """接口模式：逐页解析评论接口 JSON 并转为评论记录，经抓取会话去重、写入检查点（页面数据在计时外生成）"""
+    from checkpoint import CrawlSession
+    from network_capture import build_record_from_api, parse_comment_page
+
+    session = CrawlSession("https://www.xiaohongshu.com/explore/bench", checkpoint=str(tmp / "extract.jsonl"))
+    comments = iter_api_comments(n_comments, seed)
+    seconds = 0.0
+    count = 0
+    while True:
+        page = [c for _, c in zip(range(API_PAGE_SIZE), comments)]
+        if not page:
+            break
+        body = json.dumps({"code": 0, "data": {"comments": page, "cursor": str(count), "has_more": True}},
+                          ensure_ascii=False)
+        start = time.perf_counter()
+        items, _, _ = parse_comment_page(json.loads(body))
+        session.add([build_record_from_api(item, count + i + 1) for i, item in enumerate(items)])
+        seconds += time.perf_counter() - start
+        count += len(items)
+    session.close()
+    return count, seconds
+
+
+def case_extract_dom(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    """DOM 模式：在夹具笔记页上批量提取评论（最多 DOM_LIMIT 条）"""
+    import asyncio
+    from importlib.util import find_spec
+
+    if find_spec("playwright") is None:
+        raise Skipped("未安装 playwright")
+    from corpus import write_site
+    from dom_extract import extract_comments_batch
+
+    limit = min(n_comments, DOM_LIMIT)
+    page_path = next((write_site(tmp / "site", limit, 1, seed) / "explore").glob("*.html"))
+
+    async def measure():
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(headless=True)
+            except Exception as e:
+                raise Skipped(f"无法启动 Chromium: {str(e).splitlines()[0]}")
+            page = await browser.new_page()
+            await page.goto(page_path.as_uri())
+            start = time.perf_counter()
+            comments = await extract_comments_batch(page)
+            seconds = time.perf_counter() - start
+            await browser.close()
+            return len(comments), seconds
+
+    return asyncio.run(measure())
+
+
+def case_save_excel(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    if n_comments > CLASSIC_EXCEL_LIMIT:
+        raise Skipped(f"常规模式只测 {CLASSIC_EXCEL_LIMIT} 条以内")
+    from save_to_excel import save_to_excel
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_to_excel(json_path, str(tmp / "comments.xlsx"))
+    return n_comments, time.perf_counter() - start
+
+
+def case_save_excel_fast(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    from save_to_excel import save_to_excel_fast
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_to_excel_fast(json_path, str(tmp / "comments.xlsx"))
+    return n_comments, time.perf_counter() - start
+
+
+def case_analyze_read(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    from comment_io import iter_comments
+
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_comments(json_path))
+    return count, time.perf_counter() - start
+
+
+def case_analyze_models(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    """jieba 词典与情感模型加载（受 XHS_MODEL_CACHE 启动缓存影响）"""
+    from text_analysis import init_models
+
+    start = time.perf_counter()
+    init_models(quiet=True)
+    return 1, time.perf_counter() - start
+
+
+def case_analyze_tokenize(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    import text_analysis
+
+    text_analysis.init_models(sentiment=False, quiet=True)
+    seconds = 0.0
+    count = 0
+    for chunk in iter_chunk_items(json_path):
+        start = time.perf_counter()
+        for item in chunk:
+            text_analysis._token_cache.get(item[1])
+        seconds += time.perf_counter() - start
+        count += len(chunk)
+    return count, seconds
+
+
+def case_analyze_sentiment(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    import text_analysis
+
+    text_analysis.init_models(quiet=True)
+    seconds = 0.0
+    count = 0
+    for chunk in iter_chunk_items(json_path):
+        contents = [item[1] for item in chunk if item[1]]
+        start = time.perf_counter()
+        text_analysis._scorer.score(contents)
+        seconds += time.perf_counter() - start
+        count += len(contents)
+    return count, seconds
+
+
+def case_analyze_count(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    """词频、TF-IDF、情感分布、痛点词统计与合并（分词和打分结果在计时外算好，作为缓存结果传入）"""
+    import text_analysis
+
+    text_analysis.init_models(quiet=True)
+    stats = text_analysis.ChunkStats()
+    seconds = 0.0
+    count = 0
+    for chunk in iter_chunk_items(json_path):
+        tokens = [text_analysis._token_cache.get(item[1]) for item in chunk]
+        scores, _ = text_analysis._scorer.score([item[1] or " " for item in chunk])
+        items = [(seq, content, likes, (t, s), weight)
+                 for (seq, content, likes, _, weight), t, s in zip(chunk, tokens, scores)]
+        start = time.perf_counter()
+        stats.merge(text_analysis.analyze_chunk(items))
+        seconds += time.perf_counter() - start
+        count += len(chunk)
+    return count, seconds
+
+
+def case_analyze_total(json_path: str, n_comments: int, seed: int, tmp: Path) -> tuple:
+    """analyze_keywords 端到端（含模型加载和写出 Excel）"""
+    from analyze_keywords import analyze_keywords
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyze_keywords(json_path, str(tmp / "analysis.xlsx"))
+    return n_comments, time.perf_counter() - start
+
+
+def run_case(name: str, json_path: str, n_comments: int, seed: int) -> dict:
+    """在当前（子）进程中运行一个测试项"""
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            items, seconds = globals()[f"case_{name}"](json_path, n_comments, seed, Path(tmp))
+        except Skipped as e:
+            return {"skipped": str(e)}
+    return {"items": items, "seconds": seconds, "throughput": items / seconds if seconds > 0 else 0.0,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_history(path: Path) -> list:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_history(path: Path, history: list):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def command_run(args) -> int:
+    n_comments = parse_size(args.size)
+    names = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        print(f"错误: 未知的测试项 {', '.join(unknown)}（可选: {', '.join(CASES)}）")
+        return 2
+
+    data_dir = Path(args.data_dir)
+    print(f"📥 准备语料: {n_comments} 条（种子 {args.seed}）")
+    json_path = corpus_file(data_dir, n_comments, args.seed)
+
+    results = {}
+    print(f"{'测试项':<22}{'条数':>10}{'耗时(s)':>10}{'条/秒':>12}{'峰值RSS(MB)':>13}")
+    for name in names:
+        output = subprocess.run([sys.executable, __file__, "case", name, str(json_path), str(n_comments),
+                                 str(args.seed)], capture_output=True, text=True)
+        if output.returncode != 0:
+            error = (output.stderr.strip().splitlines() or ["未知错误"])[-1]
+            results[name] = {"error": error}
+            print(f"{CASES[name]:<22}❌ {error}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        results[name] = result
+        if "skipped" in result:
+            print(f"{CASES[name]:<22}⚠️ 跳过: {result['skipped']}")
+            continue
+        print(f"{CASES[name]:<22}{result['items']:>10}{result['seconds']:>10.2f}"
+              f"{result['throughput']:>12.0f}{result['peak_rss_mb']:>13.0f}")
+
+    entry = {"time": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+             "host": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count(),
+             "size": args.size, "comments": n_comments, "seed": args.seed, "results": results}
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    history.append(entry)
+    save_history(history_path, history)
+    print(f"\n📄 已追加到历史记录: {history_path}（第 {len(history)} 次运行）")
+    failed = [name for name, r in results.items() if "error" in r]
+    return 1 if failed else 0
+
+
+def pick_runs(history: list, base: int = None, head: int = None) -> tuple:
+    """
+    选出对比的两次运行：head 默认最后一次，base 默认同规模、同主机的上一次
+
+    Returns:
+        (base 序号, head 序号)，找不到可对比的运行时 base 为 None
+    """
+    head = len(history) - 1 if head is None else head % len(history)
+    if base is not None:
+        return base % len(history), head
+    for i in range(head - 1, -1, -1):
+        if (history[i]["comments"], history[i].get("host")) == (history[head]["comments"], history[head].get("host")):
+            return i, head
+    return None, head
+
+
+def compare_runs(base: dict, head: dict, time_threshold: float, rss_threshold: float) -> list:
+    """
+    Returns:
+        [{case, base, head, time_change, rss_change, regression}, ...]
+    """
+    rows = []
+    for name in CASES:
+        old, new = base["results"].get(name), head["results"].get(name)
+        if not old or not new or "seconds" not in old or "seconds" not in new:
+            continue
+        time_change = (new["seconds"] - old["seconds"]) / old["seconds"] if old["seconds"] > 0 else 0.0
+        rss_change = (new["peak_rss_mb"] - old["peak_rss_mb"]) / old["peak_rss_mb"] if old["peak_rss_mb"] else 0.0
+        slower = time_change > time_threshold and new["seconds"] - old["seconds"] > MIN_TIME_DELTA
+        rows.append({"case": name, "base": old, "head": new, "time_change": time_change, "rss_change": rss_change,
+                     "regression": slower or rss_change > rss_threshold})
+    return rows
+
+
+def command_compare(args) -> int:
+    history = load_history(Path(args.history))
+    if not history:
+        print(f"错误: 历史记录为空: {args.history}")
+        return 2
+    base, head = pick_runs(history, args.base, args.head)
+    if base is None:
+        print("⚠️ 没有同规模的上一次运行可对比")
+        return 0
+    old, new = history[base], history[head]
+    print(f"对比 #{base + 1}（{old['time']} {old.get('commit', '')}）→ "
+          f"#{head + 1}（{new['time']} {new.get('commit', '')}），{new['comments']} 条评论")
+    if (old["comments"], old.get("host")) != (new["comments"], new.get("host")):
+        print("⚠️ 两次运行的规模或主机不同，结果仅供参考")
+
+    rows = compare_runs(old, new, args.threshold, args.rss_threshold)
+    print(f"{'测试项':<22}{'原耗时(s)':>10}{'现耗时(s)':>10}{'变化':>9}{'原RSS':>9}{'现RSS':>9}{'变化':>9}")
+    for row in rows:
+        flag = "  ⚠️ 回归" if row["regression"] else ""
+        print(f"{CASES[row['case']]:<22}{row['base']['seconds']:>10.2f}{row['head']['seconds']:>10.2f}"
+              f"{row['time_change']:>+9.0%}{row['base']['peak_rss_mb']:>9.0f}{row['head']['peak_rss_mb']:>9.0f}"
+              f"{row['rss_change']:>+9.0%}{flag}")
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"❌ {len(regressions)} 项回归（耗时阈值 +{args.threshold:.0%}，内存阈值 +{args.rss_threshold:.0%}）")
+        return 1
+    print("✅ 没有回归")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试套件")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="运行测试并追加到历史记录")
+    run.add_argument("--size", default="1k", help=f"语料规模，预设 {' / '.join(SIZES)} 或整数")
+    run.add_argument("--seed", type=int, default=42, help="语料随机种子")
+    run.add_argument("--cases", help=f"只运行部分测试项（逗号分隔）：{', '.join(CASES)}")
+    run.add_argument("--history", default=str(DEFAULT_HISTORY), help="历史记录 JSON 文件")
+    run.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR), help="语料缓存目录")
+
+    compare = sub.add_parser("compare", help="对比历史记录中的两次运行，标出回归")
+    compare.add_argument("--history", default=str(DEFAULT_HISTORY), help="历史记录 JSON 文件")
+    compare.add_argument("--base", type=int, help="基准运行的序号（从 0 起，负数从末尾数），默认同规模的上一次")
+    compare.add_argument("--head", type=int, help="对比运行的序号，默认最后一次")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_TIME_THRESHOLD, help="耗时回归阈值（比例）")
+    compare.add_argument("--rss-threshold", type=float, default=DEFAULT_RSS_THRESHOLD, help="峰值内存回归阈值（比例）")
+
+    case = sub.add_parser("case")
+    case.add_argument("name", choices=list(CASES))
+    case.add_argument("json_path")
+    case.add_argument("comments", type=int)
+    case.add_argument("seed", type=int)
+
+    args = parser.parse_args()
+    if args.command == "case":
+        print(json.dumps(run_case(args.name, args.json_path, args.comments, args.seed)))
+        return 0
+    return command_run(args) if args.command == "run" else command_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+逐条评论分析结果的持久化缓存（SQLite）
+以 评论内容 + 分析器指纹 的哈希为键，保存分词结果和情感得分；重复分析相同评论时直接读取。
+分析器指纹包含分析器版本、jieba / SnowNLP 版本、停用词和情感阈值，任一变化时自动清空旧缓存；
+总大小超出上限时按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+# 默认缓存文件
+DEFAULT_CACHE_PATH = Path.home() / ".xhs-analysis-cache.sqlite"
+
+# 默认大小上限（MB）
+DEFAULT_CACHE_MB = 256
+
+# 单条 SQL 查询的最大参数数
+MAX_SQL_PARAMS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tokens TEXT NOT NULL,
+    score REAL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def package_version(name: str) -> str:
+    """已安装包的版本号，未安装时返回空字符串"""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return ""
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return ""
+
+
+def analyzer_fingerprint() -> str:
+    """分析器指纹：分析器版本、模型版本、停用词、情感阈值"""
+    import text_analysis
+
+    parts = {
+        "analyzer": text_analysis.ANALYZER_VERSION,
+        "jieba": package_version("jieba"),
+        "snownlp": package_version("snownlp"),
+        "stopwords": sorted(text_analysis.STOPWORDS),
+        "thresholds": [text_analysis.POSITIVE_THRESHOLD, text_analysis.NEGATIVE_THRESHOLD],
+    }
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    评论分析缓存
+
+    只在主进程中读写：每块评论分析前批量查询，工作进程只计算未命中的评论，
+    新结果由主进程写回。
+    """
+
+    def __init__(self, path: str = None, max_mb: float = DEFAULT_CACHE_MB, fingerprint: str = None):
+        """
+        Args:
+            path: 缓存文件路径，默认 ~/.xhs-analysis-cache.sqlite
+            max_mb: 缓存大小上限（MB，按条目数据量估算）
+            fingerprint: 分析器指纹，默认由 analyzer_fingerprint() 计算
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.fingerprint = fingerprint or analyzer_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self.invalidated = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.executescript(SCHEMA)
+        self._check_fingerprint()
+
+        # 本次运行序号，作为条目的最近使用时间
+        self.run = int(self._meta("run") or 0) + 1
+        self._set_meta("run", str(self.run))
+        self.db.commit()
+
+    def _meta(self, key: str) -> str:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _check_fingerprint(self):
+        """分析器、停用词或阈值变化时清空旧条目"""
+        previous = self._meta("fingerprint")
+        if previous == self.fingerprint:
+            return
+        if previous is not None:
+            self.invalidated = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            self.db.execute("DELETE FROM entries")
+            print(f"⚠️ 分析器、停用词或情感阈值已变化，清空 {self.invalidated} 条旧缓存")
+        self._set_meta("fingerprint", self.fingerprint)
+
+    def key(self, content: str) -> str:
+        """缓存键：分析器指纹 + 评论内容的哈希"""
+        return hashlib.sha1(f"{self.fingerprint}\x1f{content}".encode("utf-8")).hexdigest()
+
+    def lookup(self, contents: list) -> list:
+        """
+        批量查询
+
+        Returns:
+            与 contents 对应的列表，命中为 (分词列表, 情感得分)，未命中为 None
+        """
+        keys = [self.key(c) for c in contents]
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), MAX_SQL_PARAMS):
+            batch = unique[i:i + MAX_SQL_PARAMS]
+            rows = self.db.execute(
+                f"SELECT key, tokens, score FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for key, tokens, score in rows:
+                found[key] = (json.loads(tokens), score)
+
+        if found:
+            self.db.executemany("UPDATE entries SET used = ? WHERE key = ? AND used != ?",
+                                [(self.run, key, self.run) for key in found])
+
+        results = [found.get(key) for key in keys]
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def store(self, entries: list):
+        """
+        写入新分析结果
+
+        Args:
+            entries: [(评论内容, 分词列表, 情感得分或 None), ...]
+        """
+        rows = {}
+        for content, tokens, score in entries:
+            key = self.key(content)
+            data = json.dumps(tokens, ensure_ascii=False)
+            rows[key] = (key, data, score, len(key) + len(data.encode("utf-8")) + 16, self.run)
+        rows = list(rows.values())
+        self.db.executemany(
+            "INSERT OR REPLACE INTO entries (key, tokens, score, size, used) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self.db.commit()
+        self.stored += len(rows)
+
+    def evict(self):
+        """超出大小上限时按最近使用时间淘汰，直到降到上限的 90%"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        removed = []
+        freed = 0
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY used"):
+            removed.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self.db.executemany("DELETE FROM entries WHERE key = ?", removed)
+        self.evicted += len(removed)
+
+    def stats(self) -> dict:
+        row = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+            "entries": row[0],
+            "mb": round(row[1] / 1024 / 1024, 2)
+        }
+
+    def close(self):
+        """淘汰超限条目并提交"""
+        self.evict()
+        self.db.commit()
+        self.db.close()
+
+    def summary(self) -> str:
+        """本次运行的缓存统计"""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / lookups * 100 if lookups else 0
+        return (f"命中 {stats['hits']} / 未命中 {stats['misses']}（命中率 {rate:.1f}%），"
+                f"新增 {stats['stored']} 条，淘汰 {stats['evicted']} 条，"
+                f"共 {stats['entries']} 条 / {stats['mb']} MB")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+常驻分析服务
+在本机 HTTP 端口（只监听 127.0.0.1）上常驻一个进程，jieba 词典、IDF 表、情感模型和 openpyxl 只加载一次；
+analyze_keywords.py 启动时若发现服务在运行且代码版本一致，就把任务交给服务执行，否则在本进程中分析。
+连接信息（端口、令牌、代码版本）写在状态文件中（默认 ~/.xhs-analysis-daemon.json，可用环境变量
+XHS_ANALYSIS_DAEMON 指定），请求需携带令牌
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import secrets
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+
+# 默认状态文件
+DEFAULT_STATE_PATH = Path.home() / ".xhs-analysis-daemon.json"
+
+# 默认空闲退出时间（秒）
+DEFAULT_IDLE_TIMEOUT = 3600
+
+# 客户端等待服务响应的超时（秒）：连接超时短，分析本身不限时
+CONNECT_TIMEOUT = 0.5
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def state_path() -> Path:
+    return Path(os.environ.get("XHS_ANALYSIS_DAEMON") or DEFAULT_STATE_PATH)
+
+
+def code_version() -> str:
+    """脚本代码版本（各脚本的修改时间和大小），代码更新后旧服务不再被使用"""
+    digest = hashlib.sha1()
+    for path in sorted(SCRIPTS_DIR.glob("*.py")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_state():
+    path = state_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def request(state: dict, method: str, path: str, payload: dict = None, timeout: float = None) -> tuple:
+    """向服务发送请求，返回 (状态码, 响应字典)"""
+    import http.client
+
+    conn = http.client.HTTPConnection("127.0.0.1", state["port"], timeout=CONNECT_TIMEOUT)
+    try:
+        conn.connect()
+        conn.sock.settimeout(timeout)
+        body = json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+        conn.request(method, path, body=body, headers={
+            "Content-Type": "application/json",
+            "X-Token": state["token"]
+        })
+        response = conn.getresponse()
+        return response.status, json.loads(response.read().decode("utf-8") or "{}")
+    finally:
+        conn.close()
+
+
+def run_remote(params: dict):
+    """
+    尝试把分析任务交给常驻服务
+
+    Args:
+        params: analyze_keywords 的参数（路径需为绝对路径）
+
+    Returns:
+        {"result": 分析结果, "output": 服务端输出}；服务未运行、版本不一致或出错时返回 None（调用方改为本进程分析）
+    """
+    state = read_state()
+    if not state or state.get("version") != code_version():
+        return None
+    try:
+        status, data = request(state, "POST", "/analyze", params)
+    except OSError:
+        return None
+    if status != 200:
+        print(f"⚠️ 常驻分析服务出错，改为本进程分析: {data.get('error', status)}")
+        return None
+    sys.stdout.write(data["output"])
+    return data
+
+
+class AnalysisServer:
+    """常驻分析服务：串行执行任务，空闲超时后自动退出"""
+
+    def __init__(self, port: int = 0, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Args:
+            port: 监听端口，0 表示自动分配
+            idle_timeout: 空闲多少秒后退出，<= 0 表示不退出
+        """
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        self.idle_timeout = idle_timeout
+        self.token = secrets.token_hex(16)
+        self.version = code_version()
+        self.jobs = 0
+        self.last_active = time.monotonic()
+        self.running = True
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, data: dict):
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self):
+                if self.headers.get("X-Token") != server.token:
+                    return self._reply(403, {"error": "令牌无效"})
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                status, data = server.dispatch(self.command, self.path, payload)
+                self._reply(status, data)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self.httpd = HTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.timeout = 1.0
+        self.port = self.httpd.server_address[1]
+
+    def dispatch(self, method: str, path: str, payload: dict) -> tuple:
+        self.last_active = time.monotonic()
+        if path == "/status":
+            return 200, {"pid": os.getpid(), "port": self.port, "jobs": self.jobs, "version": self.version}
+        if path == "/shutdown" and method == "POST":
+            self.running = False
+            return 200, {"stopped": True}
+        if path == "/analyze" and method == "POST":
+            return self.analyze(payload)
+        return 404, {"error": f"未知请求: {method} {path}"}
+
+    def analyze(self, params: dict) -> tuple:
+        from analyze_keywords import analyze_keywords
+        from comment_store import StoreQuery
+
+        params = dict(params)
+        if isinstance(params.get("json_path"), dict):
+            params["json_path"] = StoreQuery(**params["json_path"])
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                result = analyze_keywords(**params)
+        except Exception:
+            return 500, {"error": traceback.format_exc(limit=3)}
+        self.jobs += 1
+        self.last_active = time.monotonic()
+        return 200, {"result": result, "output": output.getvalue()}
+
+    def warm_up(self):
+        """预先加载全部模型和依赖"""
+        from text_analysis import init_models
+
+        from importlib.util import find_spec
+
+        init_models(sentiment=bool(find_spec("numpy") and find_spec("snownlp")), quiet=True)
+        from model_cache import tfidf_model
+        tfidf_model()
+        import openpyxl  # noqa: F401
+
+    def serve(self):
+        path = state_path()
+        state = {"pid": os.getpid(), "port": self.port, "token": self.token, "version": self.version}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        print(f"✅ 常驻分析服务已启动: 127.0.0.1:{self.port}（pid {os.getpid()}）", flush=True)
+        try:
+            while self.running:
+                self.httpd.handle_request()
+                if self.idle_timeout > 0 and time.monotonic() - self.last_active > self.idle_timeout:
+                    print("空闲超时，退出")
+                    break
+        finally:
+            self.httpd.server_close()
+            current = read_state()
+            if current and current.get("pid") == os.getpid():
+                path.unlink()
+
+
+def wait_ready(timeout: float = 30.0) -> dict:
+    """等待服务就绪，返回其状态"""
+    deadline = time.monotonic() + timeout
+    version = code_version()
+    while time.monotonic() < deadline:
+        state = read_state()
+        if state and state.get("version") == version:
+            try:
+                status, data = request(state, "GET", "/status")
+                if status == 200:
+                    return data
+            except OSError:
+                pass
+        time.sleep(0.2)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻分析服务")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_start = sub.add_parser("start", help="启动服务")
+    p_start.add_argument("--port", type=int, default=0, help="监听端口（默认自动分配）")
+    p_start.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                         help="空闲多少秒后自动退出（0 不退出）")
+    p_start.add_argument("--foreground", action="store_true", help="在前台运行（默认转入后台）")
+    sub.add_parser("status", help="查看服务状态")
+    sub.add_parser("stop", help="停止服务")
+    args = parser.parse_args()
+
+    state = read_state()
+    if args.command == "start":
+        if state and wait_ready(timeout=0.5):
+            print(f"服务已在运行: 127.0.0.1:{state['port']}（pid {state['pid']}）")
+            return
+        if not args.foreground:
+            subprocess.Popen([sys.executable, __file__, "start", "--foreground", "--port", str(args.port),
+                              "--idle-timeout", str(args.idle_timeout)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            info = wait_ready()
+            if info:
+                print(f"✅ 常驻分析服务已启动: 127.0.0.1:{info['port']}（pid {info['pid']}）")
+            else:
+                print("❌ 服务启动超时")
+            return
+        server = AnalysisServer(args.port, args.idle_timeout)
+        server.warm_up()
+        server.serve()
+        return
+
+    if not state:
+        print("服务未运行")
+        return
+    try:
+        if args.command == "status":
+            status, data = request(state, "GET", "/status")
+            current = "一致" if data.get("version") == code_version() else "已过期（代码已更新，将不被使用）"
+            print(f"服务运行中: 127.0.0.1:{data['port']}（pid {data['pid']}），已完成 {data['jobs']} 个任务，"
+                  f"代码版本{current}")
+        else:
+            request(state, "POST", "/shutdown")
+            print("✅ 服务已停止")
+    except OSError:
+        print("服务未运行（状态文件已过期）")
+        state_path().unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+分析结果文件
+analyze_keywords 把一次分析的全部输出（词频、TF-IDF 权重、情感汇总与明细、痛点词、高赞评论，以及聚类、
+去重、抽样等可选部分）写成一个带版本号的 JSON（默认与输出 Excel 同名的 .result.json）；
+分析结果 Excel、词云图和调研报告都由它生成（见 render_report），换参数重新生成时不必重新分析
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+# 结果文件格式版本：字段含义变化时递增，旧版本文件需重新分析
+RESULT_VERSION = 1
+
+# 结果文件保留的高频词 / TF-IDF 关键词 / 痛点词数（词云可用的词数上限）
+RESULT_WORDS = 200
+
+# 保留的高赞评论数
+TOP_LIKED = 20
+
+# 高赞评论保留的内容长度
+TOP_LIKED_CHARS = 200
+
+
+class TopLiked:
+    """
+    记录点赞最高的评论（昵称、内容、点赞数、时间）的评论源包装，提供与 comment_store.StoreQuery 相同的
+    read_header() / iter_comments() 接口
+
+    只在第一次完整读取时记录，多遍读取的评论源（如抽样分析的扫描与分析两遍）不会重复计入
+    """
+
+    def __init__(self, source, limit: int = TOP_LIKED):
+        self.source = source
+        self.limit = limit
+        self.heap = []  # 小顶堆 (点赞数, -序号, 评论)
+        self.complete = False
+
+    def read_header(self) -> dict:
+        from comment_io import read_header
+        return read_header(self.source)
+
+    def iter_comments(self):
+        from comment_io import iter_comments
+
+        if self.complete:
+            yield from iter_comments(self.source)
+            return
+        heap = self.heap = []
+        limit = self.limit
+        for seq, comment in enumerate(iter_comments(self.source)):
+            likes = comment.get("likes") or 0
+            if len(heap) < limit or likes > heap[0][0]:
+                item = (likes, -seq, {"nickname": comment.get("nickname", ""),
+                                      "content": (comment.get("content") or "")[:TOP_LIKED_CHARS],
+                                      "likes": likes, "time": comment.get("time", "")})
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heapreplace(heap, item)
+            yield comment
+        self.complete = True
+
+    def comments(self) -> list:
+        """按点赞数降序（同赞按原顺序）"""
+        return [row for _, _, row in sorted(self.heap, key=lambda x: x[:2], reverse=True)]
+
+
+def result_path(output_path) -> Path:
+    """分析结果 Excel 对应的结果文件路径"""
+    return Path(output_path).with_suffix(".result.json")
+
+
+def build_result(stats, keywords_tfidf: list, header: dict = None, top_liked: list = None, clustering: dict = None,
+                 deduped=None, sampler=None, sketch_capacity: int = None, replies: int = None,
+                 options: dict = None, n_words: int = RESULT_WORDS) -> dict:
+    """
+    由合并后的统计结果（text_analysis.ChunkStats）生成结果字典
+
+    词频类条目为 [词, 次数, 误差]：近似计数时误差为最大高估，抽样分析时为 ±95% 误差，精确统计时为 null
+
+    Args:
+        stats: 合并后的统计结果（抽样分析时为估计值）
+        keywords_tfidf: TF-IDF 关键词 [(词, 权重), ...]
+        header: 帖子信息（url / title / crawl_time）
+        top_liked: 高赞评论（见 TopLiked.comments）
+        clustering: 痛点聚类结果（见 pain_clusters.cluster_pain_points）
+        deduped: 去重结果（dedup.DedupedComments）
+        sampler: 抽样分析（sampling.StratifiedSample）
+        sketch_capacity: 近似计数的容量，None 表示精确计数
+        replies: 计入分析的回复数
+        options: 分析参数（写入结果文件备查）
+        n_words: 保留的高频词 / 痛点词数
+    """
+    from text_analysis import ANALYZER_VERSION
+
+    def counts(counter, attr: str) -> list:
+        rows = []
+        for word, count in counter.most_common(n_words):
+            if sampler:
+                error = round(sampler.count_error(attr, word), 1)
+            elif sketch_capacity:
+                error = counter.error(word)
+            else:
+                error = None
+            rows.append([word, count, error])
+        return rows
+
+    return {
+        "version": RESULT_VERSION,
+        "analyzer_version": ANALYZER_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "post": header or {},
+        "options": options or {},
+        "total_comments": stats.total,
+        "word_total": stats.word_total,
+        "count_error": "sample" if sampler else ("sketch" if sketch_capacity else None),
+        "sketch_error_bound": round(stats.word_counts.error_bound, 1) if sketch_capacity else None,
+        "top_words": counts(stats.word_counts, "word_counts"),
+        "keywords_tfidf": [[word, round(weight, 6)] for word, weight in keywords_tfidf],
+        "sentiment_counts": {label: stats.sentiment_counts.get(label, 0) for label in ("正面", "中性", "负面")},
+        "sentiment_hist": list(stats.sentiment_hist),
+        "sentiments": stats.sentiments(),
+        "sentiment_failures": stats.failure_count,
+        "pain_words": counts(stats.pain_words, "pain_words"),
+        "top_liked": top_liked or [],
+        "replies": replies,
+        "pain_clusters": clustering,
+        "duplicates": {"summary": deduped.summary(), "groups": deduped.duplicate_groups(),
+                       "drop_spam": deduped.drop_spam} if deduped else None,
+        "approximate": {"population": sampler.population, "analyzed": sampler.analyzed,
+                        "stop_reason": sampler.stop_reason, "seconds": round(sampler.seconds, 2),
+                        "intervals": sampler.intervals(), "strata": sampler.strata_rows(),
+                        "summary": sampler.summary()} if sampler else None
+    }
+
+
+def save_result(result: dict, path) -> Path:
+    """写出结果文件（先写临时文件再改名）"""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, output)
+    return output
+
+
+def load_result(path) -> dict:
+    """读取结果文件，版本不符时抛出 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    if not isinstance(result, dict) or result.get("version") != RESULT_VERSION:
+        version = result.get("version") if isinstance(result, dict) else None
+        raise ValueError(f"结果文件版本 {version} 不受支持（需要 {RESULT_VERSION}），请重新运行 analyze_keywords.py")
+    return result
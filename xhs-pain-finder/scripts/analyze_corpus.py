@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+多帖子汇总分析（map-reduce）
+每个评论文件并行分析为一份可序列化的部分结果（词频、文档频率、情感直方图、高赞评论），
+部分结果可按任意分组、任意顺序合并为全量报告，并附逐帖对比表。
+部分结果和汇总结果保存在目录中：文件内容和分析器都未变化时直接复用，新增帖子只需分析该帖子并并入汇总
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+from collections import Counter
+from importlib.util import find_spec
+from pathlib import Path
+
+from analysis_cache import analyzer_fingerprint
+from comment_io import iter_comments, list_comment_files, read_header
+from text_analysis import (SENTIMENT_BINS, TOP_SENTIMENTS, ChunkStats, init_models,
+                           iter_chunk_stats, tfidf_from_counts)
+
+# 部分结果的格式版本
+PARTIAL_VERSION = 1
+
+# 部分结果的默认保存目录
+DEFAULT_PARTIALS_DIR = ".xhs-partials"
+
+# 逐帖对比表中每篇帖子保留的高频词 / 痛点词数
+POST_TOP_WORDS = 20
+
+
+def file_signature(path: str) -> str:
+    """文件内容签名（大小 + SHA1），内容不变时签名不变"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{Path(path).stat().st_size}-{digest.hexdigest()}"
+
+
+def ranked(counter: Counter, n: int = None) -> list:
+    """按计数降序、同计数按词排序（与合并顺序无关）"""
+    items = sorted(counter.items(), key=lambda x: (-x[1], x[0]))
+    return items if n is None else items[:n]
+
+
+class CorpusPartial:
+    """
+    一篇或多篇帖子的部分结果
+
+    计数器直接相加，高赞评论按 (点赞数, 帖子, 序号) 取 TOP，帖子集合不相交，
+    因此合并满足结合律和交换律；报告中的排名按 (计数, 词) 排序，与合并顺序无关。
+    """
+
+    def __init__(self, fingerprint: str = None):
+        self.fingerprint = fingerprint
+        self.posts = {}  # 来源文件 -> 帖子摘要（含文件签名）
+        self.total = 0
+        self.failure_count = 0
+        self.word_counts = Counter()
+        self.doc_freq = Counter()  # 包含该词的评论数
+        self.post_freq = Counter()  # 提到该词的帖子数
+        self.tfidf_freq = Counter()
+        self.pain_words = Counter()
+        self.sentiment_counts = Counter()
+        self.sentiment_hist = [0] * SENTIMENT_BINS
+        self.top_liked = []  # [(点赞数, 来源, 序号, 明细), ...]
+
+    @classmethod
+    def from_stats(cls, source: str, signature: str, header: dict, stats: ChunkStats,
+                   fingerprint: str = None) -> "CorpusPartial":
+        """由一篇帖子的统计结果构建部分结果"""
+        partial = cls(fingerprint)
+        title = header.get("title") or Path(source).stem
+        partial.posts[source] = {
+            "signature": signature,
+            "title": title,
+            "url": header.get("url", ""),
+            "crawl_time": header.get("crawl_time", ""),
+            "comments": stats.total,
+            "sentiment_counts": dict(stats.sentiment_counts),
+            "top_words": ranked(stats.word_counts, POST_TOP_WORDS),
+            "pain_words": ranked(stats.pain_words, POST_TOP_WORDS),
+            "failures": stats.failure_count
+        }
+        partial.total = stats.total
+        partial.failure_count = stats.failure_count
+        partial.word_counts = Counter(stats.word_counts)
+        partial.doc_freq = Counter(stats.doc_freq)
+        partial.post_freq = Counter(dict.fromkeys(stats.word_counts, 1))
+        partial.tfidf_freq = Counter(stats.tfidf_freq)
+        partial.pain_words = Counter(stats.pain_words)
+        partial.sentiment_counts = Counter(stats.sentiment_counts)
+        partial.sentiment_hist = list(stats.sentiment_hist)
+        partial.top_liked = [(likes, source, -neg_seq, dict(row, post=title))
+                             for likes, neg_seq, row in stats.top_sentiments]
+        return partial
+
+    def merge(self, other: "CorpusPartial") -> "CorpusPartial":
+        """并入另一份部分结果（帖子不能重复）"""
+        overlap = self.posts.keys() & other.posts.keys()
+        if overlap:
+            raise ValueError(f"帖子重复合并: {sorted(overlap)[:3]}")
+        if self.fingerprint and other.fingerprint and self.fingerprint != other.fingerprint:
+            raise ValueError("部分结果来自不同版本的分析器，不能合并")
+        self.fingerprint = self.fingerprint or other.fingerprint
+        self.posts.update(other.posts)
+        self.total += other.total
+        self.failure_count += other.failure_count
+        self.word_counts.update(other.word_counts)
+        self.doc_freq.update(other.doc_freq)
+        self.post_freq.update(other.post_freq)
+        self.tfidf_freq.update(other.tfidf_freq)
+        self.pain_words.update(other.pain_words)
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.sentiment_hist = [a + b for a, b in zip(self.sentiment_hist, other.sentiment_hist)]
+        self.top_liked = heapq.nlargest(TOP_SENTIMENTS, self.top_liked + other.top_liked,
+                                        key=lambda x: (x[0], x[1], -x[2]))
+        return self
+
+    def sentiments(self) -> list:
+        """高赞评论情感明细，按点赞数降序"""
+        return [row for *_, row in sorted(self.top_liked, key=lambda x: (-x[0], x[1], x[2]))]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PARTIAL_VERSION,
+            "fingerprint": self.fingerprint,
+            "posts": self.posts,
+            "total": self.total,
+            "failure_count": self.failure_count,
+            "word_counts": self.word_counts,
+            "doc_freq": self.doc_freq,
+            "post_freq": self.post_freq,
+            "tfidf_freq": self.tfidf_freq,
+            "pain_words": self.pain_words,
+            "sentiment_counts": self.sentiment_counts,
+            "sentiment_hist": self.sentiment_hist,
+            "top_liked": self.top_liked
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CorpusPartial":
+        partial = cls(data["fingerprint"])
+        partial.posts = data["posts"]
+        partial.total = data["total"]
+        partial.failure_count = data["failure_count"]
+        for name in ("word_counts", "doc_freq", "post_freq", "tfidf_freq", "pain_words", "sentiment_counts"):
+            setattr(partial, name, Counter(data[name]))
+        partial.sentiment_hist = data["sentiment_hist"]
+        partial.top_liked = [tuple(item) for item in data["top_liked"]]
+        return partial
+
+
+class PartialStore:
+    """
+    部分结果目录
+
+    每篇帖子一个 <来源路径哈希>.json，另有 corpus.json 保存上次的汇总结果；
+    读取时校验格式版本和分析器指纹，不一致视为不存在。
+    """
+
+    def __init__(self, directory: str, fingerprint: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+
+    def _path(self, source: str) -> Path:
+        return self.directory / f"{hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def _read(self, path: Path):
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != PARTIAL_VERSION or data.get("fingerprint") != self.fingerprint:
+            return None
+        return CorpusPartial.from_dict(data)
+
+    def _write(self, path: Path, partial: CorpusPartial):
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(partial.to_dict(), f, ensure_ascii=False)
+        tmp.replace(path)
+
+    def load(self, source: str, signature: str):
+        """读取一篇帖子的部分结果，文件内容变化时返回 None"""
+        partial = self._read(self._path(source))
+        if partial is None or partial.posts.get(source, {}).get("signature") != signature:
+            return None
+        return partial
+
+    def save(self, source: str, partial: CorpusPartial):
+        self._write(self._path(source), partial)
+
+    def load_corpus(self):
+        return self._read(self.directory / "corpus.json")
+
+    def save_corpus(self, corpus: CorpusPartial):
+        self._write(self.directory / "corpus.json", corpus)
+
+
+def analyze_post(source: str, sentiment: bool = True, fingerprint: str = None) -> CorpusPartial:
+    """分析一个评论文件，返回其部分结果（在工作进程中运行）"""
+    stats = ChunkStats()
+    for chunk in iter_chunk_stats(iter_comments(source), sentiment):
+        stats.merge(chunk)
+    return CorpusPartial.from_stats(source, file_signature(source), read_header(source), stats, fingerprint)
+
+
+def build_corpus(files: list, store: PartialStore, sentiment: bool = True, workers: int = 1) -> CorpusPartial:
+    """
+    增量构建汇总结果
+
+    上次的汇总结果中所有帖子都未变化时只并入新增帖子；有帖子被修改或移除时由各帖子的部分结果重新汇总。
+    """
+    signatures = {source: file_signature(source) for source in files}
+
+    corpus = store.load_corpus()
+    if corpus is not None and any(signatures.get(source) != post["signature"]
+                                  for source, post in corpus.posts.items()):
+        print("⚠️ 有帖子被修改或移除，由各帖子的部分结果重新汇总")
+        corpus = None
+    if corpus is None:
+        corpus = CorpusPartial(store.fingerprint)
+
+    missing = [source for source in files if source not in corpus.posts]
+    partials = {}
+    todo = []
+    for source in missing:
+        partial = store.load(source, signatures[source])
+        if partial is None:
+            todo.append(source)
+        else:
+            partials[source] = partial
+
+    print(f"共 {len(files)} 篇帖子: 汇总已包含 {len(files) - len(missing)} 篇，"
+          f"复用部分结果 {len(partials)} 篇，需分析 {len(todo)} 篇")
+
+    for i, (source, partial) in enumerate(_analyze_posts(todo, sentiment, workers, store.fingerprint), 1):
+        store.save(source, partial)
+        partials[source] = partial
+        post = partial.posts[source]
+        print(f"  [{i}/{len(todo)}] {post['title']}: {post['comments']} 条评论")
+
+    for source in missing:
+        corpus.merge(partials[source])
+    if missing:
+        store.save_corpus(corpus)
+    return corpus
+
+
+def _analyze_posts(sources: list, sentiment: bool, workers: int, fingerprint: str):
+    """逐篇产出 (来源, 部分结果)，多进程时按完成顺序产出"""
+    if workers <= 1 or len(sources) <= 1:
+        for source in sources:
+            yield source, analyze_post(source, sentiment, fingerprint)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_models,
+                             initargs=(sentiment, True)) as pool:
+        futures = {pool.submit(analyze_post, source, sentiment, fingerprint): source for source in sources}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def write_corpus_report(corpus: CorpusPartial, output_path: str, top_n: int = 50) -> Path:
+    """生成汇总报告：全量高频词 / TF-IDF / 情感 / 痛点词，以及逐帖对比表"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
+    wb = Workbook()
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="4472C4")
+
+    def write_headers(ws, headers, row=1):
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=row, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+
+    # ===== Sheet 1: 高频词统计 =====
+    ws1 = wb.active
+    ws1.title = "高频词TOP50"
+    write_headers(ws1, ["排名", "词语", "出现次数", "词频占比", "评论数", "帖子数"])
+    total_words = sum(corpus.word_counts.values())
+    for row, (word, count) in enumerate(ranked(corpus.word_counts, top_n), 2):
+        ws1.cell(row=row, column=1, value=row - 1)
+        ws1.cell(row=row, column=2, value=word)
+        ws1.cell(row=row, column=3, value=count)
+        ws1.cell(row=row, column=4, value=f"{count/total_words*100:.2f}%")
+        ws1.cell(row=row, column=5, value=corpus.doc_freq[word])
+        ws1.cell(row=row, column=6, value=corpus.post_freq[word])
+    ws1.column_dimensions["B"].width = 20
+
+    # ===== Sheet 2: TF-IDF 关键词 =====
+    ws2 = wb.create_sheet("TF-IDF关键词")
+    write_headers(ws2, ["排名", "关键词", "权重"])
+    for row, (word, weight) in enumerate(tfidf_from_counts(corpus.tfidf_freq, top_k=20), 2):
+        ws2.cell(row=row, column=1, value=row - 1)
+        ws2.cell(row=row, column=2, value=word)
+        ws2.cell(row=row, column=3, value=round(weight, 4))
+    ws2.column_dimensions["B"].width = 20
+
+    # ===== Sheet 3: 情感分析 =====
+    sentiments = corpus.sentiments()
+    if sentiments:
+        ws3 = wb.create_sheet("情感分析")
+        ws3.cell(row=1, column=1, value="情感分布汇总").font = Font(bold=True)
+        for row, label in enumerate(["正面", "中性", "负面"], 2):
+            ws3.cell(row=row, column=1, value=label)
+            ws3.cell(row=row, column=2, value=corpus.sentiment_counts.get(label, 0))
+
+        ws3.cell(row=1, column=4, value="情感得分分布").font = Font(bold=True)
+        for i, count in enumerate(corpus.sentiment_hist):
+            ws3.cell(row=i + 2, column=4, value=f"{i / SENTIMENT_BINS:.1f}-{(i + 1) / SENTIMENT_BINS:.1f}")
+            ws3.cell(row=i + 2, column=5, value=count)
+
+        start = SENTIMENT_BINS + 3
+        write_headers(ws3, ["评论内容", "情感得分", "情感类型", "点赞数", "帖子"], row=start)
+        for row, s in enumerate(sentiments, start + 1):
+            ws3.cell(row=row, column=1, value=s["content"])
+            ws3.cell(row=row, column=2, value=s["score"])
+            ws3.cell(row=row, column=3, value=s["sentiment"])
+            ws3.cell(row=row, column=4, value=s["likes"])
+            ws3.cell(row=row, column=5, value=s["post"])
+            if s["sentiment"] == "负面":
+                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="FFC7CE")
+            elif s["sentiment"] == "正面":
+                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="C6EFCE")
+        ws3.column_dimensions["A"].width = 60
+        ws3.column_dimensions["E"].width = 30
+
+    # ===== Sheet 4: 痛点关键词 =====
+    if corpus.pain_words:
+        ws4 = wb.create_sheet("痛点关键词")
+        write_headers(ws4, ["排名", "痛点词", "出现次数"])
+        for row, (word, count) in enumerate(ranked(corpus.pain_words, 30), 2):
+            ws4.cell(row=row, column=1, value=row - 1)
+            ws4.cell(row=row, column=2, value=word)
+            ws4.cell(row=row, column=3, value=count)
+        ws4.column_dimensions["B"].width = 20
+
+    # ===== Sheet 5: 逐帖对比 =====
+    posts = sorted(corpus.posts.items(), key=lambda x: (-x[1]["comments"], x[0]))
+    ws5 = wb.create_sheet("帖子概览")
+    write_headers(ws5, ["帖子标题", "评论数", "正面", "中性", "负面", "负面占比",
+                        "高频词 TOP5", "痛点词 TOP5", "链接", "抓取时间"])
+    for row, (source, post) in enumerate(posts, 2):
+        counts = post["sentiment_counts"]
+        scored = sum(counts.values())
+        ws5.cell(row=row, column=1, value=post["title"])
+        ws5.cell(row=row, column=2, value=post["comments"])
+        ws5.cell(row=row, column=3, value=counts.get("正面", 0))
+        ws5.cell(row=row, column=4, value=counts.get("中性", 0))
+        ws5.cell(row=row, column=5, value=counts.get("负面", 0))
+        ws5.cell(row=row, column=6, value=f"{counts.get('负面', 0)/scored*100:.1f}%" if scored else "")
+        ws5.cell(row=row, column=7, value="、".join(w for w, _ in post["top_words"][:5]))
+        ws5.cell(row=row, column=8, value="、".join(w for w, _ in post["pain_words"][:5]))
+        ws5.cell(row=row, column=9, value=post["url"] or source)
+        ws5.cell(row=row, column=10, value=post["crawl_time"])
+    ws5.column_dimensions["A"].width = 40
+    ws5.column_dimensions["G"].width = 40
+    ws5.column_dimensions["H"].width = 40
+    ws5.column_dimensions["I"].width = 50
+
+    ws6 = wb.create_sheet("帖子高频词")
+    write_headers(ws6, ["帖子标题", "排名", "高频词", "出现次数", "痛点词", "出现次数"])
+    row = 2
+    for source, post in posts:
+        words, pains = post["top_words"], post["pain_words"]
+        for rank in range(max(len(words), len(pains))):
+            ws6.cell(row=row, column=1, value=post["title"])
+            ws6.cell(row=row, column=2, value=rank + 1)
+            if rank < len(words):
+                ws6.cell(row=row, column=3, value=words[rank][0])
+                ws6.cell(row=row, column=4, value=words[rank][1])
+            if rank < len(pains):
+                ws6.cell(row=row, column=5, value=pains[rank][0])
+                ws6.cell(row=row, column=6, value=pains[rank][1])
+            row += 1
+    ws6.column_dimensions["A"].width = 40
+
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(output_file)
+    return output_file
+
+
+def analyze_corpus(paths: list, output_path: str, partials_dir: str = DEFAULT_PARTIALS_DIR,
+                   top_n: int = 50, workers: int = 1):
+    """
+    多帖子汇总分析
+
+    Args:
+        paths: 评论文件（JSON / JSONL）或包含评论文件的目录
+        output_path: 输出 Excel 文件路径
+        partials_dir: 部分结果保存目录
+        top_n: TOP N 高频词
+        workers: 并行分析的进程数（按帖子分配）
+    """
+    # 检查依赖（只查找不导入，依赖在用到时才加载）
+    if find_spec("jieba") is None:
+        print("错误: 请先安装 jieba: pip install jieba")
+        return None
+
+    if find_spec("openpyxl") is None:
+        print("错误: 请先安装 openpyxl: pip install openpyxl")
+        return None
+
+    has_snownlp = find_spec("numpy") is not None and find_spec("snownlp") is not None
+    if not has_snownlp:
+        print("警告: 未安装 snownlp / numpy，跳过情感分析")
+
+    files = [str(f) for f in list_comment_files(paths)]
+    if not files:
+        print("警告: 没有找到评论文件")
+        return None
+
+    store = PartialStore(partials_dir, analyzer_fingerprint())
+    corpus = build_corpus(files, store, has_snownlp, workers)
+    if not corpus.total:
+        print("警告: 没有找到评论数据")
+        return None
+
+    output_file = write_corpus_report(corpus, output_path, top_n)
+    top_words = ranked(corpus.word_counts, top_n)
+    pain_words = ranked(corpus.pain_words, 30)
+
+    print(f"\n✅ 汇总分析完成！共 {len(corpus.posts)} 篇帖子、{corpus.total} 条评论")
+    print(f"📄 保存至: {output_file}")
+    print(f"\n📊 分析结果摘要:")
+    print(f"   - 高频词 TOP5: {', '.join(w for w, _ in top_words[:5])}")
+    if corpus.sentiment_counts:
+        counts = corpus.sentiment_counts
+        print(f"   - 情感分布: 正面 {counts.get('正面', 0)}, 中性 {counts.get('中性', 0)}, 负面 {counts.get('负面', 0)}")
+    if pain_words:
+        print(f"   - 痛点词 TOP5: {', '.join(w for w, _ in pain_words[:5])}")
+    if corpus.failure_count:
+        print(f"   ⚠️ {corpus.failure_count} 条评论情感分析失败，未计入情感统计")
+
+    return {
+        "posts": len(corpus.posts),
+        "total_comments": corpus.total,
+        "top_words": top_words,
+        "sentiment_counts": dict(corpus.sentiment_counts),
+        "pain_words": pain_words,
+        "sentiment_failures": corpus.failure_count
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多帖子评论汇总分析")
+    parser.add_argument("inputs", nargs="+", help="评论文件（JSON / JSONL）或目录")
+    parser.add_argument("--output", "-o", default="汇总分析.xlsx", help="输出 Excel 文件路径")
+    parser.add_argument("--partials", default=DEFAULT_PARTIALS_DIR,
+                        help=f"部分结果保存目录，新增帖子时只分析新帖子（默认 {DEFAULT_PARTIALS_DIR}）")
+    parser.add_argument("--top", type=int, default=50, help="TOP N 高频词")
+    parser.add_argument("--workers", type=int, default=1, help="并行分析的进程数（按帖子分配）")
+
+    args = parser.parse_args()
+    analyze_corpus(args.inputs, args.output, args.partials, args.top, args.workers)
+
+
+if __name__ == "__main__":
+    main()
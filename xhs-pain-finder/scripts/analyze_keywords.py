@@ -5,222 +5,211 @@
 """
 
 import argparse
-import json
-import re
-from pathlib import Path
-from collections import Counter
 from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+
+import profiling
+from analysis_cache import DEFAULT_CACHE_MB, DEFAULT_CACHE_PATH, AnalysisCache
+from analysis_result import RESULT_WORDS, TopLiked, build_result, result_path, save_result
+from comment_io import is_query, iter_comments
+from comment_store import add_query_arguments, query_from_args
+from dedup import DEFAULT_THRESHOLD, WEIGHTINGS
+from heavy_hitters import capacity_for
+from reply_threads import REPLY_WEIGHTINGS
+from sampling import DEFAULT_ALWAYS_TOP, DEFAULT_MARGIN
+from text_analysis import ChunkStats, iter_chunk_stats, tfidf_from_counts
+
+# 近似计数的默认内存预算（MB，三个词频计数器合计）
+DEFAULT_SKETCH_MB = 64
 
-def analyze_keywords(json_path: str, output_path: str, top_n: int = 50):
+
+def analyze_keywords(json_path: str, output_path: str, top_n: int = 50, workers: int = 1,
+                     cache_path: str = None, cache_mb: float = DEFAULT_CACHE_MB,
+                     sketch: bool = False, sketch_memory: float = DEFAULT_SKETCH_MB, sketch_error: float = None,
+                     clusters: int = 0, clusters_json: str = None,
+                     dedup: bool = False, dedup_threshold: float = DEFAULT_THRESHOLD, dedup_weight: str = "one",
+                     keep_spam: bool = False, sample: int = None, time_budget: float = None,
+                     margin: float = DEFAULT_MARGIN, always_top: int = DEFAULT_ALWAYS_TOP,
+                     replies: bool = False, reply_weight: str = "likes",
+                     result_json: str = None, wordcloud: str = None, report: str = None):
     """
     分析评论词频和情感
     
     Args:
-        json_path: 输入 JSON 文件路径
+        json_path: 输入 JSON / JSONL 文件路径，或评论库查询（comment_store.StoreQuery）、评论流（pipeline.CommentStream）
         output_path: 输出 Excel 文件路径
         top_n: TOP N 高频词
+        workers: 分词与情感分析的工作进程数（1 为串行，结果与并行完全一致）
+        cache_path: 逐条分析结果的持久化缓存文件，None 表示不使用缓存
+        cache_mb: 缓存大小上限（MB）
+        sketch: 词频改用有界内存的近似计数（Space-Saving），适合超大语料
+        sketch_memory: 近似计数的内存预算（MB）
+        sketch_error: 近似计数的相对误差上界（高估 <= 误差 × 总词数），None 表示只按内存预算
+        clusters: 负面评论聚类的簇数（见 pain_clusters），0 表示不聚类；聚类需保留全部负面评论
+        clusters_json: 聚类结果 JSON 路径，默认为输出文件同名的 .clusters.json
+        dedup: 分析前合并重复 / 近似重复评论并去除灌水评论（见 dedup），需读取两遍输入，不支持评论流
+        dedup_threshold: 近似重复阈值（估计的 Jaccard 相似度），>= 1 时只合并完全重复
+        dedup_weight: 重复组计入统计的次数：one 一次、log 1 + log2(条数)、all 原条数
+        keep_spam: 去重时保留灌水评论（仍按重复合并）
+        sample: 近似分析最多抽取的评论数（按点赞数分层抽样，见 sampling），None 且未给时间预算时分析全部评论
+        time_budget: 近似分析的时间预算（秒），用完即按已分析的评论估计
+        margin: 近似分析情感占比 95% 置信区间的目标半宽，达到即提前停止
+        always_top: 近似分析中始终全部分析的高赞评论数（不超过抽样条数的一半）
+        replies: 把抓取时展开的回复（replies 回复树，见 reply_threads）作为独立评论计入词频和情感，
+            点赞数为回复自身的点赞数
+        reply_weight: 回复计入统计的次数：one 一次、likes 1 + log2(1 + 回复点赞数)
+        result_json: 分析结果文件路径（见 analysis_result），默认为输出文件同名的 .result.json
+        wordcloud: 同时生成的词云图路径（PNG），None 表示不生成
+        report: 同时生成的调研报告路径（Markdown，基于 references/report_template.md），None 表示不生成
     """
-    # 检查依赖
-    try:
-        import jieba
-        import jieba.analyse
-    except ImportError:
+    # 检查依赖（只查找不导入：jieba / 情感模型在读到第一块评论时加载，openpyxl 在写出时导入）
+    if find_spec("jieba") is None:
         print("错误: 请先安装 jieba: pip install jieba")
         return None
     
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-        from openpyxl.utils import get_column_letter
-    except ImportError:
+    if find_spec("openpyxl") is None:
         print("错误: 请先安装 openpyxl: pip install openpyxl")
         return None
     
-    try:
-        from snownlp import SnowNLP
-        has_snownlp = True
-    except ImportError:
-        print("警告: 未安装 snownlp，跳过情感分析")
-        has_snownlp = False
-    
-    # 读取数据
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    comments = data.get("comments", [])
-    if not comments:
-        print("警告: 没有找到评论数据")
+    if dedup and find_spec("numpy") is None:
+        print("错误: 请先安装 numpy: pip install numpy")
         return None
     
-    print(f"正在分析 {len(comments)} 条评论...")
+    approximate = bool(sample or time_budget)
+    if approximate and sketch:
+        print("警告: 抽样分析的计数器大小受抽样条数限制，忽略 --sketch")
+        sketch = False
+    
+    has_snownlp = find_spec("numpy") is not None and find_spec("snownlp") is not None
+    if not has_snownlp:
+        print("警告: 未安装 snownlp / numpy，跳过情感分析")
+        if clusters:
+            print("警告: 痛点聚类需要情感分析，跳过聚类")
+            clusters = 0
+    
+    source = json_path
+    threads = None
+    if replies:
+        from reply_threads import WithReplies
+        threads = source = WithReplies(json_path, reply_weight)
+    
+    deduped = None
+    if dedup:
+        from dedup import DedupedComments
+        print("正在检测重复与灌水评论...")
+        with profiling.stage("dedup"):
+            deduped = source = DedupedComments(source, dedup_threshold, dedup_weight, not keep_spam).scan()
+        summary = deduped.summary()
+        print(f"   共 {summary['total']} 条评论，完全重复 {summary['exact']} 条、近似重复 {summary['near']} 条、"
+              f"灌水 {summary['spam']} 条，去重后 {summary['kept']} 条")
     
-    # 合并所有评论文本
-    all_text = "\n".join([c.get("content", "") for c in comments])
+    # 高赞评论（报告用）在第一遍读取时顺带记录
+    top_liked = source = TopLiked(source)
+    
+    sampler = None
+    if approximate:
+        from sampling import StratifiedSample
+        with profiling.stage("sample_scan"):
+            sampler = StratifiedSample(source, sample, time_budget, margin, always_top).scan()
+    
+    print(("正在抽样分析评论..." if approximate else "正在分析评论...") + (f"（{workers} 个进程）" if workers > 1 else ""))
+    
+    # 逐块统计后按顺序合并，只保留计数器和点赞 TOP100 明细，内存占用与评论总数无关
+    sketch_capacity = capacity_for(sketch_memory, sketch_error, sketches=3) if sketch else None
+    stats = ChunkStats(sketch_capacity)
+    cache = AnalysisCache(cache_path, cache_mb) if cache_path else None
+    cache_summary = None
+    analysis = profiling.begin("analyze")
+    try:
+        if sampler:
+            stats = sampler.run(has_snownlp, workers, cache, negatives=clusters > 0)
+        else:
+            comments = profiling.timed("read", iter_comments(source), "comments")
+            for partial in iter_chunk_stats(comments, has_snownlp, workers, cache=cache, negatives=clusters > 0):
+                with profiling.stage("merge"):
+                    stats.merge(partial)
+        if cache:
+            cache.evict()
+            cache_summary = cache.summary()
+            profiling.count("analysis_cache_hits", cache.hits)
+            profiling.count("analysis_cache_misses", cache.misses)
+    finally:
+        if cache:
+            cache.close()
+        analysis.end()
     
-    # 停用词
-    stopwords = set([
-        "的", "了", "是", "我", "你", "他", "她", "它", "们", "这", "那",
-        "有", "在", "不", "也", "就", "都", "要", "会", "很", "到", "说",
-        "还", "能", "对", "和", "与", "吗", "吧", "啊", "呢", "哦", "嗯",
-        "什么", "怎么", "为什么", "哪", "哪里", "这个", "那个", "一个",
-        "可以", "没有", "因为", "所以", "但是", "如果", "虽然", "而且",
-        "或者", "以及", "比如", "就是", "不是", "可能", "应该", "觉得",
-        "知道", "看到", "感觉", "真的", "确实", "其实", "然后", "已经"
-    ])
+    total_comments = stats.total
+    word_counts = stats.word_counts
+    sentiment_counts = stats.sentiment_counts
+    pain_words = stats.pain_words
     
-    # 分词统计
-    words = jieba.cut(all_text)
-    word_counts = Counter()
+    if not total_comments:
+        print("警告: 没有找到评论数据")
+        return None
     
-    for word in words:
-        word = word.strip()
-        if len(word) >= 2 and word not in stopwords and not word.isdigit():
-            if not re.match(r'^[\W_]+$', word):  # 排除纯标点
-                word_counts[word] += 1
+    if sampler:
+        print(f"共 {total_comments} 条评论" + ("（去重后）" if dedup else "") + f"，⚠️ 近似结果: {sampler.summary()}")
+    else:
+        print(f"共分析 {total_comments} 条评论" + ("（去重后）" if dedup else "")
+              + (f"（{threads.comments} 条评论 + {threads.replies} 条回复，回复按 {reply_weight} 计权）"
+                 if threads else ""))
+    if stats.failure_count:
+        print(f"⚠️ {stats.failure_count} 条评论情感分析失败，未计入情感统计:")
+        for seq, content, reason in stats.failures[:5]:
+            print(f"   - 第 {seq + 1} 条「{content}」: {reason}")
     
     top_words = word_counts.most_common(top_n)
     
     # 提取关键词（TF-IDF）
-    keywords_tfidf = jieba.analyse.extract_tags(all_text, topK=20, withWeight=True)
-    
-    # 情感分析
-    sentiments = []
-    if has_snownlp:
-        for comment in comments:
-            content = comment.get("content", "")
-            if content:
-                try:
-                    s = SnowNLP(content)
-                    score = s.sentiments  # 0-1, 越大越正面
-                    if score > 0.6:
-                        sentiment = "正面"
-                    elif score < 0.4:
-                        sentiment = "负面"
-                    else:
-                        sentiment = "中性"
-                    sentiments.append({
-                        "content": content[:100],
-                        "score": round(score, 3),
-                        "sentiment": sentiment,
-                        "likes": comment.get("likes", 0)
-                    })
-                except:
-                    pass
-    
-    # 统计情感分布
-    sentiment_counts = Counter([s["sentiment"] for s in sentiments])
-    
-    # 提取痛点关键词（负面评论中的高频词）
-    pain_words = Counter()
-    if sentiments:
-        negative_texts = [s["content"] for s in sentiments if s["sentiment"] == "负面"]
-        for text in negative_texts:
-            for word in jieba.cut(text):
-                word = word.strip()
-                if len(word) >= 2 and word not in stopwords:
-                    pain_words[word] += 1
-    
-    # 创建 Excel
-    wb = Workbook()
-    
-    # ===== Sheet 1: 高频词统计 =====
-    ws1 = wb.active
-    ws1.title = "高频词TOP50"
-    
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4472C4")
-    
-    headers1 = ["排名", "词语", "出现次数", "词频占比"]
-    for col, header in enumerate(headers1, 1):
-        cell = ws1.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-    
-    total_words = sum(word_counts.values())
-    for row, (word, count) in enumerate(top_words, 2):
-        ws1.cell(row=row, column=1, value=row - 1)
-        ws1.cell(row=row, column=2, value=word)
-        ws1.cell(row=row, column=3, value=count)
-        ws1.cell(row=row, column=4, value=f"{count/total_words*100:.2f}%")
-    
-    ws1.column_dimensions["B"].width = 20
-    
-    # ===== Sheet 2: TF-IDF 关键词 =====
-    ws2 = wb.create_sheet("TF-IDF关键词")
-    
-    headers2 = ["排名", "关键词", "权重"]
-    for col, header in enumerate(headers2, 1):
-        cell = ws2.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-    
-    for row, (word, weight) in enumerate(keywords_tfidf, 2):
-        ws2.cell(row=row, column=1, value=row - 1)
-        ws2.cell(row=row, column=2, value=word)
-        ws2.cell(row=row, column=3, value=round(weight, 4))
-    
-    ws2.column_dimensions["B"].width = 20
-    
-    # ===== Sheet 3: 情感分析 =====
-    if sentiments:
-        ws3 = wb.create_sheet("情感分析")
-        
-        # 汇总
-        ws3.cell(row=1, column=1, value="情感分布汇总").font = Font(bold=True)
-        ws3.cell(row=2, column=1, value="正面")
-        ws3.cell(row=2, column=2, value=sentiment_counts.get("正面", 0))
-        ws3.cell(row=3, column=1, value="中性")
-        ws3.cell(row=3, column=2, value=sentiment_counts.get("中性", 0))
-        ws3.cell(row=4, column=1, value="负面")
-        ws3.cell(row=4, column=2, value=sentiment_counts.get("负面", 0))
-        
-        # 明细
-        headers3 = ["评论内容", "情感得分", "情感类型", "点赞数"]
-        for col, header in enumerate(headers3, 1):
-            cell = ws3.cell(row=6, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-        
-        # 按点赞数排序
-        sorted_sentiments = sorted(sentiments, key=lambda x: x["likes"], reverse=True)
-        for row, s in enumerate(sorted_sentiments[:100], 7):
-            ws3.cell(row=row, column=1, value=s["content"])
-            ws3.cell(row=row, column=2, value=s["score"])
-            ws3.cell(row=row, column=3, value=s["sentiment"])
-            ws3.cell(row=row, column=4, value=s["likes"])
-            
-            # 根据情感类型着色
-            if s["sentiment"] == "负面":
-                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="FFC7CE")
-            elif s["sentiment"] == "正面":
-                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="C6EFCE")
-        
-        ws3.column_dimensions["A"].width = 60
-    
-    # ===== Sheet 4: 痛点关键词 =====
-    if pain_words:
-        ws4 = wb.create_sheet("痛点关键词")
-        
-        headers4 = ["排名", "痛点词", "出现次数"]
-        for col, header in enumerate(headers4, 1):
-            cell = ws4.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-        
-        for row, (word, count) in enumerate(pain_words.most_common(30), 2):
-            ws4.cell(row=row, column=1, value=row - 1)
-            ws4.cell(row=row, column=2, value=word)
-            ws4.cell(row=row, column=3, value=count)
-        
-        ws4.column_dimensions["B"].width = 20
-    
-    # 保存
-    output_file = Path(output_path)
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(output_file)
+    with profiling.stage("tfidf"):
+        keywords_tfidf = tfidf_from_counts(stats.tfidf_freq, top_k=max(RESULT_WORDS, 20), total=stats.tfidf_total)
+    
+    sentiments = stats.sentiments()
+    
+    clustering = None
+    if clusters:
+        from pain_clusters import cluster_pain_points
+        with profiling.stage("clusters"):
+            clustering = cluster_pain_points(stats.negatives, clusters)
+        stats.negatives = []
+    
+    # 分析结果文件：Excel、词云图和报告都由它生成，换参数重新生成时不必重新分析
+    from comment_io import read_header
+    from render_report import RENDERER_LABELS, render_all
+    
+    header = read_header(json_path)
+    options = {"top_n": top_n, "sketch": bool(sketch_capacity), "clusters": clusters, "dedup": dedup,
+               "dedup_weight": dedup_weight if dedup else None, "sample": sample, "time_budget": time_budget,
+               "replies": replies, "reply_weight": reply_weight if replies else None}
+    with profiling.stage("result"):
+        result = build_result(stats, keywords_tfidf, header, top_liked.comments(), clustering, deduped, sampler,
+                              sketch_capacity, threads.replies if threads else None, options,
+                              n_words=max(RESULT_WORDS, top_n))
+        result_file = save_result(result, result_json or result_path(output_path))
+    
+    targets = {"excel": output_path}
+    if wordcloud:
+        targets["wordcloud"] = wordcloud
+    if report:
+        targets["markdown"] = report
+    outputs = render_all(result, targets)
+    output_file = outputs["excel"][0]
+    if output_file is None:
+        return None
+    
+    clusters_file = None
+    if clustering:
+        from pain_clusters import save_clusters_json
+        clusters_file = save_clusters_json(clustering, clusters_json or output_file.with_suffix(".clusters.json"),
+                                           header)
     
     print(f"\n✅ 分析完成！")
     print(f"📄 保存至: {output_file}")
+    for name in ("wordcloud", "markdown"):
+        if outputs.get(name, (None,))[0]:
+            print(f"📄 {RENDERER_LABELS[name]}: {outputs[name][0]}")
+    print(f"📄 分析结果文件: {result_file}（可用 render_report.py 重新生成 Excel / 词云图 / 报告）")
     print(f"\n📊 分析结果摘要:")
     print(f"   - 高频词 TOP5: {', '.join([w for w, c in top_words[:5]])}")
     print(f"   - TF-IDF 关键词: {', '.join([w for w, _ in keywords_tfidf[:5]])}")
@@ -228,23 +217,105 @@ def analyze_keywords(json_path: str, output_path: str, top_n: int = 50):
         print(f"   - 情感分布: 正面 {sentiment_counts.get('正面', 0)}, 中性 {sentiment_counts.get('中性', 0)}, 负面 {sentiment_counts.get('负面', 0)}")
     if pain_words:
         print(f"   - 痛点词 TOP5: {', '.join([w for w, c in pain_words.most_common(5)])}")
+    if clustering:
+        print(f"   - 痛点聚类: {'；'.join(c['label'] for c in clustering['clusters'])}（{clusters_file}）")
+    if cache_summary:
+        print(f"   - 分析缓存: {cache_summary}")
+    if sampler:
+        print(f"   - ⚠️ 以上为抽样估计: {sampler.summary()}")
+    if sketch_capacity:
+        print(f"   - 近似计数: 每个词频计数器最多 {sketch_capacity} 个词，"
+              f"计数高估不超过 {word_counts.error_bound:.1f} 次（总词数 / 容量）")
     
     return {
         "top_words": top_words,
-        "keywords_tfidf": keywords_tfidf,
+        "keywords_tfidf": keywords_tfidf[:20],
         "sentiment_counts": dict(sentiment_counts),
-        "pain_words": pain_words.most_common(30)
+        "pain_words": pain_words.most_common(30),
+        "sentiment_failures": stats.failure_count,
+        "pain_clusters": clustering["clusters"] if clustering else None,
+        "duplicates": deduped.summary() if deduped else None,
+        "replies": threads.replies if threads else None,
+        "result_path": str(result_file),
+        "approximate": {"analyzed": sampler.analyzed, "population": sampler.population,
+                        "stop_reason": sampler.stop_reason, "intervals": sampler.intervals()} if sampler else None
     }
 
 
 def main():
     parser = argparse.ArgumentParser(description="评论词频与情感分析")
-    parser.add_argument("json_file", help="输入 JSON 文件路径")
+    parser.add_argument("json_file", nargs="?", help="输入 JSON / JSONL 文件路径（或用 --store 从评论库读取）")
     parser.add_argument("--output", "-o", default="分析结果.xlsx", help="输出 Excel 文件路径")
     parser.add_argument("--top", type=int, default=50, help="TOP N 高频词")
+    parser.add_argument("--workers", type=int, default=1, help="分词与情感分析的并行进程数")
+    parser.add_argument("--cache", nargs="?", const=str(DEFAULT_CACHE_PATH), default=None,
+                        help=f"缓存逐条分析结果，重复分析时只计算新评论（默认 {DEFAULT_CACHE_PATH}）")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_MB, help="缓存大小上限（MB）")
+    parser.add_argument("--sketch", action="store_true", help="词频改用有界内存的近似计数（超大语料）")
+    parser.add_argument("--sketch-memory", type=float, default=DEFAULT_SKETCH_MB, help="近似计数的内存预算（MB）")
+    parser.add_argument("--sketch-error", type=float, default=None,
+                        help="近似计数的相对误差上界，如 0.0001（不超过内存预算）")
+    parser.add_argument("--clusters", type=int, default=0, metavar="K",
+                        help="把负面评论聚为 K 类痛点（新增 痛点聚类 工作表和 JSON，常用 5）")
+    parser.add_argument("--clusters-json", help="聚类结果 JSON 路径（默认与输出文件同名的 .clusters.json）")
+    parser.add_argument("--dedup", action="store_true",
+                        help="分析前合并重复 / 近似重复评论、去除“蹲”“求链接”等灌水评论（新增 重复评论 工作表）")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="近似重复阈值（Jaccard 相似度，1 为只合并完全重复）")
+    parser.add_argument("--dedup-weight", choices=WEIGHTINGS, default="one",
+                        help="重复组计入统计的次数：one 一次，log 1+log2(条数)，all 原条数")
+    parser.add_argument("--keep-spam", action="store_true", help="去重时保留灌水评论")
+    parser.add_argument("--sample", type=int, metavar="N",
+                        help="近似分析：按点赞数分层抽样最多 N 条（高赞评论全部分析，最多占一半），结果附置信区间")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                        help="近似分析：时间预算（秒），用完即按已分析的评论估计")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN,
+                        help="近似分析：情感占比 95%% 置信区间的目标半宽，达到即提前停止（0 为不提前停止）")
+    parser.add_argument("--always-top", type=int, default=DEFAULT_ALWAYS_TOP,
+                        help="近似分析：始终全部分析的高赞评论数（不超过抽样条数的一半）")
+    parser.add_argument("--replies", action="store_true",
+                        help="回复（extract_comments.py --replies 抓取的回复树）也作为评论计入词频和情感")
+    parser.add_argument("--reply-weight", choices=REPLY_WEIGHTINGS, default="likes",
+                        help="回复计入的次数：one 每条一次，likes 按回复自身点赞数 1+log2(1+点赞数)")
+    parser.add_argument("--result", help="分析结果文件路径（默认与输出文件同名的 .result.json，供 render_report.py 使用）")
+    parser.add_argument("--wordcloud", help="同时生成词云图（PNG 路径，需安装 wordcloud）")
+    parser.add_argument("--report", help="同时生成填好数据的调研报告（Markdown 路径）")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="不使用常驻分析服务（见 analysis_daemon.py），始终在本进程中分析")
+    
+    add_query_arguments(parser)
+    profiling.add_profile_arguments(parser)
     
     args = parser.parse_args()
-    analyze_keywords(args.json_file, args.output, args.top)
+    source = query_from_args(args) or args.json_file
+    if not source:
+        parser.error("请提供 JSON 文件或 --store 评论库")
+    params = {
+        "json_path": source, "output_path": args.output, "top_n": args.top, "workers": args.workers,
+        "cache_path": args.cache, "cache_mb": args.cache_size,
+        "sketch": args.sketch, "sketch_memory": args.sketch_memory, "sketch_error": args.sketch_error,
+        "clusters": args.clusters, "clusters_json": args.clusters_json,
+        "dedup": args.dedup, "dedup_threshold": args.dedup_threshold, "dedup_weight": args.dedup_weight,
+        "keep_spam": args.keep_spam, "sample": args.sample, "time_budget": args.time_budget,
+        "margin": args.margin, "always_top": args.always_top,
+        "replies": args.replies, "reply_weight": args.reply_weight,
+        "result_json": args.result, "wordcloud": args.wordcloud, "report": args.report
+    }
+    
+    # 常驻服务在运行时交给服务分析，省去加载 jieba / SnowNLP / openpyxl 的时间（剖析时始终在本进程中分析）
+    if not args.no_daemon and args.profile is None:
+        from analysis_daemon import run_remote
+        remote = dict(params, output_path=str(Path(args.output).resolve()),
+                      cache_path=str(Path(args.cache).resolve()) if args.cache else None,
+                      clusters_json=str(Path(args.clusters_json).resolve()) if args.clusters_json else None,
+                      **{key: str(Path(params[key]).resolve()) for key in ("result_json", "wordcloud", "report")
+                         if params[key]},
+                      json_path=source.to_dict() if is_query(source) else str(Path(source).resolve()))
+        if run_remote(remote) is not None:
+            return
+    
+    with profiling.profiled(args, args.output, "analyze_keywords"):
+        analyze_keywords(**params)
 
 
 if __name__ == "__main__":
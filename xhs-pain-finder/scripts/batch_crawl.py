@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+批量抓取 - 在同一个持久化浏览器上下文中并发抓取多篇帖子
+有界页面池 + 按域名令牌桶限速 + 单帖重试，每篇帖子输出一个 JSON，并生成 manifest
+"""
+
+import asyncio
+import json
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import profiling
+from checkpoint import CrawlSession, checkpoint_path, is_unfinished, load_previous
+from extract_comments import crawl_post, launch_context, save_result
+from reply_threads import DEFAULT_REPLY_CONCURRENCY
+
+
+class TokenBucket:
+    """令牌桶限速器（asyncio）"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: 每秒补充的令牌数，<= 0 表示不限速
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取一个令牌，不足时等待"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def read_url_list(path: str) -> list:
+    """读取 URL 列表文件（每行一个，忽略空行和 # 注释），保持顺序并去重"""
+    urls = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith("#") and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+
+def post_filename(index: int, url: str, output_format: str = "json") -> str:
+    """根据序号和帖子 id 生成输出文件名"""
+    path = urlsplit(url).path.rstrip("/")
+    note_id = re.sub(r'[^\w-]', "_", path.rsplit("/", 1)[-1]) if path else ""
+    return f"{index:04d}_{note_id or 'post'}.{output_format}"
+
+
+async def crawl_batch(urls: list, output_dir: str, concurrency: int = 4, rate: float = 1.0,
+                      burst: float = 2.0, retries: int = 2, max_scroll: int = 50,
+                      mode: str = "auto", headless: bool = False, user_data_dir: str = None,
+                      scroll_strategy: str = "adaptive", time_budget: float = None,
+                      incremental: bool = False, output_format: str = "json", replies: bool = False,
+                      reply_concurrency: int = DEFAULT_REPLY_CONCURRENCY) -> dict:
+    """
+    并发抓取多篇帖子
+
+    Args:
+        urls: 帖子链接列表
+        output_dir: 输出目录（每篇帖子一个 JSON + manifest.json）
+        concurrency: 并发页面数
+        rate: 每个域名每秒允许打开的帖子数（<= 0 不限速）
+        burst: 每个域名允许的突发数
+        retries: 单篇帖子失败后的重试次数
+        max_scroll: 最大滚动（翻页）次数
+        mode: 抓取模式，见 extract_comments
+        headless: 是否无头模式
+        user_data_dir: 浏览器用户数据目录
+        scroll_strategy: DOM 模式滚动策略
+        time_budget: 单帖评论加载时间预算（秒）
+        incremental: 增量模式，以输出目录中该帖已有的输出文件为上次结果
+        output_format: 输出格式 json / jsonl（JSONL 边抓边写）
+        replies: 是否抓取全部回复（见 reply_threads）
+        reply_concurrency: 每个页面同时展开的回复楼层数
+
+    Returns:
+        manifest 字典
+    """
+    from playwright.async_api import async_playwright
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    buckets = {}
+    entries = [None] * len(urls)
+    started = time.perf_counter()
+
+    async with async_playwright() as p:
+        with profiling.stage("browser_launch"):
+            context = await launch_context(p, user_data_dir, headless)
+
+        # 有界页面池：固定数量的标签页在任务间复用
+        pool = asyncio.Queue()
+        for i in range(concurrency):
+            page = context.pages[i] if i < len(context.pages) else await context.new_page()
+            pool.put_nowait(page)
+
+        async def worker(index: int, url: str):
+            host = urlsplit(url).netloc
+            bucket = buckets.setdefault(host, TokenBucket(rate, burst))
+            entry = {"url": url, "status": "failed", "attempts": 0}
+            task_start = time.perf_counter()
+
+            output_path = output_dir / post_filename(index + 1, url, output_format)
+            jsonl = output_format == "jsonl"
+
+            # 拿到页面后才打开检查点：同时打开的检查点文件不超过并发数
+            page = await pool.get()
+            session = None
+            try:
+                # 检查点跨重试保留，失败后的重试从已抓取的评论继续；上次运行中断留下的未完成检查点续抓，
+                # 其余情况重新抓取
+                previous = load_previous(output_path) if incremental and output_path.exists() else None
+                checkpoint = checkpoint_path(output_path)
+                session = CrawlSession(url, checkpoint, resume=is_unfinished(checkpoint), previous=previous)
+                for attempt in range(retries + 1):
+                    entry["attempts"] = attempt + 1
+                    with profiling.stage("rate_limit"):
+                        await bucket.acquire()
+                    try:
+                        result = await crawl_post(page, url, max_scroll, mode, scroll_strategy,
+                                                  time_budget, session, replies, reply_concurrency)
+                    except Exception as e:
+                        entry["error"] = str(e)
+                        print(f"  ⚠️ [{index + 1}/{len(urls)}] 第 {attempt + 1} 次抓取失败: {e}")
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+
+                    with profiling.stage("save_output"):
+                        if jsonl:
+                            output_file = session.finalize_jsonl(output_path)
+                        else:
+                            output_file = save_result(result, output_path)
+                            session.close(remove=True)
+                    entry.update({
+                        "status": "ok",
+                        "file": output_file.name,
+                        "title": result["title"],
+                        "total_comments": result["total_comments"]
+                    })
+                    entry.pop("error", None)
+                    break
+            finally:
+                if session:
+                    session.close()
+                pool.put_nowait(page)
+
+            entry["seconds"] = round(time.perf_counter() - task_start, 2)
+            entries[index] = entry
+            print(f"  [{index + 1}/{len(urls)}] {entry['status']}: {url}")
+
+        await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+        await context.close()
+
+    manifest = {
+        "crawl_time": datetime.now().isoformat(),
+        "total_posts": len(urls),
+        "succeeded": sum(1 for e in entries if e["status"] == "ok"),
+        "failed": sum(1 for e in entries if e["status"] != "ok"),
+        "seconds": round(time.perf_counter() - started, 2),
+        "posts": entries
+    }
+    with open(output_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+def run_batch(url_file: str, output_dir: str, **kwargs) -> dict:
+    """读取 URL 列表文件并批量抓取（同步入口）"""
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
+        return None
+
+    urls = read_url_list(url_file)
+    if not urls:
+        print("警告: URL 列表为空")
+        return None
+
+    print(f"共 {len(urls)} 篇帖子，并发 {kwargs.get('concurrency', 4)}")
+    manifest = asyncio.run(crawl_batch(urls, output_dir, **kwargs))
+
+    print(f"\n✅ 批量抓取完成！成功 {manifest['succeeded']} 篇，失败 {manifest['failed']} 篇，"
+          f"用时 {manifest['seconds']:.1f}s")
+    print(f"📄 清单: {Path(output_dir) / 'manifest.json'}")
+    return manifest
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+抓取断点与增量抓取
+评论在提取过程中即追加写入检查点文件（JSONL 评论格式，见 comment_io），按稳定键去重；
+中断后可从检查点恢复，也可基于上次输出只抓取新评论并在遇到已抓取内容时提前停止
+"""
+
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import profiling
+from comment_io import RECORD_TYPE, JsonlCommentWriter, iter_records, load_comments
+
+# 增量模式下连续多少批没有新评论即停止
+DEFAULT_STALE_BATCHES = 2
+
+
+def comment_key(comment: dict) -> str:
+    """评论的稳定去重键：优先评论 id，否则为 昵称+内容+时间 的哈希"""
+    if comment.get("id"):
+        return f"id:{comment['id']}"
+    raw = "\x1f".join([comment.get("nickname", ""), comment.get("content", ""), comment.get("time", "")])
+    return "h:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def checkpoint_path(output_path: str) -> Path:
+    """
+    输出文件对应的检查点路径
+
+    JSONL 输出的检查点即未完成的输出（`<输出文件>.partial`），收尾时原子替换为输出文件；
+    其他格式为 `<输出文件>.ckpt.jsonl`
+    """
+    output = Path(output_path)
+    if output.suffix.lower() == ".jsonl":
+        return output.with_name(output.name + ".partial")
+    return output.with_name(output.name + ".ckpt.jsonl")
+
+
+def is_unfinished(checkpoint: str) -> bool:
+    """检查点存在且没有结束记录（上次抓取中途中断）时返回 True"""
+    path = Path(checkpoint)
+    if not path.exists():
+        return False
+    return not any(r.get(RECORD_TYPE) == "footer" for r in iter_records(str(path)))
+
+
+def parse_comment_time(text: str, reference: datetime) -> datetime:
+    """
+    解析评论显示时间（相对时间按 reference 换算）
+
+    支持：刚刚 / N分钟前 / N小时前 / 昨天 HH:MM / N天前 / MM-DD / YYYY-MM-DD [HH:MM]，
+    无法解析时返回 None
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    if text.startswith("刚刚"):
+        return reference
+
+    match = re.match(r'^(\d+)\s*(分钟|小时|天)前', text)
+    if match:
+        amount = int(match.group(1))
+        unit = {"分钟": "minutes", "小时": "hours", "天": "days"}[match.group(2)]
+        return reference - timedelta(**{unit: amount})
+
+    match = re.match(r'^(昨天|前天)\s*(\d{1,2}):(\d{2})', text)
+    if match:
+        days = 1 if match.group(1) == "昨天" else 2
+        day = reference - timedelta(days=days)
+        return day.replace(hour=int(match.group(2)), minute=int(match.group(3)), second=0, microsecond=0)
+
+    match = re.match(r'^(\d{4})-(\d{1,2})-(\d{1,2})(?:\s+(\d{1,2}):(\d{2}))?', text)
+    if match:
+        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        hour, minute = int(match.group(4) or 0), int(match.group(5) or 0)
+        return datetime(year, month, day, hour, minute)
+
+    match = re.match(r'^(\d{1,2})-(\d{1,2})', text)
+    if match:
+        return datetime(reference.year, int(match.group(1)), int(match.group(2)))
+
+    return None
+
+
+def load_previous(path: str) -> dict:
+    """读取上次的抓取输出（JSON 或 JSONL），供增量模式使用"""
+    return load_comments(path)
+
+
+class CrawlSession:
+    """
+    单篇帖子的抓取会话
+
+    负责去重、检查点写入，以及增量模式下判断是否应继续抓取。
+    """
+
+    def __init__(self, url: str, checkpoint: str = None, resume: bool = False, previous: dict = None,
+                 stale_batches: int = DEFAULT_STALE_BATCHES):
+        """
+        Args:
+            url: 帖子链接
+            checkpoint: 检查点文件路径（见 checkpoint_path），None 表示不写检查点
+            resume: 是否从已有检查点恢复
+            previous: 增量模式下上次的抓取结果（含 crawl_time 和 comments）
+            stale_batches: 增量模式下连续多少批没有新评论即停止
+        """
+        self.url = url
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.header = {"url": url, "title": "", "crawl_time": datetime.now().isoformat()}
+        self.comments = []
+        self.keys = set()
+        self.cursor = None
+        self.stale_batches = stale_batches
+        self._stale = 0
+        self._writer = None
+
+        # 增量模式：已见评论键与上次抓取时间
+        self.previous_comments = []
+        self.merged = []  # 已并入 comments、尚未写入检查点的上次结果
+        self.seen_before = set()
+        self.since = None
+        if previous:
+            self.previous_comments = previous.get("comments", [])
+            self.seen_before = {comment_key(c) for c in self.previous_comments}
+            try:
+                since = datetime.fromisoformat(previous.get("crawl_time", ""))
+                # 评论时间多为按天显示，从当天零点起算
+                self.since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+            except ValueError:
+                self.since = None
+
+        resumed = False
+        if self.checkpoint and self.checkpoint.exists():
+            if resume:
+                self._load_checkpoint()
+                resumed = True
+                if self.comments:
+                    print(f"  从检查点恢复 {len(self.comments)} 条评论")
+            else:
+                # 不恢复时丢弃旧检查点，避免与本次结果混杂
+                self.checkpoint.unlink()
+
+        if self.checkpoint:
+            self._writer = JsonlCommentWriter(self.checkpoint, self.header, append=resumed)
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.seen_before)
+
+    @property
+    def crawl_time(self) -> str:
+        """本次抓取开始时间（恢复时沿用检查点中的时间）"""
+        return self.header["crawl_time"]
+
+    def set_title(self, title: str):
+        """记录帖子标题（头记录在第一次写入时落盘，标题需在此之前设置）"""
+        self.header["title"] = title
+
+    def _load_checkpoint(self):
+        for record in iter_records(self.checkpoint):
+            record_type = record.get(RECORD_TYPE)
+            if record_type == "header":
+                self.header.update({k: v for k, v in record.items() if k != RECORD_TYPE})
+            elif record_type == "cursor":
+                self.cursor = (record.get("url"), record.get("cursor"))
+            elif record_type is None:
+                key = comment_key(record)
+                if key not in self.keys:
+                    self.keys.add(key)
+                    self.comments.append(record)
+
+    def _write(self, record: dict):
+        if self._writer:
+            self._writer.write_record(record)
+
+    def _is_new(self, comment: dict, key: str, now: datetime) -> bool:
+        """增量模式下判断评论是否为上次抓取之后的新评论"""
+        if key in self.seen_before:
+            return False
+        if self.since is None:
+            return True
+        published = parse_comment_time(comment.get("time", ""), now)
+        return published is None or published >= self.since
+
+    def add(self, comments: list) -> bool:
+        """
+        加入一批提取到的评论（去重后写入检查点）
+
+        Returns:
+            是否应继续抓取（增量模式下连续多批无新评论时返回 False）
+        """
+        now = datetime.now()
+        added = 0
+        for comment in comments:
+            key = comment_key(comment)
+            if key in self.keys:
+                continue
+            if self.incremental and not self._is_new(comment, key, now):
+                continue
+            self.keys.add(key)
+            comment = dict(comment, index=len(self.comments) + 1)
+            self.comments.append(comment)
+            self._write(comment)
+            added += 1
+        profiling.count("comments", added)
+
+        if self._writer:
+            self._writer.flush()
+
+        if not self.incremental or not comments:
+            return True
+        self._stale = 0 if added else self._stale + 1
+        if self._stale >= self.stale_batches:
+            print(f"  增量模式: 连续 {self._stale} 批均为已抓取评论，提前停止")
+            return False
+        return True
+
+    def save_cursor(self, url: str, cursor: str):
+        """记录评论接口翻页位置，恢复时可从该 cursor 继续"""
+        self.cursor = (url, cursor)
+        self._write({RECORD_TYPE: "cursor", "url": url, "cursor": cursor})
+        if self._writer:
+            self._writer.flush()
+
+    def _merge_previous(self):
+        """增量模式：把上次结果中本次未抓到的评论接在新评论之后（只合并一次，合并的评论记入 merged）"""
+        for comment in self.previous_comments:
+            key = comment_key(comment)
+            if key not in self.keys:
+                self.keys.add(key)
+                comment = dict(comment, index=len(self.comments) + 1)
+                self.comments.append(comment)
+                self.merged.append(comment)
+        self.previous_comments = []
+
+    def result_comments(self) -> list:
+        """最终评论列表：本次新抓取（增量模式下合并上次结果），可多次调用"""
+        self._merge_previous()
+        return self.comments
+
+    def finalize_jsonl(self, output_path: str) -> Path:
+        """
+        JSONL 输出的收尾：追加合并的上次结果和结束记录，再把检查点原子替换为输出文件
+
+        在此之前输出文件（增量模式下即上次结果）保持不变，抓取中断不会丢失已有数据。
+
+        Args:
+            output_path: 输出文件路径
+
+        Returns:
+            输出文件路径
+        """
+        self._merge_previous()
+        for comment in self.merged:
+            self._write(comment)
+        self.merged = []
+        self._write({RECORD_TYPE: "footer", "total_comments": len(self.comments)})
+        self.close()
+        output = Path(output_path)
+        os.replace(self.checkpoint, output)
+        return output
+
+    def close(self, remove: bool = False):
+        """关闭检查点文件；remove=True 时在结果已保存后删除检查点"""
+        if self._writer:
+            self._writer.close()
+        if remove and self.checkpoint and self.checkpoint.exists():
+            self.checkpoint.unlink()
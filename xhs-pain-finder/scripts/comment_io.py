@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+评论数据读写
+支持两种格式：
+- JSON：{"url", "title", "crawl_time", "total_comments", "comments": [...]}（整体读入）
+- JSONL：首行为头记录 {"_type": "header", "url", "title", "crawl_time"}，之后每行一条评论（流式读取）
+JSONL 中带 "_type" 字段的行为元数据记录（头记录、翻页位置、结束记录），读取评论时跳过
+读取函数也接受提供 read_header() / iter_comments() 的查询对象（见 comment_store.StoreQuery、pipeline.CommentStream）
+"""
+
+import json
+from pathlib import Path
+
+# 元数据记录的类型标记字段
+RECORD_TYPE = "_type"
+
+
+def is_jsonl(path: str) -> bool:
+    """判断文件是否为 JSONL 格式（按扩展名，其次按首行是否为头记录）"""
+    path = Path(path)
+    if path.suffix.lower() == ".jsonl":
+        return True
+    if path.suffix.lower() == ".json":
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline().strip()
+    try:
+        record = json.loads(first)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(record, dict) and record.get(RECORD_TYPE) == "header"
+
+
+def iter_records(path: str):
+    """逐行产出 JSONL 中的所有记录（含元数据记录）"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # 抓取中断时最后一行可能不完整
+                continue
+
+
+def is_query(source) -> bool:
+    """是否为评论库查询对象或评论流（而非文件路径）"""
+    return not isinstance(source, (str, Path))
+
+
+def read_header(path: str) -> dict:
+    """读取帖子信息（url/title/crawl_time），JSON 格式需整体解析"""
+    if is_query(path):
+        return path.read_header()
+    if is_jsonl(path):
+        for record in iter_records(path):
+            if record.get(RECORD_TYPE) == "header":
+                return {k: v for k, v in record.items() if k != RECORD_TYPE}
+            break
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {k: v for k, v in data.items() if k != "comments"}
+
+
+def iter_comments(path: str):
+    """逐条产出评论（JSONL 流式读取；JSON 为兼容旧格式整体读入后逐条产出）"""
+    if is_query(path):
+        yield from path.iter_comments()
+        return
+    if is_jsonl(path):
+        for record in iter_records(path):
+            if RECORD_TYPE not in record:
+                yield record
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from data.get("comments", [])
+
+
+def load_comments(path: str) -> dict:
+    """整体读入为 JSON 格式的结果字典（供需要完整数据的场景，如增量抓取的上次结果）"""
+    header = read_header(path)
+    comments = list(iter_comments(path))
+    return dict(header, total_comments=len(comments), comments=comments)
+
+
+class JsonlCommentWriter:
+    """JSONL 评论写入器：头记录在第一次写入时落盘，每条评论写一行"""
+
+    def __init__(self, path: str, header: dict, append: bool = False):
+        """
+        Args:
+            path: 输出文件路径
+            header: 头记录内容（url/title/crawl_time），写入前可继续更新
+            append: 追加到已有文件（断点恢复），此时不再写头记录
+        """
+        self.path = Path(path)
+        self.header = header
+        self.append = append and self.path.exists()
+        self.count = 0
+        self._file = None
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+        if not self.append:
+            self.write_record(dict({RECORD_TYPE: "header"}, **self.header))
+        # 关闭后再次写入时追加，不覆盖已写内容
+        self.append = True
+
+    def write_record(self, record: dict):
+        """写入一行记录"""
+        if self._file is None:
+            self._open()
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write(self, comment: dict):
+        """写入一条评论"""
+        self.write_record(comment)
+        self.count += 1
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def list_comment_files(paths: list) -> list:
+    """展开输入：目录取其中的 .json / .jsonl 文件（跳过 manifest.json 和检查点），去重并保持顺序"""
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.iterdir()
+                                if f.suffix.lower() in (".json", ".jsonl") and f.name != "manifest.json"
+                                and not f.name.endswith(".ckpt.jsonl")))
+        else:
+            files.append(p)
+    return list(dict.fromkeys(f.resolve() for f in files))
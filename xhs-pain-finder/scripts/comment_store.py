@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+评论库（SQLite + FTS5）
+所有帖子的评论集中存入一个 SQLite 文件：帖子、评论、子评论、逐条分析结果四张表，
+帖子 / 点赞数 / 评论时间 / 抓取时间上建索引，评论内容按 jieba 分词建 FTS5 全文索引。
+StoreQuery 可直接作为 save_to_excel / analyze_keywords 的输入（替代 JSON 文件路径），例如
+“上个月所有帖子中提到 价格 的高赞负面评论”只读取命中的评论
+"""
+
+import argparse
+import json
+import sqlite3
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+
+from checkpoint import comment_key, parse_comment_time
+from comment_io import iter_comments, list_comment_files, read_header
+
+# 默认库文件
+DEFAULT_STORE_PATH = "comments.sqlite"
+
+# 库结构版本
+SCHEMA_VERSION = 1
+
+# 每批写入的评论数
+IMPORT_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    crawl_time TEXT,
+    source TEXT,
+    imported_at TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_crawl_time ON posts (crawl_time);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    comment_key TEXT NOT NULL,
+    position INTEGER,
+    comment_id TEXT,
+    nickname TEXT,
+    content TEXT,
+    likes INTEGER NOT NULL DEFAULT 0,
+    time_text TEXT,
+    published TEXT,
+    is_author_reply INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (post_id, comment_key)
+);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id, position);
+CREATE INDEX IF NOT EXISTS comments_likes ON comments (likes);
+CREATE INDEX IF NOT EXISTS comments_published ON comments (published);
+CREATE TABLE IF NOT EXISTS sub_comments (
+    comment_id INTEGER NOT NULL REFERENCES comments (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    content TEXT,
+    PRIMARY KEY (comment_id, position)
+);
+CREATE TABLE IF NOT EXISTS analysis (
+    comment_id INTEGER PRIMARY KEY REFERENCES comments (id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL,
+    tokens TEXT,
+    score REAL,
+    sentiment TEXT
+);
+CREATE INDEX IF NOT EXISTS analysis_sentiment ON analysis (sentiment);
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5 (tokens);
+"""
+
+
+def segment_for_index(text: str) -> str:
+    """按 jieba 搜索引擎模式分词，空格连接后写入全文索引（中文没有空格，FTS5 默认分词器无法切词）"""
+    import jieba
+    from model_cache import load_jieba
+
+    load_jieba()
+    return " ".join(w for w in jieba.cut_for_search(text or "") if w.strip())
+
+
+def fts_query(text: str) -> str:
+    """检索词转为 FTS5 查询：分词后逐词加引号，多个词之间为 AND"""
+    words = segment_for_index(text).split()
+    return " ".join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+class CommentStore:
+    """评论库读写"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Args:
+            path: SQLite 库文件路径，不存在时创建
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        try:
+            self.db.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"当前 SQLite 不支持 FTS5 全文索引: {e}")
+        self.db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def import_file(self, path: str) -> dict:
+        """导入一个评论文件（JSON / JSONL），帖子以链接为键，重复导入时更新点赞数等字段"""
+        header = read_header(path)
+        return self.import_comments(header, iter_comments(path), source=str(Path(path).resolve()))
+
+    def import_comments(self, header: dict, comments, source: str = "") -> dict:
+        """
+        导入一篇帖子的评论
+
+        Args:
+            header: 帖子信息（url / title / crawl_time）
+            comments: 评论迭代器
+            source: 来源文件
+
+        Returns:
+            {"post_id", "comments", "new"}
+        """
+        url = header.get("url") or source
+        crawl_time = header.get("crawl_time", "")
+        try:
+            reference = datetime.fromisoformat(crawl_time) if crawl_time else datetime.now()
+        except ValueError:
+            reference = datetime.now()
+
+        db = self.db
+        db.execute(
+            "INSERT INTO posts (url, title, crawl_time, source, imported_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET title = excluded.title, crawl_time = excluded.crawl_time, "
+            "source = excluded.source, imported_at = excluded.imported_at",
+            (url, header.get("title", ""), crawl_time, source, datetime.now().isoformat())
+        )
+        post_id = db.execute("SELECT id FROM posts WHERE url = ?", (url,)).fetchone()[0]
+
+        total = new = 0
+        batch = []
+        for position, comment in enumerate(comments):
+            batch.append((position, comment))
+            if len(batch) >= IMPORT_BATCH:
+                new += self._import_batch(post_id, batch, reference)
+                total += len(batch)
+                batch = []
+        if batch:
+            new += self._import_batch(post_id, batch, reference)
+            total += len(batch)
+        db.commit()
+        return {"post_id": post_id, "comments": total, "new": new}
+
+    def _import_batch(self, post_id: int, batch: list, reference: datetime) -> int:
+        db = self.db
+        new = 0
+        for position, comment in batch:
+            content = comment.get("content", "")
+            # 无法解析的评论时间按抓取时间计，保证按时间筛选时不会漏掉
+            published = parse_comment_time(comment.get("time", ""), reference) or reference
+            key = comment_key(comment)
+            row = db.execute("SELECT id, content FROM comments WHERE post_id = ? AND comment_key = ?",
+                             (post_id, key)).fetchone()
+            values = (comment.get("index", position + 1), comment.get("id", ""), comment.get("nickname", ""),
+                      content, comment.get("likes", 0) or 0, comment.get("time", ""),
+                      published.isoformat(timespec="minutes"), 1 if comment.get("is_author_reply") else 0)
+            if row is None:
+                cursor = db.execute(
+                    "INSERT INTO comments (position, comment_id, nickname, content, likes, time_text, published, "
+                    "is_author_reply, post_id, comment_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values + (post_id, key)
+                )
+                comment_id = cursor.lastrowid
+                db.execute("INSERT INTO comments_fts (rowid, tokens) VALUES (?, ?)",
+                           (comment_id, segment_for_index(content)))
+                new += 1
+            else:
+                comment_id, old_content = row
+                db.execute(
+                    "UPDATE comments SET position = ?, comment_id = ?, nickname = ?, content = ?, likes = ?, "
+                    "time_text = ?, published = ?, is_author_reply = ? WHERE id = ?",
+                    values + (comment_id,)
+                )
+                if old_content != content:
+                    db.execute("DELETE FROM analysis WHERE comment_id = ?", (comment_id,))
+                    db.execute("UPDATE comments_fts SET tokens = ? WHERE rowid = ?",
+                               (segment_for_index(content), comment_id))
+                db.execute("DELETE FROM sub_comments WHERE comment_id = ?", (comment_id,))
+            db.executemany("INSERT INTO sub_comments (comment_id, position, content) VALUES (?, ?, ?)",
+                           [(comment_id, i, text) for i, text in enumerate(comment.get("sub_comments") or [])])
+        return new
+
+    def analyze(self, sentiment: bool = True, batch: int = IMPORT_BATCH) -> int:
+        """
+        为尚未分析（或分析器已变化）的评论计算分词和情感得分，写入 analysis 表
+
+        Returns:
+            新分析的评论数
+        """
+        from analysis_cache import analyzer_fingerprint
+        from text_analysis import analyze_contents, classify_sentiment
+
+        fingerprint = analyzer_fingerprint()
+        rows = self.db.execute(
+            "SELECT c.id, c.content FROM comments c LEFT JOIN analysis a ON a.comment_id = c.id "
+            "WHERE a.comment_id IS NULL OR a.fingerprint != ? ORDER BY c.id", (fingerprint,)
+        ).fetchall()
+        for i in range(0, len(rows), batch):
+            chunk = rows[i:i + batch]
+            results = analyze_contents([content for _, content in chunk], sentiment)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO analysis (comment_id, fingerprint, tokens, score, sentiment) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(comment_id, fingerprint, json.dumps(tokens, ensure_ascii=False), score,
+                  classify_sentiment(score) if score is not None else None)
+                 for (comment_id, _), (tokens, score) in zip(chunk, results)]
+            )
+            self.db.commit()
+        return len(rows)
+
+    def stats(self) -> dict:
+        count = lambda table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        pages = self.db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "posts": count("posts"),
+            "comments": count("comments"),
+            "sub_comments": count("sub_comments"),
+            "analyzed": count("analysis"),
+            "mb": round(pages * page_size / 1024 / 1024, 2)
+        }
+
+
+class StoreQuery:
+    """
+    评论库查询
+
+    提供与评论文件相同的读取接口（read_header / iter_comments），可替代 JSON 路径传给
+    save_to_excel、analyze_keywords 等脚本；评论记录字段与抓取输出一致，另含 post_title / post_url。
+    """
+
+    def __init__(self, store_path: str = DEFAULT_STORE_PATH, match: str = None, post: str = None,
+                 since: str = None, until: str = None, min_likes: int = None, sentiment: str = None,
+                 order: str = "post", limit: int = None):
+        """
+        Args:
+            store_path: 评论库文件
+            match: 全文检索词（按 jieba 分词，多个词同时出现）
+            post: 帖子链接，或标题中包含的文字
+            since: 评论时间下限（YYYY-MM-DD，含）
+            until: 评论时间上限（YYYY-MM-DD，不含）
+            min_likes: 最低点赞数
+            sentiment: 情感类型（正面 / 中性 / 负面），需先运行分析
+            order: 排序 - post(按帖子和原顺序) / likes(点赞数降序) / time(评论时间降序)
+            limit: 最多返回的评论数
+        """
+        if not Path(store_path).exists():
+            raise FileNotFoundError(f"评论库不存在: {store_path}")
+        self.store_path = store_path
+        self.match = match
+        self.post = post
+        self.since = since
+        self.until = until
+        self.min_likes = min_likes
+        self.sentiment = sentiment
+        self.order = order
+        self.limit = limit
+
+    def to_dict(self) -> dict:
+        """查询参数（可序列化，用于把查询交给常驻分析服务）"""
+        params = dict(vars(self))
+        params["store_path"] = str(Path(self.store_path).resolve())
+        return params
+
+    def describe(self) -> str:
+        """查询条件的文字描述（作为导出结果的标题）"""
+        parts = []
+        if self.post:
+            parts.append(f"帖子「{self.post}」")
+        if self.since or self.until:
+            parts.append(f"{self.since or ''}~{self.until or ''}")
+        if self.match:
+            parts.append(f"包含「{self.match}」")
+        if self.sentiment:
+            parts.append(self.sentiment)
+        if self.min_likes:
+            parts.append(f"点赞 >= {self.min_likes}")
+        return "评论库查询: " + ("，".join(parts) if parts else "全部评论")
+
+    def _sql(self, columns: str) -> tuple:
+        where, params = [], []
+        joins = "JOIN posts p ON p.id = c.post_id"
+        if self.match:
+            where.append("c.id IN (SELECT rowid FROM comments_fts WHERE comments_fts MATCH ?)")
+            params.append(fts_query(self.match))
+        if self.post:
+            where.append("(p.url = ? OR p.title LIKE ?)")
+            params.extend([self.post, f"%{self.post}%"])
+        if self.since:
+            where.append("c.published >= ?")
+            params.append(self.since)
+        if self.until:
+            where.append("c.published < ?")
+            params.append(self.until)
+        if self.min_likes is not None:
+            where.append("c.likes >= ?")
+            params.append(self.min_likes)
+        if self.sentiment:
+            joins += " JOIN analysis a ON a.comment_id = c.id"
+            where.append("a.sentiment = ?")
+            params.append(self.sentiment)
+        order = {
+            "post": "p.id, c.position",
+            "likes": "c.likes DESC, c.id",
+            "time": "c.published DESC, c.id",
+        }[self.order]
+        sql = f"SELECT {columns} FROM comments c {joins}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        if self.limit:
+            sql += " LIMIT ?"
+            params.append(self.limit)
+        return sql, params
+
+    def read_header(self) -> dict:
+        return {
+            "url": str(Path(self.store_path).resolve()),
+            "title": self.describe(),
+            "crawl_time": datetime.now().isoformat()
+        }
+
+    def iter_comments(self):
+        """逐条产出命中的评论（流式读取，内存占用与结果条数无关）"""
+        db = sqlite3.connect(self.store_path)
+        try:
+            sql, params = self._sql("c.id, c.position, c.comment_id, c.nickname, c.content, c.likes, "
+                                    "c.time_text, c.is_author_reply, p.title, p.url")
+            subs = db.cursor()
+            for row in db.execute(sql, params):
+                comment_id, position, cid, nickname, content, likes, time_text, author, title, url = row
+                sub_comments = [text for (text,) in subs.execute(
+                    "SELECT content FROM sub_comments WHERE comment_id = ? ORDER BY position", (comment_id,))]
+                yield {
+                    "index": position,
+                    "id": cid,
+                    "nickname": nickname,
+                    "content": content,
+                    "likes": likes,
+                    "time": time_text,
+                    "is_author_reply": bool(author),
+                    "sub_comments": sub_comments,
+                    "post_title": title,
+                    "post_url": url
+                }
+        finally:
+            db.close()
+
+    def count(self) -> int:
+        """命中的评论总数（不受 limit 限制）"""
+        db = sqlite3.connect(self.store_path)
+        limit, self.limit = self.limit, None
+        try:
+            sql, params = self._sql("c.id")
+            return db.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+        finally:
+            self.limit = limit
+            db.close()
+
+
+def add_query_arguments(parser: argparse.ArgumentParser):
+    """为脚本添加“从评论库读取”的命令行参数"""
+    group = parser.add_argument_group("评论库输入（替代 JSON 文件）")
+    group.add_argument("--store", help="评论库文件（SQLite），指定后从库中查询评论")
+    group.add_argument("--match", help="全文检索词，如 价格")
+    group.add_argument("--post", help="帖子链接，或标题中包含的文字")
+    group.add_argument("--since", dest="store_since", metavar="DATE", help="评论时间下限 YYYY-MM-DD（含）")
+    group.add_argument("--until", dest="store_until", metavar="DATE", help="评论时间上限 YYYY-MM-DD（不含）")
+    group.add_argument("--min-likes", type=int, help="最低点赞数")
+    group.add_argument("--sentiment", choices=["正面", "中性", "负面"], help="情感类型（需先运行 comment_store.py analyze）")
+    group.add_argument("--order", choices=["post", "likes", "time"], default="post", help="排序方式")
+    group.add_argument("--limit", type=int, help="最多读取的评论数")
+
+
+def query_from_args(args) -> StoreQuery:
+    """由命令行参数构建查询，未指定 --store 时返回 None"""
+    if not args.store:
+        return None
+    return StoreQuery(args.store, match=args.match, post=args.post, since=args.store_since,
+                      until=args.store_until, min_likes=args.min_likes, sentiment=args.sentiment,
+                      order=args.order, limit=args.limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评论库（SQLite + FTS5）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="导入评论文件")
+    p_import.add_argument("inputs", nargs="+", help="评论文件（JSON / JSONL）或目录")
+    p_import.add_argument("--store", default=DEFAULT_STORE_PATH, help="评论库文件")
+
+    p_analyze = sub.add_parser("analyze", help="为未分析的评论计算分词和情感得分")
+    p_analyze.add_argument("--store", default=DEFAULT_STORE_PATH, help="评论库文件")
+
+    p_query = sub.add_parser("query", help="查询评论")
+    add_query_arguments(p_query)
+    p_query.set_defaults(limit=20)
+
+    args = parser.parse_args()
+
+    if args.command == "query":
+        if not args.store:
+            args.store = DEFAULT_STORE_PATH
+        query = query_from_args(args)
+        print(f"{query.describe()}，共 {query.count()} 条")
+        for c in query.iter_comments():
+            print(f"  [{c['likes']}赞] {c['post_title'][:20]} | {c['nickname']}: {c['content'][:60]}")
+        return
+
+    if find_spec("jieba") is None:
+        print("错误: 请先安装 jieba: pip install jieba")
+        return
+
+    with CommentStore(args.store) as store:
+        if args.command == "import":
+            for path in list_comment_files(args.inputs):
+                result = store.import_file(path)
+                print(f"  {path.name}: {result['comments']} 条评论，新增 {result['new']} 条")
+        else:
+            print(f"已分析 {store.analyze()} 条评论")
+        stats = store.stats()
+    print(f"\n✅ 评论库: {stats['posts']} 篇帖子，{stats['comments']} 条评论，"
+          f"{stats['sub_comments']} 条子评论，已分析 {stats['analyzed']} 条（{stats['mb']} MB）")
+    print(f"📄 {args.store}")
+
+
+if __name__ == "__main__":
+    main()
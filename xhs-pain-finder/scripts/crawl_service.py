@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+常驻抓取服务
+一个进程常驻一个持久化浏览器上下文（沿用 ~/.xhs-browser-data 的登录状态），从本地任务队列取抓取任务：
+- 目录队列：把任务 JSON 放进 <队列目录>/pending/，结果写到 done/
+- 本机 HTTP 端口（只监听 127.0.0.1，请求需携带令牌，连接信息写在状态文件中，默认
+  ~/.xhs-crawl-service.json，可用环境变量 XHS_CRAWL_SERVICE 指定）
+页面通过路由拦截直接中止图片、视频和字体请求，只等 DOMContentLoaded，评论是否出现由 settle_page 判断；
+每个任务记录排队时间、抓取耗时、拦截的请求数和估计节省的字节数
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+
+from analysis_daemon import request
+
+# 默认状态文件与队列目录
+DEFAULT_STATE_PATH = Path.home() / ".xhs-crawl-service.json"
+DEFAULT_QUEUE_DIR = Path.home() / ".xhs-crawl-queue"
+
+# 默认空闲退出时间（秒）
+DEFAULT_IDLE_TIMEOUT = 3600
+
+# 拦截的资源类型（Playwright resource_type）
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+
+# 估计节省字节数时每种资源最多发出的 HEAD 请求数、同时进行的请求数和超时（秒）
+SIZE_PROBE_SAMPLES = 20
+SIZE_PROBE_CONCURRENCY = 8
+SIZE_PROBE_TIMEOUT = 3.0
+
+# 目录队列轮询间隔（秒）
+QUEUE_POLL_INTERVAL = 0.2
+
+# 任务选项默认值（含义见 extract_comments.crawl_post）
+JOB_DEFAULTS = {
+    "mode": "auto",
+    "max_scroll": 50,
+    "scroll_strategy": "adaptive",
+    "time_budget": None,
+    "replies": False,
+    "reply_concurrency": 8
+}
+
+
+def state_path() -> Path:
+    return Path(os.environ.get("XHS_CRAWL_SERVICE") or DEFAULT_STATE_PATH)
+
+
+def read_state():
+    try:
+        with open(state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_json_atomic(path: Path, data: dict):
+    """先写临时文件再改名，读取方不会读到写了一半的文件"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def make_job(url: str, output: str, **options) -> dict:
+    """
+    构造抓取任务
+
+    Args:
+        url: 帖子链接
+        output: 输出文件路径（.json / .jsonl），相对路径按提交时的工作目录解析
+        **options: 任务选项，见 JOB_DEFAULTS
+    """
+    unknown = set(options) - set(JOB_DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知任务选项: {', '.join(sorted(unknown))}")
+    return {
+        "id": uuid.uuid4().hex[:12],
+        "url": url,
+        "output": str(Path(output).resolve()),
+        "options": options,
+        "submitted": time.time()
+    }
+
+
+def enqueue_file(queue_dir, job: dict) -> Path:
+    """把任务写入目录队列（服务未运行时也可提交，启动后处理）"""
+    pending = Path(queue_dir) / "pending"
+    pending.mkdir(parents=True, exist_ok=True)
+    path = pending / f"{job['id']}.json"
+    write_json_atomic(path, job)
+    return path
+
+
+class ResourceBlocker:
+    """
+    页面级资源拦截与流量统计
+
+    拦截的请求直接中止，不下载；其余请求放行，按响应的 Content-Length 累计实际下载字节数
+    """
+
+    def __init__(self, page, blocked_types=BLOCKED_RESOURCE_TYPES):
+        self.page = page
+        self.blocked_types = tuple(blocked_types)
+        self.reset()
+
+    def reset(self):
+        self.blocked = {}
+        self.blocked_urls = {}
+        self.bytes_received = 0
+
+    async def attach(self):
+        if self.blocked_types:
+            await self.page.route("**/*", self._route)
+        self.page.on("response", self._on_response)
+
+    async def _route(self, route):
+        req = route.request
+        if req.resource_type in self.blocked_types:
+            self.blocked[req.resource_type] = self.blocked.get(req.resource_type, 0) + 1
+            self.blocked_urls.setdefault(req.resource_type, []).append(req.url)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _on_response(self, response):
+        try:
+            self.bytes_received += int(response.headers.get("content-length") or 0)
+        except ValueError:
+            pass
+
+    async def estimate_saved(self, context) -> int:
+        """
+        估计拦截节省的字节数：每种资源对去重后的被拦截地址等距抽样发 HEAD 请求（共享登录 Cookie），
+        按平均 Content-Length 乘以该类拦截次数外推；拿不到大小的类型计 0
+        """
+        semaphore = asyncio.Semaphore(SIZE_PROBE_CONCURRENCY)
+
+        async def probe(url: str):
+            async with semaphore:
+                try:
+                    response = await context.request.head(url, timeout=SIZE_PROBE_TIMEOUT * 1000)
+                    return int(response.headers.get("content-length") or 0) or None
+                except Exception:
+                    return None
+
+        async def estimate(urls: list) -> float:
+            unique = list(dict.fromkeys(u for u in urls if u.startswith("http")))
+            sample = unique[::max(len(unique) // SIZE_PROBE_SAMPLES, 1)][:SIZE_PROBE_SAMPLES]
+            sizes = [size for size in await asyncio.gather(*(probe(u) for u in sample)) if size]
+            return statistics.mean(sizes) * len(urls) if sizes else 0
+
+        return int(sum(await asyncio.gather(*(estimate(urls) for urls in self.blocked_urls.values()))))
+
+
+class CrawlService:
+    """常驻抓取服务：一个浏览器上下文，concurrency 个常驻标签页并发处理队列中的任务"""
+
+    def __init__(self, queue_dir=None, port: int = 0, concurrency: int = 1, headless: bool = False,
+                 user_data_dir: str = None, block: bool = True, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Args:
+            queue_dir: 目录队列，默认 ~/.xhs-crawl-queue
+            port: HTTP 监听端口，0 表示自动分配
+            concurrency: 常驻标签页数（同时处理的任务数）
+            headless: 是否无头模式（首次使用需非无头登录）
+            user_data_dir: 浏览器用户数据目录，默认同 extract_comments
+            block: 是否拦截图片、视频和字体
+            idle_timeout: 空闲多少秒后退出，<= 0 表示不退出
+        """
+        self.queue_dir = Path(queue_dir) if queue_dir else DEFAULT_QUEUE_DIR
+        self.port = port
+        self.concurrency = max(concurrency, 1)
+        self.headless = headless
+        self.user_data_dir = user_data_dir
+        self.block = block
+        self.idle_timeout = idle_timeout
+        self.token = secrets.token_hex(16)
+        self.jobs = {}
+        self.latencies = []
+        self.completed = 0
+        self.failed = 0
+        self.bytes_saved = 0
+        self.last_active = time.monotonic()
+        self.started = None
+
+    # ===== 任务队列 =====
+
+    def submit(self, job: dict) -> dict:
+        """登记任务并放入队列（在事件循环线程中调用）"""
+        record = dict(job, status="queued", submitted=job.get("submitted") or time.time())
+        self.jobs[record["id"]] = record
+        record["done"] = asyncio.Event()
+        self.queue.put_nowait(record)
+        self.last_active = time.monotonic()
+        return record
+
+    async def watch_queue_dir(self):
+        """
+        轮询目录队列：pending/ 中的任务改名到 running/ 认领后入队，服务启动时先认领上次未完成的任务
+        （只有这些任务从检查点续抓，新任务总是重新抓取）
+        """
+        pending, running = self.queue_dir / "pending", self.queue_dir / "running"
+        for directory in (pending, running, self.queue_dir / "done"):
+            directory.mkdir(parents=True, exist_ok=True)
+        claimed = sorted(running.glob("*.json"))
+        interrupted = set(claimed)
+        while not self.stopping.is_set():
+            claimed += sorted(pending.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for path in claimed:
+                target = running / path.name
+                try:
+                    if path != target:
+                        os.replace(path, target)
+                    job = json.loads(target.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"⚠️ 跳过无效的任务文件 {path.name}: {e}")
+                    if target.exists():
+                        write_json_atomic(self.queue_dir / "done" / path.name,
+                                          {"id": target.stem, "status": "failed", "error": f"任务文件无效: {e}"})
+                        target.unlink()
+                    continue
+                job.setdefault("id", target.stem)
+                job["file"] = str(target)
+                job["resume"] = path in interrupted
+                self.submit(job)
+            claimed = []
+            if self.idle_timeout > 0 and self.queue.empty() and not self.busy \
+                    and time.monotonic() - self.last_active > self.idle_timeout:
+                print("空闲超时，退出")
+                self.stopping.set()
+                break
+            await asyncio.sleep(QUEUE_POLL_INTERVAL)
+
+    # ===== 抓取 =====
+
+    async def worker(self, page, blocker: ResourceBlocker):
+        while True:
+            job = await self.queue.get()
+            self.busy += 1
+            try:
+                await self.run_job(page, blocker, job)
+            finally:
+                self.busy -= 1
+                self.last_active = time.monotonic()
+                job["done"].set()
+
+    async def run_job(self, page, blocker: ResourceBlocker, job: dict):
+        from checkpoint import CrawlSession, checkpoint_path
+        from extract_comments import crawl_post, save_result
+
+        start = time.time()
+        job.update(status="running", started=start, queue_seconds=round(start - job["submitted"], 3))
+        options = dict(JOB_DEFAULTS, **(job.get("options") or {}))
+        output_path = Path(job["output"])
+        jsonl = output_path.suffix.lower() == ".jsonl"
+        # 只有上次服务中断时未完成的任务从检查点续抓；新任务（包括重复提交已抓取过的帖子）重新抓取，
+        # 不沿用可能残留的旧检查点
+        session = CrawlSession(job["url"], checkpoint_path(output_path), resume=bool(job.get("resume")))
+        blocker.reset()
+        print(f"▶ 任务 {job['id']}: {job['url']}", flush=True)
+        try:
+            result = await crawl_post(page, job["url"], options["max_scroll"], options["mode"],
+                                      options["scroll_strategy"], options["time_budget"], session,
+                                      options["replies"], options["reply_concurrency"],
+                                      wait_until="domcontentloaded")
+            if jsonl:
+                session.finalize_jsonl(output_path)
+            else:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                save_result(result, output_path)
+                session.close(remove=True)
+            job.update(status="ok", title=result["title"], total_comments=result["total_comments"])
+            self.completed += 1
+        except Exception as e:
+            job.update(status="failed", error=str(e), traceback=traceback.format_exc(limit=3))
+            self.failed += 1
+        finally:
+            session.close()
+
+        job["seconds"] = round(time.time() - start, 3)
+        self.latencies.append(job["seconds"])
+        job.update(blocked=dict(blocker.blocked), bytes_received=blocker.bytes_received,
+                   bytes_saved=await blocker.estimate_saved(page.context), finished=time.time())
+        self.bytes_saved += job["bytes_saved"]
+        mark = "✅" if job["status"] == "ok" else "❌"
+        print(f"{mark} 任务 {job['id']} {job['status']}: {job.get('total_comments', 0)} 条评论，"
+              f"耗时 {job['seconds']:.2f}s（排队 {job['queue_seconds']:.2f}s），拦截 {sum(job['blocked'].values())} 个请求，"
+              f"约节省 {job['bytes_saved'] / 1024:.0f} KB", flush=True)
+
+        if job.get("file"):
+            done = self.queue_dir / "done" / Path(job["file"]).name
+            write_json_atomic(done, public_job(job))
+            Path(job["file"]).unlink(missing_ok=True)
+
+    # ===== HTTP =====
+
+    def status(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "pid": os.getpid(), "port": self.port, "queue_dir": str(self.queue_dir),
+            "uptime": round(time.time() - self.started, 1), "concurrency": self.concurrency, "block": self.block,
+            "completed": self.completed, "failed": self.failed, "queued": self.queue.qsize(), "running": self.busy,
+            "latency_median": statistics.median(latencies) if latencies else None,
+            "latency_max": latencies[-1] if latencies else None,
+            "bytes_saved": self.bytes_saved
+        }
+
+    async def dispatch(self, method: str, path: str, payload: dict) -> tuple:
+        self.last_active = time.monotonic()
+        if path == "/status":
+            return 200, self.status()
+        if path == "/shutdown" and method == "POST":
+            self.stopping.set()
+            return 200, {"stopped": True}
+        if path == "/jobs" and method == "POST":
+            try:
+                job = make_job(payload["url"], payload["output"], **(payload.get("options") or {}))
+            except (KeyError, ValueError) as e:
+                return 400, {"error": f"任务无效: {e}"}
+            record = self.submit(job)
+            if payload.get("wait"):
+                await record["done"].wait()
+            return 200, public_job(record)
+        if path.startswith("/jobs/") and method == "GET":
+            job = self.jobs.get(path.rsplit("/", 1)[-1])
+            return (200, public_job(job)) if job else (404, {"error": "任务不存在"})
+        return 404, {"error": f"未知请求: {method} {path}"}
+
+    def start_http(self, loop):
+        """在后台线程运行 HTTP 服务，请求交给事件循环处理"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, data: dict):
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self):
+                if self.headers.get("X-Token") != server.token:
+                    return self._reply(403, {"error": "令牌无效"})
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                future = asyncio.run_coroutine_threadsafe(server.dispatch(self.command, self.path, payload), loop)
+                status, data = future.result()
+                self._reply(status, data)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    # ===== 主流程 =====
+
+    async def run(self):
+        from playwright.async_api import async_playwright
+        from extract_comments import launch_context
+
+        self.queue = asyncio.Queue()
+        self.stopping = asyncio.Event()
+        self.busy = 0
+        self.started = time.time()
+
+        async with async_playwright() as p:
+            start = time.perf_counter()
+            context = await launch_context(p, self.user_data_dir, self.headless)
+            workers = []
+            for i in range(self.concurrency):
+                page = context.pages[i] if i < len(context.pages) else await context.new_page()
+                blocker = ResourceBlocker(page, BLOCKED_RESOURCE_TYPES if self.block else ())
+                await blocker.attach()
+                workers.append(asyncio.create_task(self.worker(page, blocker)))
+            print(f"浏览器已就绪（{time.perf_counter() - start:.1f}s），{self.concurrency} 个标签页，"
+                  f"{'拦截图片/视频/字体' if self.block else '不拦截资源'}", flush=True)
+
+            self.start_http(asyncio.get_running_loop())
+            self.write_state()
+            print(f"✅ 常驻抓取服务已启动: 127.0.0.1:{self.port}（pid {os.getpid()}），队列目录 {self.queue_dir}",
+                  flush=True)
+            try:
+                await self.watch_queue_dir()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self.httpd.shutdown()
+                self.httpd.server_close()
+                current = read_state()
+                if current and current.get("pid") == os.getpid():
+                    state_path().unlink()
+                await context.close()
+
+    def write_state(self):
+        path = state_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "port": self.port, "token": self.token,
+                       "queue_dir": str(self.queue_dir)}, f)
+
+
+def public_job(job: dict) -> dict:
+    """任务记录中可序列化的部分"""
+    return {key: value for key, value in job.items() if key not in ("done", "file", "traceback", "resume")}
+
+
+def wait_ready(timeout: float = 60.0) -> dict:
+    """等待服务就绪，返回其状态"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = read_state()
+        if state:
+            try:
+                status, data = request(state, "GET", "/status")
+                if status == 200:
+                    return data
+            except OSError:
+                pass
+        time.sleep(0.2)
+    return None
+
+
+def submit(urls: list, outputs: list, options: dict, wait: bool = False, queue_dir=None) -> list:
+    """
+    提交抓取任务：服务在运行时经 HTTP 提交（wait=True 时等待完成），否则写入目录队列
+
+    Returns:
+        任务记录列表
+    """
+    state = read_state()
+    jobs = []
+    for url, output in zip(urls, outputs):
+        if state:
+            try:
+                status, data = request(state, "POST", "/jobs",
+                                       {"url": url, "output": str(Path(output).resolve()), "options": options,
+                                        "wait": wait})
+                if status != 200:
+                    print(f"❌ 提交失败: {data.get('error', status)}")
+                    continue
+                jobs.append(data)
+                continue
+            except OSError:
+                state = None
+        job = make_job(url, output, **options)
+        enqueue_file(queue_dir or DEFAULT_QUEUE_DIR, job)
+        jobs.append(dict(job, status="queued"))
+    return jobs
+
+
+def format_job(job: dict) -> str:
+    if job["status"] in ("queued", "running"):
+        return f"{job['id']} {job['status']}: {job['url']}"
+    line = (f"{job['id']} {job['status']}: {job.get('total_comments', 0)} 条评论，耗时 {job['seconds']:.2f}s，"
+            f"拦截 {sum(job.get('blocked', {}).values())} 个请求，约节省 {job.get('bytes_saved', 0) / 1024:.0f} KB")
+    return line + (f"\n  错误: {job['error']}" if job.get("error") else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻抓取服务")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_start = sub.add_parser("start", help="启动服务")
+    p_start.add_argument("--queue-dir", help=f"目录队列（默认 {DEFAULT_QUEUE_DIR}）")
+    p_start.add_argument("--port", type=int, default=0, help="监听端口（默认自动分配）")
+    p_start.add_argument("--concurrency", type=int, default=1, help="常驻标签页数（同时处理的任务数）")
+    p_start.add_argument("--headless", action="store_true", help="无头模式（首次使用需先非无头登录）")
+    p_start.add_argument("--user-data-dir", help="浏览器用户数据目录（默认同 extract_comments.py）")
+    p_start.add_argument("--no-block", action="store_true", help="不拦截图片、视频和字体")
+    p_start.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                         help="空闲多少秒后自动退出（0 不退出）")
+    p_start.add_argument("--foreground", action="store_true", help="在前台运行（默认转入后台）")
+
+    p_submit = sub.add_parser("submit", help="提交抓取任务")
+    p_submit.add_argument("urls", nargs="+", help="帖子链接")
+    p_submit.add_argument("--output", "-o", help="输出文件路径（单个链接）")
+    p_submit.add_argument("--output-dir", default="comments", help="多个链接时的输出目录")
+    p_submit.add_argument("--format", choices=["json", "jsonl"], default="json", help="多个链接时的输出格式")
+    p_submit.add_argument("--mode", choices=["auto", "network", "dom"], default="auto", help="抓取模式")
+    p_submit.add_argument("--max-scroll", type=int, default=50, help="最大滚动次数")
+    p_submit.add_argument("--time-budget", type=float, help="单帖评论加载时间预算（秒）")
+    p_submit.add_argument("--replies", action="store_true", help="展开并抓取全部回复")
+    p_submit.add_argument("--wait", action="store_true", help="等待任务完成并输出耗时（需服务在运行）")
+    p_submit.add_argument("--queue-dir", help="服务未运行时写入的目录队列")
+
+    sub.add_parser("status", help="查看服务状态")
+    sub.add_parser("stop", help="停止服务")
+    args = parser.parse_args()
+
+    state = read_state()
+    if args.command == "start":
+        try:
+            import playwright  # noqa: F401
+        except ImportError:
+            print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
+            return
+        if state and wait_ready(timeout=0.5):
+            print(f"服务已在运行: 127.0.0.1:{state['port']}（pid {state['pid']}）")
+            return
+        if not args.foreground:
+            command = [sys.executable, __file__, "start", "--foreground", "--port", str(args.port),
+                       "--concurrency", str(args.concurrency), "--idle-timeout", str(args.idle_timeout)]
+            for flag, value in (("--queue-dir", args.queue_dir), ("--user-data-dir", args.user_data_dir)):
+                if value:
+                    command += [flag, str(Path(value).resolve())]
+            command += ["--headless"] * args.headless + ["--no-block"] * args.no_block
+            subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            info = wait_ready()
+            if info:
+                print(f"✅ 常驻抓取服务已启动: 127.0.0.1:{info['port']}（pid {info['pid']}），队列目录 {info['queue_dir']}")
+            else:
+                print("❌ 服务启动超时")
+            return
+        service = CrawlService(args.queue_dir, args.port, args.concurrency, args.headless, args.user_data_dir,
+                               not args.no_block, args.idle_timeout)
+        asyncio.run(service.run())
+        return
+
+    if args.command == "submit":
+        from batch_crawl import post_filename
+
+        if args.output and len(args.urls) == 1:
+            outputs = [args.output]
+        else:
+            outputs = [Path(args.output_dir) / post_filename(i + 1, url, args.format) for i, url in enumerate(args.urls)]
+        options = {"mode": args.mode, "max_scroll": args.max_scroll, "time_budget": args.time_budget,
+                   "replies": args.replies}
+        if args.wait and not state:
+            print("⚠️ 服务未运行，任务已写入目录队列，服务启动后处理")
+        for job in submit(args.urls, outputs, options, args.wait, args.queue_dir):
+            print(format_job(job))
+        return
+
+    if not state:
+        print("服务未运行")
+        return
+    try:
+        if args.command == "status":
+            status, data = request(state, "GET", "/status")
+            latency = f"，耗时中位数 {data['latency_median']:.2f}s" if data["latency_median"] is not None else ""
+            print(f"服务运行中: 127.0.0.1:{data['port']}（pid {data['pid']}），已完成 {data['completed']} 个任务"
+                  f"（失败 {data['failed']}），排队 {data['queued']}，进行中 {data['running']}{latency}，"
+                  f"拦截资源约节省 {data['bytes_saved'] / 1024 / 1024:.1f} MB")
+        else:
+            request(state, "POST", "/shutdown")
+            print("✅ 服务已停止")
+    except OSError:
+        print("服务未运行（状态文件已过期）")
+        state_path().unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
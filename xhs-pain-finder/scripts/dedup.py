@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+重复与灌水评论检测
+评论先归一化（去 @提及、[表情]、标点和空白，转小写），归一化后相同的为完全重复；
+其余按字符 3-gram 计算 MinHash 签名，经 LSH 分段（banding）只比较落入同一桶的候选对，
+签名估计的 Jaccard 相似度达到阈值即视为近似重复，再按连通分量归为一组。
+整个过程对评论数近似线性（百万条评论无需两两比较），签名计算按批向量化。
+归一化后为空或只是“蹲”“求链接”等固定灌水短语（可重复多遍）的评论标记为灌水
+"""
+
+import math
+import re
+
+from comment_io import iter_comments, read_header
+
+# 字符 n-gram 长度
+SHINGLE_SIZE = 3
+
+# MinHash 签名长度与 LSH 分段数（每段 NUM_PERM / BANDS 行）
+NUM_PERM = 64
+BANDS = 16
+
+# 默认近似重复阈值（估计的 Jaccard 相似度）
+DEFAULT_THRESHOLD = 0.8
+
+# 每批计算签名的评论数（限制中间数组大小）
+SIGNATURE_BATCH = 20000
+
+# 灌水短语（归一化、去掉重复后完全相同才算）
+SPAM_PHRASES = frozenset([
+    "蹲", "蹲蹲", "蹲一个", "蹲后续", "蹲一个后续", "求链接", "求", "链接", "同问", "同求", "求同款",
+    "滴滴", "dd", "码住", "马住", "马", "mark", "插眼", "顶", "顶顶", "踩踩", "来了", "路过",
+    "关注了", "互关", "回关", "互粉", "已关注", "1", "111", "+1", "沙发", "前排"
+])
+
+# 灌水评论归一化后的最大长度（更长的不再检查，避免逐条做重复匹配）
+SPAM_MAX_CHARS = 30
+
+# 重复组的权重方式：one 只计一次，log 计 1 + log2(条数) 次，all 按原条数计（仍合并写法、去除灌水）
+WEIGHTINGS = ("one", "log", "all")
+
+# 重复评论表中每组展示的其他写法数 / 每种写法保留的字数
+MAX_VARIANTS = 3
+VARIANT_CHARS = 100
+
+MENTION_RE = re.compile(r"@[^\s@]+")
+STICKER_RE = re.compile(r"\[[^\[\]]{1,10}\]")
+NON_WORD_RE = re.compile(r"[\W_]+")
+REPEAT_RE = re.compile(r"^(.+?)\1+$")
+
+
+def normalize(text) -> str:
+    """归一化评论内容：去 @提及、[表情]、标点、空白和 emoji，转小写"""
+    if not isinstance(text, str):
+        return ""
+    if "@" in text:
+        text = MENTION_RE.sub("", text)
+    if "[" in text:
+        text = STICKER_RE.sub("", text)
+    return NON_WORD_RE.sub("", text).lower()
+
+
+def is_spam(normalized: str) -> bool:
+    """归一化后为空，或是灌水短语（可整体重复多遍，如“求链接求链接”）"""
+    if not normalized:
+        return True
+    if len(normalized) > SPAM_MAX_CHARS:
+        return False
+    match = REPEAT_RE.match(normalized)
+    core = match.group(1) if match else normalized
+    return core in SPAM_PHRASES or normalized in SPAM_PHRASES
+
+
+def group_weight(size: int, weighting: str = "one") -> int:
+    """一组重复评论在分析中计入的次数"""
+    if weighting == "all":
+        return size
+    if weighting == "log":
+        return 1 + int(math.log2(size))
+    return 1
+
+
+def _hash_params(num_perm: int, seed: int = 1):
+    """仿射哈希族 h(x) = a·x + b (mod 2^32) 的参数（a 为奇数，每个 h 都是 32 位整数上的一个置换）"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint32) | np.uint32(1)
+    b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint32)
+    return a, b
+
+
+def _mix64(x):
+    """splitmix64 终混，使编码均匀分布"""
+    import numpy as np
+
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shingles(texts: list, size: int = SHINGLE_SIZE) -> tuple:
+    """
+    一批文本的字符 n-gram 编码（每个字符 21 位，n <= 3 时编码不冲突）
+
+    Returns:
+        (编码数组, 每条文本的 n-gram 数)；短于 n 的文本补位后作为一个 n-gram
+    """
+    import numpy as np
+
+    padded = [t if len(t) >= size else t.ljust(size, "\0") for t in texts]
+    lengths = np.array([len(t) for t in padded], dtype=np.int64)
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    codes = np.concatenate([codes, np.zeros(size - 1, dtype=np.uint64)])
+    total = int(lengths.sum())
+    ids = np.zeros(total, dtype=np.uint64)
+    for j in range(size):
+        ids = (ids << np.uint64(21)) | codes[j:j + total]
+    # 只保留完全落在同一条文本内的 n-gram
+    starts = np.cumsum(lengths) - lengths
+    offsets = np.arange(total) - np.repeat(starts, lengths)
+    valid = offsets <= np.repeat(lengths - size, lengths)
+    return ids[valid], lengths - size + 1
+
+
+def minhash_signatures(texts: list, num_perm: int = NUM_PERM, seed: int = 1):
+    """文本的 MinHash 签名，形状 (文本数, num_perm)，uint32"""
+    import numpy as np
+
+    a, b = _hash_params(num_perm, seed)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    block = np.empty((num_perm, min(SIGNATURE_BATCH, len(texts))), dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_BATCH):
+        ids, counts = shingles(texts[start:start + SIGNATURE_BATCH])
+        x = (_mix64(ids) >> np.uint64(32)).astype(np.uint32)
+        bounds = np.cumsum(counts) - counts
+        hashed = np.empty_like(x)
+        # 逐个哈希函数计算（uint32 乘加溢出即取模），中间数组只有 n-gram 数大小
+        for p in range(num_perm):
+            np.multiply(x, a[p], out=hashed)
+            hashed += b[p]
+            block[p, :len(counts)] = np.minimum.reduceat(hashed, bounds)
+        signatures[start:start + len(counts)] = block[:, :len(counts)].T
+    return signatures
+
+
+def candidate_pairs(signatures, bands: int = BANDS):
+    """LSH 分段：任一段签名完全相同的文本成为候选对（同桶内均与桶中一条配对），返回 (较小下标, 较大下标)"""
+    import numpy as np
+
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    keys = []
+    for band in range(bands):
+        # 每段签名按 64 位拼接后混合为一个键；偶发的键冲突只多出候选对，会在比较签名时排除
+        part = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        words = part.view(np.uint64) if rows % 2 == 0 else part.astype(np.uint64)
+        key = words[:, 0].copy()
+        for j in range(1, words.shape[1]):
+            key = _mix64(key) ^ words[:, j]
+        order = np.argsort(key)
+        sorted_keys = key[order]
+        same = sorted_keys[1:] == sorted_keys[:-1]
+        if not same.any():
+            continue
+        # 桶内每条与桶中第一条配对
+        run_start = np.maximum.accumulate(np.where(np.concatenate([[True], ~same]), np.arange(n), 0))
+        member = np.flatnonzero(same) + 1
+        first, other = order[run_start[member]], order[member]
+        keys.append(np.minimum(first, other) * n + np.maximum(first, other))
+    if not keys:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # 多个分段找到的同一对只保留一次
+    pairs = np.sort(np.concatenate(keys))
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+    return pairs // n, pairs % n
+
+
+def similar_pairs(signatures, left, right, threshold: float, block: int = 200000):
+    """签名估计的 Jaccard 相似度达到阈值的候选对（分块比较，限制中间数组大小）"""
+    import numpy as np
+
+    keep = np.empty(len(left), dtype=bool)
+    for start in range(0, len(left), block):
+        end = start + block
+        agree = (signatures[left[start:end]] == signatures[right[start:end]]).mean(axis=1)
+        keep[start:end] = agree >= threshold
+    return left[keep], right[keep]
+
+
+def connected_components(n: int, left, right):
+    """无向图连通分量：每个节点标为所在分量中最小的节点号"""
+    import numpy as np
+
+    labels = np.arange(n)
+    if not len(left):
+        return labels
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def find_duplicates(texts: list, threshold: float = DEFAULT_THRESHOLD):
+    """
+    按归一化文本查找重复组
+
+    Args:
+        texts: 归一化后的文本（相同文本已视为完全重复）
+        threshold: 近似重复的 Jaccard 相似度阈值，>= 1 时只找完全重复
+
+    Returns:
+        每条文本所在组的标号（组内第一条的下标）
+    """
+    import numpy as np
+
+    unique = {}
+    first_of = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        first_of[i] = unique.setdefault(text, i)
+    if threshold >= 1 or len(unique) < 2:
+        return first_of
+
+    representatives = np.fromiter(unique.values(), dtype=np.int64, count=len(unique))
+    signatures = minhash_signatures(list(unique))
+    left, right = similar_pairs(signatures, *candidate_pairs(signatures), threshold)
+    labels = connected_components(len(unique), left, right)
+    # 唯一文本按首次出现排序，分量中最小的唯一文本即最早出现的一条
+    unique_label = representatives[labels]
+    position = np.empty(len(texts), dtype=np.int64)
+    position[representatives] = np.arange(len(representatives))
+    return unique_label[position[first_of]]
+
+
+class DedupedComments:
+    """
+    去重后的评论源，提供与 comment_store.StoreQuery 相同的 read_header() / iter_comments() 接口
+
+    第一遍读取评论检测重复组，第二遍每组只产出一条代表评论（组内点赞最高的一条，同赞取最早的），
+    附 dup_count（组内条数）和 weight（分析中计入的次数）；灌水评论默认不产出。
+    需要读取两遍，输入须为文件或评论库查询（不支持流水线的评论流）。
+    """
+
+    def __init__(self, source, threshold: float = DEFAULT_THRESHOLD, weighting: str = "one",
+                 drop_spam: bool = True):
+        """
+        Args:
+            source: 评论文件路径或评论库查询
+            threshold: 近似重复阈值（估计的 Jaccard 相似度）
+            weighting: 重复组的权重方式，见 WEIGHTINGS
+            drop_spam: 是否去除灌水评论
+        """
+        self.source = source
+        self.threshold = threshold
+        self.weighting = weighting
+        self.drop_spam = drop_spam
+        self.labels = None
+        self.groups = {}
+        self.total = 0
+
+    def scan(self):
+        """第一遍：归一化、标记灌水、查找重复组"""
+        import numpy as np
+
+        texts, likes, spam = [], [], []
+        for comment in iter_comments(self.source):
+            normalized = normalize(comment.get("content", ""))
+            texts.append(normalized)
+            likes.append(comment.get("likes", 0) or 0)
+            spam.append(is_spam(normalized))
+        self.total = len(texts)
+        self.labels = find_duplicates(texts, self.threshold) if texts else np.zeros(0, dtype=np.int64)
+
+        groups = {}
+        for i, label in enumerate(self.labels.tolist()):
+            group = groups.get(label)
+            if group is None:
+                groups[label] = group = {"size": 0, "likes": 0, "best": i, "exact": True, "spam": spam[i],
+                                         "text": texts[i], "variants": []}
+            group["size"] += 1
+            group["likes"] += likes[i]
+            if likes[i] > likes[group["best"]]:
+                group["best"] = i
+            if texts[i] != group["text"]:
+                group["exact"] = False
+        self.groups = groups
+        return self
+
+    def read_header(self) -> dict:
+        return read_header(self.source)
+
+    def iter_comments(self):
+        """第二遍：产出每组的代表评论，并顺带记录重复组的其他写法"""
+        if self.labels is None:
+            self.scan()
+        labels = self.labels
+        for i, comment in enumerate(iter_comments(self.source)):
+            if i >= len(labels):
+                break
+            group = self.groups[int(labels[i])]
+            if group["size"] > 1 and i != group["best"]:
+                variant = str(comment.get("content", ""))[:VARIANT_CHARS]
+                if len(group["variants"]) <= MAX_VARIANTS and variant not in group["variants"]:
+                    group["variants"].append(variant)
+            if i == group["best"]:
+                group["content"] = comment.get("content", "")
+                group["rep_likes"] = comment.get("likes", 0)
+                if self.drop_spam and group["spam"]:
+                    continue
+                # 来源已带权重时（如按点赞计权的回复，见 reply_threads）与重复组的权重相乘
+                yield dict(comment, dup_count=group["size"],
+                           weight=comment.get("weight", 1) * group_weight(group["size"], self.weighting))
+
+    def summary(self) -> dict:
+        """统计：总条数、保留条数、完全重复 / 近似重复 / 灌水条数"""
+        kept = exact = near = spam = 0
+        for group in self.groups.values():
+            if group["spam"]:
+                spam += group["size"]
+                if not self.drop_spam:
+                    kept += 1
+                continue
+            kept += 1
+            if group["size"] > 1:
+                if group["exact"]:
+                    exact += group["size"] - 1
+                else:
+                    near += group["size"] - 1
+        return {"total": self.total, "kept": kept, "exact": exact, "near": near, "spam": spam}
+
+    def duplicate_groups(self, limit: int = 200) -> list:
+        """重复组与灌水组，按条数降序（需在 iter_comments 读完之后调用）"""
+        rows = []
+        for group in self.groups.values():
+            if group["size"] < 2 and not group["spam"]:
+                continue
+            kind = "灌水" if group["spam"] else ("完全重复" if group["exact"] else "近似重复")
+            rows.append({"kind": kind, "size": group["size"], "weight": group_weight(group["size"], self.weighting),
+                         "content": group.get("content", ""), "likes": group.get("rep_likes", 0),
+                         "total_likes": group["likes"],
+                         "variants": [v for v in group["variants"]
+                                      if v != str(group.get("content", ""))[:VARIANT_CHARS]][:MAX_VARIANTS]})
+        rows.sort(key=lambda r: (-r["size"], -r["total_likes"]))
+        return rows[:limit]
+
+
+def write_duplicates_sheet(wb, duplicates: dict, title: str = "重复评论"):
+    """
+    在工作簿中添加重复评论工作表（普通模式 Workbook）
+
+    Args:
+        duplicates: 分析结果文件中的 duplicates 部分（summary / groups / drop_spam，见 analysis_result）
+    """
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    ws = wb.create_sheet(title)
+    headers = ["序号", "类型", "条数", "分析权重", "代表评论", "点赞数", "总点赞", "其他写法"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill("solid", fgColor="4472C4")
+
+    wrap = Alignment(vertical="top", wrap_text=True)
+    groups = duplicates["groups"]
+    for row, group in enumerate(groups, 2):
+        weight = "不计入" if group["kind"] == "灌水" and duplicates["drop_spam"] else group["weight"]
+        values = [row - 1, group["kind"], group["size"], weight, group["content"], group["likes"],
+                  group["total_likes"], "\n".join(group["variants"])]
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value).alignment = wrap
+
+    summary = duplicates["summary"]
+    ws.cell(row=len(groups) + 3, column=1,
+            value=f"共 {summary['total']} 条评论，完全重复 {summary['exact']} 条、近似重复 {summary['near']} 条、"
+                  f"灌水 {summary['spam']} 条，去重后 {summary['kept']} 条")
+    for col, width in zip("ABCDEFGH", (8, 12, 8, 10, 60, 10, 10, 60)):
+        ws.column_dimensions[col].width = width
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+评论 DOM 批量提取
+在页面内通过一次（或分块的）page.evaluate 读取所有评论节点的全部字段，
+避免逐元素 query_selector / inner_text 带来的大量 Playwright IPC 往返
+"""
+
+import re
+
+import profiling
+
+# 评论节点选择器（按顺序尝试，命中即停止）
+COMMENT_SELECTORS = [
+    '[class*="comment-item"]',
+    '[class*="commentItem"]',
+    '.comment-inner',
+    '[class*="comment"] > div'
+]
+
+# 各字段的选择器回退顺序，与 extract_single_comment 保持一致
+FIELD_SELECTORS = {
+    "content": ['[class*="content"]', '.text', 'p', 'span'],
+    "nickname": ['[class*="nickname"]', '[class*="name"]', '.user', 'a'],
+    "likes": ['[class*="like"]', '[class*="count"]', '.likes'],
+    "time": ['[class*="time"]', '[class*="date"]', 'time'],
+    "author": '[class*="author"], [class*="作者"]',
+    "sub_comments": '[class*="reply"], [class*="sub-comment"]'
+}
+
+# 单次 evaluate 处理的评论节点数
+DEFAULT_CHUNK_SIZE = 500
+
+# 页面内执行的提取函数：返回原始字段，截断与数字解析在 Python 侧完成
+EXTRACT_JS = """
+([commentSelectors, fields, start, limit]) => {
+    let nodes = [];
+    for (const sel of commentSelectors) {
+        nodes = document.querySelectorAll(sel);
+        if (nodes.length) break;
+    }
+    const total = nodes.length;
+    const text = (el) => (el.innerText || "").trim();
+    const len = (s) => [...s].length;
+
+    const firstMatch = (elem, selectors, accept) => {
+        let value = "";
+        for (const sel of selectors) {
+            const el = elem.querySelector(sel);
+            if (el) {
+                value = text(el);
+                if (accept(value)) break;
+            }
+        }
+        return value;
+    };
+
+    const records = [];
+    const end = Math.min(total, start + limit);
+    for (let i = start; i < end; i++) {
+        const elem = nodes[i];
+        try {
+            let likesText = "";
+            for (const sel of fields.likes) {
+                const el = elem.querySelector(sel);
+                if (el) {
+                    const t = text(el);
+                    if (/\\d+/.test(t)) { likesText = t; break; }
+                }
+            }
+            const subs = [];
+            const subElems = elem.querySelectorAll(fields.sub_comments);
+            for (let j = 0; j < Math.min(subElems.length, 5); j++) {
+                const t = text(subElems[j]);
+                if (t) subs.push(t);
+            }
+            records.push({
+                position: i,
+                content: firstMatch(elem, fields.content, (v) => v && len(v) > 2),
+                nickname: firstMatch(elem, fields.nickname, (v) => v && len(v) < 30),
+                likes_text: likesText,
+                time: firstMatch(elem, fields.time, (v) => !!v),
+                is_author_reply: elem.querySelector(fields.author) !== null,
+                sub_comments: subs
+            });
+        } catch (e) {
+            records.push({position: i, error: String(e)});
+        }
+    }
+    return {total: total, records: records};
+}
+"""
+
+
+def build_comment_record(raw: dict, index: int) -> dict:
+    """将页面返回的原始字段转换为评论记录（与 extract_single_comment 输出一致）"""
+    likes = 0
+    nums = re.findall(r'\d+', raw.get("likes_text", ""))
+    if nums:
+        likes = int(nums[0])
+
+    return {
+        "index": index,
+        "nickname": raw.get("nickname", ""),
+        "content": raw.get("content", "")[:500],  # 限制长度
+        "likes": likes,
+        "time": raw.get("time", ""),
+        "is_author_reply": bool(raw.get("is_author_reply")),
+        "sub_comments": [s[:200] for s in raw.get("sub_comments", [])]
+    }
+
+
+async def extract_comments_batch(page, chunk_size: int = DEFAULT_CHUNK_SIZE, stats: dict = None,
+                                 start: int = 0) -> list:
+    """
+    在页面内批量提取全部评论
+
+    Args:
+        page: Playwright 页面对象（async API）
+        chunk_size: 每次 evaluate 处理的节点数
+        stats: 可选，记录 evaluate 调用次数（round_trips）和节点总数（total）
+        start: 从第几个评论节点开始提取（用于滚动过程中只提取新增节点）
+
+    Returns:
+        评论记录列表（已过滤空内容）
+    """
+    comments = []
+    total = None
+
+    while total is None or start < total:
+        with profiling.stage("dom_extract"):
+            result = await page.evaluate(EXTRACT_JS, [COMMENT_SELECTORS, FIELD_SELECTORS, start, chunk_size])
+        profiling.count("ipc")
+        if stats is not None:
+            stats["round_trips"] = stats.get("round_trips", 0) + 1
+        total = result["total"]
+        if stats is not None:
+            stats["total"] = total
+
+        for raw in result["records"]:
+            position = raw["position"]
+            if "error" in raw:
+                print(f"  提取评论 {position+1} 失败: {raw['error']}")
+                continue
+            comment = build_comment_record(raw, position + 1)
+            if comment.get("content"):
+                comments.append(comment)
+
+        if not result["records"]:
+            break
+        start += chunk_size
+
+    return comments
@@ -2,175 +2,340 @@
 """
 小红书评论抓取脚本 - 浏览器辅助模式
 使用 Playwright 自动化浏览器抓取评论数据
+（asyncio 与抓取相关模块只在用到的函数中导入，--help 和批量 / 导入入口快速启动）
 """
 
 import argparse
 import json
-import time
 import re
 from datetime import datetime
 from pathlib import Path
 
-def extract_comments(url: str, output_path: str, max_scroll: int = 50, headless: bool = False):
+import profiling
+from checkpoint import CrawlSession, checkpoint_path, load_previous
+from reply_threads import DEFAULT_REPLY_CONCURRENCY
+
+# 默认浏览器用户数据目录（保持登录状态）
+DEFAULT_USER_DATA_DIR = Path.home() / ".xhs-browser-data"
+
+
+def extract_comments(url: str, output_path: str, max_scroll: int = 50, headless: bool = False,
+                     mode: str = "auto", user_data_dir: str = None, scroll_strategy: str = "adaptive",
+                     time_budget: float = None, resume: bool = False, since: str = None,
+                     session_factory=CrawlSession, replies: bool = False,
+                     reply_concurrency: int = DEFAULT_REPLY_CONCURRENCY):
     """
     从小红书帖子抓取评论
     
     Args:
         url: 小红书帖子链接
-        output_path: 输出 JSON 文件路径
-        max_scroll: 最大滚动次数
+        output_path: 输出文件路径（.json 或 .jsonl，JSONL 在抓取过程中逐条写入）
+        max_scroll: 最大滚动（翻页）次数
         headless: 是否无头模式
+        mode: 抓取模式 - network(捕获评论接口响应) / dom(滚动并解析页面) / auto(优先接口，失败回退 DOM)
+        user_data_dir: 浏览器用户数据目录，默认 ~/.xhs-browser-data
+        scroll_strategy: DOM 模式滚动策略 - adaptive(等待真实加载信号) / fixed(固定 sleep 轮询)
+        time_budget: 单帖评论加载时间预算（秒），None 表示不限
+        resume: 是否从上次中断留下的检查点恢复
+        since: 增量模式 - 上次的抓取输出文件，只抓取其 crawl_time 之后的新评论并与之合并
+        session_factory: 抓取会话类（参数同 CrawlSession），如 pipeline.PipelineSession 边抓边分发评论
+        replies: 是否展开并抓取全部回复（每条回复为完整记录，组成 replies 回复树，见 reply_threads）
+        reply_concurrency: 同时展开的回复楼层数
     """
+    import asyncio
+
     try:
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright
     except ImportError:
         print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
         return None
     
+    # JSONL 输出边抓边写到检查点，收尾时才替换输出文件（增量模式下输出文件即上次结果，中断时保持不变）
+    jsonl = Path(output_path).suffix.lower() == ".jsonl"
+    previous = load_previous(since) if since else None
+    session = session_factory(url, checkpoint_path(output_path), resume=resume, previous=previous)
+    
+    async def run():
+        async with async_playwright() as p:
+            with profiling.stage("browser_launch"):
+                context = await launch_context(p, user_data_dir, headless)
+                page = context.pages[0] if context.pages else await context.new_page()
+            result = await crawl_post(page, url, max_scroll, mode, scroll_strategy, time_budget, session,
+                                      replies, reply_concurrency)
+            with profiling.stage("browser_close"):
+                await context.close()
+            return result
+    
+    try:
+        result = asyncio.run(run())
+        with profiling.stage("save_output"):
+            if jsonl:
+                output_file = session.finalize_jsonl(output_path)
+            else:
+                output_file = save_result(result, output_path)
+    finally:
+        session.close()
+    if not jsonl:
+        # 结果已完整保存，检查点不再需要
+        session.close(remove=True)
+    
+    if previous:
+        print(f"\n增量抓取: 新增 {len(session.comments)} 条评论")
+    print(f"\n✅ 抓取完成！共 {result['total_comments']} 条评论")
+    print(f"📄 保存至: {output_file}")
+    
+    return result
+
+
+async def launch_context(p, user_data_dir: str = None, headless: bool = False):
+    """启动持久化浏览器上下文 - 使用用户数据目录保持登录状态"""
+    user_data_dir = Path(user_data_dir) if user_data_dir else DEFAULT_USER_DATA_DIR
+    user_data_dir.mkdir(parents=True, exist_ok=True)
+    
+    return await p.chromium.launch_persistent_context(
+        user_data_dir=str(user_data_dir),
+        headless=headless,
+        viewport={"width": 1280, "height": 800},
+        locale="zh-CN"
+    )
+
+
+async def crawl_post(page, url: str, max_scroll: int = 50, mode: str = "auto",
+                     scroll_strategy: str = "adaptive", time_budget: float = None,
+                     session: CrawlSession = None, replies: bool = False,
+                     reply_concurrency: int = DEFAULT_REPLY_CONCURRENCY, wait_until: str = "networkidle") -> dict:
+    """
+    在给定页面中抓取一篇帖子的评论
+    
+    Args:
+        page: Playwright 页面对象（async API）
+        url: 小红书帖子链接
+        max_scroll: 最大滚动（翻页）次数
+        mode: 抓取模式，见 extract_comments
+        scroll_strategy: DOM 模式滚动策略，见 extract_comments
+        time_budget: 单帖评论加载时间预算（秒）
+        session: 可选的抓取会话（检查点 / 断点恢复 / 增量抓取）
+        replies: 是否抓取全部回复，见 extract_comments
+        reply_concurrency: 同时展开的回复楼层数
+        wait_until: 页面加载完成的判断（Playwright goto 的 wait_until）；常驻抓取服务拦截了图片等资源，
+            用 domcontentloaded 即可，评论是否出现由 settle_page 判断
+    
+    Returns:
+        抓取结果（url/title/crawl_time/total_comments/comments）
+    """
+    from network_capture import CommentCapture
+
     comments = []
     
-    with sync_playwright() as p:
-        # 启动浏览器 - 使用用户数据目录保持登录状态
-        user_data_dir = Path.home() / ".xhs-browser-data"
-        user_data_dir.mkdir(exist_ok=True)
-        
-        context = p.chromium.launch_persistent_context(
-            user_data_dir=str(user_data_dir),
-            headless=headless,
-            viewport={"width": 1280, "height": 800},
-            locale="zh-CN"
-        )
-        
-        page = context.pages[0] if context.pages else context.new_page()
-        
+    # 接口捕获需在页面加载前注册，才能拿到首屏评论请求
+    capture = None
+    if mode in ("auto", "network"):
+        capture = CommentCapture(page, session, replies, reply_concurrency)
+        capture.attach()
+    
+    try:
         print(f"正在访问: {url}")
-        page.goto(url, wait_until="networkidle", timeout=60000)
-        
-        # 等待页面加载
-        time.sleep(3)
+        with profiling.stage("page_load"):
+            await page.goto(url, wait_until=wait_until, timeout=60000)
+            
+            # 等待页面加载
+            await settle_page(page, scroll_strategy)
         
         # 检查是否需要登录
         if "login" in page.url.lower():
             print("\n⚠️ 需要登录！请在打开的浏览器中登录小红书账号...")
             print("登录完成后，脚本将自动继续。")
-            page.wait_for_url(lambda u: "login" not in u.lower(), timeout=300000)
-            page.goto(url, wait_until="networkidle")
-            time.sleep(3)
+            with profiling.stage("login_wait"):
+                await page.wait_for_url(lambda u: "login" not in u.lower(), timeout=300000)
+            with profiling.stage("page_load"):
+                await page.goto(url, wait_until=wait_until)
+                await settle_page(page, scroll_strategy)
         
         # 获取帖子标题
         title = ""
         try:
-            title_elem = page.query_selector(".title, .note-title, h1")
+            profiling.count("ipc")
+            title_elem = await page.query_selector(".title, .note-title, h1")
             if title_elem:
-                title = title_elem.inner_text().strip()
+                title = (await title_elem.inner_text()).strip()
         except:
             pass
         
         print(f"帖子标题: {title}")
         print("开始抓取评论...")
+        if session:
+            session.set_title(title)
         
-        # 点击展开评论区（如果需要）
-        try:
-            expand_btn = page.query_selector('[class*="comment"] button, .show-more')
-            if expand_btn:
-                expand_btn.click()
-                time.sleep(1)
-        except:
-            pass
-        
-        # 滚动加载更多评论
-        last_count = 0
-        no_new_count = 0
-        
-        for i in range(max_scroll):
-            # 滚动到页面底部
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(1.5)
-            
-            # 尝试点击"查看更多评论"按钮
-            try:
-                more_btn = page.query_selector('[class*="more"], .load-more, [class*="展开"]')
-                if more_btn and more_btn.is_visible():
-                    more_btn.click()
-                    time.sleep(1)
-            except:
-                pass
-            
-            # 获取当前评论数量
-            comment_elems = page.query_selector_all('[class*="comment-item"], [class*="commentItem"], .comment')
-            current_count = len(comment_elems)
-            
-            print(f"  滚动 {i+1}/{max_scroll}, 已发现 {current_count} 条评论")
-            
-            if current_count == last_count:
-                no_new_count += 1
-                if no_new_count >= 5:
-                    print("  连续5次无新评论，停止滚动")
-                    break
-            else:
-                no_new_count = 0
-            
-            last_count = current_count
-        
-        # 提取评论数据
-        print("\n正在提取评论数据...")
-        
-        # 尝试多种选择器
-        selectors = [
-            '[class*="comment-item"]',
-            '[class*="commentItem"]',
-            '.comment-inner',
-            '[class*="comment"] > div'
-        ]
-        
-        comment_elems = []
-        for selector in selectors:
-            comment_elems = page.query_selector_all(selector)
-            if comment_elems:
-                break
+        if capture:
+            with profiling.stage("network_collect"):
+                comments = await capture.collect(max_pages=max_scroll, time_budget=time_budget)
+            if comments:
+                print(f"  接口模式: {capture.pages} 页响应, {capture.bytes_received / 1024:.1f} KB, "
+                      f"用时 {capture.elapsed:.1f}s" + (f", 回复分页 {capture.reply_pages} 页" if replies else ""))
+            elif mode == "auto":
+                print("  未捕获到评论接口响应，回退到 DOM 抓取")
         
-        for idx, elem in enumerate(comment_elems):
-            try:
-                comment_data = extract_single_comment(elem, idx + 1)
-                if comment_data and comment_data.get("content"):
-                    comments.append(comment_data)
-            except Exception as e:
-                print(f"  提取评论 {idx+1} 失败: {e}")
-        
-        context.close()
+        if not comments and mode in ("auto", "dom"):
+            comments = await scroll_and_extract_dom(page, max_scroll, scroll_strategy, time_budget, session,
+                                                    replies, reply_concurrency)
+    finally:
+        if capture:
+            capture.detach()
+    
+    if session:
+        comments = session.result_comments()
     
-    # 保存结果
-    result = {
+    return {
         "url": url,
         "title": title,
-        "crawl_time": datetime.now().isoformat(),
+        "crawl_time": session.crawl_time if session else datetime.now().isoformat(),
         "total_comments": len(comments),
         "comments": comments
     }
-    
+
+
+def save_result(result: dict, output_path: str) -> Path:
+    """保存抓取结果为 JSON"""
     output_file = Path(output_path)
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(result, f, ensure_ascii=False, indent=2)
     
-    print(f"\n✅ 抓取完成！共 {len(comments)} 条评论")
-    print(f"📄 保存至: {output_file}")
+    return output_file
+
+
+async def settle_page(page, scroll_strategy: str = "adaptive"):
+    """页面加载后的等待：adaptive 等到评论节点出现即返回，fixed 固定等待 3 秒"""
+    import asyncio
+
+    from page_loading import wait_for_comments
+
+    if scroll_strategy == "adaptive":
+        await wait_for_comments(page, timeout=3.0)
+    else:
+        await asyncio.sleep(3)
+
+
+async def scroll_and_extract_dom(page, max_scroll: int = 50, scroll_strategy: str = "adaptive",
+                                 time_budget: float = None, session: CrawlSession = None,
+                                 replies: bool = False, reply_concurrency: int = DEFAULT_REPLY_CONCURRENCY) -> list:
+    """
+    DOM 模式：滚动加载全部评论后从页面节点提取
     
-    return result
+    Args:
+        page: Playwright 页面对象
+        max_scroll: 最大滚动次数
+        scroll_strategy: adaptive(等待真实加载信号) / fixed(固定 sleep 轮询)
+        time_budget: 加载时间预算（秒），仅 adaptive 生效
+        session: 可选的抓取会话，滚动过程中即提取新增节点写入检查点
+        replies: 是否展开全部回复并按楼层提取（回复展开后再写入检查点）
+        reply_concurrency: 同时展开的回复楼层数
+    """
+    from dom_extract import extract_comments_batch
+    from page_loading import AdaptiveLoader
+    from reply_threads import expand_threads, extract_threads_batch
+    
+    extracted = 0
+    
+    async def extract(stats: dict = None, start: int = 0) -> list:
+        if not replies:
+            return await extract_comments_batch(page, stats=stats, start=start)
+        expansion = await expand_threads(page, reply_concurrency)
+        if expansion["clicks"]:
+            print(f"  展开回复: {expansion['expanded']} 次（{expansion['rounds']} 轮, {expansion['seconds']}s）")
+        return await extract_threads_batch(page, stats=stats, start=start)
+    
+    async def on_progress(count: int) -> bool:
+        # 只提取新增节点；子评论展开导致的位置偏移由最终全量提取和去重兜底
+        nonlocal extracted
+        stats = {}
+        batch = await extract(stats, extracted)
+        extracted = stats.get("total", extracted)
+        return session.add(batch)
+    
+    progress = on_progress if session else None
+    with profiling.stage("scroll_load"):
+        if scroll_strategy == "adaptive":
+            await AdaptiveLoader(page, max_scroll, time_budget, on_progress=progress).load()
+        else:
+            await scroll_fixed(page, max_scroll, on_progress=progress)
+    
+    # 提取评论数据（页面内批量提取，避免逐元素 IPC 往返）
+    print("\n正在提取评论数据...")
+    comments = await extract()
+    if session:
+        session.add(comments)
+    return comments
+
 
+async def scroll_fixed(page, max_scroll: int = 50, on_progress=None):
+    """固定间隔滚动：每次滚动后 sleep，连续 5 次无新评论停止"""
+    import asyncio
 
-def extract_single_comment(elem, index: int) -> dict:
-    """提取单条评论数据"""
+    # 点击展开评论区（如果需要）
+    try:
+        expand_btn = await page.query_selector('[class*="comment"] button, .show-more')
+        if expand_btn:
+            await expand_btn.click()
+            await asyncio.sleep(1)
+    except:
+        pass
+    
+    # 滚动加载更多评论
+    last_count = 0
+    no_new_count = 0
+    
+    for i in range(max_scroll):
+        # 滚动到页面底部
+        profiling.count("scrolls")
+        profiling.count("ipc", 4)
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        with profiling.stage("scroll_wait"):
+            await asyncio.sleep(1.5)
+        
+        # 尝试点击"查看更多评论"按钮
+        try:
+            more_btn = await page.query_selector('[class*="more"], .load-more, [class*="展开"]')
+            if more_btn and await more_btn.is_visible():
+                profiling.count("ipc")
+                await more_btn.click()
+                with profiling.stage("scroll_wait"):
+                    await asyncio.sleep(1)
+        except:
+            pass
+        
+        # 获取当前评论数量
+        current_count = await page.eval_on_selector_all(
+            '[class*="comment-item"], [class*="commentItem"], .comment', "els => els.length"
+        )
+        
+        print(f"  滚动 {i+1}/{max_scroll}, 已发现 {current_count} 条评论")
+        
+        if current_count == last_count:
+            no_new_count += 1
+            if no_new_count >= 5:
+                print("  连续5次无新评论，停止滚动")
+                break
+        else:
+            no_new_count = 0
+            if on_progress and not await on_progress(current_count):
+                break
+        
+        last_count = current_count
+
+
+async def extract_single_comment(elem, index: int) -> dict:
+    """提取单条评论数据（逐元素查询，保留用于基准对比，见 dom_extract.extract_comments_batch）"""
     
     # 评论内容
     content = ""
     content_selectors = ['[class*="content"]', '.text', 'p', 'span']
     for sel in content_selectors:
         try:
-            content_elem = elem.query_selector(sel)
+            content_elem = await elem.query_selector(sel)
             if content_elem:
-                content = content_elem.inner_text().strip()
+                content = (await content_elem.inner_text()).strip()
                 if content and len(content) > 2:
                     break
         except:
@@ -181,9 +346,9 @@ def extract_single_comment(elem, index: int) -> dict:
     nick_selectors = ['[class*="nickname"]', '[class*="name"]', '.user', 'a']
     for sel in nick_selectors:
         try:
-            nick_elem = elem.query_selector(sel)
+            nick_elem = await elem.query_selector(sel)
             if nick_elem:
-                nickname = nick_elem.inner_text().strip()
+                nickname = (await nick_elem.inner_text()).strip()
                 if nickname and len(nickname) < 30:
                     break
         except:
@@ -194,9 +359,9 @@ def extract_single_comment(elem, index: int) -> dict:
     like_selectors = ['[class*="like"]', '[class*="count"]', '.likes']
     for sel in like_selectors:
         try:
-            like_elem = elem.query_selector(sel)
+            like_elem = await elem.query_selector(sel)
             if like_elem:
-                like_text = like_elem.inner_text().strip()
+                like_text = (await like_elem.inner_text()).strip()
                 # 提取数字
                 nums = re.findall(r'\d+', like_text)
                 if nums:
@@ -210,9 +375,9 @@ def extract_single_comment(elem, index: int) -> dict:
     time_selectors = ['[class*="time"]', '[class*="date"]', 'time']
     for sel in time_selectors:
         try:
-            time_elem = elem.query_selector(sel)
+            time_elem = await elem.query_selector(sel)
             if time_elem:
-                pub_time = time_elem.inner_text().strip()
+                pub_time = (await time_elem.inner_text()).strip()
                 if pub_time:
                     break
         except:
@@ -221,7 +386,7 @@ def extract_single_comment(elem, index: int) -> dict:
     # 是否作者回复
     is_author = False
     try:
-        author_badge = elem.query_selector('[class*="author"], [class*="作者"]')
+        author_badge = await elem.query_selector('[class*="author"], [class*="作者"]')
         is_author = author_badge is not None
     except:
         pass
@@ -229,9 +394,9 @@ def extract_single_comment(elem, index: int) -> dict:
     # 子评论
     sub_comments = []
     try:
-        sub_elems = elem.query_selector_all('[class*="reply"], [class*="sub-comment"]')
+        sub_elems = await elem.query_selector_all('[class*="reply"], [class*="sub-comment"]')
         for sub in sub_elems[:5]:  # 最多取5条子评论
-            sub_content = sub.inner_text().strip()
+            sub_content = (await sub.inner_text()).strip()
             if sub_content:
                 sub_comments.append(sub_content[:200])
     except:
@@ -248,15 +413,74 @@ def extract_single_comment(elem, index: int) -> dict:
     }
 
 
+def import_to_store(store_path: str, files: list):
+    """把抓取输出导入评论库"""
+    from comment_store import CommentStore
+
+    with CommentStore(store_path) as store:
+        for path in files:
+            result = store.import_file(path)
+            print(f"📥 导入评论库: {path.name} 共 {result['comments']} 条，新增 {result['new']} 条")
+
+
 def main():
     parser = argparse.ArgumentParser(description="小红书评论抓取工具")
-    parser.add_argument("url", help="小红书帖子链接")
+    parser.add_argument("url", nargs="?", help="小红书帖子链接")
     parser.add_argument("--output", "-o", default="comments.json", help="输出文件路径")
     parser.add_argument("--max-scroll", type=int, default=50, help="最大滚动次数")
     parser.add_argument("--headless", action="store_true", help="无头模式（不显示浏览器）")
+    parser.add_argument("--mode", choices=["auto", "network", "dom"], default="auto",
+                        help="抓取模式：auto 优先捕获评论接口，失败回退 DOM")
+    parser.add_argument("--scroll-strategy", choices=["adaptive", "fixed"], default="adaptive",
+                        help="DOM 模式滚动策略：adaptive 等待加载信号，fixed 固定间隔轮询")
+    parser.add_argument("--time-budget", type=float, help="单帖评论加载时间预算（秒）")
+    parser.add_argument("--resume", action="store_true", help="从上次中断留下的检查点恢复")
+    parser.add_argument("--since", help="增量模式：上次的输出文件，只抓取其后的新评论并合并")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式：以已有的输出文件为上次结果（批量模式按帖子对应的输出文件）")
+    parser.add_argument("--store", help="抓取完成后同时导入评论库（SQLite，见 comment_store.py）")
+    parser.add_argument("--replies", action="store_true",
+                        help="展开“展开更多回复”，每条回复保存为完整记录（replies 回复树）")
+    parser.add_argument("--reply-concurrency", type=int, default=DEFAULT_REPLY_CONCURRENCY,
+                        help="同时展开的回复楼层数")
+    
+    batch = parser.add_argument_group("批量模式")
+    batch.add_argument("--url-file", help="URL 列表文件（每行一个链接），指定后进入批量模式")
+    batch.add_argument("--output-dir", default="comments", help="批量模式输出目录")
+    batch.add_argument("--concurrency", type=int, default=4, help="并发页面数")
+    batch.add_argument("--rate", type=float, default=1.0, help="每个域名每秒打开的帖子数（0 不限速）")
+    batch.add_argument("--retries", type=int, default=2, help="单篇帖子失败重试次数")
+    batch.add_argument("--format", choices=["json", "jsonl"], default="json", help="批量模式输出格式")
+    
+    profiling.add_profile_arguments(parser)
     
     args = parser.parse_args()
-    extract_comments(args.url, args.output, args.max_scroll, args.headless)
+    
+    if args.url_file:
+        from batch_crawl import run_batch
+        with profiling.profiled(args, args.output_dir, "extract_comments"):
+            manifest = run_batch(args.url_file, args.output_dir, concurrency=args.concurrency, rate=args.rate,
+                                 retries=args.retries, max_scroll=args.max_scroll, mode=args.mode,
+                                 headless=args.headless, scroll_strategy=args.scroll_strategy,
+                                 time_budget=args.time_budget, incremental=args.incremental,
+                                 output_format=args.format, replies=args.replies,
+                                 reply_concurrency=args.reply_concurrency)
+        if manifest and args.store:
+            import_to_store(args.store, [Path(args.output_dir) / e["file"]
+                                         for e in manifest["posts"] if e["status"] == "ok"])
+    elif args.url:
+        since = args.since
+        if args.incremental and not since and Path(args.output).exists():
+            since = args.output
+        with profiling.profiled(args, args.output, "extract_comments"):
+            result = extract_comments(args.url, args.output, args.max_scroll, args.headless, args.mode,
+                                      scroll_strategy=args.scroll_strategy, time_budget=args.time_budget,
+                                      resume=args.resume, since=since, replies=args.replies,
+                                      reply_concurrency=args.reply_concurrency)
+        if result and args.store:
+            import_to_store(args.store, [Path(args.output)])
+    else:
+        parser.error("请提供帖子链接或 --url-file")
 
 
 if __name__ == "__main__":
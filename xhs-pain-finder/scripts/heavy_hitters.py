@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+有界内存的高频词计数（Space-Saving）
+最多跟踪 capacity 个词：新词进入时替换当前计数最小的词，并继承其计数作为误差。
+任一词的估计计数 >= 真实计数，高估不超过 总计数 / capacity；真实计数超过该界的词一定在表中
+"""
+
+import heapq
+import math
+
+# 每个跟踪词的大致内存占用（字典项 + 堆项 + 词本身，字节）
+ENTRY_BYTES = 512
+
+
+def capacity_for(memory_mb: float = None, error: float = None, sketches: int = 1) -> int:
+    """
+    由内存预算和误差上界确定每个计数器的容量
+
+    Args:
+        memory_mb: 所有计数器合计的内存预算（MB），None 表示不限
+        error: 相对误差上界（高估 <= error × 总计数），None 表示只按内存预算
+        sketches: 共享内存预算的计数器个数
+    """
+    limit = None
+    if memory_mb is not None:
+        limit = max(int(memory_mb * 1024 * 1024 / sketches / ENTRY_BYTES), 1)
+    if error is None:
+        if limit is None:
+            raise ValueError("需指定内存预算或误差上界")
+        return limit
+    needed = math.ceil(1 / error)
+    if limit is not None and needed > limit:
+        print(f"⚠️ 误差上界 {error} 需要 {needed} 个词的容量，超出内存预算，按预算使用 {limit}"
+              f"（误差上界 {1 / limit:.2g}）")
+        return limit
+    return needed
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频词计数器
+
+    接口与 Counter 的常用部分一致（update / most_common / items / 取值），可直接替换累计用的 Counter。
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: 最多跟踪的词数
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self.evictions = 0
+        self._heap = []  # (计数, 词)，计数变化时追加新项，出堆时跳过过期项
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, item) -> bool:
+        return item in self.counts
+
+    def __getitem__(self, item) -> int:
+        return self.counts.get(item, 0)
+
+    def add(self, item, count: int = 1):
+        """计入 item 出现 count 次"""
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+        else:
+            floor, victim = self._pop_min()
+            del counts[victim]
+            del self.errors[victim]
+            counts[item] = floor + count
+            self.errors[item] = floor
+            self.evictions += 1
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild()
+
+    def update(self, other):
+        """并入一个计数映射（Counter 或另一个 SpaceSaving），按映射的顺序逐项计入"""
+        for item, count in other.items():
+            self.add(item, count)
+
+    def _pop_min(self) -> tuple:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def _rebuild(self):
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def items(self):
+        return self.counts.items()
+
+    def values(self):
+        return self.counts.values()
+
+    def error(self, item) -> int:
+        """item 计数的最大高估量"""
+        return self.errors.get(item, 0)
+
+    @property
+    def error_bound(self) -> float:
+        """所有词计数的最大高估量上界"""
+        return self.total / self.capacity
+
+    def most_common(self, n: int = None) -> list:
+        """按估计计数降序（同计数按进入顺序），与 Counter.most_common 相同"""
+        ranked = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        return ranked if n is None else ranked[:n]
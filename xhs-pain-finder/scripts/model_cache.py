@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+模型启动缓存
+jieba 前缀词典、TF-IDF 的 IDF 表在首次使用时各序列化为一个 pickle 文件，大型计数表存为 .npy 以内存映射打开
+（SnowNLP 模型见 sentiment_batch.load_models），之后的运行直接读入，
+不再解析词典文本、也不再导入 jieba.analyse 和 snownlp（导入时会加载全部模型）。
+缓存目录默认 ~/.cache/xhs-pain-finder，可用环境变量 XHS_MODEL_CACHE 指定（设为 off 不使用缓存）；
+缓存文件名包含包版本和模型文件路径的哈希，升级依赖后自动重建
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+# 缓存格式版本：缓存内容结构变化时递增
+CACHE_VERSION = "1"
+
+# 进程内已读入的模型
+_tfidf = None
+_arrays = {}
+
+
+def cache_dir():
+    """缓存目录，禁用时返回 None"""
+    value = os.environ.get("XHS_MODEL_CACHE")
+    if value and value.lower() == "off":
+        return None
+    return Path(value) if value else Path.home() / ".cache" / "xhs-pain-finder"
+
+
+def cached(name: str, source: str, build):
+    """
+    读取缓存，不存在（或损坏）时调用 build() 构建并写入
+
+    Args:
+        name: 缓存名（含包版本）
+        source: 模型来源（文件路径等），变化时使用新的缓存文件
+        build: 构建函数，返回可 pickle 的对象
+    """
+    directory = cache_dir()
+    if directory is None:
+        return build()
+    key = hashlib.sha1(f"{CACHE_VERSION}\x1f{source}".encode("utf-8")).hexdigest()[:12]
+    path = directory / f"{name}-{key}.pickle"
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+
+    data = build()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+    except OSError:
+        # 缓存目录不可写时只是每次重新构建
+        pass
+    return data
+
+
+def cached_arrays(name: str, source: str, build) -> tuple:
+    """
+    读取带 NumPy 数组的缓存：数组存为 .npy，以只读内存映射打开（进程内只读一次）
+
+    Args:
+        name: 缓存名
+        source: 模型来源，变化时使用新的缓存目录
+        build: 构建函数，返回 (可 pickle 的对象, {名称: 数组})
+    """
+    import numpy as np
+
+    if name in _arrays:
+        return _arrays[name]
+    directory = cache_dir()
+    if directory is None:
+        _arrays[name] = build()
+        return _arrays[name]
+    key = hashlib.sha1(f"{CACHE_VERSION}\x1f{source}".encode("utf-8")).hexdigest()[:12]
+    folder = directory / f"{name}-{_version(name)}-{key}"
+    try:
+        with open(folder / "meta.pickle", "rb") as f:
+            meta, names = pickle.load(f)
+        _arrays[name] = meta, {n: np.load(folder / f"{n}.npy", mmap_mode="r") for n in names}
+        return _arrays[name]
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+
+    meta, arrays = build()
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        # meta.pickle 最后写入，存在即表示数组已完整
+        for n, array in arrays.items():
+            tmp = folder / f"{n}.{os.getpid()}.tmp.npy"
+            np.save(tmp, array)
+            tmp.replace(folder / f"{n}.npy")
+        tmp = folder / f"meta.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((meta, list(arrays)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(folder / "meta.pickle")
+    except OSError:
+        pass
+    _arrays[name] = meta, arrays
+    return _arrays[name]
+
+
+def _version(name: str) -> str:
+    from analysis_cache import package_version
+
+    return package_version(name)
+
+
+def load_jieba():
+    """初始化 jieba 默认分词器（前缀词典从缓存读入，比 jieba 自带的 marshal 缓存快数倍）"""
+    import jieba
+
+    dt = jieba.dt
+    if dt.initialized:
+        return
+    path = dt.dictionary or jieba.DEFAULT_DICT_NAME
+
+    def build():
+        dt.initialize()
+        return dt.FREQ, dt.total
+
+    with dt.lock:
+        if dt.initialized:
+            return
+        source = f"{Path(jieba.__file__).parent}:{path}:{dt.cache_file}"
+        dt.FREQ, dt.total = cached(f"jieba-{_version('jieba')}", source, build)
+        dt.initialized = True
+
+
+def tfidf_model() -> dict:
+    """
+    jieba 默认 TF-IDF 模型：{"idf_freq", "median_idf", "stop_words"}
+
+    与 jieba.analyse.default_tfidf 相同，缓存命中时不导入 jieba.analyse（导入时会加载词性标注和 IDF 表）
+    """
+    global _tfidf
+    if _tfidf is None:
+        def build():
+            import jieba.analyse
+
+            tfidf = jieba.analyse.default_tfidf
+            return {"idf_freq": tfidf.idf_freq, "median_idf": tfidf.median_idf,
+                    "stop_words": frozenset(tfidf.stop_words)}
+
+        import jieba
+        _tfidf = cached(f"jieba-idf-{_version('jieba')}", str(Path(jieba.__file__).parent), build)
+    return _tfidf
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+评论接口响应捕获
+监听页面的评论列表 JSON 响应（/api/sns/web/v2/comment/page），直接解析为评论记录，
+并按 cursor 翻页，无需渲染和解析 DOM
+"""
+
+import json
+import re
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import profiling
+
+# 评论列表接口
+COMMENT_API_PATTERN = re.compile(r"/api/sns/web/v2/comment/page")
+
+# 等待单页接口响应的超时（毫秒）
+RESPONSE_TIMEOUT = 10000
+
+# 在页面上下文中重放接口请求（携带登录 Cookie），返回 HTTP 状态码
+FETCH_JS = """
+async (url) => {
+    const resp = await fetch(url, {credentials: "include"});
+    await resp.text();
+    return resp.status;
+}
+"""
+
+# 滚动页面及评论容器到底部，触发页面自身的翻页请求
+SCROLL_JS = """
+() => {
+    window.scrollTo(0, document.body.scrollHeight);
+    for (const el of document.querySelectorAll('.note-scroller, [class*="comments-container"]')) {
+        el.scrollTop = el.scrollHeight;
+    }
+}
+"""
+
+
+def parse_like_count(value) -> int:
+    """解析点赞数，兼容 "1.2万" 这类缩写"""
+    text = str(value or "0").strip()
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*([万wW千kK]?)', text)
+    if not match:
+        return 0
+    number = float(match.group(1))
+    unit = match.group(2)
+    if unit in ("万", "w", "W"):
+        number *= 10000
+    elif unit in ("千", "k", "K"):
+        number *= 1000
+    return int(number)
+
+
+def format_create_time(value) -> str:
+    """将接口中的毫秒时间戳转为 "YYYY-MM-DD HH:MM" 字符串"""
+    try:
+        return datetime.fromtimestamp(int(value) / 1000).strftime("%Y-%m-%d %H:%M")
+    except (TypeError, ValueError, OverflowError, OSError):
+        return ""
+
+
+def parse_comment_page(payload: dict) -> tuple:
+    """
+    解析一页评论接口响应
+
+    Returns:
+        (评论列表, 下一页 cursor, 是否还有更多)
+    """
+    data = payload.get("data") or {}
+    return data.get("comments") or [], data.get("cursor", ""), bool(data.get("has_more"))
+
+
+def build_record_from_api(item: dict, index: int, replies: bool = False) -> dict:
+    """
+    将接口中的一条评论转换为评论记录（字段与 DOM 模式一致，另含评论 id）
+
+    Args:
+        item: 接口中的一条一级评论
+        index: 评论序号
+        replies: 是否附全部回复组成的回复树（replies 字段，见 reply_threads）
+    """
+    user = item.get("user_info") or {}
+
+    sub_comments = []
+    for sub in (item.get("sub_comments") or [])[:5]:  # 最多取5条子评论
+        sub_user = (sub.get("user_info") or {}).get("nickname", "")
+        sub_content = (sub.get("content") or "").strip()
+        if sub_content:
+            text = f"{sub_user}: {sub_content}" if sub_user else sub_content
+            sub_comments.append(text[:200])
+
+    record = {
+        "index": index,
+        "id": item.get("id", ""),
+        "nickname": user.get("nickname", ""),
+        "content": (item.get("content") or "").strip()[:500],  # 限制长度
+        "likes": parse_like_count(item.get("like_count")),
+        "time": format_create_time(item.get("create_time")),
+        "is_author_reply": "is_author" in (item.get("show_tags") or []),
+        "sub_comments": sub_comments
+    }
+    if replies:
+        from reply_threads import replies_from_api
+        record["replies"] = replies_from_api(item)
+    return record
+
+
+def with_cursor(url: str, cursor: str) -> str:
+    """替换接口 URL 中的 cursor 参数"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query["cursor"] = cursor
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class CommentCapture:
+    """
+    评论接口响应捕获器
+
+    需在 page.goto 之前 attach，页面首屏请求的评论也会被捕获。
+    翻页优先在页面内重放接口请求，失败（如签名校验不通过）时改为滚动触发页面自身请求。
+    """
+
+    def __init__(self, page, session=None, replies: bool = False, reply_concurrency: int = 8):
+        """
+        Args:
+            page: Playwright 页面对象（async API）
+            session: 可选的 CrawlSession，每页评论即时写入检查点，并可从记录的 cursor 恢复
+            replies: 是否补齐每条评论的全部回复（按楼层并发请求回复分页，见 reply_threads）
+            reply_concurrency: 同时请求回复分页的楼层数
+        """
+        self.page = page
+        self.session = session
+        self.replies = replies
+        self.reply_concurrency = reply_concurrency
+        self.reply_pages = 0
+        self._reply_replay_ok = True
+        self.stopped = False
+        self.comments = []
+        self.cursor = ""
+        self.has_more = True
+        self.pages = 0
+        self.bytes_received = 0
+        self.elapsed = 0.0
+        self._pending = []
+        self._seen_ids = set()
+        self._last_url = None
+        self._replay_ok = True
+        # 检查点记录的翻页位置：首屏响应会覆盖 session.cursor，需在第一次 drain 之前取出
+        self._resume_cursor = session.cursor if session else None
+
+    def attach(self):
+        """注册响应监听"""
+        self.page.on("response", self._on_response)
+
+    def detach(self):
+        """移除响应监听（页面复用于下一篇帖子前调用）"""
+        self.page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        # 事件回调中只记录响应，读取 body 放到主流程中进行
+        if COMMENT_API_PATTERN.search(response.url):
+            self._pending.append(response)
+
+    async def drain(self) -> int:
+        """解析已捕获的响应，返回新增评论数"""
+        added = 0
+        pending, self._pending = self._pending, []
+        for response in pending:
+            profiling.count("ipc")
+            try:
+                body = await response.body()
+                payload = json.loads(body)
+            except Exception:
+                continue
+            if payload.get("code", 0) != 0 or payload.get("success") is False:
+                continue
+
+            self.bytes_received += len(body)
+            self.pages += 1
+            profiling.count("api_pages")
+            profiling.count("api_bytes", len(body))
+            self._last_url = response.url
+            items, self.cursor, self.has_more = parse_comment_page(payload)
+            if self.replies and self._reply_replay_ok:
+                await self._fetch_replies(response.url, items)
+
+            page_comments = []
+            for item in items:
+                comment_id = item.get("id")
+                if comment_id and comment_id in self._seen_ids:
+                    continue
+                if comment_id:
+                    self._seen_ids.add(comment_id)
+                comment = build_record_from_api(item, len(self.comments) + 1, self.replies)
+                if comment.get("content"):
+                    self.comments.append(comment)
+                    page_comments.append(comment)
+                    added += 1
+
+            if self.session:
+                if not self.session.add(page_comments):
+                    self.stopped = True
+                # 恢复的 cursor 尚未生效时不记录首屏的 cursor，以免再次中断时退回第 2 页
+                if self.has_more and self.cursor and not self._resume_cursor:
+                    self.session.save_cursor(response.url, self.cursor)
+        return added
+
+    async def _fetch_replies(self, page_url: str, items: list):
+        """补齐本页评论的其余回复（写入检查点之前），回复分页请求被拒绝时不再尝试，只保留内嵌的回复"""
+        from reply_threads import fetch_all_replies
+
+        stats = await fetch_all_replies(self.page, page_url, items, self.reply_concurrency)
+        self.reply_pages += stats["pages"]
+        if stats["failed"] and not stats["pages"]:
+            self._reply_replay_ok = False
+            print("  ⚠️ 回复分页请求失败，只保留评论接口内嵌的回复")
+
+    async def _wait_for_page(self, trigger) -> bool:
+        """执行 trigger（返回协程的函数）并等待下一页接口响应，返回是否拿到有效新页"""
+        pages_before = self.pages
+        if trigger:
+            profiling.count("ipc")
+        try:
+            async with self.page.expect_response(
+                lambda r: COMMENT_API_PATTERN.search(r.url) is not None,
+                timeout=RESPONSE_TIMEOUT
+            ):
+                if trigger:
+                    await trigger()
+        except Exception:
+            pass
+        await self.drain()
+        return self.pages > pages_before
+
+    async def next_page(self) -> bool:
+        """请求下一页，返回是否成功"""
+        if self._replay_ok and self._last_url and self.cursor:
+            next_url = with_cursor(self._last_url, self.cursor)
+            if await self._wait_for_page(lambda: self.page.evaluate(FETCH_JS, next_url)):
+                return True
+            self._replay_ok = False
+        return await self._wait_for_page(lambda: self.page.evaluate(SCROLL_JS))
+
+    async def collect(self, max_pages: int = 50, time_budget: float = None) -> list:
+        """
+        按 cursor 翻页收集评论
+
+        Args:
+            max_pages: 最大翻页次数
+            time_budget: 翻页时间预算（秒），None 表示不限
+
+        Returns:
+            评论记录列表
+        """
+        start = time.perf_counter()
+        await self.drain()
+        if self.pages == 0:
+            # 首屏请求可能尚未返回
+            await self._wait_for_page(None)
+
+        # 从检查点记录的 cursor 继续翻页
+        if self.pages and self._resume_cursor:
+            self._last_url, self.cursor = self._resume_cursor
+            self.has_more = True
+        self._resume_cursor = None
+
+        while self.pages and self.has_more and not self.stopped and self.pages < max_pages:
+            if time_budget is not None and time.perf_counter() - start >= time_budget:
+                print("  超出时间预算，停止翻页")
+                break
+            if not await self.next_page():
+                print("  评论接口翻页失败，停止翻页")
+                break
+            print(f"  翻页 {self.pages}/{max_pages}, 已获取 {len(self.comments)} 条评论")
+
+        self.elapsed = time.perf_counter() - start
+        return self.comments
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+评论区自适应加载
+以真实信号代替固定 sleep 判断滚动加载是否完成：
+MutationObserver 统计的评论节点数、进行中的网络请求、"没有更多评论" 结束标记；
+仅在信号都未出现时才指数退避，并支持单帖总时间预算
+"""
+
+import asyncio
+import time
+
+import profiling
+from network_capture import SCROLL_JS
+
+# 评论节点计数选择器（与原滚动循环一致）
+COMMENT_COUNT_SELECTOR = '[class*="comment-item"], [class*="commentItem"], .comment'
+
+# 评论区结束标记
+END_MARKER_SELECTORS = ['.end-container', '[class*="no-more"]', '[class*="noMore"]']
+
+# 注入 MutationObserver，持续统计评论节点数；重复注入时直接返回当前计数
+OBSERVER_JS = """
+(selector) => {
+    if (window.__xhsLoader) return window.__xhsLoader.count;
+    const state = {count: document.querySelectorAll(selector).length};
+    new MutationObserver(() => {
+        state.count = document.querySelectorAll(selector).length;
+    }).observe(document.body, {childList: true, subtree: true});
+    window.__xhsLoader = state;
+    return state.count;
+}
+"""
+
+# 当前状态：评论节点数 + 是否出现结束标记
+STATE_JS = """
+(endSelectors) => {
+    const ended = endSelectors.some((sel) => {
+        const el = document.querySelector(sel);
+        return el !== null && el.getClientRects().length > 0;
+    });
+    return {count: window.__xhsLoader ? window.__xhsLoader.count : 0, ended: ended};
+}
+"""
+
+# 等待条件：评论数超过上次计数或出现结束标记
+WAIT_JS = """
+([prev, endSelectors]) => {
+    if (window.__xhsLoader && window.__xhsLoader.count > prev) return true;
+    return endSelectors.some((sel) => {
+        const el = document.querySelector(sel);
+        return el !== null && el.getClientRects().length > 0;
+    });
+}
+"""
+
+# 点击 "查看更多评论" 按钮（如可见）
+CLICK_MORE_JS = """
+() => {
+    const btn = document.querySelector('[class*="more"], .load-more, [class*="展开"]');
+    if (btn && btn.getClientRects().length > 0) { btn.click(); return true; }
+    return false;
+}
+"""
+
+
+class NetworkTracker:
+    """跟踪页面进行中的 XHR/fetch 请求数"""
+
+    TRACKED_TYPES = ("xhr", "fetch")
+
+    def __init__(self, page):
+        self.page = page
+        self.in_flight = set()
+        self.last_activity = time.monotonic()
+
+    def attach(self):
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_done)
+        self.page.on("requestfailed", self._on_done)
+
+    def detach(self):
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_done)
+        self.page.remove_listener("requestfailed", self._on_done)
+
+    def _on_request(self, request):
+        if request.resource_type in self.TRACKED_TYPES:
+            self.in_flight.add(request)
+            self.last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self.in_flight:
+            self.in_flight.discard(request)
+            self.last_activity = time.monotonic()
+
+    async def wait_idle(self, quiet: float = 0.3, timeout: float = 10.0) -> bool:
+        """等待没有进行中的请求且持续 quiet 秒，返回是否在 timeout 内达到空闲"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.in_flight and time.monotonic() - self.last_activity >= quiet:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+
+class AdaptiveLoader:
+    """
+    自适应滚动加载器
+
+    每次滚动后等待评论节点数增长或结束标记出现，再等待网络请求稳定；
+    都未发生时按指数退避重试，连续 max_misses 次无进展或超出时间预算即停止。
+    """
+
+    def __init__(self, page, max_scroll: int = 50, time_budget: float = None,
+                 signal_timeout: float = 3.0, base_backoff: float = 0.5, max_backoff: float = 8.0,
+                 max_misses: int = 4, on_progress=None):
+        """
+        Args:
+            page: Playwright 页面对象（async API）
+            max_scroll: 最大滚动次数
+            time_budget: 单帖加载总时间预算（秒），None 表示不限
+            signal_timeout: 每次滚动后等待信号的超时（秒）
+            base_backoff: 首次退避时长（秒）
+            max_backoff: 退避时长上限（秒）
+            max_misses: 连续无进展的最大次数
+            on_progress: 可选的异步回调 on_progress(count)，评论数增长时调用，返回 False 则停止滚动
+        """
+        self.page = page
+        self.max_scroll = max_scroll
+        self.time_budget = time_budget
+        self.signal_timeout = signal_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_misses = max_misses
+        self.on_progress = on_progress
+        self.tracker = NetworkTracker(page)
+        self.stats = {}
+
+    def _remaining(self, start: float) -> float:
+        if self.time_budget is None:
+            return float("inf")
+        return self.time_budget - (time.monotonic() - start)
+
+    async def _state(self) -> dict:
+        profiling.count("ipc")
+        return await self.page.evaluate(STATE_JS, END_MARKER_SELECTORS)
+
+    async def load(self) -> dict:
+        """
+        滚动加载全部评论
+
+        Returns:
+            加载统计（scrolls/count/seconds/stop_reason）
+        """
+        start = time.monotonic()
+        count = await self.page.evaluate(OBSERVER_JS, COMMENT_COUNT_SELECTOR)
+        profiling.count("ipc")
+        self.tracker.attach()
+        misses = 0
+        scrolls = 0
+        stop_reason = "max_scroll"
+
+        try:
+            for i in range(self.max_scroll):
+                remaining = self._remaining(start)
+                if remaining <= 0:
+                    stop_reason = "time_budget"
+                    break
+
+                scrolls += 1
+                profiling.count("scrolls")
+                profiling.count("ipc", 3)
+                await self.page.evaluate(SCROLL_JS)
+                await self.page.evaluate(CLICK_MORE_JS)
+
+                with profiling.stage("scroll_wait"):
+                    # 信号 1：评论节点数增长或出现结束标记
+                    try:
+                        await self.page.wait_for_function(
+                            WAIT_JS, arg=[count, END_MARKER_SELECTORS],
+                            timeout=min(self.signal_timeout, remaining) * 1000
+                        )
+                    except Exception:
+                        pass
+
+                    # 信号 2：进行中的请求稳定（同一批评论可能分多次渲染）
+                    await self.tracker.wait_idle(timeout=min(self.signal_timeout, max(self._remaining(start), 0)))
+
+                state = await self._state()
+                print(f"  滚动 {i+1}/{self.max_scroll}, 已发现 {state['count']} 条评论")
+
+                if state["ended"]:
+                    count = state["count"]
+                    stop_reason = "end_marker"
+                    break
+
+                if state["count"] > count:
+                    count = state["count"]
+                    misses = 0
+                    if self.on_progress and not await self.on_progress(count):
+                        stop_reason = "incremental"
+                        break
+                    continue
+
+                # 无任何信号：指数退避后再试
+                misses += 1
+                if misses >= self.max_misses:
+                    stop_reason = "no_progress"
+                    break
+                backoff = min(self.base_backoff * 2 ** (misses - 1), self.max_backoff)
+                with profiling.stage("scroll_backoff"):
+                    await asyncio.sleep(max(min(backoff, self._remaining(start)), 0))
+        finally:
+            self.tracker.detach()
+
+        self.stats = {
+            "scrolls": scrolls,
+            "count": count,
+            "seconds": round(time.monotonic() - start, 2),
+            "stop_reason": stop_reason
+        }
+        print(f"  停止滚动: {stop_reason}（{scrolls} 次滚动, {self.stats['seconds']}s）")
+        return self.stats
+
+
+async def wait_for_comments(page, timeout: float = 3.0) -> bool:
+    """等待首批评论节点或结束标记出现，代替页面加载后的固定等待"""
+    profiling.count("ipc")
+    try:
+        await page.wait_for_function(
+            """([selector, endSelectors]) => document.querySelector(selector) !== null
+                || endSelectors.some((sel) => document.querySelector(sel) !== null)""",
+            arg=[COMMENT_COUNT_SELECTOR, END_MARKER_SELECTORS],
+            timeout=timeout * 1000
+        )
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+负面评论痛点聚类
+负面评论的分词结果（分析时已得到，含持久化缓存命中的结果）转为稀疏 TF-IDF 向量（行归一化），
+用 mini-batch 球面 k-means（余弦相似度）聚类：每步只取一小批评论更新中心，10 万条评论数秒内完成。
+每个簇以中心权重最高的词作标签，取点赞最高的评论作代表评论，结果写入 Excel 工作表和 JSON（供填写报告的痛点章节）
+"""
+
+import json
+import math
+from collections import Counter
+from pathlib import Path
+
+# 默认簇数
+DEFAULT_CLUSTERS = 5
+
+# mini-batch 大小与最多迭代步数
+BATCH_SIZE = 1024
+MAX_STEPS = 200
+
+# 中心最大移动量低于此值时停止迭代
+TOLERANCE = 1e-4
+
+# k-means++ 初始化时的抽样评论数
+INIT_SAMPLE = 5000
+
+# 不同初始化的重复次数（取抽样评论与中心平均相似度最高的一次，避免陷入局部最优）
+N_INIT = 3
+
+# 每个簇的标签词数 / 关键词数 / 代表评论数
+LABEL_TERMS = 3
+TOP_TERMS = 8
+TOP_QUOTES = 3
+
+# 聚类结果 JSON 的格式版本
+CLUSTERS_VERSION = 1
+
+
+class SparseRows:
+    """行压缩（CSR）稀疏矩阵：indptr / indices / data 三个数组，只实现聚类需要的运算"""
+
+    def __init__(self, indptr, indices, data, n_cols: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_cols = n_cols
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def rows(self, selected):
+        """取出若干行：返回 (每个非零元所在的新行号, 列号, 值)"""
+        import numpy as np
+
+        starts = self.indptr[selected]
+        lengths = self.indptr[selected + 1] - starts
+        row_ids = np.repeat(np.arange(len(selected)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.repeat(starts, lengths) + offsets
+        return row_ids, self.indices[positions], self.data[positions]
+
+    def similarities(self, selected, centers):
+        """若干行与各中心的内积（行与中心均已归一化，即余弦相似度），形状 (行数, 簇数)"""
+        import numpy as np
+
+        row_ids, cols, values = self.rows(selected)
+        sims = np.empty((len(selected), len(centers)))
+        for c, center in enumerate(centers):
+            sims[:, c] = np.bincount(row_ids, weights=center[cols] * values, minlength=len(selected))
+        return sims
+
+    def dense(self, selected):
+        import numpy as np
+
+        row_ids, cols, values = self.rows(selected)
+        out = np.zeros((len(selected), self.n_cols))
+        out[row_ids, cols] = values
+        return out
+
+
+def vectorize(documents: list, min_df: int = 2):
+    """
+    分词列表转为 TF-IDF 行向量（平滑 idf，行 L2 归一化）
+
+    Args:
+        documents: [[词, ...], ...]
+        min_df: 至少出现在几条评论中的词才计入（评论很少时自动放宽为 1）
+
+    Returns:
+        (SparseRows, 词表)；没有任何词的评论对应空行
+    """
+    import numpy as np
+
+    doc_freq = Counter()
+    for words in documents:
+        doc_freq.update(set(words))
+    if len(documents) < 50:
+        min_df = 1
+    vocab = sorted(w for w, df in doc_freq.items() if df >= min_df)
+    column = {w: i for i, w in enumerate(vocab)}
+    n = len(documents)
+    idf = np.array([math.log((1 + n) / (1 + doc_freq[w])) + 1 for w in vocab])
+
+    indptr = [0]
+    indices = []
+    counts = []
+    for words in documents:
+        tf = Counter(column[w] for w in words if w in column)
+        indices.extend(tf.keys())
+        counts.extend(tf.values())
+        indptr.append(len(indices))
+    indptr = np.array(indptr, dtype=np.int64)
+    indices = np.array(indices, dtype=np.int64)
+    data = np.array(counts, dtype=float) * idf[indices] if len(indices) else np.zeros(0)
+
+    # 行归一化
+    row_ids = np.repeat(np.arange(n), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n))
+    if len(data):
+        data /= norms[row_ids]
+    return SparseRows(indptr, indices, data, len(vocab)), vocab
+
+
+class MiniBatchKMeans:
+    """
+    mini-batch 球面 k-means
+
+    k-means++ 初始化，每步按一小批样本增量更新中心（学习率为 1 / 该簇累计样本数）；
+    重复 n_init 次不同的初始化，保留抽样评论与所属中心平均相似度最高的结果。
+    """
+
+    def __init__(self, n_clusters: int = DEFAULT_CLUSTERS, batch_size: int = BATCH_SIZE,
+                 max_steps: int = MAX_STEPS, n_init: int = N_INIT, seed: int = 42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_steps = max_steps
+        self.n_init = n_init
+        self.seed = seed
+        self.centers = None
+        self.steps = 0
+
+    @staticmethod
+    def _normalize(centers):
+        import numpy as np
+
+        norms = np.linalg.norm(centers, axis=1, keepdims=True)
+        return np.divide(centers, norms, out=np.zeros_like(centers), where=norms > 0)
+
+    def _init_centers(self, X, sample, rng):
+        """k-means++：在抽样评论中按 (1 - 最大相似度)² 的概率依次选取中心"""
+        import numpy as np
+
+        centers = self._normalize(X.dense(sample[rng.integers(len(sample))][None]))
+        best = X.similarities(sample, centers)[:, 0]
+        while len(centers) < self.n_clusters:
+            weights = np.clip(1 - best, 0, None) ** 2
+            if weights.sum() <= 0:
+                # 剩余评论都与已有中心重合
+                break
+            pick = sample[rng.choice(len(sample), p=weights / weights.sum())]
+            center = self._normalize(X.dense(pick[None]))
+            centers = np.vstack([centers, center])
+            best = np.maximum(best, X.similarities(sample, center)[:, 0])
+        return centers
+
+    def fit(self, X, rows):
+        """
+        Args:
+            X: SparseRows
+            rows: 参与聚类的行号（非空行）
+        """
+        import numpy as np
+
+        rng = np.random.default_rng(self.seed)
+        sample = rng.choice(rows, size=min(len(rows), INIT_SAMPLE), replace=False)
+        best = None
+        for _ in range(self.n_init):
+            centers, steps = self._fit_once(X, rows, sample, rng)
+            score = X.similarities(sample, centers).max(axis=1).mean()
+            if best is None or score > best[0]:
+                best = (score, centers, steps)
+        _, self.centers, self.steps = best
+        return self
+
+    def _fit_once(self, X, rows, sample, rng) -> tuple:
+        import numpy as np
+
+        centers = self._init_centers(X, sample, rng)
+        k, n_cols = centers.shape
+        counts = np.zeros(k)
+        batch_size = min(self.batch_size, len(rows))
+        steps = 0
+        for step in range(self.max_steps):
+            batch = rng.choice(rows, size=batch_size, replace=False)
+            labels = X.similarities(batch, centers).argmax(axis=1)
+            row_ids, cols, values = X.rows(batch)
+            sums = np.bincount(labels[row_ids] * n_cols + cols, weights=values,
+                               minlength=k * n_cols).reshape(k, n_cols)
+            batch_counts = np.bincount(labels, minlength=k)
+            updated = batch_counts > 0
+            counts += batch_counts
+            new_centers = centers.copy()
+            new_centers[updated] = (centers[updated] * (counts[updated] - batch_counts[updated])[:, None]
+                                    + sums[updated]) / counts[updated][:, None]
+            new_centers = self._normalize(new_centers)
+            shift = np.abs(new_centers - centers).max()
+            centers = new_centers
+            steps = step + 1
+            if shift < TOLERANCE:
+                break
+        return centers, steps
+
+    def predict(self, X, rows, chunk_size: int = 20000) -> tuple:
+        """返回 (簇号, 与中心的相似度)，分块计算以限制内存"""
+        import numpy as np
+
+        labels = np.empty(len(rows), dtype=np.int64)
+        sims = np.empty(len(rows))
+        for start in range(0, len(rows), chunk_size):
+            part = X.similarities(rows[start:start + chunk_size], self.centers)
+            labels[start:start + chunk_size] = part.argmax(axis=1)
+            sims[start:start + chunk_size] = part.max(axis=1)
+        return labels, sims
+
+
+def fit_clusters(documents: list, n_clusters: int = DEFAULT_CLUSTERS, seed: int = 42) -> dict:
+    """
+    向量化并聚类
+
+    Args:
+        documents: [(序号, 点赞数, 评论内容, 分词), ...]，分词已去停用词
+        n_clusters: 簇数（评论较少时自动减少）
+        seed: 随机种子（结果可复现）
+
+    Returns:
+        {"labels": 每条评论的簇号（无词的评论为 -1）, "similarities", "centers", "vocab", "steps"}
+    """
+    import numpy as np
+
+    X, vocab = vectorize([words for _, _, _, words in documents])
+    rows = np.flatnonzero(np.diff(X.indptr) > 0)
+    labels = np.full(len(documents), -1, dtype=np.int64)
+    sims = np.zeros(len(documents))
+    fit = {"labels": labels, "similarities": sims, "centers": np.zeros((0, len(vocab))), "vocab": vocab, "steps": 0}
+    if not len(rows):
+        return fit
+    model = MiniBatchKMeans(min(n_clusters, len(rows)), seed=seed).fit(X, rows)
+    labels[rows], sims[rows] = model.predict(X, rows)
+    fit.update(centers=model.centers, steps=model.steps)
+    return fit
+
+
+def summarize_clusters(documents: list, fit: dict) -> dict:
+    """
+    由聚类结果生成各簇摘要
+
+    Returns:
+        {"negative_comments", "clustered", "steps", "clusters": [...]}，簇按评论数降序，每个簇含
+        id / label / terms / size / share / likes / quotes（点赞最高的代表评论）
+    """
+    import numpy as np
+
+    labels, sims, vocab = fit["labels"], fit["similarities"], fit["vocab"]
+    clustered = int((labels >= 0).sum())
+    clusters = []
+    for c, center in enumerate(fit["centers"]):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        top = np.argsort(-center)[:TOP_TERMS]
+        terms = [(vocab[i], round(float(center[i]), 4)) for i in top if center[i] > 0]
+        # 代表评论：点赞最高，同赞取更接近中心的
+        ranked = sorted(members, key=lambda i: (-documents[i][1], -sims[i], documents[i][0]))
+        quotes = []
+        seen = set()
+        for i in ranked:
+            _, likes, content, _ = documents[i]
+            if content in seen:
+                continue
+            seen.add(content)
+            quotes.append({"content": content, "likes": likes, "similarity": round(float(sims[i]), 3)})
+            if len(quotes) >= TOP_QUOTES:
+                break
+        clusters.append({
+            "label": "、".join(term for term, _ in terms[:LABEL_TERMS]),
+            "terms": terms,
+            "size": int(len(members)),
+            "share": round(len(members) / clustered, 4),
+            "likes": int(sum(documents[i][1] for i in members)),
+            "quotes": quotes
+        })
+    clusters.sort(key=lambda x: (-x["size"], -x["likes"], x["label"]))
+    for rank, cluster in enumerate(clusters, 1):
+        cluster["id"] = rank
+    return {"negative_comments": len(documents), "clustered": clustered, "steps": fit["steps"],
+            "clusters": clusters}
+
+
+def cluster_pain_points(documents: list, n_clusters: int = DEFAULT_CLUSTERS, seed: int = 42) -> dict:
+    """负面评论聚类并生成摘要（见 fit_clusters / summarize_clusters）"""
+    return summarize_clusters(documents, fit_clusters(documents, n_clusters, seed))
+
+
+def write_clusters_sheet(wb, result: dict, title: str = "痛点聚类"):
+    """在工作簿中添加痛点聚类工作表（普通模式 Workbook）"""
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    ws = wb.create_sheet(title)
+    headers = ["痛点", "标签", "关键词", "评论数", "占比", "总点赞", "代表评论"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill("solid", fgColor="4472C4")
+
+    wrap = Alignment(vertical="top", wrap_text=True)
+    for row, cluster in enumerate(result["clusters"], 2):
+        quotes = "\n".join(f"「{q['content']}」（👍 {q['likes']}）" for q in cluster["quotes"])
+        values = [f"痛点 {cluster['id']}", cluster["label"], "、".join(t for t, _ in cluster["terms"]),
+                  cluster["size"], f"{cluster['share'] * 100:.1f}%", cluster["likes"], quotes]
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value).alignment = wrap
+
+    row = len(result["clusters"]) + 3
+    ws.cell(row=row, column=1, value=f"负面评论 {result['negative_comments']} 条，"
+                                     f"参与聚类 {result['clustered']} 条（其余去停用词后无内容）")
+    for col, width in zip("ABCDEFG", (10, 20, 40, 10, 10, 10, 80)):
+        ws.column_dimensions[col].width = width
+
+
+def save_clusters_json(result: dict, path: str, header: dict = None) -> Path:
+    """写出机器可读的聚类结果"""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    data = dict({"version": CLUSTERS_VERSION, "post": header or {}}, **result)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return output
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+单命令流水线：抓取、写 Excel、词频与情感分析同时进行
+抓取会话去重后的新评论经有界队列同时送入 评论 Excel 写入 和 分析 两个阶段（各在一个线程中运行，
+分析可再分给多个进程），抓取结束时下游基本也已处理完，只剩最后的合并与保存，端到端耗时约等于抓取耗时。
+下游跟不上时队列写满，抓取暂停等待（背压），内存占用与评论总数无关；原始评论照常写入输出文件，
+可供其他脚本复用。结束时输出各阶段的评论数、耗时、吞吐和背压等待时间
+"""
+
+import argparse
+import queue
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+from checkpoint import CrawlSession
+
+# 每个下游队列最多积压的评论数
+DEFAULT_QUEUE_SIZE = 2000
+
+# 队列结束标记
+_END = object()
+
+
+class CommentStream:
+    """
+    有界评论队列（单生产者、单消费者）
+
+    提供与 comment_store.StoreQuery 相同的 read_header() / iter_comments() 接口，
+    可直接作为 save_to_excel_fast / analyze_keywords 的输入；帖子信息在 close() 时给出，
+    读完全部评论后 read_header() 即可拿到。
+    """
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            name: 阶段名称（用于统计输出）
+            maxsize: 最多积压的评论数，队列满时 put() 阻塞
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.queue = queue.Queue(maxsize)
+        self.header = {}
+        self.items = 0
+        self.max_depth = 0
+        # 生产者因队列满而等待的时间（背压）/ 消费者等待新评论的时间
+        self.blocked = 0.0
+        self.idle = 0.0
+
+    def put(self, comment: dict):
+        try:
+            self.queue.put_nowait(comment)
+        except queue.Full:
+            start = time.perf_counter()
+            self.queue.put(comment)
+            self.blocked += time.perf_counter() - start
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def close(self, header: dict):
+        """评论发送完毕"""
+        self.header = dict(header)
+        self.queue.put(_END)
+
+    def read_header(self) -> dict:
+        return self.header
+
+    def iter_comments(self):
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                start = time.perf_counter()
+                item = self.queue.get()
+                self.idle += time.perf_counter() - start
+            if item is _END:
+                return
+            self.items += 1
+            yield item
+
+    def drain(self):
+        """丢弃剩余评论（下游出错时避免生产者一直阻塞）"""
+        for _ in self.iter_comments():
+            pass
+
+
+class Stage(threading.Thread):
+    """在线程中以 CommentStream 为输入运行一个下游阶段"""
+
+    def __init__(self, name: str, stream: CommentStream, target, *args, **kwargs):
+        super().__init__(name=name, daemon=True)
+        self.stream = stream
+        self.call = (target, args, kwargs)
+        self.result = None
+        self.error = None
+        self.seconds = 0.0
+
+    def run(self):
+        target, args, kwargs = self.call
+        start = time.perf_counter()
+        try:
+            self.result = target(self.stream, *args, **kwargs)
+        except BaseException as e:
+            self.error = e
+            self.stream.drain()
+        finally:
+            self.seconds = time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    把抓取到的评论同时分发给 Excel 写入和分析两个阶段
+
+    用法：start() → 抓取过程中多次 publish() → finish(帖子信息)
+    """
+
+    def __init__(self, excel_output: str, analysis_output: str, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 analysis_options: dict = None, replies: bool = False):
+        """
+        Args:
+            excel_output: 评论 Excel 输出路径
+            analysis_output: 分析结果 Excel 输出路径
+            queue_size: 每个下游队列最多积压的评论数
+            analysis_options: 传给 analyze_keywords 的其他参数（top_n / workers / cache_path / sketch 等）
+            replies: 评论 Excel 另建 回复 工作表（抓取时展开了回复）
+        """
+        from analyze_keywords import analyze_keywords
+        from save_to_excel import save_to_excel_fast
+
+        self.stages = [
+            Stage("Excel 写入", CommentStream("Excel 写入", queue_size), save_to_excel_fast, excel_output,
+                  replies=replies),
+            Stage("词频与情感分析", CommentStream("词频与情感分析", queue_size), analyze_keywords,
+                  analysis_output, **(analysis_options or {}))
+        ]
+        self.published = 0
+        self.started = None
+        self.crawl_seconds = 0.0
+        self.seconds = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+
+    def publish(self, comments: list):
+        """送入一批新评论（下游队列满时阻塞，抓取随之暂停）"""
+        for comment in comments:
+            for stage in self.stages:
+                stage.stream.put(comment)
+        self.published += len(comments)
+
+    def finish(self, header: dict) -> dict:
+        """
+        结束输入，等待各阶段完成合并与保存
+
+        Returns:
+            {阶段名称: 阶段结果}；任一阶段出错时重新抛出其异常
+        """
+        self.crawl_seconds = time.perf_counter() - self.started
+        for stage in self.stages:
+            stage.stream.close(header)
+        for stage in self.stages:
+            stage.join()
+        self.seconds = time.perf_counter() - self.started
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+        return {stage.name: stage.result for stage in self.stages}
+
+    def stats(self) -> list:
+        """各阶段统计：[{stage, items, seconds, busy, throughput, blocked, max_depth}, ...]"""
+        rows = [{"stage": "抓取", "items": self.published, "seconds": self.crawl_seconds,
+                 "busy": self.crawl_seconds, "blocked": sum(s.stream.blocked for s in self.stages),
+                 "max_depth": None}]
+        for stage in self.stages:
+            stream = stage.stream
+            rows.append({"stage": stage.name, "items": stream.items, "seconds": stage.seconds,
+                         "busy": max(stage.seconds - stream.idle, 0.0), "blocked": None,
+                         "max_depth": stream.max_depth})
+        for row in rows:
+            row["throughput"] = row["items"] / row["busy"] if row["busy"] > 0 else 0.0
+        return rows
+
+    def print_stats(self):
+        print(f"\n⏱️ 流水线统计（端到端 {self.seconds:.1f}s，抓取 {self.crawl_seconds:.1f}s）:")
+        print(f"   {'阶段':<12}{'评论数':>8}{'耗时(s)':>10}{'处理(s)':>10}{'条/秒':>10}{'背压等待(s)':>12}{'最大积压':>10}")
+        for row in self.stats():
+            blocked = f"{row['blocked']:.1f}" if row["blocked"] is not None else "-"
+            depth = str(row["max_depth"]) if row["max_depth"] is not None else "-"
+            print(f"   {row['stage']:<12}{row['items']:>8}{row['seconds']:>10.1f}{row['busy']:>10.1f}"
+                  f"{row['throughput']:>10.0f}{blocked:>12}{depth:>10}")
+
+
+class PipelineSession(CrawlSession):
+    """抓取会话：去重后的新评论（含恢复和增量合并的评论）同时送入流水线"""
+
+    def __init__(self, pipeline: Pipeline, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pipeline = pipeline
+        # 从检查点恢复的评论
+        self.pipeline.publish(self.comments)
+
+    def add(self, comments: list) -> bool:
+        before = len(self.comments)
+        keep_going = super().add(comments)
+        self.pipeline.publish(self.comments[before:])
+        return keep_going
+
+    def _merge_previous(self):
+        before = len(self.comments)
+        super()._merge_previous()
+        self.pipeline.publish(self.comments[before:])
+
+
+def run_pipeline(url: str, output_path: str = "comments.jsonl", excel_output: str = "评论数据.xlsx",
+                 analysis_output: str = "分析结果.xlsx", queue_size: int = DEFAULT_QUEUE_SIZE,
+                 analysis_options: dict = None, **crawl_options):
+    """
+    抓取一篇帖子，同时写出评论 Excel 和分析结果
+
+    Args:
+        url: 小红书帖子链接
+        output_path: 原始评论输出路径（.jsonl 边抓边写，.json 抓取结束后写出）
+        excel_output: 评论 Excel 输出路径
+        analysis_output: 分析结果 Excel 输出路径
+        queue_size: 每个下游队列最多积压的评论数
+        analysis_options: 传给 analyze_keywords 的其他参数
+        crawl_options: 传给 extract_comments 的抓取参数（max_scroll / headless / mode / since 等）
+
+    Returns:
+        {"crawl": 抓取结果, "excel": Excel 路径, "analysis": 分析摘要, "stats": 各阶段统计}
+    """
+    if find_spec("playwright") is None:
+        print("错误: 请先安装 playwright: pip install playwright && playwright install chromium")
+        return None
+
+    from extract_comments import extract_comments
+
+    pipeline = Pipeline(excel_output, analysis_output, queue_size, analysis_options,
+                        replies=crawl_options.get("replies", False))
+    pipeline.start()
+    result = None
+    try:
+        result = extract_comments(url, output_path,
+                                  session_factory=lambda *a, **kw: PipelineSession(pipeline, *a, **kw),
+                                  **crawl_options)
+    finally:
+        # 抓取中断时下游仍处理已抓到的评论
+        header = {k: v for k, v in (result or {}).items() if k != "comments"} or {"url": url}
+        outputs = pipeline.finish(header)
+    pipeline.print_stats()
+
+    return {
+        "crawl": result,
+        "excel": outputs["Excel 写入"],
+        "analysis": outputs["词频与情感分析"],
+        "stats": pipeline.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小红书评论一站式流水线：抓取、写 Excel、分析同时进行")
+    parser.add_argument("url", help="小红书帖子链接")
+    parser.add_argument("--output", "-o", default="comments.jsonl", help="原始评论输出路径（.jsonl / .json）")
+    parser.add_argument("--excel", default="评论数据.xlsx", help="评论 Excel 输出路径")
+    parser.add_argument("--analysis", default="分析结果.xlsx", help="分析结果 Excel 输出路径")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="每个下游队列最多积压的评论数（写满时抓取暂停）")
+    parser.add_argument("--store", help="抓取完成后同时导入评论库（SQLite，见 comment_store.py）")
+
+    crawl = parser.add_argument_group("抓取")
+    crawl.add_argument("--max-scroll", type=int, default=50, help="最大滚动次数")
+    crawl.add_argument("--headless", action="store_true", help="无头模式（不显示浏览器）")
+    crawl.add_argument("--mode", choices=["auto", "network", "dom"], default="auto",
+                       help="抓取模式：auto 优先捕获评论接口，失败回退 DOM")
+    crawl.add_argument("--scroll-strategy", choices=["adaptive", "fixed"], default="adaptive",
+                       help="DOM 模式滚动策略：adaptive 等待加载信号，fixed 固定间隔轮询")
+    crawl.add_argument("--time-budget", type=float, help="单帖评论加载时间预算（秒）")
+    crawl.add_argument("--resume", action="store_true", help="从上次中断留下的检查点恢复")
+    crawl.add_argument("--incremental", action="store_true",
+                       help="增量模式：以已有的输出文件为上次结果，只抓取新评论并合并")
+    crawl.add_argument("--replies", action="store_true",
+                       help="展开并抓取全部回复，评论 Excel 另建 回复 工作表，分析时回复按自身点赞数计权")
+
+    analysis = parser.add_argument_group("分析")
+    analysis.add_argument("--top", type=int, default=50, help="TOP N 高频词")
+    analysis.add_argument("--workers", type=int, default=1, help="分词与情感分析的并行进程数")
+    analysis.add_argument("--cache", help="缓存逐条分析结果的 SQLite 文件（见 analyze_keywords.py --cache）")
+    analysis.add_argument("--sketch", action="store_true", help="词频改用有界内存的近似计数（超大语料）")
+    analysis.add_argument("--clusters", type=int, default=0, metavar="K", help="把负面评论聚为 K 类痛点")
+
+    args = parser.parse_args()
+
+    since = args.output if args.incremental and Path(args.output).exists() else None
+    result = run_pipeline(
+        args.url, args.output, args.excel, args.analysis, args.queue_size,
+        analysis_options={"top_n": args.top, "workers": args.workers, "cache_path": args.cache,
+                          "sketch": args.sketch, "clusters": args.clusters, "replies": args.replies},
+        max_scroll=args.max_scroll, headless=args.headless, mode=args.mode,
+        scroll_strategy=args.scroll_strategy, time_budget=args.time_budget, resume=args.resume, since=since,
+        replies=args.replies
+    )
+    if result and result["crawl"] and args.store:
+        from extract_comments import import_to_store
+        import_to_store(args.store, [Path(args.output)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+分阶段性能剖析（--profile）
+各脚本用 stage("名称") 包住页面加载、滚动等待、DOM 提取、分词、情感打分、Excel 保存等阶段，
+用 count("名称", n) 累计 IPC 调用、处理评论数、缓存命中等计数；开启后输出两个文件：
+- <前缀>.profile.json：各阶段调用次数 / 累计耗时 / 最长单次、计数器、峰值内存
+- <前缀>.trace.json：Chrome Trace 格式的阶段时间线（chrome://tracing 或 https://ui.perfetto.dev 打开）
+可对指定阶段附加 cProfile（函数级耗时，另存 .prof）或 tracemalloc（分配位置与峰值）采集。
+未开启时 stage() 返回共享的空上下文、count() 直接返回，开销可忽略
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# 时间线最多记录的阶段事件数（超出后只累计汇总，不再记录事件）
+MAX_TRACE_EVENTS = 200000
+
+# 采集结果保留的函数 / 分配位置数
+CAPTURE_TOP = 25
+
+CAPTURE_MODES = ("cprofile", "tracemalloc")
+
+# 当前进程的剖析器，None 表示未开启
+_active = None
+
+
+class _NullStage:
+    """未开启剖析时的空阶段"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def end(self):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值 RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，Linux 以 KB 计
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _lane() -> int:
+    """时间线上的行：asyncio 任务各占一行（批量抓取的并发页面），其余按线程"""
+    try:
+        import asyncio
+        task = asyncio.current_task()
+    except (RuntimeError, ImportError):
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class _Stage:
+    """一次阶段计时"""
+
+    __slots__ = ("profiler", "name", "start", "lane")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.lane = _lane()
+        if self.name == self.profiler.capture_stage:
+            self.profiler._capture_enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        if self.name == profiler.capture_stage:
+            profiler._capture_exit()
+        profiler._record(self.name, self.start, end - self.start, self.lane)
+        return False
+
+    def end(self):
+        self.__exit__(None, None, None)
+
+
+class Profiler:
+    """
+    阶段计时、计数器与峰值内存
+
+    同名阶段可多次进入（如逐块分词），汇总为调用次数、累计耗时和最长单次；阶段可以嵌套，
+    嵌套阶段的耗时同时计入外层阶段
+    """
+
+    def __init__(self, script: str, capture_stage: str = None, capture: str = "cprofile"):
+        """
+        Args:
+            script: 脚本名（写入报告）
+            capture_stage: 附加采集的阶段名，None 表示不采集
+            capture: 采集方式 - cprofile(函数级耗时) / tracemalloc(内存分配)
+        """
+        self.script = script
+        self.capture_stage = capture_stage
+        self.capture = capture
+        self.pid = os.getpid()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.origin = time.perf_counter()
+        self.stages = {}
+        self.counters = Counter()
+        self.events = []
+        self.dropped_events = 0
+        self.lanes = {}
+        self._capture_depth = 0
+        self._cprofile = None
+        self._alloc_peak = 0
+        self._alloc_snapshot = None
+
+    def stage(self, name: str):
+        # 进程池的工作进程（fork）继承了剖析器，只在主进程中计时
+        if os.getpid() != self.pid:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def _record(self, name: str, start: float, seconds: float, lane: int):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        if seconds > entry["max_seconds"]:
+            entry["max_seconds"] = seconds
+        if len(self.events) >= MAX_TRACE_EVENTS:
+            self.dropped_events += 1
+            return
+        tid = self.lanes.setdefault(lane, len(self.lanes) + 1)
+        self.events.append((name, start - self.origin, seconds, tid))
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        """累计一段没有单独事件的耗时（如逐条读取评论，见 timed）"""
+        entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        entry["calls"] += calls
+        entry["seconds"] += seconds
+
+    # ===== 指定阶段的 cProfile / tracemalloc 采集 =====
+
+    def _capture_enter(self):
+        self._capture_depth += 1
+        if self._capture_depth > 1:
+            return
+        if self.capture == "tracemalloc":
+            import tracemalloc
+            tracemalloc.start()
+        else:
+            import cProfile
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _capture_exit(self):
+        self._capture_depth -= 1
+        if self._capture_depth > 0:
+            return
+        if self.capture == "tracemalloc":
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            # 只保留分配峰值最高的一次调用的快照
+            if peak > self._alloc_peak:
+                self._alloc_peak = peak
+                self._alloc_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        else:
+            self._cprofile.disable()
+
+    def _capture_report(self, prefix: str) -> dict:
+        if not self.capture_stage:
+            return None
+        report = {"stage": self.capture_stage, "mode": self.capture}
+        if self.capture == "tracemalloc":
+            report["peak_mb"] = round(self._alloc_peak / 1024 / 1024, 2)
+            report["top"] = []
+            if self._alloc_snapshot:
+                for stat in self._alloc_snapshot.statistics("lineno")[:CAPTURE_TOP]:
+                    frame = stat.traceback[0]
+                    report["top"].append({"location": f"{frame.filename}:{frame.lineno}",
+                                          "mb": round(stat.size / 1024 / 1024, 3), "blocks": stat.count})
+            return report
+
+        if self._cprofile is None:
+            report["top"] = []
+            return report
+        import pstats
+        prof_path = f"{prefix}.{self.capture_stage}.prof"
+        self._cprofile.dump_stats(prof_path)
+        report["prof"] = prof_path
+        stats = pstats.Stats(self._cprofile)
+        rows = []
+        for (filename, lineno, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{Path(filename).name}:{lineno}({function})", "calls": calls,
+                         "self_seconds": round(tottime, 4), "cumulative_seconds": round(cumtime, 4)})
+        rows.sort(key=lambda r: r["cumulative_seconds"], reverse=True)
+        report["top"] = rows[:CAPTURE_TOP]
+        return report
+
+    # ===== 输出 =====
+
+    def report(self, prefix: str = None) -> dict:
+        """汇总报告（prefix 为 cProfile 统计文件的路径前缀）"""
+        wall = time.perf_counter() - self.origin
+        stages = {name: {"calls": s["calls"], "seconds": round(s["seconds"], 4),
+                         "max_seconds": round(s["max_seconds"], 4),
+                         "share": round(s["seconds"] / wall, 4) if wall else 0.0}
+                  for name, s in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"])}
+        return {
+            "script": self.script,
+            "started": self.started_at,
+            "wall_seconds": round(wall, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "dropped_events": self.dropped_events,
+            "capture": self._capture_report(prefix) if prefix else None
+        }
+
+    def trace(self) -> dict:
+        """Chrome Trace 格式（微秒）"""
+        events = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.script}}]
+        for name, start, seconds, tid in self.events:
+            events.append({"name": name, "cat": "stage", "ph": "X", "pid": self.pid, "tid": tid,
+                           "ts": round(start * 1e6, 1), "dur": round(seconds * 1e6, 1)})
+        end = round((time.perf_counter() - self.origin) * 1e6, 1)
+        events.append({"name": "counters", "ph": "C", "pid": self.pid, "tid": 0, "ts": end,
+                       "args": dict(self.counters)})
+        events.append({"name": "peak_rss_mb", "ph": "C", "pid": self.pid, "tid": 0, "ts": end,
+                       "args": {"MB": round(peak_rss_mb(), 1)}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, prefix: str) -> tuple:
+        """
+        写出 <前缀>.profile.json 与 <前缀>.trace.json
+
+        Returns:
+            (报告, 报告路径, 时间线路径)
+        """
+        Path(prefix).parent.mkdir(parents=True, exist_ok=True)
+        report = self.report(prefix)
+        report_path = Path(f"{prefix}.profile.json")
+        trace_path = Path(f"{prefix}.trace.json")
+        report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        trace_path.write_text(json.dumps(self.trace(), ensure_ascii=False), encoding="utf-8")
+        return report, report_path, trace_path
+
+
+def stage(name: str):
+    """阶段计时上下文（同步与异步代码通用）；未开启剖析时为空操作"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+def begin(name: str):
+    """开始一个阶段并返回它，调用其 end() 结束（阶段跨越大段代码、不便缩进为 with 块时使用）"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name).__enter__()
+
+
+def count(name: str, n: int = 1):
+    """累计计数器；未开启剖析时为空操作（热循环中请按批计数）"""
+    if _active is not None:
+        _active.counters[name] += n
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def timed(name: str, iterable, counter: str = None):
+    """
+    逐项计时的迭代器包装（读取评论等与写入交错进行的阶段），耗时累计到阶段 name，
+    项数累计到计数器 counter；未开启剖析时原样返回
+
+    Args:
+        name: 阶段名
+        iterable: 被包装的可迭代对象
+        counter: 可选的计数器名
+    """
+    if _active is None:
+        return iterable
+    return _timed(_active, name, iterable, counter)
+
+
+def _timed(profiler: Profiler, name: str, iterable, counter: str):
+    iterator = iter(iterable)
+    clock = time.perf_counter
+    seconds = 0.0
+    items = 0
+    try:
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                seconds += clock() - start
+                break
+            seconds += clock() - start
+            items += 1
+            yield item
+    finally:
+        profiler.add_time(name, seconds, items)
+        if counter:
+            profiler.counters[counter] += items
+
+
+def add_profile_arguments(parser):
+    """为命令行添加 --profile / --profile-stage / --profile-capture 参数"""
+    group = parser.add_argument_group("性能剖析")
+    group.add_argument("--profile", nargs="?", const="", default=None, metavar="PREFIX",
+                       help="输出各阶段耗时、计数器和峰值内存（<前缀>.profile.json）及 Chrome Trace 时间线"
+                            "（<前缀>.trace.json），前缀默认为输出文件名")
+    group.add_argument("--profile-stage", metavar="STAGE", help="对指定阶段附加 cProfile / tracemalloc 采集")
+    group.add_argument("--profile-capture", choices=CAPTURE_MODES, default="cprofile",
+                       help="指定阶段的采集方式：cprofile 函数级耗时，tracemalloc 内存分配位置")
+
+
+@contextmanager
+def profiled(args, output_path, script: str):
+    """
+    按命令行参数开启剖析，结束时写出报告并打印摘要；未指定 --profile 时不做任何事
+
+    Args:
+        args: 含 add_profile_arguments 参数的命令行参数
+        output_path: 脚本的输出文件（或目录），作为默认的报告路径前缀
+        script: 脚本名
+    """
+    global _active
+    if args.profile is None:
+        yield None
+        return
+    prefix = args.profile or str(Path(output_path).with_suffix("") if Path(output_path).suffix
+                                 else Path(output_path) / "profile")
+    _active = Profiler(script, args.profile_stage, args.profile_capture)
+    profiler = _active
+    try:
+        yield profiler
+    finally:
+        _active = None
+        report, report_path, trace_path = profiler.save(prefix)
+        print_report(report)
+        print(f"📄 剖析报告: {report_path}")
+        print(f"📄 时间线: {trace_path}（chrome://tracing 或 https://ui.perfetto.dev 打开）")
+
+
+def print_report(report: dict, limit: int = 12):
+    """打印各阶段耗时、计数器与采集结果摘要"""
+    print(f"\n⏱️ 性能剖析: 总耗时 {report['wall_seconds']:.2f}s，峰值内存 {report['peak_rss_mb']:.0f} MB")
+    for name, s in list(report["stages"].items())[:limit]:
+        # 逐项计时的阶段（见 timed）没有单次耗时
+        longest = f"（最长 {s['max_seconds']:.3f}s）" if s["max_seconds"] else ""
+        print(f"   - {name:<16} {s['seconds']:>9.3f}s {s['share']:>6.1%}  {s['calls']:>6} 次{longest}")
+    if report["counters"]:
+        print("   - 计数: " + "，".join(f"{k} {v}" for k, v in sorted(report["counters"].items())))
+    capture = report.get("capture")
+    if capture:
+        print(f"   - {capture['stage']} 阶段 {capture['mode']} 采集" +
+              (f"（分配峰值 {capture['peak_mb']} MB）" if capture["mode"] == "tracemalloc" else "") + ":")
+        for row in capture["top"][:8]:
+            if capture["mode"] == "tracemalloc":
+                print(f"       {row['mb']:>8.3f} MB  {row['location']}")
+            else:
+                print(f"       {row['cumulative_seconds']:>8.3f}s  {row['function']}")
+        if capture["stage"] not in report["stages"]:
+            print(f"   ⚠️ 没有运行到阶段 {capture['stage']}（可选: {', '.join(report['stages'])}）")
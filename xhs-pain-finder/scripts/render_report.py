@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+由分析结果文件生成报告产物
+分析结果 Excel、词云图（PNG）和填好数据的调研报告（Markdown，基于 references/report_template.md）
+各自只读取 analyze_keywords 写出的 .result.json（见 analysis_result），互不依赖，可并发生成；
+换参数重新生成时不必重新分析
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+
+import profiling
+from analysis_result import load_result, result_path
+
+# 报告模板
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent.parent / "references" / "report_template.md"
+
+# 词云可选的词来源（结果文件中的字段）
+WORDCLOUD_SOURCES = {"words": "top_words", "tfidf": "keywords_tfidf", "pain": "pain_words"}
+
+# 常见系统的中文字体（词云默认字体不含中文）
+CJK_FONTS = [
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf"
+]
+
+# 词云在 1/WORDCLOUD_SCALE 尺寸上排版后放大输出：排版耗时随面积和字号增长，放大 4 倍比 2 倍快约 10 倍，
+# 输出时按原尺寸绘制字形，仍然清晰
+WORDCLOUD_SCALE = 4
+
+# 报告中的情感类型标记
+SENTIMENT_EMOJI = {"正面": "😊", "中性": "😐", "负面": "😞"}
+
+
+# ===== Excel =====
+
+def render_excel(result: dict, output_path: str, top_n: int = None) -> Path:
+    """
+    分析结果 Excel：高频词、TF-IDF 关键词、情感分析、痛点关键词，以及聚类 / 重复评论 / 抽样说明（如有）
+
+    Args:
+        result: 分析结果（见 analysis_result.build_result）
+        output_path: 输出路径
+        top_n: 高频词表的词数，默认为分析时的 top_n
+    """
+    building = profiling.begin("excel_build")
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
+    top_n = top_n or result["options"].get("top_n", 50)
+    approximate = result["approximate"]
+    sketch = result["count_error"] == "sketch"
+    wb = Workbook()
+
+    # ===== Sheet 1: 高频词统计 =====
+    ws1 = wb.active
+    ws1.title = "高频词TOP50"
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="4472C4")
+
+    headers1 = ["排名", "词语", "出现次数（估计）" if approximate else "出现次数", "词频占比"]
+    if sketch:
+        headers1.append("最大高估")
+    if approximate:
+        headers1.append("±95%误差")
+    for col, header in enumerate(headers1, 1):
+        cell = ws1.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+
+    total_words = result["word_total"]
+    for row, (word, count, error) in enumerate(result["top_words"][:top_n], 2):
+        ws1.cell(row=row, column=1, value=row - 1)
+        ws1.cell(row=row, column=2, value=word)
+        ws1.cell(row=row, column=3, value=count)
+        ws1.cell(row=row, column=4, value=f"{count/total_words*100:.2f}%")
+        if error is not None:
+            ws1.cell(row=row, column=5, value=error)
+
+    ws1.column_dimensions["B"].width = 20
+
+    # ===== Sheet 2: TF-IDF 关键词 =====
+    ws2 = wb.create_sheet("TF-IDF关键词")
+
+    headers2 = ["排名", "关键词", "权重"]
+    for col, header in enumerate(headers2, 1):
+        cell = ws2.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+
+    for row, (word, weight) in enumerate(result["keywords_tfidf"][:20], 2):
+        ws2.cell(row=row, column=1, value=row - 1)
+        ws2.cell(row=row, column=2, value=word)
+        ws2.cell(row=row, column=3, value=round(weight, 4))
+
+    ws2.column_dimensions["B"].width = 20
+
+    # ===== Sheet 3: 情感分析 =====
+    sentiments = result["sentiments"]
+    sentiment_counts = result["sentiment_counts"]
+    if sentiments:
+        ws3 = wb.create_sheet("情感分析")
+
+        # 汇总
+        ws3.cell(row=1, column=1, value="情感分布汇总（抽样估计）" if approximate else "情感分布汇总").font = Font(bold=True)
+        ws3.cell(row=2, column=1, value="正面")
+        ws3.cell(row=2, column=2, value=sentiment_counts.get("正面", 0))
+        ws3.cell(row=3, column=1, value="中性")
+        ws3.cell(row=3, column=2, value=sentiment_counts.get("中性", 0))
+        ws3.cell(row=4, column=1, value="负面")
+        ws3.cell(row=4, column=2, value=sentiment_counts.get("负面", 0))
+        if approximate:
+            for row, (p, half) in enumerate(approximate["intervals"].values(), 2):
+                ws3.cell(row=row, column=3, value=f"{p:.1%} ± {half:.1%}")
+
+        # 明细
+        headers3 = ["评论内容", "情感得分", "情感类型", "点赞数"]
+        for col, header in enumerate(headers3, 1):
+            cell = ws3.cell(row=6, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+
+        # 按点赞数排序
+        for row, s in enumerate(sentiments, 7):
+            ws3.cell(row=row, column=1, value=s["content"])
+            ws3.cell(row=row, column=2, value=s["score"])
+            ws3.cell(row=row, column=3, value=s["sentiment"])
+            ws3.cell(row=row, column=4, value=s["likes"])
+
+            # 根据情感类型着色
+            if s["sentiment"] == "负面":
+                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="FFC7CE")
+            elif s["sentiment"] == "正面":
+                ws3.cell(row=row, column=3).fill = PatternFill("solid", fgColor="C6EFCE")
+
+        ws3.column_dimensions["A"].width = 60
+
+    # ===== Sheet 4: 痛点关键词 =====
+    if result["pain_words"]:
+        ws4 = wb.create_sheet("痛点关键词")
+
+        headers4 = ["排名", "痛点词", "出现次数（估计）" if approximate else "出现次数"]
+        if sketch:
+            headers4.append("最大高估")
+        if approximate:
+            headers4.append("±95%误差")
+        for col, header in enumerate(headers4, 1):
+            cell = ws4.cell(row=1, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+
+        for row, (word, count, error) in enumerate(result["pain_words"][:30], 2):
+            ws4.cell(row=row, column=1, value=row - 1)
+            ws4.cell(row=row, column=2, value=word)
+            ws4.cell(row=row, column=3, value=count)
+            if error is not None:
+                ws4.cell(row=row, column=4, value=error)
+
+        ws4.column_dimensions["B"].width = 20
+
+    # ===== Sheet 5: 痛点聚类 =====
+    if result["pain_clusters"]:
+        from pain_clusters import write_clusters_sheet
+        write_clusters_sheet(wb, result["pain_clusters"])
+
+    # ===== Sheet 6: 重复评论 =====
+    if result["duplicates"]:
+        from dedup import write_duplicates_sheet
+        write_duplicates_sheet(wb, result["duplicates"])
+
+    if approximate:
+        from sampling import write_sampling_sheet
+        write_sampling_sheet(wb, approximate)
+
+    building.end()
+
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with profiling.stage("excel_save"):
+        wb.save(output_file)
+    return output_file
+
+
+# ===== 词云 =====
+
+def find_cjk_font():
+    """查找系统中的中文字体，找不到时返回 None"""
+    for path in CJK_FONTS:
+        if Path(path).exists():
+            return path
+    return None
+
+
+def render_wordcloud(result: dict, output_path: str, source: str = "words", max_words: int = 200,
+                     width: int = 1600, height: int = 900, font_path: str = None, background: str = "white",
+                     colormap: str = "viridis") -> Path:
+    """
+    词云图（PNG）
+
+    Args:
+        result: 分析结果
+        output_path: 输出路径
+        source: 词的来源 - words(高频词) / tfidf(TF-IDF 关键词，按权重) / pain(痛点词)
+        max_words: 最多显示的词数（不超过结果文件保留的词数）
+        width: 图片宽度（像素）
+        height: 图片高度（像素）
+        font_path: 字体文件，默认自动查找系统中文字体
+        background: 背景色
+        colormap: matplotlib 配色名
+
+    Returns:
+        输出路径；缺少依赖或没有词时返回 None
+    """
+    if find_spec("wordcloud") is None:
+        print("错误: 请先安装 wordcloud: pip install wordcloud")
+        return None
+
+    frequencies = {}
+    for row in result[WORDCLOUD_SOURCES[source]][:max_words]:
+        frequencies[row[0]] = row[1]
+    if not frequencies:
+        print(f"⚠️ 结果中没有{'痛点词' if source == 'pain' else '关键词'}，跳过词云")
+        return None
+
+    font_path = font_path or find_cjk_font()
+    if not font_path:
+        print("⚠️ 未找到中文字体，词云中的中文可能显示为方框，请用 --font 指定字体文件")
+
+    with profiling.stage("wordcloud"):
+        from wordcloud import WordCloud
+
+        cloud = WordCloud(font_path=font_path, width=max(width // WORDCLOUD_SCALE, 1),
+                          height=max(height // WORDCLOUD_SCALE, 1), scale=WORDCLOUD_SCALE,
+                          background_color=background, max_words=max_words, colormap=colormap,
+                          prefer_horizontal=0.9, random_state=42)
+        cloud.generate_from_frequencies(frequencies)
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        # to_file 以 optimize=True 压缩 PNG，耗时与排版相当，这里按默认压缩保存
+        cloud.to_image().save(output_file)
+    return output_file
+
+
+# ===== Markdown 报告 =====
+
+def md_cell(text) -> str:
+    """表格单元格：去换行、转义竖线"""
+    return str(text).replace("\r", " ").replace("\n", " ").replace("|", "\\|")
+
+
+def md_quote(text) -> str:
+    return str(text).replace("\r", " ").replace("\n", " ")
+
+
+def format_count(count, error) -> str:
+    return f"{count}（±{error}）" if error is not None else str(count)
+
+
+def pain_point_blocks(result: dict, pain_points: int) -> str:
+    """痛点章节：有聚类结果时按各簇，否则按出现最多的痛点词（引用包含该词的高赞负面评论）"""
+    blocks = []
+    clustering = result["pain_clusters"]
+    if clustering:
+        for cluster in clustering["clusters"]:
+            lines = [f"### 痛点 {cluster['id']}：{cluster['label']}",
+                     f"- **关键词**：{'、'.join(t for t, _ in cluster['terms'])}",
+                     f"- **规模**：{cluster['size']} 条负面评论（{cluster['share'] * 100:.1f}%），共 👍 {cluster['likes']}",
+                     "- **描述**：[痛点描述]",
+                     "- **典型评论**："]
+            lines += [f"  > \"{md_quote(q['content'])}\"（👍 {q['likes']}）\n" for q in cluster["quotes"][:3]]
+            blocks.append("\n".join(lines).rstrip())
+        return "\n\n".join(blocks)
+
+    negatives = [s for s in result["sentiments"] if s["sentiment"] == "负面"]
+    for i, (word, count, error) in enumerate(result["pain_words"][:pain_points], 1):
+        quotes = [s for s in negatives if word in s["content"]][:2]
+        lines = [f"### 痛点 {i}：[痛点名称]",
+                 f"- **痛点词**：{word}（负面评论中出现 {format_count(count, error)} 次）",
+                 "- **描述**：[痛点描述]",
+                 "- **典型评论**："]
+        lines += [f"  > \"{md_quote(s['content'])}\"（👍 {s['likes']}）\n" for s in quotes] \
+            or ["  > \"[引用原始评论]\"（👍 [点赞数]）"]
+        blocks.append("\n".join(lines).rstrip())
+    return "\n\n".join(blocks)
+
+
+def report_fields(result: dict, top_words: int, pain_points: int, wordcloud: str = None) -> dict:
+    """模板中独占一行的数据占位符 → 填入的内容（空字符串表示删去该行）"""
+    approximate = result["approximate"]
+    counts = result["sentiment_counts"]
+    scored = sum(counts.values())
+    sentiment_rows = []
+    if scored:
+        for label in ("正面", "中性", "负面"):
+            share = f"{counts[label] / scored:.1%}"
+            if approximate and label in approximate["intervals"]:
+                share += f" ± {approximate['intervals'][label][1]:.1%}"
+            sentiment_rows.append(f"| {SENTIMENT_EMOJI[label]} {label} | {counts[label]} | {share} |")
+    else:
+        sentiment_rows.append("| - | 未做情感分析 | - |")
+
+    negatives = [s for s in result["sentiments"] if s["sentiment"] == "负面"][:5]
+    return {
+        "[APPROXIMATE_NOTE]": f"> ⚠️ 以下为抽样估计的近似结果：{approximate['summary']}  " if approximate else "",
+        "[PAIN_POINTS]": pain_point_blocks(result, pain_points),
+        "[TOP_WORDS_ROWS]": "\n".join(f"| {rank} | {md_cell(word)} | {format_count(count, error)} | [解读] |"
+                                      for rank, (word, count, error) in enumerate(result["top_words"][:top_words], 1)),
+        "[TFIDF_KEYWORDS]": "、".join(word for word, _ in result["keywords_tfidf"][:10]),
+        "[WORDCLOUD]": f"![词云图]({wordcloud})" if wordcloud else "",
+        "[SENTIMENT_ROWS]": "\n".join(sentiment_rows),
+        "[NEGATIVE_TOP5]": "\n".join(f"{i}. > \"{md_quote(s['content'])}\"（👍 {s['likes']}）"
+                                     for i, s in enumerate(negatives, 1)) or "（无负面评论）",
+        "[TOP_LIKED_ROWS]": "\n".join(f"| {rank} | {md_cell(c['nickname'])} | {md_cell(c['content'])} | {c['likes']} |"
+                                      for rank, c in enumerate(result["top_liked"], 1))
+    }
+
+
+def render_markdown(result: dict, output_path: str, template: str = None, top_words: int = 10,
+                    pain_points: int = 3, wordcloud: str = None) -> Path:
+    """
+    填好数据的调研报告
+
+    模板中的行内占位符（[帖子标题] / [CRAWL_TIME] / [POST_URL] / [TOTAL_COMMENTS] / [TOP_N]）和独占一行的数据占位符
+    （见 report_fields）由分析结果填写；[一句话总结]、[解读]、[痛点描述] 等需要人工判断的占位符原样保留
+
+    Args:
+        result: 分析结果
+        output_path: 输出路径
+        template: 报告模板，默认 references/report_template.md
+        top_words: 高频词表的词数
+        pain_points: 没有聚类结果时按痛点词列出的痛点数
+        wordcloud: 词云图路径（嵌入报告，写为相对报告的路径），None 表示不嵌入
+    """
+    with profiling.stage("markdown"):
+        output_file = Path(output_path)
+        if wordcloud:
+            wordcloud = Path(wordcloud).resolve()
+            try:
+                wordcloud = wordcloud.relative_to(output_file.resolve().parent)
+            except ValueError:
+                pass
+            wordcloud = wordcloud.as_posix()
+        fields = report_fields(result, top_words, pain_points, wordcloud)
+
+        post = result["post"]
+        text = Path(template or DEFAULT_TEMPLATE).read_text(encoding="utf-8")
+        text = (text.replace("[帖子标题]", post.get("title") or "[帖子标题]")
+                .replace("[CRAWL_TIME]", post.get("crawl_time") or "[CRAWL_TIME]")
+                .replace("[POST_URL]", post.get("url") or "[POST_URL]")
+                .replace("[TOTAL_COMMENTS]", str(result["total_comments"]))
+                .replace("[TOP_N]", str(min(top_words, len(result["top_words"])))))
+        lines = []
+        for line in text.split("\n"):
+            value = fields.get(line.strip())
+            if value is None:
+                lines.append(line)
+            elif value:
+                lines.append(value)
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(text, encoding="utf-8")
+    return output_file
+
+
+# ===== 并发生成 =====
+
+RENDERERS = {"excel": render_excel, "wordcloud": render_wordcloud, "markdown": render_markdown}
+
+RENDERER_LABELS = {"excel": "分析结果 Excel", "wordcloud": "词云图", "markdown": "调研报告"}
+
+
+def render_all(result: dict, targets: dict, options: dict = None) -> dict:
+    """
+    并发生成多个产物（每个产物一个线程；写 PNG / xlsx 时的压缩与文件写入不持有 GIL）
+
+    Args:
+        result: 分析结果
+        targets: {产物: 输出路径}，产物为 RENDERERS 中的名称
+        options: {产物: 该产物渲染函数的其他参数}
+
+    Returns:
+        {产物: (输出路径或 None, 耗时秒数)}；某个产物出错不影响其他产物
+    """
+    options = options or {}
+    if "markdown" in targets and "wordcloud" in targets:
+        options["markdown"] = dict(options.get("markdown") or {}, wordcloud=targets["wordcloud"])
+
+    def run(name: str):
+        start = time.perf_counter()
+        try:
+            path = RENDERERS[name](result, targets[name], **(options.get(name) or {}))
+        except Exception as e:
+            print(f"❌ 生成{RENDERER_LABELS[name]}失败: {e}")
+            path = None
+        return path, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(len(targets), 1)) as pool:
+        futures = {name: pool.submit(run, name) for name in targets}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由分析结果文件生成 Excel / 词云图 / 调研报告")
+    parser.add_argument("result", help="分析结果文件（analyze_keywords.py 输出的 .result.json，或分析结果 Excel 路径）")
+    parser.add_argument("--excel", help="分析结果 Excel 输出路径")
+    parser.add_argument("--wordcloud", help="词云图输出路径（PNG）")
+    parser.add_argument("--report", help="调研报告输出路径（Markdown）")
+    parser.add_argument("--top", type=int, help="Excel 高频词表的词数（默认同分析时）")
+
+    cloud = parser.add_argument_group("词云")
+    cloud.add_argument("--cloud-source", choices=list(WORDCLOUD_SOURCES), default="words",
+                       help="词的来源：words 高频词，tfidf TF-IDF 关键词，pain 痛点词")
+    cloud.add_argument("--max-words", type=int, default=200, help="最多显示的词数")
+    cloud.add_argument("--size", default="1600x900", help="图片尺寸（宽x高）")
+    cloud.add_argument("--font", help="中文字体文件（默认自动查找）")
+    cloud.add_argument("--background", default="white", help="背景色")
+    cloud.add_argument("--colormap", default="viridis", help="matplotlib 配色名")
+
+    report = parser.add_argument_group("调研报告")
+    report.add_argument("--template", help=f"报告模板（默认 {DEFAULT_TEMPLATE.name}）")
+    report.add_argument("--report-words", type=int, default=10, help="报告高频词表的词数")
+    report.add_argument("--pain-points", type=int, default=3, help="没有聚类结果时列出的痛点数")
+
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    targets = {name: path for name, path in (("excel", args.excel), ("wordcloud", args.wordcloud),
+                                             ("markdown", args.report)) if path}
+    if not targets:
+        parser.error("请至少指定 --excel / --wordcloud / --report 之一")
+    if "excel" in targets and find_spec("openpyxl") is None:
+        print("错误: 请先安装 openpyxl: pip install openpyxl")
+        return
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    path = Path(args.result)
+    if path.suffix.lower() != ".json":
+        path = result_path(path)
+    try:
+        result = load_result(path)
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取分析结果 {path}: {e}")
+        return
+
+    options = {
+        "excel": {"top_n": args.top},
+        "wordcloud": {"source": args.cloud_source, "max_words": args.max_words, "width": width, "height": height,
+                      "font_path": args.font, "background": args.background, "colormap": args.colormap},
+        "markdown": {"template": args.template, "top_words": args.report_words, "pain_points": args.pain_points}
+    }
+    with profiling.profiled(args, next(iter(targets.values())), "render_report"):
+        outputs = render_all(result, targets, options)
+    for name, (output, seconds) in outputs.items():
+        if output:
+            print(f"📄 {RENDERER_LABELS[name]}: {output}（⏱️ {seconds * 1000:.0f} ms）")
+
+
+if __name__ == "__main__":
+    main()
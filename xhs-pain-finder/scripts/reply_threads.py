@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+评论回复楼层
+抓取时展开“展开更多回复”：页面内以滑动窗口同时展开多个楼层（最多 concurrency 个在途），每个楼层等到新回复
+渲染或超时即让出位置，不再逐个点击、逐个等待；接口模式下按楼层 cursor 并发请求回复分页。
+每条回复保存为完整记录（昵称、内容、点赞数、时间、作者标记），按“回复 某人：”或接口中的回复对象挂到被回复的
+那条记录下，组成紧凑的树：一级评论记录的 replies 为回复列表，回复再有回复时才带 replies / reply_to 字段。
+分析与导出时可把回复展开为独立评论，按回复自身的点赞数计权
+（asyncio 只在浏览器相关函数中导入：analyze_keywords 在模块顶层导入本模块的常量，空输入时也要快速启动）
+"""
+
+import math
+import re
+
+import profiling
+
+# 楼层（一级评论及其回复区）、楼层内一级评论、回复节点选择器
+THREAD_SELECTOR = '.parent-comment'
+ROOT_SELECTOR = '[class*="comment-item"]:not([class*="comment-item-sub"])'
+REPLY_SELECTOR = '[class*="comment-item-sub"]'
+
+# “展开更多回复”按钮：选择器命中且文字含以下关键词
+EXPAND_SELECTOR = '.reply-container .show-more, .reply-container [class*="show-more"]'
+EXPAND_TEXT = "展开|更多回复"
+
+# 同时展开的楼层数 / 单个楼层等待新回复的超时（秒）/ 展开轮数上限（楼层每次只加载一页回复）
+DEFAULT_REPLY_CONCURRENCY = 8
+EXPAND_TIMEOUT = 5.0
+MAX_EXPAND_ROUNDS = 50
+
+# 同一按钮连续展开失败多少次后不再点击
+MAX_EXPAND_FAILURES = 2
+
+# 回复内容长度上限（与一级评论一致）
+MAX_REPLY_CHARS = 500
+
+# 分析中回复计入次数的方式：one 每条一次，likes 按自身点赞数 1 + log2(1 + 点赞数)
+REPLY_WEIGHTINGS = ("one", "likes")
+
+# 回复正文开头的回复对象：“回复 昵称 : 内容”
+REPLY_TO_RE = re.compile(r'^回复\s*(.+?)\s*[:：]\s*')
+
+# 评论回复分页接口
+REPLY_API_PATH = "/api/sns/web/v2/comment/sub/page"
+REPLY_PAGE_SIZE = 10
+
+# 页面内滑动窗口展开：每个楼层点击后等到回复节点数增加（或按钮被移除）再让出位置
+EXPAND_JS = """
+async ([selector, textPattern, replySelector, threadSelector, limit, timeout, maxFailures]) => {
+    const pattern = new RegExp(textPattern);
+    const buttons = [...document.querySelectorAll(selector)].filter((b) =>
+        b.getClientRects().length > 0 && !b.dataset.xhsExpanding
+        && Number(b.dataset.xhsFailures || 0) < maxFailures && pattern.test(b.innerText || ""));
+    let expanded = 0, failed = 0;
+
+    const expand = (btn) => new Promise((resolve) => {
+        const thread = btn.closest(threadSelector) || btn.parentElement;
+        const before = thread.querySelectorAll(replySelector).length;
+        btn.dataset.xhsExpanding = "1";
+        let timer = null;
+        const done = (ok) => {
+            observer.disconnect();
+            clearTimeout(timer);
+            delete btn.dataset.xhsExpanding;
+            if (ok) { expanded++; delete btn.dataset.xhsFailures; }
+            else { failed++; btn.dataset.xhsFailures = String(Number(btn.dataset.xhsFailures || 0) + 1); }
+            resolve();
+        };
+        const observer = new MutationObserver(() => {
+            if (!btn.isConnected || thread.querySelectorAll(replySelector).length > before) done(true);
+        });
+        observer.observe(thread, {childList: true, subtree: true});
+        timer = setTimeout(() => done(false), timeout);
+        btn.click();
+    });
+
+    let next = 0;
+    const lane = async () => { while (next < buttons.length) await expand(buttons[next++]); };
+    await Promise.all(Array.from({length: Math.min(limit, buttons.length)}, lane));
+    return {found: buttons.length, expanded: expanded, failed: failed};
+}
+"""
+
+# 页面内按楼层提取一级评论与全部回复的原始字段
+THREADS_JS = """
+([threadSelector, rootSelector, replySelector, fields, start, limit]) => {
+    const nodes = document.querySelectorAll(threadSelector);
+    const total = nodes.length;
+    const text = (el) => (el.innerText || "").trim();
+    const len = (s) => [...s].length;
+
+    const firstMatch = (elem, selectors, accept) => {
+        let value = "";
+        for (const sel of selectors) {
+            const el = elem.querySelector(sel);
+            if (el) {
+                value = text(el);
+                if (accept(value)) break;
+            }
+        }
+        return value;
+    };
+    const item = (elem) => {
+        let likesText = "";
+        for (const sel of fields.likes) {
+            const el = elem.querySelector(sel);
+            if (el && /\\d+/.test(text(el))) { likesText = text(el); break; }
+        }
+        return {
+            id: (elem.id || "").replace(/^comment-/, ""),
+            content: firstMatch(elem, fields.content, (v) => v && len(v) > 2),
+            nickname: firstMatch(elem, fields.nickname, (v) => v && len(v) < 30),
+            likes_text: likesText,
+            time: firstMatch(elem, fields.time, (v) => !!v),
+            is_author_reply: elem.querySelector(fields.author) !== null
+        };
+    };
+
+    const records = [];
+    const end = Math.min(total, start + limit);
+    for (let i = start; i < end; i++) {
+        try {
+            const root = nodes[i].querySelector(rootSelector);
+            if (!root) continue;
+            const record = item(root);
+            record.position = i;
+            record.replies = [...nodes[i].querySelectorAll(replySelector)].map(item);
+            records.push(record);
+        } catch (e) {
+            records.push({position: i, error: String(e)});
+        }
+    }
+    return {total: total, records: records};
+}
+"""
+
+# 在页面上下文中请求回复分页（携带登录 Cookie），返回 JSON 或 null
+FETCH_JSON_JS = """
+async (url) => {
+    try {
+        const resp = await fetch(url, {credentials: "include"});
+        if (!resp.ok) return null;
+        return await resp.json();
+    } catch (e) {
+        return null;
+    }
+}
+"""
+
+
+def reply_record(nickname: str, content: str, likes: int, time: str, is_author: bool, reply_id: str = "",
+                 reply_to: str = "") -> dict:
+    """
+    一条回复记录（字段与一级评论一致；正文开头的“回复 某人：”拆为 reply_to）
+    """
+    content = (content or "").strip()
+    match = REPLY_TO_RE.match(content)
+    if match:
+        reply_to = reply_to or match.group(1)
+        content = content[match.end():]
+    record = {
+        "id": reply_id or "",
+        "nickname": nickname or "",
+        "content": content[:MAX_REPLY_CHARS],
+        "likes": likes,
+        "time": time or "",
+        "is_author_reply": bool(is_author)
+    }
+    if reply_to:
+        record["reply_to"] = reply_to
+    return record
+
+
+def build_reply_tree(replies: list) -> list:
+    """
+    把楼层内按时间排列的回复组成树
+
+    Args:
+        replies: [(回复记录, 被回复的回复 id), ...]，id 为空时按回复记录的 reply_to（昵称）
+            挂到楼层内该昵称最近的一条回复下，都找不到时为一级评论的直接回复
+
+    Returns:
+        一级评论的直接回复列表，有下级回复的记录带 replies 字段
+    """
+    roots = []
+    by_id = {}
+    last_by_nickname = {}
+    for record, target_id in replies:
+        parent = by_id.get(target_id) if target_id else None
+        if parent is None and record.get("reply_to"):
+            parent = last_by_nickname.get(record["reply_to"])
+        (parent.setdefault("replies", []) if parent is not None else roots).append(record)
+        if record.get("id"):
+            by_id[record["id"]] = record
+        if record.get("nickname"):
+            last_by_nickname[record["nickname"]] = record
+    return roots
+
+
+def iter_replies(comment: dict):
+    """按楼层顺序（深度优先）产出 (层级, 回复记录)，一级评论的直接回复为第 1 层"""
+    stack = [(1, reply) for reply in reversed(comment.get("replies") or ())]
+    while stack:
+        depth, reply = stack.pop()
+        yield depth, reply
+        stack.extend((depth + 1, child) for child in reversed(reply.get("replies") or ()))
+
+
+def count_replies(comment: dict) -> int:
+    return sum(1 for _ in iter_replies(comment))
+
+
+def sub_comment_texts(replies: list) -> list:
+    """兼容旧字段 sub_comments：前 5 条直接回复的“昵称: 内容”"""
+    texts = []
+    for reply in replies[:5]:
+        if reply["content"]:
+            text = f"{reply['nickname']}: {reply['content']}" if reply["nickname"] else reply["content"]
+            texts.append(text[:200])
+    return texts
+
+
+def reply_weight(likes: int, weighting: str = "likes") -> int:
+    """一条回复在分析中计入的次数"""
+    if weighting == "likes":
+        return 1 + int(math.log2(1 + max(likes, 0)))
+    return 1
+
+
+class WithReplies:
+    """
+    把每条一级评论的回复展开为独立评论的评论源，提供与 comment_store.StoreQuery 相同的
+    read_header() / iter_comments() 接口
+
+    回复紧跟在所属一级评论之后产出，点赞数为回复自身的点赞数，weight 按 weighting 计，
+    并带 reply_depth（层级）和 parent_index（所属一级评论序号）；一级评论原样产出
+    """
+
+    def __init__(self, source, weighting: str = "likes"):
+        """
+        Args:
+            source: JSON / JSONL 文件路径或评论源对象
+            weighting: 回复计入次数的方式，见 REPLY_WEIGHTINGS
+        """
+        self.source = source
+        self.weighting = weighting
+        self.comments = 0
+        self.replies = 0
+
+    def read_header(self) -> dict:
+        from comment_io import read_header
+        return read_header(self.source)
+
+    def iter_comments(self):
+        from comment_io import iter_comments
+
+        self.comments = self.replies = 0
+        for comment in iter_comments(self.source):
+            self.comments += 1
+            yield comment
+            parent_index = comment.get("index", self.comments)
+            for depth, reply in iter_replies(comment):
+                self.replies += 1
+                fields = {key: value for key, value in reply.items() if key != "replies"}
+                yield dict(fields, weight=reply_weight(reply.get("likes", 0), self.weighting),
+                           reply_depth=depth, parent_index=parent_index)
+
+
+# ===== 浏览器端：展开与提取 =====
+
+async def expand_threads(page, concurrency: int = DEFAULT_REPLY_CONCURRENCY, timeout: float = EXPAND_TIMEOUT,
+                         max_rounds: int = MAX_EXPAND_ROUNDS, time_budget: float = None) -> dict:
+    """
+    展开页面上全部“展开更多回复”
+
+    每轮在页面内找出当前可见的展开按钮，最多 concurrency 个楼层同时展开；楼层每次只加载一页回复，
+    加载后按钮仍在时下一轮继续，直到没有按钮、一轮无进展、轮数或时间预算用完
+
+    Args:
+        page: Playwright 页面对象（async API）
+        concurrency: 同时展开的楼层数（1 为逐个点击等待）
+        timeout: 单个楼层等待新回复的超时（秒）
+        max_rounds: 展开轮数上限
+        time_budget: 总时间预算（秒），None 表示不限
+
+    Returns:
+        展开统计（rounds/clicks/expanded/failed/seconds）
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    stats = {"rounds": 0, "clicks": 0, "expanded": 0, "failed": 0}
+    with profiling.stage("reply_expand"):
+        for _ in range(max_rounds):
+            if time_budget is not None and loop.time() - start >= time_budget:
+                break
+            result = await page.evaluate(EXPAND_JS, [EXPAND_SELECTOR, EXPAND_TEXT, REPLY_SELECTOR, THREAD_SELECTOR,
+                                                     max(concurrency, 1), timeout * 1000, MAX_EXPAND_FAILURES])
+            profiling.count("ipc")
+            stats["rounds"] += 1
+            stats["clicks"] += result["found"]
+            stats["expanded"] += result["expanded"]
+            stats["failed"] += result["failed"]
+            if not result["found"] or not result["expanded"]:
+                break
+    stats["seconds"] = round(loop.time() - start, 2)
+    profiling.count("reply_clicks", stats["clicks"])
+    return stats
+
+
+def build_thread_record(raw: dict, index: int) -> dict:
+    """页面返回的楼层原始字段转为评论记录（一级评论字段同 dom_extract.build_comment_record，另含回复树）"""
+    from dom_extract import build_comment_record
+
+    replies = []
+    for item in raw.get("replies", []):
+        reply = build_comment_record(dict(item, sub_comments=[]), 0)
+        replies.append((reply_record(reply["nickname"], item.get("content", ""), reply["likes"], reply["time"],
+                                     reply["is_author_reply"], item.get("id", "")), ""))
+    tree = build_reply_tree(replies)
+    comment = build_comment_record(dict(raw, sub_comments=[]), index)
+    comment["sub_comments"] = sub_comment_texts(tree)
+    if raw.get("id"):
+        comment["id"] = raw["id"]
+    comment["replies"] = tree
+    return comment
+
+
+async def extract_threads_batch(page, chunk_size: int = 200, stats: dict = None, start: int = 0) -> list:
+    """
+    在页面内按楼层批量提取一级评论及其全部回复（参数同 dom_extract.extract_comments_batch，位置按楼层计）
+
+    Returns:
+        评论记录列表（含 replies 回复树，已过滤空内容）
+    """
+    from dom_extract import FIELD_SELECTORS
+
+    comments = []
+    total = None
+    while total is None or start < total:
+        with profiling.stage("dom_extract"):
+            result = await page.evaluate(THREADS_JS, [THREAD_SELECTOR, ROOT_SELECTOR, REPLY_SELECTOR,
+                                                      FIELD_SELECTORS, start, chunk_size])
+        profiling.count("ipc")
+        total = result["total"]
+        if stats is not None:
+            stats["round_trips"] = stats.get("round_trips", 0) + 1
+            stats["total"] = total
+
+        for raw in result["records"]:
+            if "error" in raw:
+                print(f"  提取楼层 {raw['position'] + 1} 失败: {raw['error']}")
+                continue
+            comment = build_thread_record(raw, raw["position"] + 1)
+            if comment.get("content"):
+                comments.append(comment)
+
+        if start + chunk_size >= total:
+            break
+        start += chunk_size
+    return comments
+
+
+# ===== 接口模式：回复分页 =====
+
+def replies_from_api(item: dict) -> list:
+    """接口中一条一级评论内嵌的全部回复组成的树（见 build_reply_tree）"""
+    from network_capture import format_create_time, parse_like_count
+
+    replies = []
+    for sub in item.get("sub_comments") or ():
+        target = sub.get("target_comment") or {}
+        replies.append((reply_record(
+            (sub.get("user_info") or {}).get("nickname", ""), sub.get("content", ""),
+            parse_like_count(sub.get("like_count")), format_create_time(sub.get("create_time")),
+            "is_author" in (sub.get("show_tags") or []), sub.get("id", ""),
+            (target.get("user_info") or {}).get("nickname", "")
+        ), target.get("id", "")))
+    return build_reply_tree(replies)
+
+
+def reply_page_url(comment_page_url: str, root_id: str, cursor: str) -> str:
+    """由评论分页请求的地址构造某一楼层的回复分页地址"""
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+    parts = urlsplit(comment_page_url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    params = {"note_id": query.get("note_id", ""), "root_comment_id": root_id, "num": str(REPLY_PAGE_SIZE),
+              "cursor": cursor}
+    if "image_formats" in query:
+        params["image_formats"] = query["image_formats"]
+    return urlunsplit(parts._replace(path=REPLY_API_PATH, query=urlencode(params)))
+
+
+async def fetch_all_replies(page, comment_page_url: str, items: list,
+                            concurrency: int = DEFAULT_REPLY_CONCURRENCY, max_pages: int = MAX_EXPAND_ROUNDS) -> dict:
+    """
+    为接口返回的一级评论补齐其余回复：还有更多回复的楼层按 cursor 翻页，最多 concurrency 个楼层同时请求，
+    新回复追加到对应评论的 sub_comments
+
+    Args:
+        page: Playwright 页面对象
+        comment_page_url: 评论分页请求的地址（取 note_id 等参数）
+        items: 接口中的一级评论列表（原地补充）
+        concurrency: 同时请求的楼层数
+        max_pages: 每个楼层最多请求的回复页数
+
+    Returns:
+        统计（threads/pages/replies/failed）
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    stats = {"threads": 0, "pages": 0, "replies": 0, "failed": 0}
+
+    async def expand(item: dict):
+        cursor = item.get("sub_comment_cursor", "")
+        seen = {sub.get("id") for sub in item.get("sub_comments") or ()}
+        for _ in range(max_pages):
+            async with semaphore:
+                payload = await page.evaluate(FETCH_JSON_JS, reply_page_url(comment_page_url, item["id"], cursor))
+            profiling.count("ipc")
+            if not payload or payload.get("code", 0) != 0 or payload.get("success") is False:
+                stats["failed"] += 1
+                return
+            data = payload.get("data") or {}
+            stats["pages"] += 1
+            for sub in data.get("comments") or ():
+                if sub.get("id") not in seen:
+                    seen.add(sub.get("id"))
+                    item.setdefault("sub_comments", []).append(sub)
+                    stats["replies"] += 1
+            cursor = data.get("cursor", "")
+            if not data.get("has_more") or not cursor:
+                return
+
+    pending = [item for item in items if item.get("id") and item.get("sub_comment_has_more")]
+    stats["threads"] = len(pending)
+    if pending:
+        with profiling.stage("reply_fetch"):
+            await asyncio.gather(*(expand(item) for item in pending))
+    return stats
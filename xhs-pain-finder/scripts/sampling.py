@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+近似分析：按点赞数分层抽样，估计情感分布和词频
+第一遍只读取点赞数划分层：点赞最高的若干条评论单独成层、全部分析（不超过抽样条数的一半），
+其余按点赞数量级（0、1–9、10–99……）分层；
+第二遍读入抽中的评论，先给每层抽取最少 STRATUM_MIN 条，再分析高赞层，之后按轮次分析，每轮各层按评论数比例抽取，
+层内随机顺序。每轮结束时按分层抽样公式（含有限总体校正）计算情感占比的 95% 置信区间，
+全部区间半宽不超过目标误差即提前停止，也可按抽样条数或时间预算停止（时间预算从模型加载完成后计，
+只在一轮结束时检查，高赞层分析完、抽样部分达到 MIN_SAMPLE 条之前不会停止）。词频等计数按各层的抽样比例放大为估计值；
+仍未抽到的层（抽样条数过小或时间预算用完）情感占比按未知处理，区间覆盖其全部可能取值
+"""
+
+import math
+import random
+import time
+from collections import Counter, deque
+
+from comment_io import iter_comments, read_header
+from text_analysis import DEFAULT_CHUNK_SIZE, SENTIMENT_BINS, ChunkStats, chunk_item, init_models, iter_stats
+
+# 情感占比置信区间的目标半宽（0.02 即 ±2 个百分点）
+DEFAULT_MARGIN = 0.02
+
+# 始终全部分析的高赞评论数
+DEFAULT_ALWAYS_TOP = 1000
+
+# 只给时间预算时最多抽取的评论数（抽中的评论需读入内存）
+MAX_SAMPLE = 200000
+
+# 每轮抽样的评论数 / 判断收敛或按时间预算停止前抽样部分至少分析的评论数
+ROUND_SIZE = 5000
+MIN_SAMPLE = 1000
+
+# 每层最少抽取的评论数（估计层内方差至少需要 2 条），在高赞层之前安排
+STRATUM_MIN = 2
+
+# 高赞层最多占抽样条数的比例，其余留给各层抽样
+TOP_SHARE = 0.5
+
+# 点赞数分层边界：0、1–9、10–99、100–999、>=1000
+LIKE_BOUNDS = (1, 10, 100, 1000)
+
+# 95% 置信区间的正态分位数
+Z = 1.96
+
+# 抽样随机种子（结果可复现）
+SEED = 42
+
+SENTIMENT_LABELS = ("正面", "中性", "负面")
+
+
+def like_stratum(likes: int) -> int:
+    """点赞数所在的层（0 为 0 赞）"""
+    stratum = 0
+    for bound in LIKE_BOUNDS:
+        if likes < bound:
+            break
+        stratum += 1
+    return stratum
+
+
+def stratum_label(stratum: int) -> str:
+    if stratum == 0:
+        return "0 赞"
+    low = LIKE_BOUNDS[stratum - 1]
+    if stratum == len(LIKE_BOUNDS):
+        return f">={low} 赞"
+    return f"{low}–{LIKE_BOUNDS[stratum] - 1} 赞"
+
+
+class Stratum:
+    """一层评论：总体（按权重计）、抽样顺序和已分析部分的统计"""
+
+    def __init__(self, label: str, full: bool = False):
+        self.label = label
+        self.full = full  # 是否全部分析（高赞层）
+        self.indices = []
+        self.population = 0
+        self.stats = ChunkStats()
+
+    @property
+    def analyzed(self) -> int:
+        """已分析的评论数（按权重计）"""
+        return self.stats.total
+
+    @property
+    def scale(self) -> float:
+        """放大倍数：层总体 / 已分析"""
+        return self.population / self.analyzed if self.analyzed else 0.0
+
+    @property
+    def fpc(self) -> float:
+        """有限总体校正 1 - 抽样比例"""
+        return max(1.0 - self.analyzed / self.population, 0.0) if self.population else 0.0
+
+
+class StratifiedSample:
+    """
+    分层抽样的近似分析，提供与 comment_store.StoreQuery 相同的 read_header() 接口
+
+    用法：scan() → run(...) 得到估计的 ChunkStats，再用 intervals() / count_error() / strata_rows() 输出误差。
+    需要读取两遍输入，输入须为文件、评论库查询或 dedup.DedupedComments（不支持流水线的评论流）。
+    """
+
+    def __init__(self, source, sample_size: int = None, time_budget: float = None,
+                 margin: float = DEFAULT_MARGIN, always_top: int = DEFAULT_ALWAYS_TOP, seed: int = SEED):
+        """
+        Args:
+            source: 评论文件路径、评论库查询或其他评论源
+            sample_size: 最多分析的评论数（高赞层全部分析，但不超过其中的 TOP_SHARE），None 时最多 MAX_SAMPLE 条
+            time_budget: 时间预算（秒，从读入抽样评论并加载模型后开始计），用完即按已分析的评论估计
+                （在一轮结束时检查，各层按比例抽完整轮；高赞层分析完、抽样部分达到 MIN_SAMPLE 条之前不停止）
+            margin: 情感占比 95% 置信区间的目标半宽，全部达到即提前停止，0 表示不提前停止
+            always_top: 始终全部分析的高赞评论数（不超过抽样条数的 TOP_SHARE）
+            seed: 抽样随机种子
+        """
+        self.source = source
+        self.sample_size = sample_size
+        self.time_budget = time_budget
+        self.margin = margin
+        self.always_top = always_top
+        self.seed = seed
+        self.strata = []
+        self.total = 0
+        self.population = 0
+        self.schedule = []
+        self.started = None
+        self.seconds = 0.0
+        self.stop_reason = None
+
+    def scan(self):
+        """第一遍：按点赞数分层，安排各轮抽样顺序"""
+        self.started = time.perf_counter()
+        likes, weights = [], []
+        for comment in iter_comments(self.source):
+            likes.append(comment.get("likes", 0) or 0)
+            weights.append(comment.get("weight", 1))
+        self.total = len(likes)
+        self.population = sum(weights)
+
+        # 点赞最高的 always_top 条（点赞为 0 的不算）单独成层；高赞层不能占满抽样条数，否则其他层抽不到
+        always_top = min(self.always_top, int((self.sample_size or MAX_SAMPLE) * TOP_SHARE))
+        ranked = sorted(range(self.total), key=lambda i: -likes[i])[:always_top]
+        top = set(i for i in ranked if likes[i] > 0)
+        self.strata = [Stratum(f"点赞最高 {len(top)} 条", full=True)]
+        self.strata += [Stratum(stratum_label(h)) for h in range(len(LIKE_BOUNDS) + 1)]
+        for i in range(self.total):
+            stratum = self.strata[0 if i in top else 1 + like_stratum(likes[i])]
+            stratum.indices.append(i)
+            stratum.population += weights[i]
+        rng = random.Random(self.seed)
+        for stratum in self.strata[1:]:
+            rng.shuffle(stratum.indices)
+
+        self.schedule = self._plan()
+        return self
+
+    def _plan(self) -> list:
+        """
+        安排分析顺序：先给每层抽取 STRATUM_MIN 条，再全部高赞层，之后每轮各层按评论数比例抽取 ROUND_SIZE 条
+
+        Returns:
+            [(层号, [评论下标, ...], 是否一轮的最后一块), ...]，每块不超过 DEFAULT_CHUNK_SIZE 条
+        """
+        top = self.strata[0]
+        limit = self.sample_size if self.sample_size else MAX_SAMPLE
+        limit = max(limit, len(top.indices))
+        schedule = []
+
+        def add(h: int, indices: list):
+            for start in range(0, len(indices), DEFAULT_CHUNK_SIZE):
+                schedule.append([h, indices[start:start + DEFAULT_CHUNK_SIZE], False])
+
+        taken = [0] * len(self.strata)
+        planned = 0
+        for h, stratum in enumerate(self.strata[1:], 1):
+            k = min(STRATUM_MIN, len(stratum.indices), max(limit - len(top.indices) - planned, 0))
+            add(h, stratum.indices[:k])
+            taken[h] = k
+            planned += k
+
+        add(0, top.indices)
+        if schedule:
+            schedule[-1][2] = True
+        planned += len(top.indices)
+        rest = sum(len(s.indices) for s in self.strata[1:])
+        while planned < limit and rest:
+            budget = min(ROUND_SIZE, limit - planned)
+            for h, stratum in enumerate(self.strata[1:], 1):
+                remaining = len(stratum.indices) - taken[h]
+                if not remaining:
+                    continue
+                k = min(math.ceil(budget * len(stratum.indices) / rest), remaining, limit - planned)
+                if k <= 0:
+                    continue
+                add(h, stratum.indices[taken[h]:taken[h] + k])
+                taken[h] += k
+                planned += k
+            if not schedule[-1][2]:
+                schedule[-1][2] = True
+            if all(taken[h] >= len(s.indices) for h, s in enumerate(self.strata) if h):
+                break
+        return [tuple(entry) for entry in schedule]
+
+    def read_header(self) -> dict:
+        return read_header(self.source)
+
+    def run(self, sentiment: bool = True, workers: int = 1, cache=None, negatives: bool = False) -> ChunkStats:
+        """
+        第二遍：读入抽中的评论，按轮次分析直到收敛、达到抽样条数或用完时间预算
+
+        Returns:
+            估计的统计结果（计数为按层放大后的估计值，情感明细与失败示例来自已分析的评论）
+        """
+        selected = {i for _, indices, _ in self.schedule for i in indices}
+        comments = {}
+        for i, comment in enumerate(iter_comments(self.source)):
+            if i in selected:
+                comments[i] = comment
+
+        # 读文件和加载模型不计入时间预算，否则预算很小时只够分析各层的最少条数
+        init_models(sentiment, quiet=True)
+        budget_start = time.perf_counter()
+        pending = deque()
+
+        def chunks():
+            for h, indices, round_end in self.schedule:
+                pending.append((h, round_end))
+                yield [chunk_item(i, comments[i]) for i in indices]
+
+        self.stop_reason = "已分析全部抽样" if len(selected) < self.total else "已分析全部评论"
+        for partial in iter_stats(chunks(), sentiment, workers, cache, negatives):
+            h, round_end = pending.popleft()
+            self.strata[h].stats.merge(partial)
+            if (round_end and self.time_budget and time.perf_counter() - budget_start >= self.time_budget
+                    and self._enough_sampled()):
+                self.stop_reason = f"用完时间预算 {self.time_budget:g}s"
+                break
+            if round_end and self.margin and sentiment and not self.exact and self.converged():
+                self.stop_reason = f"情感占比误差已小于 ±{self.margin:.0%}"
+                break
+        self.seconds = time.perf_counter() - self.started
+        return self.estimate()
+
+    @property
+    def analyzed(self) -> int:
+        return sum(s.analyzed for s in self.strata)
+
+    @property
+    def exact(self) -> bool:
+        """所有评论都已分析（估计即精确值）"""
+        return self.analyzed >= self.population
+
+    def _scored_weights(self) -> list:
+        """各层打分成功评论的估计总体（未分析的层按全部可打分计）"""
+        weights = []
+        for stratum in self.strata:
+            scored = sum(stratum.stats.sentiment_counts.values())
+            weights.append(stratum.population * scored / stratum.analyzed if stratum.analyzed else stratum.population)
+        return weights
+
+    @property
+    def unsampled(self) -> int:
+        """未抽到任何评论的层的总体（按权重计）"""
+        return sum(s.population for s in self.strata if not s.analyzed)
+
+    def intervals(self) -> dict:
+        """
+        情感占比估计及 95% 置信区间半宽：{情感类型: (占比, 半宽)}
+
+        未抽到的层占比未知：各情感按 1/3 计入估计，半宽加上该层占比的 2/3，区间覆盖其全部可能取值
+        """
+        if not self.analyzed:
+            return {}
+        weights = self._scored_weights()
+        total = sum(weights)
+        result = {}
+        for label in SENTIMENT_LABELS:
+            estimate = variance = unknown = 0.0
+            for stratum, weight in zip(self.strata, weights):
+                if not weight or not total:
+                    continue
+                share = weight / total
+                scored = sum(stratum.stats.sentiment_counts.values())
+                if not stratum.analyzed:
+                    estimate += share / len(SENTIMENT_LABELS)
+                    unknown += share * (1 - 1 / len(SENTIMENT_LABELS))
+                    continue
+                if not scored:
+                    continue
+                p = stratum.stats.sentiment_counts.get(label, 0) / scored
+                estimate += share * p
+                # 样本太少时按 p = 0.5 保守估计
+                spread = p * (1 - p) if scored > 1 else 0.25
+                variance += share ** 2 * stratum.fpc * spread / max(scored - 1, 1)
+            result[label] = (estimate, Z * math.sqrt(variance) + unknown)
+        return result
+
+    def _enough_sampled(self) -> bool:
+        """高赞层已全部分析，且抽样部分已分析至少 MIN_SAMPLE 条（不足以外推时不提前停止）"""
+        top, sampled = self.strata[0], self.strata[1:]
+        if top.analyzed < top.population:
+            return False
+        return sum(s.analyzed for s in sampled) >= min(MIN_SAMPLE, sum(s.population for s in sampled))
+
+    def converged(self) -> bool:
+        """
+        抽样部分已分析至少 MIN_SAMPLE 条、每个未分析完的层都有打分结果，且全部情感占比的误差达到目标
+        （未抽到的层半宽按未知计，不会提前收敛）
+        """
+        sampled = self.strata[1:]
+        if not self._enough_sampled():
+            return False
+        if any(s.population and s.fpc > 0 and sum(s.stats.sentiment_counts.values()) < 2 for s in sampled):
+            return False
+        intervals = self.intervals()
+        return bool(intervals) and all(half <= self.margin for _, half in intervals.values())
+
+    def count_error(self, attr: str, word: str) -> float:
+        """估计计数的 95% 置信区间半宽（各层计数按泊松近似），attr 为 ChunkStats 的计数器名"""
+        variance = sum(s.scale ** 2 * s.fpc * getattr(s.stats, attr).get(word, 0) for s in self.strata)
+        return Z * math.sqrt(variance)
+
+    def estimate(self) -> ChunkStats:
+        """把各层统计按放大倍数合并为总体的估计"""
+        result = ChunkStats()
+        result.total = self.population
+        for attr in ("word_counts", "doc_freq", "tfidf_freq", "pain_words"):
+            totals = {}
+            for stratum in self.strata:
+                scale = stratum.scale
+                for word, count in getattr(stratum.stats, attr).items():
+                    totals[word] = totals.get(word, 0.0) + count * scale
+            setattr(result, attr, Counter({w: max(1, round(c)) for w, c in totals.items()}))
+
+        hist = [0.0] * SENTIMENT_BINS
+        for stratum in self.strata:
+            scale = stratum.scale
+            for i, count in enumerate(stratum.stats.sentiment_hist):
+                hist[i] += count * scale
+            for item in stratum.stats.top_sentiments:
+                result.add_top(item)
+            result.failure_count += stratum.stats.failure_count
+            result.failures.extend(stratum.stats.failures)
+            result.negatives.extend(stratum.stats.negatives)
+        result.sentiment_hist = [round(c) for c in hist]
+        # 情感计数 = 估计占比 × 可打分评论的估计总数（未抽到的层也计入总数，与 intervals() 一致）
+        if any(sum(s.stats.sentiment_counts.values()) for s in self.strata):
+            scored = sum(self._scored_weights())
+            result.sentiment_counts = Counter({label: round(p * scored) for label, (p, _) in self.intervals().items()})
+        result.failures.sort()
+        result.negatives.sort()
+        return result
+
+    def strata_rows(self) -> list:
+        """各层概况：[{label, population, analyzed, ratio}, ...]"""
+        return [{"label": s.label, "population": s.population, "analyzed": s.analyzed,
+                 "ratio": s.analyzed / s.population if s.population else 0.0}
+                for s in self.strata if s.population]
+
+    def summary(self) -> str:
+        intervals = self.intervals()
+        sentiment = "，".join(f"{label} {p:.1%}±{half:.1%}" for label, (p, half) in intervals.items())
+        return (f"抽样分析 {self.analyzed}/{self.population} 条（{self.stop_reason}，{self.seconds:.1f}s）"
+                + (f"；情感占比 {sentiment}（95% 置信区间）" if sentiment else "")
+                + (f"；{self.unsampled} 条评论所在的层未抽到，情感占比按未知计入区间，词频计数不含这部分"
+                   if self.unsampled else ""))
+
+
+def write_sampling_sheet(wb, approximate: dict, title: str = "近似结果说明"):
+    """
+    在工作簿最前面添加抽样说明工作表（普通模式 Workbook），并设为打开时显示的工作表
+
+    Args:
+        approximate: 分析结果文件中的 approximate 部分（population / analyzed / stop_reason / seconds /
+            intervals / strata，见 analysis_result）
+    """
+    from openpyxl.styles import Font, PatternFill
+
+    ws = wb.create_sheet(title, 0)
+    wb.active = 0
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="4472C4")
+
+    ws.cell(row=1, column=1, value="⚠️ 以下结果为抽样估计的近似值，不是全量统计").font = Font(bold=True, color="C00000")
+    population, analyzed = approximate["population"], approximate["analyzed"]
+    ws.cell(row=2, column=1, value=f"评论总数 {population}，已分析 {analyzed} 条"
+                                   f"（{analyzed / population:.1%}），停止原因：{approximate['stop_reason']}，"
+                                   f"耗时 {approximate['seconds']:.1f}s")
+    ws.cell(row=3, column=1, value="计数按各层抽样比例放大；误差为 95% 置信区间半宽（情感占比按分层抽样公式，词频按泊松近似）")
+
+    def header_row(row: int, headers: list):
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=row, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+
+    header_row(5, ["情感类型", "估计占比", "±95%误差", "置信区间"])
+    row = 6
+    for label, (p, half) in approximate["intervals"].items():
+        values = [label, f"{p:.2%}", f"{half:.2%}", f"{max(p - half, 0):.2%} – {min(p + half, 1):.2%}"]
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value)
+        row += 1
+
+    row += 1
+    header_row(row, ["分层", "评论数", "已分析", "抽样比例"])
+    for stratum in approximate["strata"]:
+        row += 1
+        values = [stratum["label"], stratum["population"], stratum["analyzed"], f"{stratum['ratio']:.1%}"]
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value)
+
+    ws.column_dimensions["A"].width = 24
+    for col in "BCD":
+        ws.column_dimensions[col].width = 16
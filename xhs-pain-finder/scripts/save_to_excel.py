@@ -1,21 +1,68 @@
 #!/usr/bin/env python3
 """
-评论数据存储脚本 - 将 JSON 数据保存到 Excel
+评论数据存储脚本 - 将 JSON / JSONL 数据保存到 Excel
 """
 
 import argparse
-import json
 from pathlib import Path
 from datetime import datetime
 
-def save_to_excel(json_path: str, output_path: str):
+import profiling
+from comment_io import iter_comments, read_header
+from comment_store import add_query_arguments, query_from_args
+
+# 表头与列宽
+HEADERS = ["序号", "用户昵称", "评论内容", "点赞数", "发布时间", "作者回复", "子评论"]
+COL_WIDTHS = [8, 15, 60, 10, 15, 10, 40]
+
+# 回复表（--replies）：每条回复一行，按所属评论序号和楼层顺序排列
+REPLY_HEADERS = ["评论序号", "层级", "用户昵称", "回复对象", "回复内容", "点赞数", "发布时间", "作者回复"]
+REPLY_COL_WIDTHS = [8, 6, 15, 15, 60, 10, 15, 10]
+
+# xlsx 单个工作表的最大行数（含表头）
+MAX_SHEET_ROWS = 1048576
+
+
+def comment_row(comment: dict, default_index: int) -> list:
+    """评论记录转为表格行"""
+    return [
+        comment.get("index", default_index),
+        comment.get("nickname", ""),
+        comment.get("content", ""),
+        comment.get("likes", 0),
+        comment.get("time", ""),
+        "是" if comment.get("is_author_reply") else "",
+        "\n".join(comment.get("sub_comments", []))
+    ]
+
+
+def reply_row(parent_index: int, depth: int, reply: dict) -> list:
+    """回复记录转为回复表的行"""
+    return [
+        parent_index,
+        depth,
+        reply.get("nickname", ""),
+        reply.get("reply_to", ""),
+        reply.get("content", ""),
+        reply.get("likes", 0),
+        reply.get("time", ""),
+        "是" if reply.get("is_author_reply") else ""
+    ]
+
+
+def save_to_excel(json_path: str, output_path: str, fast: bool = False, replies: bool = False):
     """
-    将评论 JSON 数据保存到 Excel
+    将评论数据保存到 Excel（逐条读取评论，汇总数字在同一遍中累计）
     
     Args:
-        json_path: 输入 JSON 文件路径
+        json_path: 输入 JSON / JSONL 文件路径，或评论库查询（comment_store.StoreQuery）
         output_path: 输出 Excel 文件路径
+        fast: 使用 write-only 流式写出（适合数十万行以上，超出单表行数上限自动分表）
+        replies: 另建 回复 工作表，列出抓取时展开的全部回复（见 reply_threads）
     """
+    if fast:
+        return save_to_excel_fast(json_path, output_path, replies=replies)
+    
     try:
         from openpyxl import Workbook
         from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
@@ -24,15 +71,8 @@ def save_to_excel(json_path: str, output_path: str):
         print("错误: 请先安装 openpyxl: pip install openpyxl")
         return None
     
-    # 读取 JSON 数据
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    comments = data.get("comments", [])
-    
-    if not comments:
-        print("警告: 没有找到评论数据")
-        return None
+    # 读取帖子信息，评论在写入时逐条读取
+    data = read_header(json_path)
     
     # 创建工作簿
     wb = Workbook()
@@ -53,10 +93,9 @@ def save_to_excel(json_path: str, output_path: str):
     )
     
     # 表头
-    headers = ["序号", "用户昵称", "评论内容", "点赞数", "发布时间", "作者回复", "子评论"]
-    col_widths = [8, 15, 60, 10, 15, 10, 40]
+    headers = HEADERS
     
-    for col, (header, width) in enumerate(zip(headers, col_widths), 1):
+    for col, (header, width) in enumerate(zip(headers, COL_WIDTHS), 1):
         cell = ws.cell(row=1, column=col, value=header)
         cell.font = header_font
         cell.fill = header_fill
@@ -67,17 +106,31 @@ def save_to_excel(json_path: str, output_path: str):
     # 冻结首行
     ws.freeze_panes = "A2"
     
-    # 填充数据
-    for row_idx, comment in enumerate(comments, 2):
-        row_data = [
-            comment.get("index", row_idx - 1),
-            comment.get("nickname", ""),
-            comment.get("content", ""),
-            comment.get("likes", 0),
-            comment.get("time", ""),
-            "是" if comment.get("is_author_reply") else "",
-            "\n".join(comment.get("sub_comments", []))
-        ]
+    ws_replies = None
+    reply_total = 0
+    if replies:
+        from reply_threads import iter_replies
+        
+        ws_replies = wb.create_sheet("回复")
+        for col, (header, width) in enumerate(zip(REPLY_HEADERS, REPLY_COL_WIDTHS), 1):
+            cell = ws_replies.cell(row=1, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_align
+            cell.border = border
+            ws_replies.column_dimensions[get_column_letter(col)].width = width
+        ws_replies.freeze_panes = "A2"
+    
+    # 填充数据（同时累计汇总信息）
+    total = 0
+    total_likes = 0
+    author_replies = 0
+    with_sub_comments = 0
+    high_likes = 0
+    
+    writing = profiling.begin("write_rows")
+    for row_idx, comment in enumerate(profiling.timed("read", iter_comments(json_path), "comments"), 2):
+        row_data = comment_row(comment, row_idx - 1)
         
         for col, value in enumerate(row_data, 1):
             cell = ws.cell(row=row_idx, column=col, value=value)
@@ -86,12 +139,32 @@ def save_to_excel(json_path: str, output_path: str):
         
         # 根据点赞数高亮
         likes = comment.get("likes", 0)
+        total += 1
+        total_likes += likes
+        author_replies += 1 if comment.get("is_author_reply") else 0
+        with_sub_comments += 1 if comment.get("sub_comments") else 0
+        high_likes += 1 if likes >= 100 else 0
         if likes >= 100:
             for col in range(1, len(headers) + 1):
                 ws.cell(row=row_idx, column=col).fill = PatternFill("solid", fgColor="FFF2CC")
         elif likes >= 50:
             for col in range(1, len(headers) + 1):
                 ws.cell(row=row_idx, column=col).fill = PatternFill("solid", fgColor="E2EFDA")
+        
+        if ws_replies is not None:
+            for depth, reply in iter_replies(comment):
+                reply_total += 1
+                for col, value in enumerate(reply_row(row_data[0], depth, reply), 1):
+                    cell = ws_replies.cell(row=reply_total + 1, column=col, value=value)
+                    cell.alignment = cell_align
+                    cell.border = border
+                    if reply.get("likes", 0) >= 100:
+                        cell.fill = PatternFill("solid", fgColor="FFF2CC")
+    writing.end()
+    
+    if not total:
+        print("警告: 没有找到评论数据")
+        return None
     
     # 添加汇总信息工作表
     ws_summary = wb.create_sheet("汇总信息")
@@ -100,11 +173,13 @@ def save_to_excel(json_path: str, output_path: str):
         ["帖子链接", data.get("url", "")],
         ["帖子标题", data.get("title", "")],
         ["抓取时间", data.get("crawl_time", "")],
-        ["评论总数", len(comments)],
-        ["总点赞数", sum(c.get("likes", 0) for c in comments)],
-        ["作者回复数", sum(1 for c in comments if c.get("is_author_reply"))],
-        ["有子评论数", sum(1 for c in comments if c.get("sub_comments"))],
+        ["评论总数", total],
+        ["总点赞数", total_likes],
+        ["作者回复数", author_replies],
+        ["有子评论数", with_sub_comments],
     ]
+    if ws_replies is not None:
+        summary_data.append(["回复总数", reply_total])
     
     for row_idx, (label, value) in enumerate(summary_data, 1):
         ws_summary.cell(row=row_idx, column=1, value=label).font = Font(bold=True)
@@ -116,22 +191,236 @@ def save_to_excel(json_path: str, output_path: str):
     # 保存文件
     output_file = Path(output_path)
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(output_file)
+    with profiling.stage("excel_save"):
+        wb.save(output_file)
+    
+    print(f"✅ Excel 文件已保存: {output_file}")
+    print(f"   - 共 {total} 条评论" + (f"，{reply_total} 条回复" if ws_replies is not None else ""))
+    print(f"   - 高赞评论(≥100): {high_likes} 条")
+    
+    return output_file
+
+
+class CommentSheetWriter:
+    """
+    write-only 模式的评论表写入器
+    
+    所有单元格引用共享的命名样式（不再逐格创建样式对象），
+    单表达到行数上限时自动新建工作表，汇总数字在写入的同一遍中累计。
+    """
+    
+    def __init__(self, wb, rows_per_sheet: int = MAX_SHEET_ROWS - 1, sheet_title: str = "评论数据",
+                 replies: bool = False):
+        """
+        Args:
+            wb: write_only=True 的 Workbook
+            rows_per_sheet: 每个工作表的数据行数上限（不含表头）
+            sheet_title: 工作表名称（后续分表追加序号）
+            replies: 同时把每条评论的回复写入 回复 工作表（同样按行数上限分表）
+        """
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+        
+        self.wb = wb
+        self.rows_per_sheet = rows_per_sheet
+        self.sheet_title = sheet_title
+        self.ws = None
+        self.sheet_rows = 0
+        self.sheets = []
+        self._style_arrays = {}
+        
+        self.replies = replies
+        self.reply_ws = None
+        self.reply_rows = 0
+        self.reply_sheets = []
+        self.reply_total = 0
+        
+        self.total = 0
+        self.total_likes = 0
+        self.author_replies = 0
+        self.with_sub_comments = 0
+        self.high_likes = 0
+        
+        border = Border(
+            left=Side(style="thin"),
+            right=Side(style="thin"),
+            top=Side(style="thin"),
+            bottom=Side(style="thin")
+        )
+        cell_align = Alignment(horizontal="left", vertical="top", wrap_text=True)
+        styles = [
+            NamedStyle(name="评论表头", font=Font(bold=True, color="FFFFFF", size=11),
+                       fill=PatternFill("solid", fgColor="4472C4"), border=border,
+                       alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+            NamedStyle(name="评论单元格", alignment=cell_align, border=border),
+            NamedStyle(name="评论单元格-高赞", alignment=cell_align, border=border,
+                       fill=PatternFill("solid", fgColor="FFF2CC")),
+            NamedStyle(name="评论单元格-中赞", alignment=cell_align, border=border,
+                       fill=PatternFill("solid", fgColor="E2EFDA")),
+            NamedStyle(name="汇总标签", font=Font(bold=True)),
+        ]
+        for style in styles:
+            if style.name not in wb.named_styles:
+                wb.add_named_style(style)
+    
+    def _styled(self, value, style: str, ws=None):
+        from openpyxl.cell import WriteOnlyCell
+        
+        cell = WriteOnlyCell(ws or self.ws, value=value)
+        template = self._style_arrays.get(style)
+        if template is None:
+            cell.style = style
+            self._style_arrays[style] = cell._style
+        else:
+            # 同名样式共享同一个样式数组，避免逐格查找命名样式
+            cell._style = template
+        return cell
+    
+    def _create_sheet(self, base_title: str, sheets: list, headers: list, widths: list):
+        from openpyxl.utils import get_column_letter
+        
+        number = len(sheets) + 1
+        title = base_title if number == 1 else f"{base_title}{number}"
+        ws = self.wb.create_sheet(title)
+        sheets.append(title)
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+        ws.freeze_panes = "A2"
+        ws.append([self._styled(h, "评论表头", ws) for h in headers])
+        return ws
+    
+    def _new_sheet(self):
+        self.ws = self._create_sheet(self.sheet_title, self.sheets, HEADERS, COL_WIDTHS)
+        self.sheet_rows = 0
+    
+    def append(self, comment: dict):
+        """写入一条评论"""
+        if self.ws is None or self.sheet_rows >= self.rows_per_sheet:
+            self._new_sheet()
+        
+        likes = comment.get("likes", 0)
+        self.total += 1
+        self.total_likes += likes
+        self.author_replies += 1 if comment.get("is_author_reply") else 0
+        self.with_sub_comments += 1 if comment.get("sub_comments") else 0
+        self.high_likes += 1 if likes >= 100 else 0
+        
+        # 根据点赞数高亮
+        if likes >= 100:
+            style = "评论单元格-高赞"
+        elif likes >= 50:
+            style = "评论单元格-中赞"
+        else:
+            style = "评论单元格"
+        
+        row = comment_row(comment, self.total)
+        self.ws.append([self._styled(v, style) for v in row])
+        self.sheet_rows += 1
+        
+        if self.replies:
+            self._append_replies(row[0], comment)
+    
+    def _append_replies(self, parent_index: int, comment: dict):
+        from reply_threads import iter_replies
+        
+        for depth, reply in iter_replies(comment):
+            if self.reply_ws is None or self.reply_rows >= self.rows_per_sheet:
+                self.reply_ws = self._create_sheet("回复", self.reply_sheets, REPLY_HEADERS, REPLY_COL_WIDTHS)
+                self.reply_rows = 0
+            style = "评论单元格-高赞" if reply.get("likes", 0) >= 100 else "评论单元格"
+            self.reply_ws.append([self._styled(v, style, self.reply_ws) for v in reply_row(parent_index, depth, reply)])
+            self.reply_rows += 1
+            self.reply_total += 1
+    
+    def write_summary(self, data: dict):
+        """添加汇总信息工作表（需在全部评论写入之后调用）"""
+        from openpyxl.cell import WriteOnlyCell
+        
+        ws = self.wb.create_sheet("汇总信息")
+        ws.column_dimensions["A"].width = 15
+        ws.column_dimensions["B"].width = 80
+        
+        summary_data = [
+            ["帖子链接", data.get("url", "")],
+            ["帖子标题", data.get("title", "")],
+            ["抓取时间", data.get("crawl_time", "")],
+            ["评论总数", self.total],
+            ["总点赞数", self.total_likes],
+            ["作者回复数", self.author_replies],
+            ["有子评论数", self.with_sub_comments],
+        ]
+        if len(self.sheets) > 1:
+            summary_data.append(["评论工作表", "、".join(self.sheets)])
+        if self.replies:
+            summary_data.append(["回复总数", self.reply_total])
+        
+        for label, value in summary_data:
+            label_cell = WriteOnlyCell(ws, value=label)
+            label_cell.style = "汇总标签"
+            ws.append([label_cell, value])
+
+
+def save_to_excel_fast(json_path: str, output_path: str, rows_per_sheet: int = MAX_SHEET_ROWS - 1,
+                       replies: bool = False):
+    """
+    以 write-only 模式流式写出评论 Excel
+    
+    Args:
+        json_path: 输入 JSON / JSONL 文件路径，或评论库查询（comment_store.StoreQuery）、评论流（pipeline.CommentStream）
+        output_path: 输出 Excel 文件路径
+        rows_per_sheet: 每个工作表的数据行数上限
+        replies: 另建 回复 工作表，见 save_to_excel
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        print("错误: 请先安装 openpyxl: pip install openpyxl")
+        return None
+    
+    wb = Workbook(write_only=True)
+    writer = CommentSheetWriter(wb, rows_per_sheet, replies=replies)
+    
+    with profiling.stage("write_rows"):
+        for comment in profiling.timed("read", iter_comments(json_path), "comments"):
+            writer.append(comment)
+    
+    if not writer.total:
+        print("警告: 没有找到评论数据")
+        return None
+    
+    # 帖子信息在评论之后读取：流水线的评论流（pipeline.CommentStream）在抓取结束时才有完整标题
+    writer.write_summary(read_header(json_path))
+    
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with profiling.stage("excel_save"):
+        wb.save(output_file)
     
     print(f"✅ Excel 文件已保存: {output_file}")
-    print(f"   - 共 {len(comments)} 条评论")
-    print(f"   - 高赞评论(≥100): {sum(1 for c in comments if c.get('likes', 0) >= 100)} 条")
+    print(f"   - 共 {writer.total} 条评论" + (f"（分 {len(writer.sheets)} 个工作表）" if len(writer.sheets) > 1 else "")
+          + (f"，{writer.reply_total} 条回复" if replies else ""))
+    print(f"   - 高赞评论(≥100): {writer.high_likes} 条")
     
     return output_file
 
 
 def main():
     parser = argparse.ArgumentParser(description="将评论数据保存到 Excel")
-    parser.add_argument("json_file", help="输入 JSON 文件路径")
+    parser.add_argument("json_file", nargs="?", help="输入 JSON / JSONL 文件路径（或用 --store 从评论库读取）")
     parser.add_argument("--output", "-o", default="评论数据.xlsx", help="输出 Excel 文件路径")
+    parser.add_argument("--fast", action="store_true",
+                        help="write-only 流式写出（适合大数据量，超出单表行数上限自动分表）")
+    parser.add_argument("--replies", action="store_true",
+                        help="另建 回复 工作表，列出抓取时展开的全部回复（extract_comments.py --replies）")
+    
+    add_query_arguments(parser)
+    profiling.add_profile_arguments(parser)
     
     args = parser.parse_args()
-    save_to_excel(args.json_file, args.output)
+    source = query_from_args(args) or args.json_file
+    if not source:
+        parser.error("请提供 JSON 文件或 --store 评论库")
+    with profiling.profiled(args, args.output, "save_to_excel"):
+        save_to_excel(source, args.output, args.fast, args.replies)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+批量情感打分
+SnowNLP 的情感模型（朴素贝叶斯）只加载一次，转为 NumPy 数组：词表索引 + 正 / 负类对数概率向量；
+一批评论分词后构成稀疏的 评论×词 计数矩阵，与对数概率差向量做一次稀疏矩阵-向量乘得到全部得分。
+
+情感模型是在 SnowNLP 自带分词的结果上训练的，换用 jieba 分词会使得分明显偏离，
+因此分词仍复现 SnowNLP 的字标注模型（b/m/e/s 二阶 HMM）：一批评论中的中文片段按位置同时做 Viterbi，
+相同片段只分一次。得分与 SnowNLP(content).sentiments 在浮点误差内一致；失败的评论逐条报告，不静默丢弃
+"""
+
+import math
+
+# 字标注：词首 / 词中 / 词尾 / 单字词，BOS 为句首占位
+STATUS = ("b", "m", "e", "s")
+BOS = 4
+BOS_KEY = ("", "BOS")
+
+# 模型键编码为定长字符串：(字, 标注) -> 字 + 标注，句首为 BOS_CODE（第二位不是标注字母，不会与真实键冲突）
+BOS_CODE = "^^"
+
+# 缓存上限：中文片段分词结果、字三元组的转移对数概率
+DEFAULT_RUN_CACHE = 200000
+DEFAULT_TRIGRAM_CACHE = 200000
+
+
+def encode_key(key: tuple) -> str:
+    """SnowNLP 分词模型的 (字, 标注) 键（或由其组成的 n 元组）转为字符串，每个 (字, 标注) 占 2 个字符"""
+    if isinstance(key[0], tuple):
+        text = "".join(map("".join, key))
+    else:
+        text = key[0] + key[1]
+    # 标注是小写字母，"BOS" 只会来自句首键
+    return text.replace(BOS_KEY[1], BOS_CODE)
+
+
+def load_models() -> tuple:
+    """
+    读入批量打分所需的 SnowNLP 模型（经 model_cache 缓存，缓存命中时不导入 snownlp）
+
+    分词模型的二元 / 三元计数表（约 130 万项）存为排序后的键数组和计数数组，以只读内存映射打开，
+    加载几乎不耗时，多个工作进程共享同一份页缓存。
+
+    Returns:
+        (模型字典, {"bi_keys", "bi_counts", "tri_keys", "tri_counts"})
+    """
+    from importlib.util import find_spec
+    from model_cache import cached_arrays
+
+    def build():
+        import numpy as np
+        from snownlp import normal, sentiment
+        from snownlp import seg as snow_seg
+
+        model = snow_seg.segger.segger
+        bayes = sentiment.classifier.classifier
+        pos, neg = bayes.d["pos"], bayes.d["neg"]
+        arrays = {}
+        for name, table in (("bi", model.bi.d), ("tri", model.tri.d)):
+            keys = np.array([encode_key(key) for key in table])
+            counts = np.fromiter(table.values(), dtype=float, count=len(table))
+            order = np.argsort(keys)
+            arrays[f"{name}_keys"], arrays[f"{name}_counts"] = keys[order], counts[order]
+        meta = {
+            "seg": {"uni": {encode_key(k): v for k, v in model.uni.d.items()},
+                    "uni_total": model.uni.getsum(), "l1": model.l1, "l2": model.l2, "l3": model.l3,
+                    "re_zh": snow_seg.re_zh},
+            "sentiment": {"pos": pos.d, "neg": neg.d, "pos_none": pos.none, "neg_none": neg.none,
+                          "pos_total": pos.getsum(), "neg_total": neg.getsum()},
+            "stopwords": frozenset(normal.stop)
+        }
+        return meta, arrays
+
+    spec = find_spec("snownlp")
+    if spec is None:
+        raise ImportError("No module named 'snownlp'")
+    return cached_arrays("snownlp", spec.origin, build)
+
+
+def lookup_counts(keys, counts, queries: list):
+    """在排序键数组中批量查找计数，未找到为 0"""
+    import numpy as np
+
+    query = np.array(queries, dtype=keys.dtype)
+    index = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+    return np.where(keys[index] == query, counts[index], 0.0)
+
+
+class BatchSegmenter:
+    """
+    与 snownlp.seg.seg 结果一致的批量分词
+
+    一批中文片段按长度排序后逐位置推进：第 i 步同时处理所有长度 > i 的片段，
+    状态为 (前一字标注, 当前字标注)，同分时按 SnowNLP 的插入顺序取第一个，保证路径一致。
+    """
+
+    def __init__(self, run_cache: int = DEFAULT_RUN_CACHE, trigram_cache: int = DEFAULT_TRIGRAM_CACHE):
+        """
+        Args:
+            run_cache: 缓存的中文片段数
+            trigram_cache: 缓存的字三元组数
+        """
+        models, arrays = load_models()
+        model = models["seg"]
+        self.re_zh = model["re_zh"]
+        self.uni = model["uni"]
+        self.bi_keys, self.bi_counts = arrays["bi_keys"], arrays["bi_counts"]
+        self.tri_keys, self.tri_counts = arrays["tri_keys"], arrays["tri_counts"]
+        self.uni_total = model["uni_total"]
+        self.l1, self.l2, self.l3 = model["l1"], model["l2"], model["l3"]
+        self.run_cache_size = run_cache
+        self.trigram_cache_size = trigram_cache
+        self.runs = {}
+        self.trigrams = {}
+        self.known_chars = {}
+
+    def _tag_keys(self, char: str) -> list:
+        """某个位置可取的 (字, 标注) 键（已编码），下标与状态下标一致；句首只有 BOS"""
+        if not char:
+            return [None, None, None, None, BOS_CODE]
+        return [char + s for s in STATUS] + [None]
+
+    def _is_known(self, char: str) -> bool:
+        """字是否在模型中出现过（未出现的字不计转移概率，见 CharacterBasedGenerativeModel.tag）"""
+        known = self.known_chars.get(char)
+        if known is None:
+            known = any(self.uni.get(char + s, 0) for s in STATUS)
+            self.known_chars[char] = known
+        return known
+
+    def _trigram_log_probs(self, trigrams: list):
+        """
+        计算字三元组 (c1, c2, c3) 的转移对数概率，形状 (N, 5, 5, 4)：[t1, t2, t3]
+
+        逐项与 CharacterBasedGenerativeModel.log_prob 相同的浮点运算顺序
+        """
+        import numpy as np
+
+        uni_get = self.uni.get
+        uni3, bi23, uni2, bi12, tri123 = [], [], [], [], []
+        for c1, c2, c3 in trigrams:
+            k1, k2, k3 = self._tag_keys(c1), self._tag_keys(c2), self._tag_keys(c3)[:4]
+            uni3.append([uni_get(k, 0) for k in k3])
+            uni2.append([uni_get(k, 0) if k else 0 for k in k2])
+            # 不存在的组合以空串查询，计数为 0
+            bi23.extend([a + b if a else "" for a in k2 for b in k3])
+            bi12.extend([a + b if a and b else "" for a in k1 for b in k2])
+            tri123.extend([a + b + c if a and b else "" for a in k1 for b in k2 for c in k3])
+
+        n = len(trigrams)
+        uni3 = np.array(uni3, dtype=float).reshape(n, 1, 1, 4)
+        uni2 = np.array(uni2, dtype=float).reshape(n, 1, 5, 1)
+        bi23 = lookup_counts(self.bi_keys, self.bi_counts, bi23).reshape(n, 1, 5, 4)
+        bi12 = lookup_counts(self.bi_keys, self.bi_counts, bi12).reshape(n, 5, 5, 1)
+        tri123 = lookup_counts(self.tri_keys, self.tri_counts, tri123).reshape(n, 5, 5, 4)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            uni = self.l1 * (uni3 / self.uni_total)
+            bi = np.where(uni2 == 0, 0.0, (self.l2 * bi23) / uni2)
+            tri = np.where(bi12 == 0, 0.0, (self.l3 * tri123) / bi12)
+            total = uni + bi + tri
+            return np.where(total == 0, -np.inf, np.log(total))
+
+    def _lookup_trigrams(self, runs: list) -> dict:
+        """一批片段用到的全部字三元组的转移对数概率（命中缓存的不再计算）"""
+        needed = []
+        seen = set()
+        for run in runs:
+            chars = ["", ""] + list(run)
+            for i in range(len(run)):
+                key = (chars[i], chars[i + 1], chars[i + 2])
+                if key not in self.trigrams and key not in seen:
+                    seen.add(key)
+                    needed.append(key)
+
+        if needed:
+            if len(self.trigrams) + len(needed) > self.trigram_cache_size:
+                self.trigrams.clear()
+            for key, lp in zip(needed, self._trigram_log_probs(needed)):
+                self.trigrams[key] = lp
+        return self.trigrams
+
+    def _tag_runs(self, runs: list) -> list:
+        """批量 Viterbi 标注，返回与 runs 对应的标注下标序列"""
+        import numpy as np
+
+        order = sorted(range(len(runs)), key=lambda i: -len(runs[i]))
+        runs_sorted = [runs[i] for i in order]
+        lengths = [len(r) for r in runs_sorted]
+        n = len(runs_sorted)
+        trigrams = self._lookup_trigrams(runs_sorted)
+
+        # 状态 [t1, t2]（前一字、当前字），rank 为该状态在 SnowNLP 中的插入顺序（inf 表示不存在）
+        score = np.full((n, 5, 5), -np.inf)
+        rank = np.full((n, 5, 5), np.inf)
+        score[:, BOS, BOS] = 0.0
+        rank[:, BOS, BOS] = 0.0
+        t3_major = np.arange(4).reshape(1, 1, 4) * 8.0
+        backpointers = []
+
+        for i in range(lengths[0]):
+            k = sum(1 for length in lengths if length > i)
+            prev_score, prev_rank = score[:k], rank[:k]
+            present = np.isfinite(prev_rank)
+            chars = [("" if i < 2 else run[i - 2], "" if i < 1 else run[i - 1], run[i]) for run in runs_sorted[:k]]
+            known = np.array([self._is_known(c[2]) for c in chars])
+
+            # 已知字：按转移概率取最优前驱，同分取插入顺序最早的
+            lp = np.stack([trigrams[c] for c in chars])
+            p = prev_score[:, :, :, None] + lp
+            best = p.max(axis=1)
+            candidates = (p == best[:, None]) & present[:, :, :, None]
+            choice = np.where(candidates, prev_rank[:, :, :, None], np.inf).argmin(axis=1)
+
+            # 未登录字：不计概率，保留插入顺序最后的前驱
+            if not known.all():
+                last = np.where(present, prev_rank, -np.inf).argmax(axis=1)
+                unknown_choice = np.repeat(last[:, :, None], 4, axis=2)
+                unknown_best = np.take_along_axis(prev_score, last[:, None, :], axis=1)[:, 0, :, None]
+                unknown_best = np.repeat(unknown_best, 4, axis=2)
+                choice = np.where(known[:, None, None], choice, unknown_choice)
+                best = np.where(known[:, None, None], best, unknown_best)
+
+            has_pre = present.any(axis=1)
+            new_score = np.full((k, 5, 5), -np.inf)
+            new_score[:, :, :4] = np.where(has_pre[:, :, None], best, -np.inf)
+
+            # 新状态插入顺序：先按当前字标注，再按前一字标注在上一步中首次出现的顺序
+            first = np.where(present, prev_rank, np.inf).min(axis=1)
+            first_order = np.argsort(np.argsort(first, axis=1, kind="stable"), axis=1, kind="stable")
+            new_rank = np.full((k, 5, 5), np.inf)
+            new_rank[:, :, :4] = np.where(has_pre[:, :, None], t3_major + first_order[:, :, None], np.inf)
+
+            score = np.concatenate([new_score, score[k:]]) if k < n else new_score
+            rank = np.concatenate([new_rank, rank[k:]]) if k < n else new_rank
+            backpointers.append(choice)
+
+        # 终止状态：得分最高，同分取插入顺序最早的
+        flat_score = score.reshape(n, 25)
+        flat_rank = rank.reshape(n, 25)
+        best = flat_score.max(axis=1, keepdims=True)
+        final = np.where((flat_score == best) & np.isfinite(flat_rank), flat_rank, np.inf).argmin(axis=1)
+
+        backpointers = [bp.tolist() for bp in backpointers]
+        final = final.tolist()
+        tags_sorted = []
+        for j, length in enumerate(lengths):
+            t2, t3 = divmod(final[j], 5)
+            tags = [0] * length
+            for i in range(length - 1, -1, -1):
+                tags[i] = t3
+                t1 = backpointers[i][j][t2][t3]
+                t2, t3 = t1, t2
+            tags_sorted.append(tags)
+
+        result = [None] * len(runs)
+        for j, i in enumerate(order):
+            result[i] = tags_sorted[j]
+        return result
+
+    @staticmethod
+    def _words(run: str, tags: list) -> list:
+        """标注序列转为词（与 snownlp.seg.seg.Seg.seg 相同）"""
+        words = []
+        tmp = ""
+        for char, tag in zip(run, tags):
+            if tag == 2:
+                words.append(tmp + char)
+                tmp = ""
+            elif tag == 0 or tag == 3:
+                if tmp:
+                    words.append(tmp)
+                tmp = char
+            else:
+                tmp += char
+        if tmp:
+            words.append(tmp)
+        return words
+
+    def seg_batch(self, docs: list) -> list:
+        """批量分词，结果与 [snownlp.seg.seg(doc) for doc in docs] 一致"""
+        pieces = []
+        new_runs = {}
+        for doc in docs:
+            parts = []
+            for s in self.re_zh.split(doc):
+                s = s.strip()
+                if not s:
+                    continue
+                if self.re_zh.match(s):
+                    parts.append((True, s))
+                    if s not in self.runs:
+                        new_runs[s] = None
+                else:
+                    parts.extend((False, word) for word in s.split())
+            pieces.append(parts)
+
+        if new_runs:
+            runs = list(new_runs)
+            if len(self.runs) + len(runs) > self.run_cache_size:
+                self.runs.clear()
+            for run, tags in zip(runs, self._tag_runs(runs)):
+                self.runs[run] = self._words(run, tags)
+
+        result = []
+        for parts in pieces:
+            words = []
+            for is_zh, piece in parts:
+                if is_zh:
+                    words.extend(self.runs[piece])
+                else:
+                    words.append(piece)
+            result.append(words)
+        return result
+
+
+class BatchSentimentScorer:
+    """
+    批量情感打分器
+
+    模型权重：weights[j] = log P(词j|正面) - log P(词j|负面)，未登录词与先验单独计；
+    得分 = sigmoid(先验 + Σ 词频 × 权重)，等价于 SnowNLP 的两类朴素贝叶斯后验。
+    """
+
+    def __init__(self, segmenter: BatchSegmenter = None):
+        import numpy as np
+
+        models, _ = load_models()
+        bayes = models["sentiment"]
+        pos, neg = bayes["pos"], bayes["neg"]
+        pos_none, neg_none = bayes["pos_none"], bayes["neg_none"]
+        pos_total, neg_total = bayes["pos_total"], bayes["neg_total"]
+        vocab = list(dict.fromkeys(list(pos) + list(neg)))
+        self.index = {word: i for i, word in enumerate(vocab)}
+        self.log_pos = np.log(np.array([pos.get(w, pos_none) for w in vocab], dtype=float) / pos_total)
+        self.log_neg = np.log(np.array([neg.get(w, neg_none) for w in vocab], dtype=float) / neg_total)
+        self.weights = self.log_pos - self.log_neg
+        self.prior = math.log(pos_total) - math.log(neg_total)
+        self.oov_weight = math.log(pos_none / pos_total) - math.log(neg_none / neg_total)
+        self.stopwords = models["stopwords"]
+        self.segmenter = segmenter or BatchSegmenter()
+
+    def tokenize(self, docs: list) -> list:
+        """分词并去除 SnowNLP 的停用词（与 SnowNLP 情感模块的预处理一致）"""
+        stop = self.stopwords
+        return [[w for w in words if w not in stop] for words in self.segmenter.seg_batch(docs)]
+
+    def score_tokens(self, batch: list):
+        """
+        对已分词的一批评论打分（稀疏矩阵-向量乘）
+
+        Returns:
+            (得分数组, 失败列表 [(下标, 原因), ...])，失败项得分为 NaN
+        """
+        import numpy as np
+
+        rows, cols = [], []
+        oov = np.zeros(len(batch))
+        index = self.index
+        for i, words in enumerate(batch):
+            for word in words:
+                j = index.get(word)
+                if j is None:
+                    oov[i] += 1
+                else:
+                    rows.append(i)
+                    cols.append(j)
+
+        margin = self.prior + oov * self.oov_weight + np.bincount(
+            np.array(rows, dtype=np.intp), weights=self.weights[np.array(cols, dtype=np.intp)], minlength=len(batch)
+        )
+        with np.errstate(over="ignore"):
+            scores = 1.0 / (1.0 + np.exp(-margin))
+
+        failures = [(i, "得分非有限值") for i in np.flatnonzero(~np.isfinite(scores)).tolist()]
+        return scores, failures
+
+    def score(self, docs: list):
+        """
+        对一批评论文本打分
+
+        Returns:
+            (得分列表, 失败列表 [(下标, 原因), ...])，失败项得分为 None
+        """
+        failures = []
+        valid = []
+        for i, doc in enumerate(docs):
+            if isinstance(doc, str):
+                valid.append(i)
+            else:
+                failures.append((i, f"内容类型错误: {type(doc).__name__}"))
+
+        scores = [None] * len(docs)
+        try:
+            tokens = self.tokenize([docs[i] for i in valid])
+        except Exception as e:
+            # 整批分词失败时逐条重试，定位具体失败的评论
+            tokens = []
+            ok = []
+            for i in valid:
+                try:
+                    tokens.extend(self.tokenize([docs[i]]))
+                    ok.append(i)
+                except Exception as item_error:
+                    failures.append((i, f"分词失败: {item_error or e}"))
+            valid = ok
+
+        values, bad = self.score_tokens(tokens)
+        bad = {valid[j]: reason for j, reason in bad}
+        for j, i in enumerate(valid):
+            if i in bad:
+                failures.append((i, bad[i]))
+            else:
+                scores[i] = float(values[j])
+        failures.sort()
+        return scores, failures
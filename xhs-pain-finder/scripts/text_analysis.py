@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+评论文本分词与词频统计
+每条评论只分词一次（相同内容命中缓存），高频词、TF-IDF 关键词和痛点词都由同一份分词结果得出；
+评论按块统计为可合并的部分结果，可在进程池中并行计算，按块顺序合并后与串行结果完全一致
+"""
+
+import heapq
+import re
+from collections import Counter, deque
+from operator import itemgetter
+
+import profiling
+from heavy_hitters import SpaceSaving
+from model_cache import load_jieba, tfidf_model
+
+# 分析器版本：分词或打分逻辑变化时递增，使持久化缓存失效（见 analysis_cache）
+ANALYZER_VERSION = "2"
+
+# 停用词
+STOPWORDS = frozenset([
+    "的", "了", "是", "我", "你", "他", "她", "它", "们", "这", "那",
+    "有", "在", "不", "也", "就", "都", "要", "会", "很", "到", "说",
+    "还", "能", "对", "和", "与", "吗", "吧", "啊", "呢", "哦", "嗯",
+    "什么", "怎么", "为什么", "哪", "哪里", "这个", "那个", "一个",
+    "可以", "没有", "因为", "所以", "但是", "如果", "虽然", "而且",
+    "或者", "以及", "比如", "就是", "不是", "可能", "应该", "觉得",
+    "知道", "看到", "感觉", "真的", "确实", "其实", "然后", "已经"
+])
+
+# 纯标点 / 符号
+PUNCT_RE = re.compile(r'^[\W_]+$')
+
+# 分词缓存默认容量（条）
+DEFAULT_CACHE_SIZE = 100000
+
+# 情感阈值：得分 > POSITIVE_THRESHOLD 为正面，< NEGATIVE_THRESHOLD 为负面
+POSITIVE_THRESHOLD = 0.6
+NEGATIVE_THRESHOLD = 0.4
+
+# 情感明细保留的高赞评论数
+TOP_SENTIMENTS = 100
+
+# 情感得分直方图的分箱数（0-1 等宽）
+SENTIMENT_BINS = 10
+
+# 每个统计块的评论数
+DEFAULT_CHUNK_SIZE = 500
+
+# 情感分析失败的评论最多保留的示例数
+MAX_FAILURE_SAMPLES = 20
+
+# 痛点聚类保留的负面评论内容长度
+NEGATIVE_CONTENT_CHARS = 200
+
+
+class TokenCache:
+    """
+    分词缓存：按评论内容缓存 jieba 分词结果
+
+    重复评论（刷屏、复制粘贴）直接复用已有分词；超过容量时淘汰最早加入的条目。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            max_entries: 最多缓存的不同内容数，<= 0 表示不缓存
+        """
+        import jieba
+
+        self._cut = jieba.lcut
+        self.max_entries = max_entries
+        self.tokens = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content: str) -> list:
+        """返回评论内容的分词结果（原始词，未去空白）"""
+        tokens = self.tokens.get(content)
+        if tokens is not None:
+            self.hits += 1
+            return tokens
+
+        self.misses += 1
+        tokens = self._cut(content)
+        if self.max_entries > 0:
+            if len(self.tokens) >= self.max_entries:
+                del self.tokens[next(iter(self.tokens))]
+            self.tokens[content] = tokens
+        return tokens
+
+
+def filter_words(tokens: list) -> list:
+    """高频词过滤：去停用词、纯数字和纯标点，长度 >= 2"""
+    words = []
+    for word in tokens:
+        word = word.strip()
+        if len(word) >= 2 and word not in STOPWORDS and not word.isdigit() and not PUNCT_RE.match(word):
+            words.append(word)
+    return words
+
+
+def count_words(tokens: list, word_counts: Counter):
+    """高频词统计"""
+    word_counts.update(filter_words(tokens))
+
+
+def count_tfidf(tokens: list, tfidf_freq: Counter, weight: int = 1):
+    """TF-IDF 词频，过滤规则与 jieba.analyse.extract_tags 一致"""
+    stop_words = tfidf_model()["stop_words"]
+    for word in tokens:
+        stripped = word.strip()
+        if len(stripped) >= 2 and stripped.lower() not in stop_words:
+            tfidf_freq[word] += weight
+
+
+def weighted(words: list, weight: int):
+    """按权重计数的词（权重为 1 时原样返回，供 Counter.update）"""
+    if weight == 1:
+        return words
+    return {word: count * weight for word, count in Counter(words).items()}
+
+
+def pain_terms(tokens: list) -> list:
+    """痛点词（负面评论）：去停用词，长度 >= 2"""
+    terms = []
+    for word in tokens:
+        word = word.strip()
+        if len(word) >= 2 and word not in STOPWORDS:
+            terms.append(word)
+    return terms
+
+
+def tfidf_from_counts(freq: Counter, top_k: int = 20, total: int = None) -> list:
+    """
+    由词频计算 TF-IDF 关键词，结果与 jieba.analyse.extract_tags(..., withWeight=True) 一致
+
+    Args:
+        freq: 按 extract_tags 规则过滤后的词频（Counter 或近似计数的 SpaceSaving）
+        top_k: 返回的关键词数
+        total: 词频总数，默认为 freq 的计数之和
+    """
+    tfidf = tfidf_model()
+    if total is None:
+        total = sum(freq.values())
+    if not total:
+        return []
+    idf_freq, median_idf = tfidf["idf_freq"], tfidf["median_idf"]
+    weights = {w: c * (idf_freq.get(w, median_idf) / total) for w, c in freq.items()}
+    return sorted(weights.items(), key=itemgetter(1), reverse=True)[:top_k]
+
+
+def classify_sentiment(score: float) -> str:
+    """情感得分（0-1，越大越正面）转为情感类型"""
+    if score > POSITIVE_THRESHOLD:
+        return "正面"
+    if score < NEGATIVE_THRESHOLD:
+        return "负面"
+    return "中性"
+
+
+class ChunkStats:
+    """
+    一块评论的统计结果（可合并）
+
+    按评论顺序合并时，计数器中词的先后顺序（决定同频词排名）与串行统计一致；
+    高赞情感明细以 (点赞数, -全局序号) 排序，合并结果与合并方式无关。
+    指定 sketch_capacity 时词频改用有界内存的 SpaceSaving 近似计数（用于累计结果，单块统计始终精确）。
+    """
+
+    def __init__(self, sketch_capacity: int = None):
+        """
+        Args:
+            sketch_capacity: 近似计数时每个词频计数器最多跟踪的词数，None 为精确计数
+        """
+        self.total = 0
+        self.sketch_capacity = sketch_capacity
+        counter = (lambda: SpaceSaving(sketch_capacity)) if sketch_capacity else Counter
+        self.word_counts = counter()
+        self.doc_freq = counter()  # 包含该词的评论数
+        self.tfidf_freq = counter()
+        self.sentiment_counts = Counter()
+        self.sentiment_hist = [0] * SENTIMENT_BINS
+        self.pain_words = counter()
+        self.top_sentiments = []  # 小顶堆 (点赞数, -序号, 明细)
+        self.new_entries = []  # 需写入持久化缓存的新结果 (内容, 分词, 情感得分)
+        self.failure_count = 0
+        self.failures = []  # 情感分析失败示例 (序号, 内容, 原因)
+        self.negatives = []  # 痛点聚类用的负面评论 (序号, 点赞数, 内容, 痛点词)，只在需要时收集
+
+    def add_top(self, item: tuple):
+        """按点赞数保留 TOP_SENTIMENTS 条情感明细（同赞按原顺序）"""
+        if len(self.top_sentiments) < TOP_SENTIMENTS:
+            heapq.heappush(self.top_sentiments, item)
+        else:
+            heapq.heappushpop(self.top_sentiments, item)
+
+    @staticmethod
+    def _count_total(counter) -> int:
+        """计数总和（近似计数器记录精确的总计数，其估计值之和会偏大）"""
+        return counter.total if isinstance(counter, SpaceSaving) else sum(counter.values())
+
+    @property
+    def word_total(self) -> int:
+        return self._count_total(self.word_counts)
+
+    @property
+    def tfidf_total(self) -> int:
+        return self._count_total(self.tfidf_freq)
+
+    def add_failure(self, seq: int, content, reason: str):
+        """记录一条情感分析失败的评论"""
+        self.failure_count += 1
+        if len(self.failures) < MAX_FAILURE_SAMPLES:
+            self.failures.append((seq, str(content)[:50], reason))
+
+    def merge(self, other: "ChunkStats"):
+        """并入后一块的统计结果"""
+        self.total += other.total
+        self.failure_count += other.failure_count
+        self.failures.extend(other.failures[:MAX_FAILURE_SAMPLES - len(self.failures)])
+        self.word_counts.update(other.word_counts)
+        self.doc_freq.update(other.doc_freq)
+        self.tfidf_freq.update(other.tfidf_freq)
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.sentiment_hist = [a + b for a, b in zip(self.sentiment_hist, other.sentiment_hist)]
+        self.pain_words.update(other.pain_words)
+        self.negatives.extend(other.negatives)
+        for item in other.top_sentiments:
+            self.add_top(item)
+
+    def sentiments(self) -> list:
+        """情感明细，按点赞数降序（同赞按原顺序）"""
+        return [row for _, _, row in sorted(self.top_sentiments, key=lambda x: x[:2], reverse=True)]
+
+
+# 进程内共享的分词缓存与情感打分器（每个工作进程只加载一次）
+_token_cache = None
+_scorer = None
+
+
+def init_models(sentiment: bool = True, quiet: bool = False):
+    """
+    加载 jieba 词典与情感模型（从启动缓存读入，见 model_cache；也作为进程池的 initializer）
+
+    Args:
+        sentiment: 是否加载情感模型
+        quiet: 不输出 jieba 加载日志（工作进程）
+    """
+    global _token_cache, _scorer
+    with profiling.stage("load_models"):
+        import jieba
+
+        if quiet:
+            jieba.setLogLevel(jieba.logging.WARNING)
+        load_jieba()
+        if _token_cache is None:
+            _token_cache = TokenCache()
+        if sentiment and _scorer is None:
+            from sentiment_batch import BatchSentimentScorer
+            _scorer = BatchSentimentScorer()
+
+
+def analyze_chunk(items: list, sentiment: bool = True, record: bool = False,
+                  negatives: bool = False) -> ChunkStats:
+    """
+    统计一块评论
+
+    Args:
+        items: [(全局序号, 评论内容, 点赞数, 缓存结果, 权重), ...]，缓存结果为 (分词, 情感得分) 或 None；
+            权重为该条评论计入统计的次数（合并重复评论后见 dedup，通常为 1）
+        sentiment: 是否做情感分析
+        record: 是否把未命中缓存的新结果记入 new_entries（只记打分成功的评论）
+        negatives: 是否收集负面评论及其痛点词（供 pain_clusters 聚类）
+    """
+    if _token_cache is None or (sentiment and _scorer is None):
+        init_models(sentiment)
+
+    stats = ChunkStats()
+
+    # 命中缓存的直接使用，其余评论分词后整块批量打分
+    results = []
+    pending = []
+    with profiling.stage("tokenize"):
+        for seq, content, likes, cached, _ in items:
+            if cached is not None:
+                results.append(cached)
+                continue
+            if sentiment and content:
+                pending.append(len(results))
+            results.append((_token_cache.get(content) if isinstance(content, str) else [], None))
+
+    if pending:
+        with profiling.stage("sentiment"):
+            scores, failures = _scorer.score([items[i][1] for i in pending])
+        for i, score in zip(pending, scores):
+            results[i] = (results[i][0], score)
+            if record and score is not None:
+                stats.new_entries.append((items[i][1], results[i][0], score))
+        for j, reason in failures:
+            stats.add_failure(items[pending[j]][0], items[pending[j]][1], reason)
+
+    counting = profiling.begin("count")
+    for (seq, content, likes, _, weight), (tokens, score) in zip(items, results):
+        stats.total += weight
+        words = filter_words(tokens)
+        stats.word_counts.update(weighted(words, weight))
+        # 每条评论中出现的词各计一次
+        stats.doc_freq.update(dict.fromkeys(words, weight) if weight != 1 else dict.fromkeys(words).keys())
+        count_tfidf(tokens, stats.tfidf_freq, weight)
+
+        if not sentiment or not content or score is None:
+            continue
+        label = classify_sentiment(score)
+        stats.sentiment_counts[label] += weight
+        stats.sentiment_hist[min(int(score * SENTIMENT_BINS), SENTIMENT_BINS - 1)] += weight
+        row = {
+            "content": content[:100],
+            "score": round(score, 3),
+            "sentiment": label,
+            "likes": likes
+        }
+        stats.add_top((likes, -seq, row))
+
+        # 提取痛点关键词（负面评论全文中的高频词）
+        if label == "负面":
+            terms = pain_terms(tokens)
+            stats.pain_words.update(weighted(terms, weight))
+            if negatives:
+                stats.negatives.append((seq, likes, content[:NEGATIVE_CONTENT_CHARS], terms))
+    counting.end()
+    return stats
+
+
+def analyze_contents(contents: list, sentiment: bool = True) -> list:
+    """
+    逐条分词并批量打分（供需要逐条结果的场景，如评论库的 analysis 表）
+
+    Returns:
+        [(分词列表, 情感得分), ...]，空内容、未做情感分析或打分失败时得分为 None
+    """
+    if _token_cache is None or (sentiment and _scorer is None):
+        init_models(sentiment)
+
+    results = [(_token_cache.get(c) if isinstance(c, str) else [], None) for c in contents]
+    pending = [i for i, c in enumerate(contents) if c] if sentiment else []
+    if pending:
+        scores, _ = _scorer.score([contents[i] for i in pending])
+        for i, score in zip(pending, scores):
+            results[i] = (results[i][0], score)
+    return results
+
+
+def chunk_item(seq: int, comment: dict) -> tuple:
+    """一条评论在统计块中的表示 (序号, 内容, 点赞数, None, 权重)"""
+    return seq, comment.get("content", ""), comment.get("likes", 0), None, comment.get("weight", 1)
+
+
+def iter_chunks(comments, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """把评论流切分为 [(序号, 内容, 点赞数, None, 权重), ...] 块"""
+    chunk = []
+    for seq, comment in enumerate(comments):
+        chunk.append(chunk_item(seq, comment))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def with_cached(chunks, cache):
+    """为每块评论附上持久化缓存中的分词与情感结果"""
+    for chunk in chunks:
+        cached = cache.lookup([item[1] for item in chunk])
+        yield [(seq, content, likes, hit, weight) for (seq, content, likes, _, weight), hit in zip(chunk, cached)]
+
+
+def iter_chunk_stats(comments, sentiment: bool = True, workers: int = 1,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, cache=None, negatives: bool = False):
+    """
+    按原顺序逐块产出统计结果
+
+    Args:
+        comments: 评论迭代器
+        sentiment: 是否做情感分析
+        workers: 工作进程数，<= 1 时在当前进程中串行统计
+        chunk_size: 每块评论数
+        cache: 可选的 AnalysisCache，命中的评论不再分词和打分，新结果写回缓存
+        negatives: 是否收集负面评论（见 analyze_chunk）
+    """
+    return iter_stats(iter_chunks(comments, chunk_size), sentiment, workers, cache, negatives)
+
+
+def iter_stats(chunks, sentiment: bool = True, workers: int = 1, cache=None, negatives: bool = False):
+    """
+    按顺序产出已切分好的各块评论的统计结果
+
+    Args:
+        chunks: [(序号, 内容, 点赞数, None, 权重), ...] 块的迭代器（见 chunk_item），可以按前面块的结果
+            惰性生成（如抽样分析）；并行时最多预取 workers * 2 块
+        其余参数同 iter_chunk_stats
+    """
+    for stats in _iter_stats(chunks, sentiment, workers, cache, negatives):
+        if cache is not None and stats.new_entries:
+            cache.store(stats.new_entries)
+            stats.new_entries = []
+        yield stats
+
+
+def _iter_stats(chunks, sentiment, workers, cache, negatives):
+    record = cache is not None
+    if record:
+        chunks = with_cached(chunks, cache)
+    if workers <= 1:
+        hits, misses = (_token_cache.hits, _token_cache.misses) if _token_cache else (0, 0)
+        for chunk in chunks:
+            profiling.count("chunks")
+            yield analyze_chunk(chunk, sentiment, record, negatives)
+        profiling.count("token_cache_hits", _token_cache.hits - hits if _token_cache else 0)
+        profiling.count("token_cache_misses", _token_cache.misses - misses if _token_cache else 0)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 在途块数有上限，读取速度不会超过处理速度，内存占用与评论总数无关
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_models,
+                             initargs=(sentiment, True)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            profiling.count("chunks")
+            pending.append(pool.submit(analyze_chunk, chunk, sentiment, record, negatives))
+            if len(pending) >= max_pending:
+                with profiling.stage("wait_workers"):
+                    result = pending.popleft().result()
+                yield result
+        while pending:
+            with profiling.stage("wait_workers"):
+                result = pending.popleft().result()
+            yield result